@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import io
+import logging
+import os
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import chess  # type: ignore
+import chess.engine  # type: ignore
+import chess.pgn  # type: ignore
+from chess.engine import InfoDict, Limit, PovScore
+
+import picotutor_constants as c
+from pgn import PgnDisplay
+from picotutor import PicoTutor
+from uci.engine import UciEngine, UciShell
+
+BATCH_PGN_FILE = "games" + os.sep + "analysis.pgn"
+
+logger = logging.getLogger(__name__)
+
+
+def read_game(text: str) -> chess.pgn.Game:
+    """Return the game of a PGN text or of a move list like "e4 e5 Nf3" or "e2e4 e7e5 g1f3"."""
+    game = chess.pgn.read_game(io.StringIO(text))
+    if game is None or game.errors:
+        raise ValueError("no game found in {}".format(text[:40]))
+    return game
+
+
+def position_score(board: chess.Board, info: InfoDict) -> PovScore:
+    """Return the score of board from the engine info, game end positions don't need the engine."""
+    if board.is_checkmate():
+        return PovScore(chess.engine.Mate(0), board.turn)
+    if board.is_stalemate() or board.is_insufficient_material():
+        return PovScore(chess.engine.Cp(0), board.turn)
+    return info["score"]
+
+
+class BatchAnalysis(object):
+    """Analyse every position of a game with a pool of engine processes.
+
+    Each position is analysed once to the deep limit and once to LOW_DEPTH, by as many
+    engines as there are cpu cores. A move is scored like in PicoTutor: the best score is the
+    deep score of the position before the move, the move score the negated deep (and low)
+    score of the position after it. The plies are reported in game order as soon as their
+    positions are done.
+    """
+
+    def __init__(
+        self,
+        file: str,
+        uci_shell: UciShell,
+        loop: asyncio.AbstractEventLoop,
+        workers: int = 0,
+        depth: int = c.DEEP_DEPTH,
+        nodes: int = 0,
+        pgn_file: str = BATCH_PGN_FILE,
+    ):
+        self.file = file
+        self.uci_shell = uci_shell
+        self.loop = loop
+        self.workers = workers or os.cpu_count() or 1
+        self.limit = Limit(nodes=nodes) if nodes else Limit(depth=depth)
+        self.low_limit = Limit(depth=min(c.LOW_DEPTH, depth))
+        self.pgn_file = pgn_file
+        self.lock = asyncio.Lock()  # one game at a time, it already uses all cores
+
+    def is_running(self) -> bool:
+        return self.lock.locked()
+
+    async def open_engines(self, number: int) -> List[UciEngine]:
+        """Start number engines with one thread each."""
+        engines = [
+            UciEngine(
+                file=self.file, uci_shell=self.uci_shell, mame_par="", loop=self.loop, engine_debug_name=f"batch{i}"
+            )
+            for i in range(number)
+        ]
+        await asyncio.gather(*(engine.open_engine() for engine in engines))
+        for engine in engines:
+            if engine.loaded_ok():
+                engine.option("Threads", 1)
+                await engine.send()
+        return [engine for engine in engines if engine.loaded_ok()]
+
+    async def analyse(self, game: chess.pgn.Game, on_ply: Optional[Callable[[dict], Awaitable]] = None) -> List[dict]:
+        """Return the evaluation of every move of the game mainline, on_ply gets each one in game order."""
+        boards = [game.board()]
+        for node in game.mainline():
+            boards.append(node.board())
+        if len(boards) < 2:
+            return []
+        async with self.lock:
+            deep: Dict[int, PovScore] = {}
+            low: Dict[int, PovScore] = {}
+            best_moves: Dict[int, chess.Move] = {}
+            jobs: asyncio.Queue = asyncio.Queue()
+            for index, board in enumerate(boards):
+                if board.is_game_over():
+                    deep[index] = low[index] = position_score(board, {})
+                    continue
+                jobs.put_nowait((index, self.limit, deep))
+                if index > 0:  # the start position is only a "before" position
+                    jobs.put_nowait((index, self.low_limit, low))
+            evaluations: List[dict] = []
+
+            async def report():
+                # plies only in game order, ply i needs positions i and i+1
+                while len(evaluations) < len(boards) - 1:
+                    ply = len(evaluations)
+                    if ply not in deep or ply + 1 not in deep or ply + 1 not in low:
+                        return
+                    evaluations.append(self.evaluate(boards, ply, deep, low, best_moves, evaluations))
+                    if on_ply:
+                        await on_ply(evaluations[-1])
+
+            async def work(engine: UciEngine):
+                while not jobs.empty():
+                    index, limit, scores = jobs.get_nowait()
+                    info = await engine.analyse(boards[index], limit)
+                    scores[index] = position_score(boards[index], info)
+                    if scores is deep and info.get("pv"):
+                        best_moves[index] = info["pv"][0]
+                    await report()
+
+            engines = await self.open_engines(min(self.workers, jobs.qsize()) or 1)
+            if not engines:
+                raise chess.engine.EngineError("batch analysis engine {} not loaded".format(self.file))
+            try:
+                await asyncio.gather(*(work(engine) for engine in engines))
+                await report()  # only game end positions
+            finally:
+                await asyncio.gather(*(engine.quit() for engine in engines), return_exceptions=True)
+        return evaluations
+
+    @staticmethod
+    def evaluate(
+        boards: List[chess.Board],
+        ply: int,
+        deep: Dict[int, PovScore],
+        low: Dict[int, PovScore],
+        best_moves: Dict[int, chess.Move],
+        evaluations: List[dict],
+    ) -> dict:
+        """Return the evaluation of the move from boards[ply] to boards[ply + 1] like picotutor stores them."""
+        board = boards[ply]
+        move = boards[ply + 1].peek()
+        turn = board.turn
+        best_score = deep[ply].pov(turn).score(mate_score=99999)
+        best_mate = deep[ply].pov(turn).mate() or 0
+        current = -deep[ply + 1].pov(not turn)
+        current_score = current.score(mate_score=99999)
+        current_mate = current.mate() or 0
+        low_score = -low[ply + 1].pov(not turn).score(mate_score=99999)
+        deep_low_diff = current_score - low_score
+        best_move = best_moves.get(ply, move)
+        if move == best_move:
+            current_score = best_score  # same move, don't let one ply of search depth count as loss
+        best_deep_diff = best_score - current_score
+        value = {
+            "ply": ply + 1,
+            "move": move.uci(),
+            "user_move": board.san(move),
+            "best_move": board.san(best_move) if best_move in board.legal_moves else "",
+            "score": current_score,
+            "CPL": best_deep_diff,
+            "deep_low_diff": deep_low_diff,
+        }
+        if current_mate != 0:
+            value["mate"] = current_mate
+        before = evaluations[ply - 2] if ply > 1 else None
+        score_hist_diff = current_score - before["score"] if before else 0
+        if before:
+            value["score_hist_diff"] = score_hist_diff
+        legal_no = board.legal_moves.count()
+        eval_string = ""
+        if legal_no > 1:
+            eval_string = PicoTutor.classify_move(
+                best_deep_diff,
+                deep_low_diff,
+                score_hist_diff,
+                False,
+                before is not None,
+                legal_no,
+                best_score,
+                best_mate,
+                current_mate,
+            )
+        value["nag"] = PicoTutor.symbol_to_nag(eval_string)
+        value["symbol"] = eval_string
+        return value
+
+    @staticmethod
+    def annotate(game: chess.pgn.Game, evaluations: List[dict]) -> chess.pgn.Game:
+        """Add NAGs and comments of the evaluations to the game mainline, in the PgnDisplay format."""
+        for node, value in zip(game.mainline(), evaluations):
+            nag = value["nag"]
+            if nag != chess.pgn.NAG_NULL:
+                node.nags.add(nag)
+            elif value["CPL"] <= c.INACCURACY_TH:
+                continue
+            node.comment = PgnDisplay._get_picotutor_eval_comments(nag, value, node.turn())
+        game.headers["Annotator"] = "PicoTutor batch analysis"
+        return game
+
+    async def annotate_game(self, game: chess.pgn.Game, on_ply: Optional[Callable[[dict], Awaitable]] = None) -> str:
+        """Analyse the game, append it annotated to the pgn file and return its PGN text."""
+        evaluations = await self.analyse(game, on_ply)
+        pgn_text = str(self.annotate(game, evaluations))
+        if self.pgn_file:
+            await asyncio.to_thread(self._save, pgn_text)
+        return pgn_text
+
+    def _save(self, pgn_text: str):
+        with open(self.pgn_file, "a", encoding="utf-8") as file:
+            file.write(pgn_text + "\n\n")
+        logger.info("batch analysis saved to %s", self.pgn_file)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Measure idle cpu, board event latency and write latency of the ble transport.
+
+"polling" - rx.read(), waitForNotifications(0.05) and sleep(0.01) in a loop (old way)
+"notify"  - blocking notification wait and a token bucket for the writes
+The board is a ReplayPeripheral, a gatt read of the old loop takes --read-ms.
+Run from the picochess folder: python3 -m benchmarks.bench_ble_transport
+"""
+
+import argparse
+import queue
+import threading
+import time
+
+from eboard.ble_replay import ReplayPeripheral
+from eboard.ble_transport import Transport
+from utilities import EventStats
+
+READ = "read-characteristic"
+WRITE = "write-characteristic"
+
+
+class PollingTransport(Transport):
+    """The transport loop before the token bucket."""
+
+    read_time = 0.03
+
+    def _handle_device_data(self, device, address, rx, tx, que, wrque, bt_error):
+        message_delta_time = 0.1
+        time_last_out = time.time() + 0.2
+        while self.worker_thread_active:
+            if not wrque.empty() and time.time() - time_last_out > message_delta_time:
+                tx.write(wrque.get(), withResponse=True)
+                time_last_out = time.time()
+                wrque.task_done()
+            time.sleep(self.read_time)  # rx.read() waits for the answer of the board
+            device.waitForNotifications(0.05)
+            time.sleep(0.01)
+        device.disconnect()
+
+
+def run(transport_class, notifications, writes, duration):
+    """Return (cpu seconds, event latencies, write latencies) of one connection."""
+    que: queue.Queue = queue.Queue()
+    peripheral = ReplayPeripheral(READ, WRITE, notifications)
+    transport = transport_class(que, READ, WRITE, peripheral=peripheral)
+    transport.open_mt("replay")
+    que.get()  # agent-state
+    latencies = []
+
+    def consume():
+        for _ in notifications:
+            que.get()
+            latencies.append(time.monotonic() - peripheral.sent[len(latencies)][0])
+
+    consumer = threading.Thread(target=consume)
+    consumer.start()
+    write_times = []
+    cpu = time.process_time()
+    start = time.monotonic()
+    for at in writes:
+        time.sleep(max(start + at - time.monotonic(), 0))
+        write_times.append(time.monotonic())
+        transport.write_mt(b"L")
+    time.sleep(max(start + duration - time.monotonic(), 0))
+    cpu = time.process_time() - cpu
+    consumer.join()
+    transport.quit()
+    transport.worker_threader.join()
+    written = [at for at, _ in peripheral.written]
+    return cpu, latencies, [done - put for put, done in zip(write_times, written)]
+
+
+def ms(values, fraction):
+    return EventStats.percentile(values, fraction) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-s", "--seconds", type=float, default=10.0, help="length of each run")
+    parser.add_argument("-e", "--events", type=int, default=40, help="board notifications per run")
+    parser.add_argument("-r", "--read-ms", type=float, default=30.0, help="gatt read time of the polling loop")
+    args = parser.parse_args()
+    PollingTransport.read_time = args.read_ms / 1000
+
+    step = args.seconds / (args.events + 1)
+    notifications = [(1 + step * number * 0.9, b"\x01") for number in range(args.events)]
+    writes = [step * number * 0.9 + step / 3 for number in range(args.events // 4)]
+
+    print(f"{args.seconds:.0f}s idle and {args.seconds:.0f}s with {args.events} events, {len(writes)} writes")
+    print(f"{'loop':>8} {'idle cpu':>9} {'event p50':>10} {'p99':>8} {'write p50':>10} {'p99':>8}")
+    for name, transport_class in (("polling", PollingTransport), ("notify", Transport)):
+        idle_cpu, _, _ = run(transport_class, [], [], args.seconds)
+        _, latencies, write_latencies = run(transport_class, notifications, writes, args.seconds)
+        print(
+            f"{name:>8} {idle_cpu / args.seconds * 100:>8.2f}% "
+            f"{ms(latencies, 0.5):>7.1f} ms {ms(latencies, 0.99):>5.1f} ms "
+            f"{ms(write_latencies, 0.5):>7.1f} ms {ms(write_latencies, 0.99):>5.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Measure the cost of sending one COMPUTER_MOVE message to all displays.
+
+"copies"    - game.copy() in picochess and a deepcopy of the message per display (old way)
+"snapshots" - GameSnapshot.of() in picochess and DisplayMsg.show() sharing the snapshot
+Run from the picochess folder: python3 -m benchmarks.bench_display_fanout
+"""
+
+import argparse
+import asyncio
+import copy
+import random
+import timeit
+
+import chess  # type: ignore
+
+from dgt.api import Message
+from utilities import DisplayMsg, GameSnapshot
+
+
+class NullDisplay(DisplayMsg):
+    """A display which only takes messages (like web, dgt, pgn and talker queues)."""
+
+    async def add_to_queue(self, message):
+        pass
+
+
+def random_game(plies: int) -> chess.Board:
+    """Return a game with (up to) plies half moves."""
+    rnd = random.Random(plies)
+    game = chess.Board()
+    while len(game.move_stack) < plies and not game.is_game_over():
+        game.push(rnd.choice(list(game.legal_moves)))
+    return game
+
+
+async def old_show(message, displays):
+    for display in displays:
+        await display.add_to_queue(copy.deepcopy(message))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-d", "--displays", type=int, default=4, help="number of display queues")
+    parser.add_argument("-n", "--number", type=int, default=50, help="messages per timing run")
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    displays = [NullDisplay(loop) for _ in range(args.displays)]
+    move = chess.Move.null()
+
+    def copies(game):
+        msg = Message.COMPUTER_MOVE(move=move, ponder=None, game=game.copy(), wait=False, is_user_move=False)
+        loop.run_until_complete(old_show(msg, displays))
+
+    def snapshots(game):
+        msg = Message.COMPUTER_MOVE(move=move, ponder=None, game=GameSnapshot.of(game), wait=False, is_user_move=False)
+        loop.run_until_complete(DisplayMsg.show(msg))
+
+    print(f"{args.displays} displays, time per message")
+    print(f"{'plies':>6} {'copies':>12} {'snapshots':>12}")
+    for plies in (10, 50, 100, 200, 400):
+        game = random_game(plies)
+        old = min(timeit.repeat(lambda: copies(game), number=args.number, repeat=5)) / args.number
+        new = min(timeit.repeat(lambda: snapshots(game), number=args.number, repeat=5)) / args.number
+        print(f"{len(game.move_stack):>6} {old * 1e6:>9.0f} us {new * 1e6:>9.0f} us")
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
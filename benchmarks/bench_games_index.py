@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Time the games window queries for positions of gamesdb/games.pgn, common and rare ones.
+
+"server" - GET ?action=get_games&fen=... of a running tcscid get_games.tcl server (old way),
+           only with --server, e.g. --server http://localhost:7778
+"index"  - GamesIndex.find() without its answer cache, same positions
+The positions are those after a number of plies in every --step th game of the collection.
+Run from the picochess folder: python3 -m benchmarks.bench_games_index [--server url]
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+import urllib.parse
+import urllib.request
+
+import chess  # type: ignore
+import chess.pgn
+
+from games_index import GamesIndex, build_index
+from utilities import EventStats
+
+GAMES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "gamesdb", "games.pgn")
+PLIES = (0, 4, 8, 12, 20, 30)
+
+
+def positions(pgn: str, step: int):
+    """Return {plies: [fen]} of every step th game."""
+    found: dict = {plies: [] for plies in PLIES}
+    with open(pgn, encoding="utf-8", errors="replace") as handle:
+        number = 0
+        while True:
+            game = chess.pgn.read_game(handle)
+            if game is None:
+                break
+            number += 1
+            if number % step:
+                continue
+            board = game.board()
+            for ply, move in enumerate(game.mainline_moves(), start=1):
+                board.push(move)
+                if ply in found:
+                    found[ply].append(board.fen())
+            found[0].append(chess.STARTING_FEN)
+    return found
+
+
+def server_query(url: str, fen: str) -> list:
+    with urllib.request.urlopen(url + "/?" + urllib.parse.urlencode({"action": "get_games", "fen": fen})) as reply:
+        return json.loads(reply.read().decode("utf-8", errors="replace"))["data"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pgn", nargs="?", default=GAMES, help="pgn collection")
+    parser.add_argument("-s", "--step", type=int, default=250, help="take the positions of every step th game")
+    parser.add_argument("--server", help="url of a tcscid get_games.tcl server with the same games")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        index_path = os.path.join(folder, "games.idx")
+        start = time.perf_counter()
+        games, _ = build_index([args.pgn], index_path)
+        print(f"{os.path.basename(args.pgn)}: {games} games, index built in {time.perf_counter() - start:.1f}s")
+        index = GamesIndex(index_path)
+        index.open()
+        print(f"{'plies':>5} {'fens':>5} {'games':>6} {'index p50':>10} {'p99':>9}", end="")
+        print(f" {'server p50':>11} {'p99':>9}" if args.server else "")
+        for plies, fens in positions(args.pgn, args.step).items():
+            index_times, server_times, found = [], [], 0
+            for fen in fens:
+                index.cache.clear()
+                start = time.perf_counter()
+                found += len(index.find(chess.Board(fen)))
+                index_times.append(time.perf_counter() - start)
+                if args.server:
+                    start = time.perf_counter()
+                    server_query(args.server, fen)
+                    server_times.append(time.perf_counter() - start)
+            print(f"{plies:>5} {len(fens):>5} {found / len(fens):>6.1f} {ms(index_times, 0.5):>7.2f} ms", end="")
+            print(f" {ms(index_times, 0.99):>6.2f} ms", end="")
+            print(f" {ms(server_times, 0.5):>8.1f} ms {ms(server_times, 0.99):>6.1f} ms" if args.server else "")
+        index.close()
+
+
+def ms(values, fraction):
+    return EventStats.percentile(values, fraction) * 1000
+
+
+if __name__ == "__main__":
+    main()
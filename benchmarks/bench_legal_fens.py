@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Replay recorded eboard fen events through the process_fen legal fen lookups.
+
+Compares the old per event list computation against the LegalFenIndex.
+Run from the picochess folder: python3 -m benchmarks.bench_legal_fens [trace files]
+"""
+
+import argparse
+import os
+import timeit
+from typing import List
+
+import chess  # type: ignore
+
+from picochess import LegalFenIndex
+
+DEFAULT_TRACE = os.path.join(os.path.dirname(__file__), "data", "board_fen_events.txt")
+
+
+def read_trace(file_name: str) -> List[str]:
+    """Read one board fen per line, lines starting with # are comments."""
+    with open(file_name, "r", encoding="utf-8") as trace:
+        return [line.strip() for line in trace if line.strip() and not line.startswith("#")]
+
+
+def legal_fen_list(game_copy: chess.Board) -> List[str]:
+    """The old compute_legal_fens: a list of board fens in legal_moves order."""
+    fens = []
+    for move in game_copy.legal_moves:
+        game_copy.push(move)
+        fens.append(game_copy.board_fen())
+        game_copy.pop()
+    return fens
+
+
+def replay_lists(events: List[str]) -> chess.Board:
+    """Replay events the way process_fen did with three parallel lists."""
+    game = chess.Board()
+    legal_fens = legal_fen_list(game.copy())
+    last_legal_fens: List[str] = []
+    for fen in events:
+        legal_fens_pico = legal_fen_list(game.copy())
+        if fen == game.board_fen():
+            continue
+        if fen in last_legal_fens:
+            game.pop()
+            game.push(list(game.legal_moves)[last_legal_fens.index(fen)])
+            legal_fens = legal_fen_list(game.copy())
+        elif fen in legal_fens:
+            game.push(list(game.legal_moves)[legal_fens.index(fen)])
+            last_legal_fens = legal_fens
+            legal_fens = legal_fen_list(game.copy())
+        elif fen in legal_fens_pico:
+            pass
+    return game
+
+
+def replay_index(events: List[str]) -> chess.Board:
+    """Replay events the way process_fen does with the successor index."""
+    index = LegalFenIndex()
+    game = chess.Board()
+    legal_fens = index.successors(game)
+    last_legal_fens: dict = {}
+    for fen in events:
+        legal_fens_pico = index.successors(game)
+        if fen == game.board_fen():
+            continue
+        if fen in last_legal_fens:
+            game.pop()
+            game.push(last_legal_fens[fen])
+            legal_fens = index.successors(game)
+        elif fen in legal_fens:
+            game.push(legal_fens[fen])
+            last_legal_fens = legal_fens
+            legal_fens = index.successors(game)
+        elif fen in legal_fens_pico:
+            pass
+    return game
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("traces", nargs="*", default=[DEFAULT_TRACE], help="files with one board fen per line")
+    parser.add_argument("-n", "--number", type=int, default=20, help="replays per timing run")
+    args = parser.parse_args()
+
+    for file_name in args.traces:
+        events = read_trace(file_name)
+        assert replay_lists(events).move_stack == replay_index(events).move_stack, "replays disagree"
+        plies = len(replay_index(events).move_stack)
+        lists = min(timeit.repeat(lambda: replay_lists(events), number=args.number, repeat=5)) / args.number
+        index = min(timeit.repeat(lambda: replay_index(events), number=args.number, repeat=5)) / args.number
+        print(f"{os.path.basename(file_name)}: {len(events)} events, {plies} plies")
+        print(f"  lists : {lists * 1000:8.2f} ms/replay  {lists * 1e6 / len(events):8.1f} us/event")
+        print(f"  index : {index * 1000:8.2f} ms/replay  {index * 1e6 / len(events):8.1f} us/event")
+        print(f"  speedup {lists / index:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Replay recorded eboard fen events through the MoveDebouncer.
+
+"timers" - a chess.Board, push/pop of every legal move and a threading.Timer per update (old way)
+"cached" - successors from the (previous fen, colour) cache and one scheduler thread
+Run from the picochess folder: python3 -m benchmarks.bench_move_debouncer [trace files]
+"""
+
+import argparse
+import os
+import threading
+import timeit
+from typing import List, Optional
+
+import chess  # type: ignore
+
+from benchmarks.bench_legal_fens import DEFAULT_TRACE, read_trace
+from eboard.move_debouncer import MoveDebouncer
+
+
+class TimerMoveDebouncer(MoveDebouncer):
+    """The debouncer before the successor cache and the scheduler thread."""
+
+    def __init__(self, debounce_time_millis, callback):
+        super().__init__(debounce_time_millis, callback)
+        self.timer: Optional[threading.Timer] = None
+
+    def update(self, short_fen: str):
+        if self.timer is not None:
+            self.timer.cancel()
+        if self._shall_start_timer(short_fen):
+            self.timer = threading.Timer(self.debounce_time_millis / 1000, self.callback, [short_fen])
+            self.timer.start()
+        else:
+            self.callback(short_fen)
+        self.previous_fens.append(short_fen)
+
+    def stop(self):
+        if self.timer is not None:
+            self.timer.cancel()
+
+    def _is_move_extendable(self, previous_fen: str, fen: str):
+        for color in ("b", "w"):
+            board = self._board_from_fen(previous_fen, color)
+            legal_moves = board.legal_moves
+            legal_fens = self._legal_fens(board, legal_moves)
+            if fen in legal_fens:
+                return self._is_extendable(board, legal_moves, legal_fens.index(fen))
+        return False
+
+    def _is_extendable(self, board: chess.Board, legal_moves, index: int):
+        move = list(legal_moves)[index]
+        if board.piece_type_at(move.from_square) == chess.KNIGHT:
+            return False
+        for m in legal_moves:
+            if m.from_square == move.from_square and m.to_square != move.to_square:
+                return True
+        return False
+
+    def _legal_fens(self, b: chess.Board, legal_moves) -> List[str]:
+        board = b.copy()
+        fens = []
+        for move in legal_moves:
+            board.push(move)
+            fens.append(board.board_fen())
+            board.pop()
+        return fens
+
+
+def replay(debouncer_class, events: List[str]) -> List[str]:
+    """Return the fens sent at once, a long debounce time keeps the scheduled ones pending."""
+    sent: List[str] = []
+    debouncer = debouncer_class(60000, sent.append)
+    for fen in events:
+        debouncer.update(fen)
+    debouncer.stop()
+    return sent
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("traces", nargs="*", default=[DEFAULT_TRACE], help="files with one board fen per line")
+    parser.add_argument("-n", "--number", type=int, default=20, help="replays per timing run")
+    args = parser.parse_args()
+
+    for file_name in args.traces:
+        events = read_trace(file_name)
+        assert replay(TimerMoveDebouncer, events) == replay(MoveDebouncer, events), "replays disagree"
+        debounced = len(events) - len(replay(MoveDebouncer, events))
+        timers = min(timeit.repeat(lambda: replay(TimerMoveDebouncer, events), number=args.number, repeat=5))
+        cached = min(timeit.repeat(lambda: replay(MoveDebouncer, events), number=args.number, repeat=5))
+        timers, cached = timers / args.number, cached / args.number
+        print(f"{os.path.basename(file_name)}: {len(events)} events, {debounced} debounced")
+        print(f"  timers: {timers * 1000:8.2f} ms/replay  {timers * 1e6 / len(events):8.1f} us/event")
+        print(f"  cached: {cached * 1000:8.2f} ms/replay  {cached * 1e6 / len(events):8.1f} us/event")
+        print(f"  speedup {timers / cached:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Play book games against every books/*.bin and time the engine book lookups.
+
+"reader"   - AlternativeMover.book() on a chess.polyglot.MemoryMappedReader (old way)
+"book"     - the same on the OpeningBook, prefetch() runs untimed like it does while the user thinks
+"prefetch" - the cost of those prefetch() calls
+The engine plays the book move and its ponder move is the user reply, until a side is out of book.
+Run from the picochess folder: python3 -m benchmarks.bench_opening_book [books]
+"""
+
+import argparse
+import glob
+import os
+import random
+import time
+from typing import List, Tuple
+
+import chess  # type: ignore
+import chess.polyglot
+
+from book import OpeningBook
+from picochess import AlternativeMover
+from utilities import EventStats
+
+BOOKS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "books", "*.bin")
+
+
+def play(bookreader, seed: int, prefetch: bool) -> Tuple[List[str], List[float], float]:
+    """Return (moves, lookup seconds, prefetch seconds) of one book game."""
+    game = chess.Board()
+    mover = AlternativeMover()
+    moves, lookups, prefetched = [], [], 0.0
+    state = random.getstate()
+    random.seed(seed)  # the readers choose with the module random
+    try:
+        while True:
+            start = time.perf_counter()
+            book_move = mover.book(bookreader, game.copy())
+            lookups.append(time.perf_counter() - start)
+            mover.reset()
+            if book_move is None:
+                break
+            game.push(book_move.move)
+            moves.append(book_move.move.uci())
+            if prefetch:
+                start = time.perf_counter()
+                bookreader.prefetch(game)
+                prefetched += time.perf_counter() - start
+            if book_move.ponder is None or not game.is_legal(book_move.ponder):
+                break
+            game.push(book_move.ponder)
+            moves.append(book_move.ponder.uci())
+    finally:
+        random.setstate(state)
+    return moves, lookups, prefetched
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("books", nargs="*", help="polyglot books, default books/*.bin")
+    parser.add_argument("-g", "--games", type=int, default=50, help="book games per book")
+    args = parser.parse_args()
+
+    files = args.books or sorted(glob.glob(BOOKS))
+    print(
+        f"{'book':>20} {'MB':>5} {'plies':>6} {'reader p50':>11} {'p99':>8} {'book p50':>9} {'p99':>8} {'prefetch':>9}"
+    )
+    totals: dict = {"reader": [], "book": [], "prefetch": 0.0}
+    for file_name in files:
+        reader = chess.polyglot.open_reader(file_name)
+        book = OpeningBook(file_name)
+        plies, reader_lookups, book_lookups, prefetched = 0, [], [], 0.0
+        for seed in range(args.games):
+            moves, lookups, _ = play(reader, seed, prefetch=False)
+            book_moves, cached_lookups, prefetch_time = play(book, seed, prefetch=True)
+            assert moves == book_moves, f"{file_name}: the games differ"
+            plies += len(moves)
+            reader_lookups += lookups
+            book_lookups += cached_lookups
+            prefetched += prefetch_time
+        reader.close()
+        book.close()
+        totals["reader"] += reader_lookups
+        totals["book"] += book_lookups
+        totals["prefetch"] += prefetched
+        print(
+            f"{os.path.basename(file_name):>20} {os.path.getsize(file_name) / 1e6:>5.1f} {plies:>6} "
+            f"{us(reader_lookups, 0.5):>8.1f} us {us(reader_lookups, 0.99):>5.1f} us "
+            f"{us(book_lookups, 0.5):>6.1f} us {us(book_lookups, 0.99):>5.1f} us {prefetched * 1000:>6.1f} ms"
+        )
+    reader_total, book_total = sum(totals["reader"]), sum(totals["book"])
+    print(f"lookups: reader {reader_total * 1000:.1f} ms, book {book_total * 1000:.1f} ms")
+    print(f"speedup {reader_total / book_total:.1f}x, prefetch {totals['prefetch'] * 1000:.1f} ms off the clock")
+
+
+def us(values, fraction):
+    return EventStats.percentile(values, fraction) * 1e6
+
+
+if __name__ == "__main__":
+    main()
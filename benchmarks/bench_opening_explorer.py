@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Time the book table queries of the web page while book games are played.
+
+"file"     - open opening.data, binary search with seek/read, close: what obooksrv did per query (old way)
+"explorer" - OpeningExplorer.moves(), prefetch() of the previous game position runs untimed
+"prefetch" - the cost of those prefetch() calls, the web server runs them in a worker thread
+The opening.data is made from the entries of a polyglot book with random statistics.
+Run from the picochess folder: python3 -m benchmarks.bench_opening_explorer [book]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from typing import List
+
+import chess  # type: ignore
+import chess.polyglot
+
+from explorer import KEY, RECORD, OpeningExplorer, decode_move
+from utilities import EventStats
+
+BOOK = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "books", "q-komodo.bin")
+
+
+def file_query(path: str, board: chess.Board) -> List[dict]:
+    """The obooksrv lookup: a seek and a read for each step of the binary search."""
+    key = chess.polyglot.zobrist_hash(board)
+    moves = []
+    with open(path, "rb") as data_file:
+        low, high = 0, os.fstat(data_file.fileno()).st_size // RECORD.size
+        while low < high:
+            middle = (low + high) // 2
+            data_file.seek(middle * RECORD.size)
+            if KEY.unpack(data_file.read(KEY.size))[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        data_file.seek(low * RECORD.size)
+        while True:
+            record = data_file.read(RECORD.size)
+            if len(record) < RECORD.size:
+                break
+            record_key, raw, whitewins, draws, count = RECORD.unpack(record)
+            if record_key != key:
+                break
+            moves.append(
+                {
+                    "move": decode_move(board, raw),
+                    "whitewins": whitewins,
+                    "draws": draws,
+                    "blackwins": max(100 - whitewins - draws, 0),
+                    "count": count,
+                }
+            )
+    return moves
+
+
+def write_data(book: str, path: str) -> int:
+    """Write an opening.data with the keys and moves of the polyglot book, return the number of records."""
+    records = 0
+    rng = random.Random(0)
+    with chess.polyglot.open_reader(book) as reader, open(path, "wb") as data_file:
+        for entry in reader:  # the book is sorted by key already
+            whitewins = rng.randint(20, 45)
+            draws = rng.randint(20, 100 - whitewins)
+            data_file.write(RECORD.pack(entry.key, entry.raw_move, whitewins, draws, entry.weight + 1))
+            records += 1
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("book", nargs="?", default=BOOK, help="polyglot book for the positions")
+    parser.add_argument("-g", "--games", type=int, default=200, help="book games")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "opening.data")
+        records = write_data(args.book, path)
+        explorer = OpeningExplorer(path)
+        explorer.open()
+        rng = random.Random(1)
+        file_times, explorer_times, prefetched = [], [], 0.0
+        for _ in range(args.games):
+            board = chess.Board()
+            while True:
+                start = time.perf_counter()
+                expected = file_query(path, board)
+                file_times.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                moves = explorer.moves(board)
+                explorer_times.append(time.perf_counter() - start)
+                assert moves == expected, board.fen()
+                if not moves:
+                    break
+                board.push_uci(rng.choice(moves)["move"])
+                start = time.perf_counter()
+                explorer.prefetch(board)
+                prefetched += time.perf_counter() - start
+        stats = explorer.stats()
+        explorer.close()
+
+    print(f"{os.path.basename(args.book)}: {records} moves, {args.games} games, {len(file_times)} queries")
+    print(f"{'lookup':>9} {'p50':>9} {'p99':>9} {'total':>9}")
+    for name, times in (("file", file_times), ("explorer", explorer_times)):
+        print(f"{name:>9} {us(times, 0.5):>6.1f} us {us(times, 0.99):>6.1f} us {sum(times) * 1000:>6.1f} ms")
+    print(f"speedup {sum(file_times) / sum(explorer_times):.1f}x, hit rate {stats['hit_rate']:.2f}")
+    print(f"prefetch {prefetched * 1000:.1f} ms in a worker thread, {prefetched / args.games * 1000:.1f} ms per game")
+
+
+def us(values, fraction):
+    return EventStats.percentile(values, fraction) * 1e6
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Time and measure the memory of saving an uploaded pgn file from its multipart body.
+
+"buffered" - the whole body in memory, parse_multipart_form_data, one write of the file (old way)
+"streamed" - the body in 64KB chunks through MultipartStream and PgnScanner, each chunk written at once,
+             then the game offset index
+"parsed"   - with --parse: reading all games of the file with chess.pgn, a check by parsing
+Run from the picochess folder: python3 -m benchmarks.bench_pgn_upload [pgn]
+"""
+
+import argparse
+import io
+import os
+import tempfile
+import time
+import tracemalloc
+
+import chess.pgn  # type: ignore
+from tornado import httputil
+
+from upload_pgn import MultipartStream, PgnScanner
+from utilities import write_offset_index
+
+GAMES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "gamesdb", "games.pgn")
+BOUNDARY = b"----picochessbench"
+CHUNK = 64 * 1024  # the chunk size of the tornado http server
+
+
+def body(pgn: bytes) -> bytes:
+    head = b"--" + BOUNDARY + b'\r\nContent-Disposition: form-data; name="file"; filename="games.pgn"\r\n\r\n'
+    return head + pgn + b"\r\n--" + BOUNDARY + b"--\r\n"
+
+
+def buffered(data: bytes, path: str) -> int:
+    arguments: dict = {}
+    files: dict = {}
+    httputil.parse_multipart_form_data(BOUNDARY, data, arguments, files)
+    with open(path, "wb") as upload:
+        upload.write(files["file"][0]["body"])
+    return 0
+
+
+def streamed(data: bytes, path: str) -> int:
+    stream, scanner = MultipartStream(BOUNDARY), PgnScanner()
+    with open(path, "wb") as upload:
+        for start in range(0, len(data), CHUNK):
+            for part, content in stream.feed(data[start : start + CHUNK]):
+                if part is None:
+                    scanner.feed(content)
+                    upload.write(content)
+    offsets = scanner.close()
+    write_offset_index(path, offsets)
+    return len(offsets)
+
+
+def parsed(data: bytes, _path: str) -> int:
+    games = 0
+    handle = io.StringIO(data.decode("utf-8", errors="replace"))
+    while chess.pgn.read_game(handle) is not None:
+        games += 1
+    return games
+
+
+def measure(function, data: bytes, path: str):
+    """Return (seconds, peak MB, games) of the function, the memory is traced in a second run."""
+    start = time.perf_counter()
+    games = function(data, path)
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    function(data, path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak / 1e6, games
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pgn", nargs="?", default=GAMES, help="pgn file to upload")
+    parser.add_argument("--parse", action="store_true", help="also time reading all games with chess.pgn")
+    args = parser.parse_args()
+
+    with open(args.pgn, "rb") as pgn_file:
+        pgn = pgn_file.read()
+    data = body(pgn)
+    print(f"{os.path.basename(args.pgn)}: {len(pgn) / 1e6:.1f} MB")
+    print(f"{'upload':>9} {'time':>8} {'memory':>10} {'games':>6}")
+    with tempfile.TemporaryDirectory() as folder:
+        ways = [("buffered", buffered), ("streamed", streamed)] + ([("parsed", parsed)] if args.parse else [])
+        for name, function in ways:
+            seconds, peak, games = measure(function, data, os.path.join(folder, name + ".pgn"))
+            print(f"{name:>9} {seconds:>6.2f} s {peak:>7.1f} MB {games or '-':>6}")
+    print("the buffered way also holds the body itself, the server reads it into memory before the handler runs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Load the assets of the clock page with many clients and measure the event loop lag.
+
+"flask"  - every /static/ request runs the Flask app in a WSGIContainer on the event loop (old way)
+"static" - the StaticAssetHandler with the precompressed variants of build/static.py
+The clients are processes that load the page every --interval seconds, the web server and
+a 10 ms ticker share the event loop like the clock and the board do in picochess.
+"revisit" clients send the ETag they got. The clients run at the lowest priority, so the lag
+is the time the loop is blocked by requests. cpu/load is the server cpu time per page load.
+Run from the picochess folder: python3 -m benchmarks.bench_static_assets
+"""
+
+import argparse
+import asyncio
+import http.client
+import multiprocessing
+import os
+import re
+import socket
+import time
+from typing import Dict, List, Tuple
+
+import tornado.web  # type: ignore
+import tornado.wsgi  # type: ignore
+
+from build.static import compress_static
+from server import STATIC_PATH, StaticAssetHandler
+from utilities import EventStats
+from web.picoweb import picoweb as pw
+
+TICK = 0.01
+
+
+def page_assets() -> List[str]:
+    """Return the /static/ urls of the clock page."""
+    with open("web/picoweb/templates/clock.html", "r", encoding="utf-8") as page:
+        names = re.findall(r"static_url\('([^']+)'\)", page.read())
+    return ["/static/" + name for name in dict.fromkeys(names)]
+
+
+def client(port: int, paths: List[str], loads: int, interval: float, revisit: bool) -> Tuple[int, List[float]]:
+    """Load all paths every interval seconds over one keep-alive connection, return (bytes, page load times)."""
+    os.nice(19)  # the event loop comes first, like picochess before the browsers on the same machine
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    etags: Dict[str, str] = {}
+    received = 0
+    load_times = []
+    for _ in range(loads):
+        start = time.monotonic()
+        for path in paths:
+            headers = {"Accept-Encoding": "br, gzip"}
+            if revisit and path in etags:
+                headers["If-None-Match"] = etags[path]
+            connection.request("GET", path, headers=headers)
+            response = connection.getresponse()
+            received += len(response.read())
+            etags[path] = response.getheader("Etag", "")
+        load_times.append(time.monotonic() - start)
+        time.sleep(max(start + interval - time.monotonic(), 0))
+    connection.close()
+    return received, load_times
+
+
+def flask_app() -> tornado.web.Application:
+    return tornado.web.Application([(r".*", tornado.web.FallbackHandler, {"fallback": tornado.wsgi.WSGIContainer(pw)})])
+
+
+def static_app() -> tornado.web.Application:
+    StaticAssetHandler.hash_files(STATIC_PATH)  # make_app starts this in a thread
+    return tornado.web.Application([], static_path=STATIC_PATH, static_handler_class=StaticAssetHandler)
+
+
+async def run(app: tornado.web.Application, clients: int, loads: int, interval: float, revisit: bool, paths: List[str]):
+    """Return (tick lags, page load times, bytes, server cpu seconds) while the clients load the page."""
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    server = app.listen(port, address="127.0.0.1")
+    loop = asyncio.get_running_loop()
+    lags: List[float] = []
+    with multiprocessing.Pool(clients) as pool:
+        cpu = time.process_time()
+        result = pool.starmap_async(client, [(port, paths, loads, interval, revisit)] * clients)
+        while not result.ready():
+            tick = loop.time()
+            await asyncio.sleep(TICK)
+            lags.append(loop.time() - tick - TICK)
+        results = result.get()
+        cpu = time.process_time() - cpu
+    server.stop()
+    load_times = [seconds for _, times in results for seconds in times]
+    return lags, load_times, sum(received for received, _ in results), cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-c", "--clients", type=int, default=8, help="clients loading the page at the same time")
+    parser.add_argument("-l", "--loads", type=int, default=10, help="page loads per client")
+    parser.add_argument("-i", "--interval", type=float, default=2.0, help="seconds between the page loads of a client")
+    args = parser.parse_args()
+
+    compress_static()
+    paths = page_assets()
+    print(f"{args.clients} clients, {args.loads} loads of {len(paths)} assets every {args.interval}s")
+    print(
+        f"{'server':>14} {'lag p50':>8} {'p99':>8} {'max':>8} {'load p50':>9} {'p99':>8} {'cpu/load':>9} {'MB sent':>8}"
+    )
+    for name, make_app in (("flask", flask_app), ("static", static_app)):
+        for revisit in (False, True):
+            lags, load_times, received, cpu = asyncio.run(
+                run(make_app(), args.clients, args.loads, args.interval, revisit, paths)
+            )
+            label = name + (" revisit" if revisit else "")
+            print(
+                f"{label:>14} {ms(lags, 0.5):>5.1f} ms {ms(lags, 0.99):>5.1f} ms {max(lags) * 1000:>5.1f} ms "
+                f"{ms(load_times, 0.5):>6.0f} ms {ms(load_times, 0.99):>5.0f} ms "
+                f"{cpu / len(load_times) * 1000:>6.1f} ms {received / 1e6:>8.1f}"
+            )
+
+
+def ms(values, fraction):
+    return EventStats.percentile(values, fraction) * 1000
+
+
+if __name__ == "__main__":
+    main()
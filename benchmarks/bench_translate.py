@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Measure DgtTranslate.text() for every text_id of dgt/translate.py.
+
+"chain"    - the if-chain of DgtTranslate._text() on each call (old way)
+"compiled" - DgtTranslate.text() with the compiled texts of the current language
+Run from the picochess folder: python3 -m benchmarks.bench_translate
+"""
+
+import argparse
+import logging
+import re
+import timeit
+
+from dgt.translate import DgtTranslate
+
+MSGS = ("", "5", "12:30", "Stockfish 16")
+
+
+def text_ids():
+    """Return all text_ids handled by DgtTranslate."""
+    with open("dgt/translate.py", "r", encoding="utf-8") as source:
+        return sorted(set(re.findall(r'text_id == "(\w+)"', source.read())))
+
+
+def chain(translate: DgtTranslate, calls):
+    for text_id, msg in calls:
+        try:
+            translate.capital_text(translate._text(text_id, msg, False, 1.0, {"web"}))
+        except (TypeError, ValueError, IndexError, AttributeError):
+            pass
+
+
+def compiled(translate: DgtTranslate, calls):
+    for text_id, msg in calls:
+        try:
+            translate.text("N10_" + text_id, msg, {"web"})
+        except (TypeError, ValueError, IndexError, AttributeError):
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-l", "--languages", nargs="*", default=["en", "de", "es", "it"], help="languages to measure")
+    parser.add_argument("-n", "--number", type=int, default=5, help="passes over all texts per timing run")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    calls = [(text_id, msg) for text_id in text_ids() for msg in MSGS]
+    print(f"{len(calls) // len(MSGS)} text_ids with {len(MSGS)} msgs, time per text")
+    print(f"{'lang':>5} {'chain':>10} {'compiled':>10} {'uncompiled':>11}")
+    for language in args.languages:
+        translate = DgtTranslate("some", 3, language, "4.1.6")
+        compiled(translate, calls)  # compile outside the timing
+        old = min(timeit.repeat(lambda: chain(translate, calls), number=args.number, repeat=5))
+        new = min(timeit.repeat(lambda: compiled(translate, calls), number=args.number, repeat=5))
+        per_call = args.number * len(calls)
+        print(
+            f"{language:>5} {old / per_call * 1e6:>7.1f} us {new / per_call * 1e6:>7.1f} us {len(translate.uncompiled):>11}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+import threading
+from collections import OrderedDict
+from random import Random, randint
+from typing import Container, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import chess  # type: ignore
+import chess.polyglot  # type: ignore
+
+CACHE_SIZE = 4096  # positions
+PREFETCH_PLIES = 4  # plies ahead of the game position
+PREFETCH_WIDTH = 3  # most played book moves followed in each prefetched position
+MIX_SCALE = 0xFFFF  # merged weight of a move played in every game of a book of weight 1.0
+
+logger = logging.getLogger(__name__)
+
+BookFiles = Union[str, Sequence[Tuple[str, float]]]
+
+
+def book_files(main_file: str, mix: str = "") -> List[Tuple[str, float]]:
+    """Return [(file, weight)] of the main book and the mix, e.g. "books/Perfect2019.bin:0.5,books/g-fun.bin"."""
+    files = [(main_file, 1.0)]
+    for item in mix.split(","):
+        name, _, weight = item.strip().partition(":")
+        if name and name != main_file:
+            files.append((name, float(weight) if weight else 1.0))
+    return files
+
+
+class OpeningBook(object):
+    """Polyglot opening books with an in-memory index of the positions near the game.
+
+    It answers find_all() and weighted_choice() like a chess.polyglot.MemoryMappedReader.
+    The entries of a position are read once from the memory-mapped files and kept by
+    zobrist hash. prefetch() loads the most played continuations of a position ahead
+    of time, the engine calls it while the user thinks. Several books can be merged:
+    the books use different weight scales, so the weight of a move is the sum of its
+    share of the position in each book times the weight of that book.
+    The book files stay open, switching back to a book doesn't reopen it.
+    """
+
+    def __init__(self, files: BookFiles = (), cache_size: int = CACHE_SIZE):
+        self.cache_size = cache_size
+        self.readers: Dict[str, chess.polyglot.MemoryMappedReader] = {}
+        self.books: List[Tuple[chess.polyglot.MemoryMappedReader, float]] = []
+        self.names: List[Tuple[str, float]] = []
+        self.cache: OrderedDict = OrderedDict()  # (zobrist hash, chess960): entries of all weights
+        self.lock = threading.Lock()  # prefetch() runs in a worker thread
+        self.lookups = self.cache_hits = self.prefetched = 0
+        if files:
+            self.open(files)
+        opening_books.append(self)
+
+    def open(self, files: BookFiles):
+        """Use the book file or the [(file, weight)] books from now on."""
+        names = [(files, 1.0)] if isinstance(files, str) else list(files)
+        books, opened = [], []
+        for name, weight in names:
+            if name not in self.readers:
+                try:
+                    self.readers[name] = chess.polyglot.open_reader(name)
+                except OSError as error:
+                    logger.warning("opening book %s not available: %s", name, error)
+                    continue
+            books.append((self.readers[name], weight))
+            opened.append((name, weight))
+        with self.lock:
+            self.names = opened
+            self.books = books
+            self.cache.clear()
+
+    def close(self):
+        with self.lock:
+            for reader in self.readers.values():
+                reader.close()
+            self.readers.clear()
+            self.books = []
+            self.cache.clear()
+
+    def _load(self, board: chess.Board) -> Tuple[chess.polyglot.Entry, ...]:
+        """Merge the entries of all books, in the order of the first book with the move."""
+        if len(self.books) == 1:
+            return tuple(self.books[0][0].find_all(board, minimum_weight=0))
+        merged: Dict[chess.Move, List] = {}
+        for reader, weight in self.books:
+            entries = list(reader.find_all(board, minimum_weight=0))
+            total = sum(entry.weight for entry in entries)
+            for entry in entries:
+                share = MIX_SCALE * weight * entry.weight / total if total else 0.0
+                if entry.move in merged:
+                    merged[entry.move][1] += share
+                else:
+                    merged[entry.move] = [entry, share]
+        return tuple(entry._replace(weight=int(round(share))) for entry, share in merged.values())
+
+    def entries(self, board: chess.Board, prefetch: bool = False) -> Tuple[chess.polyglot.Entry, ...]:
+        """Return all book entries of the position, also those of weight 0."""
+        key = (chess.polyglot.zobrist_hash(board), board.chess960)
+        with self.lock:
+            if not prefetch:
+                self.lookups += 1
+            entries = self.cache.get(key)
+            if entries is not None:
+                self.cache.move_to_end(key)
+                if not prefetch:
+                    self.cache_hits += 1
+                return entries
+            entries = self._load(board)
+            self.cache[key] = entries
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+            if prefetch:
+                self.prefetched += 1
+            return entries
+
+    def find_all(
+        self, board: chess.Board, *, minimum_weight: int = 1, exclude_moves: Container[chess.Move] = ()
+    ) -> Iterator[chess.polyglot.Entry]:
+        """Yield the entries of the position like MemoryMappedReader.find_all()."""
+        for entry in self.entries(board):
+            if entry.weight >= minimum_weight and entry.move not in exclude_moves:
+                yield entry
+
+    def weighted_choice(
+        self,
+        board: chess.Board,
+        *,
+        exclude_moves: Container[chess.Move] = (),
+        random: Optional[Random] = None,
+    ) -> chess.polyglot.Entry:
+        """Select an entry distributed by the weights, raise IndexError if the position isn't in the book."""
+        entries = list(self.find_all(board, exclude_moves=exclude_moves))
+        total_weights = sum(entry.weight for entry in entries)
+        if not total_weights:
+            raise IndexError()
+        choice = random.randint(0, total_weights - 1) if random else randint(0, total_weights - 1)
+        current_sum = 0
+        for entry in entries:
+            current_sum += entry.weight
+            if current_sum > choice:
+                return entry
+        raise IndexError()
+
+    def prefetch(self, board: chess.Board, plies: int = PREFETCH_PLIES, width: int = PREFETCH_WIDTH) -> int:
+        """Load the positions after the most played book moves up to plies ahead, return how many were new."""
+        board = board.copy(stack=False)
+        before = self.prefetched
+        positions = [board]
+        for _ in range(plies):
+            following = []
+            for position in positions:
+                entries = sorted(self.entries(position, prefetch=True), key=lambda entry: entry.weight, reverse=True)
+                for entry in entries[:width]:
+                    if entry.weight:
+                        child = position.copy(stack=False)
+                        child.push(entry.move)
+                        following.append(child)
+            positions = following
+            if not positions:
+                break
+        for position in positions:
+            self.entries(position, prefetch=True)
+        return self.prefetched - before
+
+    def stats(self) -> dict:
+        """Return the lookup counters, hit_rate is the share of lookups answered from memory."""
+        return {
+            "books": [{"file": name, "weight": weight} for name, weight in self.names],
+            "positions": len(self.cache),
+            "lookups": self.lookups,
+            "cache_hits": self.cache_hits,
+            "prefetched": self.prefetched,
+            "hit_rate": round(self.cache_hits / self.lookups, 3) if self.lookups else 0.0,
+        }
+
+
+opening_books: List[OpeningBook] = []
+
+
+def book_stats() -> List[dict]:
+    """Return the counters of all opening books (for /debug/events)."""
+    return [book.stats() for book in opening_books]
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Write gamesdb/games.idx, the position index of the games window on the web page.
+
+Run from the picochess folder: python3 -m build.games [pgn files or folders]
+Default: gamesdb/games.pgn and the games folder. Only new games are read if the
+pgn files were just appended to since the last run.
+"""
+
+import sys
+import time
+
+from games_index import INDEX_FILE, PGN_SOURCES, build_index
+
+
+def main():
+    start = time.monotonic()
+    games, scanned = build_index(sys.argv[1:] or PGN_SOURCES, INDEX_FILE)
+    print("{}: {} games, {} new, {:.1f}s".format(INDEX_FILE, games, scanned, time.monotonic() - start))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import gzip
+import os
+
+try:
+    import brotli  # type: ignore
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = (".css", ".js", ".svg", ".html", ".json", ".txt", ".ttf", ".eot", ".otf", ".ico")
+MIN_SIZE = 1024  # bytes, smaller files are sent as they are
+MIN_SAVING = 0.9  # a variant is only kept if it is smaller than this share of the file
+
+
+def compress_file(file_name, encoders):
+    """Write the variants of file_name that are missing or older than the file, return their names."""
+    with open(file_name, "rb") as source:
+        data = source.read()
+    written = []
+    for suffix, encode in encoders:
+        variant = file_name + suffix
+        if os.path.isfile(variant) and os.path.getmtime(variant) >= os.path.getmtime(file_name):
+            continue
+        compressed = encode(data)
+        if len(compressed) < len(data) * MIN_SAVING:
+            with open(variant, "wb") as target:
+                target.write(compressed)
+            written.append(variant)
+        elif os.path.isfile(variant):
+            os.remove(variant)
+    return written
+
+
+def compress_static(static_path=None):
+    """Write the gzip (and brotli if the module is installed) variants the web server sends to browsers."""
+    if static_path is None:
+        program_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+        static_path = os.path.join(program_path, "web", "picoweb", "static")
+    encoders = [(".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        encoders.append((".br", lambda data: brotli.compress(data, quality=11)))
+    written = []
+    for folder, _, files in os.walk(static_path):
+        for file_name in sorted(files):
+            path = os.path.join(folder, file_name)
+            if file_name.endswith(COMPRESSIBLE) and os.path.getsize(path) >= MIN_SIZE:
+                written += compress_file(path, encoders)
+    for variant in written:
+        print(os.path.relpath(variant, static_path))
+    return written
+
+
+if __name__ == "__main__":
+    compress_static()
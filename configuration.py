@@ -34,6 +34,20 @@ class Configuration:
             help="address of the remote engine server",
             default=None,
         )
+        self.parser.add_argument(
+            "-erpt",
+            "--engine-remote-port",
+            type=int,
+            help="port of the picochess engine server (python3 -m uci.remote), 0 uses SSH",
+            default=0,
+        )
+        self.parser.add_argument(
+            "-ersc",
+            "--engine-remote-secret",
+            type=str,
+            help="secret shared with the picochess engine server",
+            default="",
+        )
         self.parser.add_argument("-eru", "--engine-remote-user", type=str, help="username for the remote engine server")
         self.parser.add_argument("-erp", "--engine-remote-pass", type=str, help="password for the remote engine server")
         self.parser.add_argument("-erk", "--engine-remote-key", type=str, help="key file for the remote engine server")
@@ -44,6 +58,20 @@ class Configuration:
             help="engine home path for the remote engine server",
             default="",
         )
+        self.parser.add_argument(
+            "-eps",
+            "--engine-pool-size",
+            type=int,
+            help="number of idle engines kept running for a quick engine change, 0 quits every engine",
+            default=2,
+        )
+        self.parser.add_argument(
+            "-epm",
+            "--engine-pool-memory",
+            type=int,
+            help="memory in MB the idle engines may use",
+            default=512,
+        )
         self.parser.add_argument(
             "-d",
             "--dgt-port",
@@ -57,6 +85,13 @@ class Configuration:
             help="path of book such as 'books/b-flank.bin'",
             default="books/h-varied.bin",
         )
+        self.parser.add_argument(
+            "-bmix",
+            "--book-mix",
+            type=str,
+            default="",
+            help="books merged into the selected book with their weight such as 'books/Perfect2019.bin:0.5,books/g-fun.bin'",
+        )
         self.parser.add_argument(
             "-t",
             "--time",
@@ -92,6 +127,12 @@ class Configuration:
             help="logging level",
         )
         self.parser.add_argument("-lf", "--log-file", type=str, help="log to the given file")
+        self.parser.add_argument(
+            "-stp",
+            "--startup-profile",
+            action="store_true",
+            help="print the timing of the startup phases and their critical path",
+        )
         self.parser.add_argument(
             "-pf", "--pgn-file", type=str, help="pgn file used to store the games", default="games.pgn"
         )
@@ -287,6 +328,40 @@ class Configuration:
             default="/opt/picochess/engines/aarch64/a-stockf",
             help="engine used for PicoTutor analysis",
         )
+        self.parser.add_argument(
+            "-baw",
+            "--batch-workers",
+            type=int,
+            default=0,
+            help="engine processes for the batch analysis of a game from the web page, default 0 is one per CPU core",
+        )
+        self.parser.add_argument(
+            "-bad",
+            "--batch-depth",
+            type=int,
+            default=17,
+            help="depth the batch analysis searches every position, default is 17",
+        )
+        self.parser.add_argument(
+            "-ban",
+            "--batch-nodes",
+            type=int,
+            default=0,
+            help="nodes the batch analysis searches every position instead of the depth, default 0 uses the depth",
+        )
+        self.parser.add_argument(
+            "-tbp",
+            "--tablebase-path",
+            type=str,
+            default="tablebases/syzygy",
+            help="folder of the syzygy tablebases for exact endgame scores and tutor evaluations, empty disables them",
+        )
+        self.parser.add_argument(
+            "-tbm",
+            "--tablebase-moves",
+            action="store_true",
+            help="engine plays the perfect tablebase move in endgames without searching, default is off",
+        )
         self.parser.add_argument(
             "-watc",
             "--tutor-watcher",
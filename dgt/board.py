@@ -16,24 +16,149 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
 import platform
-import struct
 import logging
 import subprocess
-from threading import Timer, Lock
+from collections import deque
+from threading import Lock
 from fcntl import fcntl, F_GETFL, F_SETFL
 from os import O_NONBLOCK, read, path, listdir
 from serial import Serial, SerialException, STOPBITS_ONE, PARITY_NONE, EIGHTBITS  # type: ignore
 import time
-from typing import List, Optional, Tuple
+from typing import Deque, List, Optional, Tuple
 
 from eboard.eboard import EBoard
 from dgt.util import DgtAck, DgtClk, DgtCmd, DgtMsg, ClockIcons, ClockSide, enum
 from dgt.api import Message, Dgt
-from utilities import AsyncRepeatingTimer, DisplayMsg, hms_time
+from utilities import AsyncRepeatingTimer, DisplayMsg, EventStats, hms_time
 import asyncio
 
 logger = logging.getLogger(__name__)
 
+CLOCK_QUEUE_SIZE = 8  # clock commands waiting for the ack of the last one
+# clock commands showing a text, a newer one replaces a queued one if the clock queue is full
+CLOCK_TEXT_COMMANDS = {
+    DgtClk.DGT_CMD_CLOCK_ASCII.value,
+    DgtClk.DGT_CMD_REV2_ASCII.value,
+    DgtClk.DGT_CMD_CLOCK_DISPLAY.value,
+}
+ROUND_TRIP_SAMPLES = 200
+EE_MOVES_LENGTH = 0x1F00  # falsely requested DGT_MSG_EE_MOVES dump
+
+# board commands answered by a message, to measure their round trip
+REPLIES = {
+    DgtCmd.DGT_SEND_BRD: DgtMsg.DGT_MSG_BOARD_DUMP,
+    DgtCmd.DGT_SEND_VERSION: DgtMsg.DGT_MSG_VERSION,
+    DgtCmd.DGT_RETURN_SERIALNR: DgtMsg.DGT_MSG_SERIALNR,
+    DgtCmd.DGT_RETURN_LONG_SERIALNR: DgtMsg.DGT_MSG_LONG_SERIALNR,
+    DgtCmd.DGT_SEND_BATTERY_STATUS: DgtMsg.DGT_MSG_BATTERY_STATUS,
+}
+
+
+class DgtParser(object):
+    """Split the bytes read from the serial port into complete DGT board messages.
+
+    A message starts with its id (high bit set) and two 7bit length bytes, the data bytes
+    have the high bit cleared. Bytes outside a message are dropped until the next id.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.skip = 0  # bytes of an unwanted message still to ignore
+        self.dropped = 0
+
+    def reset(self):
+        self.buffer.clear()
+        self.skip = 0
+
+    def _drop(self, count: int):
+        del self.buffer[:count]
+        self.dropped += count
+
+    def feed(self, data: bytes) -> List[Tuple[int, tuple]]:
+        """Add the data and return the (message id, message data) of all completed messages."""
+        self.buffer += data
+        messages = []
+        while self.buffer:
+            if self.skip:
+                count = min(self.skip, len(self.buffer))
+                del self.buffer[:count]
+                self.skip -= count
+                continue
+            if not self.buffer[0] & 0x80:
+                start = next((index for index, byte in enumerate(self.buffer) if byte & 0x80), len(self.buffer))
+                self._drop(start)
+                continue
+            if len(self.buffer) < 3:
+                break
+            message_id = self.buffer[0]
+            message_length = (self.buffer[1] << 7) + self.buffer[2] - 3
+            if message_length <= 0 or message_length > 64:
+                if message_id == 0x8F and message_length == EE_MOVES_LENGTH:  # @todo find out why this can happen
+                    logger.warning("falsely DGT_SEND_EE_MOVES send before => receive and ignore EE_MOVES result")
+                    del self.buffer[:3]
+                    self.skip = message_length
+                else:
+                    logger.warning("illegal length in message header 0x%x length: %i", message_id, message_length)
+                    self._drop(1)
+                continue
+            try:
+                DgtMsg(message_id)
+            except ValueError:
+                logger.warning("illegal id in message header 0x%x length: %i", message_id, message_length)
+                self._drop(1)
+                continue
+            data_part = self.buffer[3 : 3 + message_length]
+            next_id = next((index for index, byte in enumerate(data_part) if byte & 0x80), None)
+            if next_id is not None:
+                logger.warning("illegal data in message 0x%x found", message_id)
+                logger.warning("ignore collected message data %s", tuple(data_part[:next_id]))
+                self._drop(3 + next_id)
+                continue
+            if len(data_part) < message_length:
+                break
+            messages.append((message_id, tuple(data_part)))
+            del self.buffer[: 3 + message_length]
+        return messages
+
+
+class SerialStats(object):
+    """Round trip times per command and traffic counters of the serial DGT board."""
+
+    def __init__(self, samples=ROUND_TRIP_SAMPLES):
+        self.samples = samples
+        self.round_trips: dict = {}  # command name: deque of seconds
+        self.counts: dict = {}
+        self.bytes_in = self.messages_in = self.commands_out = 0
+        self.clock_resends = self.clock_dropped = self.clock_queue_max = 0
+
+    def add(self, name: str, seconds: float):
+        """Record the time between a command and its answer."""
+        if name not in self.counts:
+            self.round_trips[name] = deque(maxlen=self.samples)
+            self.counts[name] = 0
+        self.round_trips[name].append(seconds)
+        self.counts[name] += 1
+
+    def report(self) -> dict:
+        round_trips = {}
+        for name in sorted(self.counts):
+            samples = self.round_trips[name]
+            round_trips[name] = {
+                "count": self.counts[name],
+                "p50_ms": round(EventStats.percentile(samples, 0.5) * 1000, 2),
+                "p99_ms": round(EventStats.percentile(samples, 0.99) * 1000, 2),
+                "max_ms": round(max(samples) * 1000, 2),
+            }
+        return {
+            "round_trips": round_trips,
+            "bytes_in": self.bytes_in,
+            "messages_in": self.messages_in,
+            "commands_out": self.commands_out,
+            "clock_resends": self.clock_resends,
+            "clock_dropped": self.clock_dropped,
+            "clock_queue_max": self.clock_queue_max,
+        }
+
 
 class Rev2Info:
     is_revelation = False
@@ -104,11 +229,17 @@ class DgtBoard(EBoard):
         self.field_factor = field_factor % 10
 
         self.serial = None
+        self.serial_fd: Optional[int] = None  # watched by the event loop for incoming data
         self.lock = Lock()  # lock the serial write
-        self.incoming_board_thread = None
+        self.incoming_board_task: Optional[asyncio.Task] = None
+        self.disconnected = asyncio.Event()
+        self.parser = DgtParser()
+        self.stats = SerialStats()
+        self.pending_replies: dict = {}  # expected message id: (command name, send time)
         self.lever_pos: Optional[int] = None
-        # the next three are only used for "not dgtpi" mode
+        # the next four are only used for "not dgtpi" mode
         self.clock_lock: float = 0.0  # serial connected clock is locked
+        self.clock_queue: Deque[Tuple[list, bytes]] = deque()  # waiting for the ack of the last clock command
         self.last_clock_command: list = []  # Used for resend last (failed) clock command
         self.enable_ser_clock: Optional[bool] = (
             None  # None = "unknown status" False="only board found" True="clock also found"
@@ -136,6 +267,13 @@ class DgtBoard(EBoard):
 
         self.in_settime = False  # this is true between set_clock and clock_start => use set values instead of clock
         self.low_time = False  # This is set from picochess.py and used to limit the field timer
+        dgt_boards.append(self)
+
+    def serial_stats(self) -> dict:
+        """Return the round trip times and traffic counters (for /debug/events)."""
+        report = self.stats.report()
+        report.update(device=self.device, bytes_dropped=self.parser.dropped, clock_queue=len(self.clock_queue))
+        return report
 
     def expired_field_timer(self):
         """Board position hasnt changed for some time."""
@@ -147,7 +285,6 @@ class DgtBoard(EBoard):
         """Stop the field timer cause another field change been send."""
         logger.debug("board position was unstable => ignore former field update")
         self.field_timer.cancel()
-        self.field_timer.join()
         self.field_timer_running = False
 
     def start_field_timer(self):
@@ -157,8 +294,7 @@ class DgtBoard(EBoard):
         else:
             wait = (0.5 if self.channel == "BT" else 0.25) + 0.03 * self.field_factor  # BT's scanning in half speed
         logger.debug("board position changed => wait %.2fsecs for a stable result low_time: %s", wait, self.low_time)
-        self.field_timer = Timer(wait, self.expired_field_timer)
-        self.field_timer.start()
+        self.field_timer = self.loop.call_later(wait, self.expired_field_timer)
         self.field_timer_running = True
 
     def write_command(self, message: list):
@@ -173,6 +309,29 @@ class DgtBoard(EBoard):
             if mes.value == DgtClk.DGT_CMD_REV2_ASCII.value:
                 logger.debug("sending text [%s] to (rev) clock", "".join([chr(elem) for elem in message[4:15]]))
 
+        data = self._encode(message)
+        if data is None:
+            return False
+        if message[0] == DgtCmd.DGT_CLOCK_MESSAGE:
+            if len(self.clock_queue) >= CLOCK_QUEUE_SIZE:
+                self._drop_clock_text(newest=message[3].value in CLOCK_TEXT_COMMANDS)
+            self.clock_queue.append((message, data))
+            self.stats.clock_queue_max = max(self.stats.clock_queue_max, len(self.clock_queue))
+            self._send_clock_command()
+            return True
+
+        if not self._write_serial(data):
+            return False
+        reply = REPLIES.get(message[0])
+        if reply is not None and reply not in self.pending_replies:
+            self.pending_replies[reply] = (message[0].name, time.time())
+        if message[0] == DgtCmd.DGT_SET_LEDS:
+            logger.debug("(rev) leds turned %s", "on" if message[2] else "off")
+        return True
+
+    @staticmethod
+    def _encode(message: list) -> Optional[bytes]:
+        """Return the bytes of the message list, None if it contains an unsupported type."""
         array = []
         char_to_xl = {
             "0": 0x3F,
@@ -232,41 +391,78 @@ class DgtBoard(EBoard):
                         array.append(char_to_xl[character.lower()])
             else:
                 logger.error("type not supported [%s]", type(item))
-                return False
+                return None
 
-        while True:
-            if self.serial:
-                with self.lock:
-                    try:
-                        self.serial.write(bytearray(array))
-                        break
-                    except ValueError:
-                        logger.error("invalid bytes sent %s", message)
-                        return False
-                    except SerialException as write_expection:
-                        logger.error(write_expection)
-                        self.serial.close()
-                        self.serial = None
-                    except IOError as write_expection:
-                        logger.error(write_expection)
-                        self.serial.close()
-                        self.serial = None
-            if mes == DgtCmd.DGT_RETURN_SERIALNR:
-                break
-            time.sleep(0.1)
+        return bytes(array)
 
-        if message[0] == DgtCmd.DGT_SET_LEDS:
-            logger.debug("(rev) leds turned %s", "on" if message[2] else "off")
-        if message[0] == DgtCmd.DGT_CLOCK_MESSAGE:
+    def _write_serial(self, data: bytes) -> bool:
+        if not self.serial:
+            return False
+        with self.lock:
+            try:
+                self.serial.write(data)
+            except ValueError:
+                logger.error("invalid bytes sent %s", list(data))
+                return False
+            except SerialException as write_expection:
+                logger.error(write_expection)
+                self._close_serial()
+                return False
+            except IOError as write_expection:
+                logger.error(write_expection)
+                self._close_serial()
+                return False
+        self.stats.commands_out += 1
+        return True
+
+    def _drop_clock_text(self, newest: bool):
+        """Drop a queued text command of the full clock queue, set_and_run and end_text are always kept.
+
+        A new text replaces the newest queued text, only the last text matters. Any other new command
+        drops the oldest queued text. Without a queued text nothing is dropped and the queue grows.
+        """
+        texts = [index for index, (queued, _) in enumerate(self.clock_queue) if queued[3].value in CLOCK_TEXT_COMMANDS]
+        if not texts:
+            logger.warning("(ser) clock queue full => no text to drop")
+            return
+        index = texts[-1] if newest else texts[0]
+        logger.warning("(ser) clock queue full => dropping [%s]", self.clock_queue[index][0][3])
+        del self.clock_queue[index]
+        self.stats.clock_dropped += 1
+
+    def _send_clock_command(self):
+        """Write the next queued clock command, as soon as the clock acknowledged the last one."""
+        if self.clock_lock or not self.clock_queue:
+            return
+        message, data = self.clock_queue.popleft()
+        if self._write_serial(data):
             self.last_clock_command = message
-            if self.clock_lock:
-                logger.warning('(ser) clock is already locked. Maybe a "resend"?')
-            else:
-                logger.debug("(ser) clock is locked now")
+            logger.debug("(ser) clock is locked now")
             self.clock_lock = time.time()
-        else:
-            time.sleep(0.1)  # give the board some time to process the command
-        return True
+
+    def _resend_clock_command(self):
+        """Unlock the clock and write the last clock command again, in front of the queued ones."""
+        self.clock_lock = 0.0
+        if self.last_clock_command:
+            self.clock_queue.appendleft((self.last_clock_command, self._encode(self.last_clock_command)))
+            self.stats.clock_resends += 1
+        self._send_clock_command()
+
+    def _close_serial(self):
+        """Forget the broken serial connection, the incoming board task opens it again."""
+        if self.serial_fd is not None:
+            self.loop.remove_reader(self.serial_fd)
+            self.serial_fd = None
+        if self.serial:
+            self.serial.close()
+            self.serial = None
+        self.clock_lock = 0.0
+        self.clock_queue.clear()
+        self.pending_replies.clear()
+        if self.watchdog_timer.is_running():
+            logger.debug("watchdog timer is stopped now")
+            self.watchdog_timer.stop()
+        self.disconnected.set()
 
     def _process_board_message(self, message_id: int, message: tuple, message_length: int):
         if False:  # switch-case
@@ -324,7 +520,7 @@ class DgtBoard(EBoard):
                     logger.warning("(ser) clock ACK error %s", (ack0, ack1, ack2, ack3))
                     if self.last_clock_command:
                         logger.debug("(ser) clock resending failed message [%s]", self.last_clock_command)
-                        self.write_command(self.last_clock_command)
+                        self._resend_clock_command()
                         self.last_clock_command = []  # only resend once
                     return
                 else:
@@ -333,6 +529,8 @@ class DgtBoard(EBoard):
                         cmd = self.last_clock_command[3]  # type: DgtClk
                         if cmd.value != ack1 and ack1 < 0x80:
                             logger.warning("(ser) clock ACK [%s] out of sync - last: [%s]", DgtAck(ack1), cmd)
+                        elif self.clock_lock and cmd.value == ack1:
+                            self.stats.add(cmd.name, time.time() - self.clock_lock)
                 # @todo these lines are better as what is done on DgtHw but it doesnt work
                 # if ack1 == DgtAck.DGT_ACK_CLOCK_SETNRUN.value:
                 #     logger.info('(ser) clock out of set time now')
@@ -443,7 +641,8 @@ class DgtBoard(EBoard):
                 logger.debug("(ser) clock null message ignored")
             if self.clock_lock:
                 logger.debug("(ser) clock unlocked after %.3f secs", time.time() - self.clock_lock)
-                self.clock_lock = False
+                self.clock_lock = 0.0
+            self._send_clock_command()
 
         elif message_id == DgtMsg.DGT_MSG_BOARD_DUMP:
             if message_length != 64:
@@ -520,93 +719,52 @@ class DgtBoard(EBoard):
         else:  # Default
             logger.warning("message not handled [%s]", DgtMsg(message_id))
 
-    def _read_serial(self, bytes_toread=1):
-        try:
-            return self.serial.read(bytes_toread)
-        except SerialException:
-            pass
-        except AttributeError:  # serial is None (race condition)
-            pass
-        return b""
-
-    def _read_board_message(self, head: bytes):
-        message: Tuple = ()
-        header_len = 3
-        header = head + self._read_serial(header_len - 1)
-        try:
-            header = struct.unpack(">BBB", header)
-        except struct.error:
-            logger.warning("timeout in header reading")
-            return message
-        message_id = header[0]
-        message_length = counter = (header[1] << 7) + header[2] - header_len
-        if message_length <= 0 or message_length > 64:
-            if message_id == 0x8F and message_length == 0x1F00:  # @todo find out why this can happen
-                logger.warning("falsely DGT_SEND_EE_MOVES send before => receive and ignore EE_MOVES result")
-                self.watchdog_timer.stop()  # this serial read gonna take around 8secs
-                now = time.time()
-                while counter > 0:
-                    ee_moves = self._read_serial(counter)
-                    if self.serial:
-                        logger.debug(
-                            "EE_MOVES 0x%x bytes read - inWaiting: 0x%x", len(ee_moves), self.serial.inWaiting()
-                        )
-                    counter -= len(ee_moves)
-                    if time.time() - now > 15:
-                        logger.warning("EE_MOVES needed over 15secs => ignore not readed 0x%x bytes now", counter)
-                        break
-                self.watchdog_timer.start()
-            else:
-                logger.warning("illegal length in message header 0x%x length: %i", message_id, message_length)
-            return message
-
+    def _read_board_messages(self):
+        """Called by the event loop as soon as the serial port has data."""
         try:
+            data = self.serial.read(self.serial.in_waiting or 1)
+        except SerialException as read_exception:
+            logger.error(read_exception)
+            self._close_serial()
+            return
+        except IOError as read_exception:
+            logger.error(read_exception)
+            self._close_serial()
+            return
+        self._process_serial_data(data)
+
+    def _process_serial_data(self, data: bytes):
+        self.stats.bytes_in += len(data)
+        for message_id, message in self.parser.feed(data):
+            self.stats.messages_in += 1
+            if message_id in self.pending_replies:
+                name, send_time = self.pending_replies.pop(message_id)
+                self.stats.add(name, time.time() - send_time)
             if not message_id == DgtMsg.DGT_MSG_SERIALNR:
-                logger.debug("(ser) board get [%s] length: %i", DgtMsg(message_id), message_length)
-        except ValueError:
-            logger.warning("illegal id in message header 0x%x length: %i", message_id, message_length)
-            return message
-
-        while counter:
-            byte = self._read_serial()
-            try:
-                if byte:
-                    data: Tuple = struct.unpack(">B", byte)
-                    counter -= 1
-                    if data[0] & 0x80:
-                        logger.warning("illegal data in message 0x%x found", message_id)
-                        logger.warning("ignore collected message data %s", message)
-                        return self._read_board_message(byte)
-                    message += data
-                else:
-                    logger.warning("timeout in data reading")
-            except struct.error:
-                logger.warning("struct error => maybe a reconnected board?")
-
-        self._process_board_message(message_id, message, message_length)
-        return message
+                logger.debug("(ser) board get [%s] length: %i", DgtMsg(message_id), len(message))
+            self._process_board_message(message_id, message, len(message))
 
-    def _process_incoming_board_forever(self):
-        counter = 0
+    async def _process_incoming_board_forever(self):
         logger.info("incoming_board ready")
         while True:
-            byte = b""
-            if self.serial:
-                byte = self._read_serial()
-            else:
-                self._setup_serial_port()
-                if self.serial:
-                    logger.debug("sleeping for 0.5 secs. Afterwards startup the (ser) board")
-                    time.sleep(0.5)
-                    counter = 0
-                    self._startup_serial_board()
-            if byte and byte[0] & 0x80:
-                self._read_board_message(head=byte)
-            else:
-                counter = (counter + 1) % 10
-                if counter == 0 and not self.watchdog_timer.is_running():
+            if not self.serial:
+                if not await asyncio.to_thread(self._setup_serial_port):
+                    await asyncio.sleep(0.1)
+                    continue
+                logger.debug("sleeping for 0.5 secs. Afterwards startup the (ser) board")
+                await asyncio.sleep(0.5)
+                if not self.serial:
+                    continue
+                self.parser.reset()
+                self.disconnected.clear()
+                self.serial_fd = self.serial.fileno()
+                self.loop.add_reader(self.serial_fd, self._read_board_messages)
+                self._startup_serial_board()
+            try:
+                await asyncio.wait_for(self.disconnected.wait(), 1)
+            except asyncio.TimeoutError:
+                if not self.watchdog_timer.is_running():
                     self._watchdog()  # issue 150 - check for alive connection, so write something to the board
-                time.sleep(0.1)
 
     def ask_battery_status(self):
         """Ask the BT board for the battery status."""
@@ -636,8 +794,7 @@ class DgtBoard(EBoard):
             if time.time() - self.clock_lock > 2:
                 logger.debug("(ser) clock is locked over 2secs")
                 logger.debug("resending locked (ser) clock message [%s]", self.last_clock_command)
-                self.clock_lock = 0.0
-                self.write_command(self.last_clock_command)
+                self._resend_clock_command()
         self.write_command([DgtCmd.DGT_RETURN_SERIALNR])  # ask for this AFTER cause of - maybe - old board hardware
 
     def _open_bluetooth(self):
@@ -822,7 +979,7 @@ class DgtBoard(EBoard):
     def _open_serial(self, device: str):
         assert not self.serial, "serial connection still active: %s" % self.serial
         try:
-            self.serial = Serial(device, stopbits=STOPBITS_ONE, parity=PARITY_NONE, bytesize=EIGHTBITS, timeout=0.5)
+            self.serial = Serial(device, stopbits=STOPBITS_ONE, parity=PARITY_NONE, bytesize=EIGHTBITS, timeout=0)
         except SerialException:
             return False
         return True
@@ -835,9 +992,6 @@ class DgtBoard(EBoard):
 
         waitchars = ["/", "-", "\\", "|"]
 
-        if self.watchdog_timer.is_running():
-            logger.debug("watchdog timer is stopped now")
-            self.watchdog_timer.stop()
         if self.serial:
             return True
         with self.lock:
@@ -869,23 +1023,8 @@ class DgtBoard(EBoard):
         return False
 
     # dgtHw functions start
-    def _wait_for_clock(self, func: str):
-        has_to_wait = False
-        counter = 0
-        while self.clock_lock:
-            if not has_to_wait:
-                has_to_wait = True
-                logger.debug("(ser) clock is locked => waiting to serve: %s", func)
-            time.sleep(0.1)
-            counter = (counter + 1) % 30
-            if counter == 0:
-                logger.warning("(ser) clock is locked over 3secs")
-        if has_to_wait:
-            logger.debug("(ser) clock is released now")
-
     def set_text_rp(self, text: bytes, beep: int):
         """Display a text on a Pi enabled Rev2."""
-        self._wait_for_clock("SetTextRp()")
         res = self.write_command(
             [
                 DgtCmd.DGT_CLOCK_MESSAGE,
@@ -911,7 +1050,6 @@ class DgtBoard(EBoard):
 
     def set_text_3k(self, text: bytes, beep: int):
         """Display a text on a 3000 Clock."""
-        self._wait_for_clock("SetText3K()")
         res = self.write_command(
             [
                 DgtCmd.DGT_CLOCK_MESSAGE,
@@ -943,7 +1081,6 @@ class DgtBoard(EBoard):
                 result = 0x02
             return result
 
-        self._wait_for_clock("SetTextXL()")
         icn = (_transfer(right_icons) & 0x07) | (_transfer(left_icons) << 3) & 0x38
         res = self.write_command(
             [
@@ -966,7 +1103,6 @@ class DgtBoard(EBoard):
 
     def set_and_run(self, lr: int, lh: int, lm: int, ls: int, rr: int, rh: int, rm: int, rs: int):
         """Set the clock with times and let it run."""
-        self._wait_for_clock("SetAndRun()")
         side = ClockSide.NONE
         if lr == 1 and rr == 0:
             side = ClockSide.LEFT
@@ -992,7 +1128,6 @@ class DgtBoard(EBoard):
 
     def end_text(self):
         """Return the clock display to time display."""
-        self._wait_for_clock("EndText()")
         res = self.write_command(
             [
                 DgtCmd.DGT_CLOCK_MESSAGE,
@@ -1007,7 +1142,6 @@ class DgtBoard(EBoard):
     def light_squares_on_revelation(self, uci_move: str):
         """Light the Rev2 leds."""
         if self.is_revelation and not self.disable_revelation_leds:
-            # self._wait_for_clock('LIGHTon')
             logger.debug("(rev) leds turned on - move: %s", uci_move)
             fr_s = (8 - int(uci_move[1])) * 8 + ord(uci_move[0]) - ord("a")
             to_s = (8 - int(uci_move[3])) * 8 + ord(uci_move[2]) - ord("a")
@@ -1032,5 +1166,12 @@ class DgtBoard(EBoard):
 
     def run(self):
         """NOT called from threading.Thread instead inside the __init__ function from hw.py."""
-        self.incoming_board_thread = Timer(0, self._process_incoming_board_forever)
-        self.incoming_board_thread.start()
+        self.incoming_board_task = self.loop.create_task(self._process_incoming_board_forever())
+
+
+dgt_boards: List[DgtBoard] = []
+
+
+def dgt_board_stats() -> List[dict]:
+    """Return the serial counters of all DGT boards (for /debug/events)."""
+    return [board.serial_stats() for board in dgt_boards]
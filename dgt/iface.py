@@ -195,7 +195,6 @@ class DgtIface(DisplayDgt):
                 await self._process_message(message)
                 # res = await task # needed only for debug below
                 self.dgt_queue.task_done()
-                await asyncio.sleep(0.05)  # balancing message queues
                 # if not res:
                 #    logger.warning("DgtApi command %s failed result: %s", message, res)
         except asyncio.CancelledError:
@@ -29,6 +29,70 @@ from dgt.api import Dgt
 
 logger = logging.getLogger(__name__)
 
+MSG_MARK = "\x00"  # frames the msg format specs inside a compiled text
+
+
+class MsgText(str):
+    """Stand-in for the msg string while DgtTranslate compiles a text.
+
+    The value is the text built so far, each use of msg is written as MSG_MARK + format spec + MSG_MARK.
+    Only the string operations which can be replayed later with format(msg, spec) are allowed,
+    all others raise a TypeError and the text_id is not compiled.
+    """
+
+    def __new__(cls, value=MSG_MARK * 2):
+        return super().__new__(cls, value)
+
+    def __getattribute__(self, name):
+        if name.startswith("__") or name in ("ljust", "rjust"):
+            return super().__getattribute__(name)
+        raise TypeError("msg." + name + " can't be compiled")
+
+    def _spec(self) -> str:
+        """Return the format spec if the text is msg alone."""
+        parts = str.split(self, MSG_MARK)
+        if len(parts) != 3 or parts[0] or parts[2] or parts[1][:1] not in ("", "."):
+            raise TypeError("only msg itself can be sliced or padded")
+        return parts[1]
+
+    def __getitem__(self, key):
+        spec = MsgText._spec(self)
+        if not isinstance(key, slice) or key.start or key.step or not isinstance(key.stop, int) or key.stop < 0:
+            raise TypeError("only msg[:n] can be compiled")
+        if spec:
+            return MsgText(MSG_MARK + "." + str(min(key.stop, int(spec[1:]))) + MSG_MARK)
+        return MsgText(MSG_MARK + "." + str(key.stop) + MSG_MARK)
+
+    def _pad(self, align: str, width: int, fillchar: str):
+        if fillchar != " " or not isinstance(width, int):
+            raise TypeError("only blanks can be compiled")
+        return MsgText(MSG_MARK + align + str(width) + MsgText._spec(self) + MSG_MARK)
+
+    def ljust(self, width, fillchar=" "):
+        return MsgText._pad(self, "<", width, fillchar)
+
+    def rjust(self, width, fillchar=" "):
+        return MsgText._pad(self, ">", width, fillchar)
+
+    def __add__(self, other):
+        if not isinstance(other, str):
+            return NotImplemented
+        return MsgText(str.__add__(self, other))
+
+    def __radd__(self, other):
+        if not isinstance(other, str):
+            return NotImplemented
+        return MsgText(str.__add__(other, self))
+
+    def __str__(self):
+        return self
+
+    def _fail(self, *args):
+        raise TypeError("msg value is needed")
+
+    __len__ = __iter__ = __contains__ = __format__ = __mod__ = __rmod__ = __mul__ = __rmul__ = _fail
+    __eq__ = __ne__ = __lt__ = __le__ = __gt__ = __ge__ = __hash__ = _fail
+
 
 class DgtTranslate(object):
     """Handle translations for clock texts or moves."""
@@ -50,16 +114,24 @@ class DgtTranslate(object):
         self.notation = False  # Set from dgt.menu lateron
         self.update_status = "no info"
         self.git_status = "no info"
+        self.clear_compiled()
 
     def set_last_updated_info(self, update_status: str):
         """Set last update status info string."""
         if update_status:
             self.update_status = update_status
+            self.clear_compiled()
 
     def set_git_info(self, git_status: str):
         """Set last update status info string."""
         if git_status:
             self.git_status = git_status
+            self.clear_compiled()
+
+    def clear_compiled(self):
+        """Forget the compiled texts, they are compiled again for the current language and status."""
+        self.compiled = {}  # text_id: (web_text, large_text, medium_text, small_text, wait)
+        self.uncompiled = set()  # text_ids depending on more than a msg string
 
     def beep_to_config(self, beep: Beep):
         """Transfer beep to dict."""
@@ -82,6 +154,7 @@ class DgtTranslate(object):
     def set_language(self, language: str):
         """Set language."""
         self.language = language
+        self.clear_compiled()
 
     def set_capital(self, capital: bool):
         """Set capital letters."""
@@ -103,7 +176,6 @@ class DgtTranslate(object):
         """Return standard text for clock display."""
         if devs is None:  # prevent W0102 error
             devs = {"ser", "i2c", "web"}
-        entxt = detxt = nltxt = frtxt = estxt = ittxt = None  # error case
 
         (code, text_id) = str_code.split("_", 1)
         if code[0] == "B":
@@ -121,6 +193,68 @@ class DgtTranslate(object):
         else:
             beep = False
         maxtime = int(code[1:]) / 10
+
+        if isinstance(msg, str) and text_id not in self.uncompiled:
+            compiled = self.compiled.get(text_id)
+            if compiled is None:
+                compiled = self._compile(text_id)
+            if compiled is not None:
+                web_text, large_text, medium_text, small_text, wait = compiled
+                return self.capital_text(
+                    Dgt.DISPLAY_TEXT(
+                        web_text=self._fill(web_text, msg),
+                        large_text=self._fill(large_text, msg),
+                        medium_text=self._fill(medium_text, msg),
+                        small_text=self._fill(small_text, msg),
+                        wait=wait,
+                        beep=beep,
+                        maxtime=maxtime,
+                        devs=devs,
+                    )
+                )
+        return self.capital_text(self._text(text_id, msg, beep, maxtime, devs))
+
+    def _compile(self, text_id: str):
+        """Compile the texts of text_id for the current language, None if they depend on more than msg."""
+        try:
+            txt = self._text(text_id, MsgText(), None, None, None)
+            fields = tuple(
+                self._template(value) for value in (txt.web_text, txt.large_text, txt.medium_text, txt.small_text)
+            )
+        except (TypeError, ValueError, IndexError, KeyError, AttributeError):
+            txt = None
+        # a text_id setting its own beep or an unknown one (maxtime=0) stays with the long way
+        if txt is None or txt.beep is not None or txt.maxtime is not None:
+            self.uncompiled.add(text_id)
+            return None
+        compiled = fields + (txt.wait,)
+        self.compiled[text_id] = compiled
+        return compiled
+
+    @staticmethod
+    def _template(value: str):
+        """Split a compiled text into literal parts and msg format specs, plain texts stay as they are."""
+        if not isinstance(value, str):
+            raise TypeError("text is not a string")
+        parts = str.split(value, MSG_MARK)
+        if len(parts) == 1:
+            return parts[0]
+        if len(parts) % 2 == 0:
+            raise ValueError("msg field cut in half")
+        for spec in parts[1::2]:
+            format("", spec)  # raises ValueError on a broken spec
+        return tuple(parts)
+
+    @staticmethod
+    def _fill(template, msg: str) -> str:
+        """Put msg into a compiled text."""
+        if isinstance(template, str):
+            return template
+        return "".join([format(msg, part) if i % 2 else part for i, part in enumerate(template)])
+
+    def _text(self, text_id: str, msg, beep, maxtime, devs):
+        """Return the text for text_id in the current language, not yet in capital letters."""
+        entxt = detxt = nltxt = frtxt = estxt = ittxt = None  # error case
         wait = False
 
         if text_id == "default":
@@ -7846,22 +7980,22 @@ class DgtTranslate(object):
         if self.language == "es":
             # Prefer explicit Spanish texts where they differ from English
             if estxt is not None and estxt is not entxt:
-                return self.capital_text(estxt)
+                return estxt
             es_override = self._spanish_override(text_id, entxt, msg)
             if es_override is not None:
-                return self.capital_text(es_override)
+                return es_override
 
         if self.language == "de" and detxt is not None:
-            return self.capital_text(detxt)
+            return detxt
         if self.language == "nl" and nltxt is not None:
-            return self.capital_text(nltxt)
+            return nltxt
         if self.language == "fr" and frtxt is not None:
-            return self.capital_text(frtxt)
+            return frtxt
         if self.language == "es" and estxt is not None:
-            return self.capital_text(estxt)
+            return estxt
         if self.language == "it" and ittxt is not None:
-            return self.capital_text(ittxt)
-        return self.capital_text(entxt)
+            return ittxt
+        return entxt
 
     def _create_spanish_text(
         self,
@@ -189,7 +189,6 @@ class Dispatcher(DispatchDgt):
                 # asyncio.create_task(self.process_dispatch_message(msg))
                 await self.process_dispatch_message(msg)
                 dispatch_queue.task_done()
-                await asyncio.sleep(0.05)  # balancing message queues
         except asyncio.CancelledError:
             logger.debug("dispatch_queue cancelled")
 
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""A bluepy Peripheral without bluetooth: it replays recorded board notifications.
+
+Give a ReplayPeripheral to the ble Transport (peripheral=...) to run a board protocol
+without a board, for tests and benchmarks. A recording has one notification per line:
+seconds after connecting and the hex data, e.g. "0.250 0102ff".
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, List, Tuple
+
+READ_HANDLE = 0x10
+WRITE_HANDLE = 0x20
+
+
+def read_recording(lines) -> List[Tuple[float, bytes]]:
+    """Return the (seconds, data) notifications of a recording, empty lines and # comments are skipped."""
+    notifications = []
+    for line in lines:
+        line = line.split("#")[0].strip()
+        if line:
+            seconds, data = line.split()
+            notifications.append((float(seconds), bytes.fromhex(data)))
+    return notifications
+
+
+class ReplayCharacteristic(object):
+
+    def __init__(self, uuid: str, handle: int, peripheral: "ReplayPeripheral"):
+        self.uuid = uuid
+        self.handle = handle
+        self.peripheral = peripheral
+
+    def getHandle(self) -> int:
+        return self.handle
+
+    def supportsRead(self) -> bool:
+        return False
+
+    def propertiesToString(self) -> str:
+        return "NOTIFY" if self.handle == READ_HANDLE else "WRITE"
+
+    def write(self, data: bytes, withResponse=False):
+        self.peripheral.check_connection()
+        self.peripheral.written.append((time.monotonic(), bytes(data)))
+
+
+class ReplayService(object):
+
+    def __init__(self, characteristics: List[ReplayCharacteristic]):
+        self.characteristics = characteristics
+
+    def getCharacteristics(self) -> List[ReplayCharacteristic]:
+        return self.characteristics
+
+
+class ReplayPeripheral(object):
+    """Send the notifications at their time after connecting and keep every write."""
+
+    def __init__(self, read_characteristic: str, write_characteristic: str, notifications: List[Tuple[float, bytes]]):
+        self.rx = ReplayCharacteristic(read_characteristic, READ_HANDLE, self)
+        self.tx = ReplayCharacteristic(write_characteristic, WRITE_HANDLE, self)
+        self.pending: Deque[Tuple[float, bytes]] = deque(sorted(notifications, key=lambda item: item[0]))
+        self.delegate: Any = None  # the btle.DefaultDelegate of the Transport
+        self.address = ""
+        self.connected_at = 0.0
+        self.connected = False
+        self.notifying = False
+        self.written: List[Tuple[float, bytes]] = []  # (monotonic time, data)
+        self.sent: List[Tuple[float, bytes]] = []  # (monotonic time the board sent it, data)
+        self.lost = threading.Event()
+
+    def __call__(self, address: str) -> "ReplayPeripheral":
+        """Used as the peripheral factory of the Transport: connect to the board."""
+        self.connect(address)
+        return self
+
+    def connect(self, address: str):
+        self.address = address
+        self.connected = True
+        self.connected_at = time.monotonic()
+        self.lost.clear()
+
+    def disconnect(self):
+        self.connected = False
+
+    def lose_connection(self):
+        """Let the next call fail like an out of range board."""
+        self.lost.set()
+
+    def check_connection(self):
+        if self.lost.is_set():
+            self.connected = False
+        if not self.connected:
+            raise ConnectionError(f"device {self.address} disconnected")
+
+    def setMTU(self, mtu: int):
+        pass
+
+    def getServices(self) -> List[ReplayService]:
+        return [ReplayService([self.rx, self.tx])]
+
+    def withDelegate(self, delegate):
+        self.delegate = delegate
+        return self
+
+    def writeCharacteristic(self, handle: int, val: bytes, withResponse=False):
+        if handle == READ_HANDLE + 1:
+            self.notifying = val == (1).to_bytes(2, byteorder="little")
+
+    def waitForNotifications(self, timeout: float) -> bool:
+        """Wait like bluepy: return True after handling one notification, False after the timeout."""
+        self.check_connection()
+        until = time.monotonic() + timeout
+        if self.notifying and self.pending:
+            due = self.connected_at + self.pending[0][0]
+            if due <= until:
+                if self.lost.wait(max(due - time.monotonic(), 0)):
+                    self.check_connection()
+                _, data = self.pending.popleft()
+                self.sent.append((due, data))
+                self.delegate.handleNotification(self.rx.handle, data)
+                return True
+        if self.lost.wait(max(until - time.monotonic(), 0)):
+            self.check_connection()
+        return False
@@ -31,26 +31,81 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+NOTIFY_WAIT = 0.1  # longest wait for notifications before a queued write is sent
+WRITE_RATE = 10.0  # writes per second, the boards need 0.1 secs between messages
+WRITE_BURST = 1
+CONNECT_HOLD = 0.2  # no writes right after (re)connecting
+
+
+class TokenBucket(object):
+    """Allow rate writes per second on average and up to burst writes at once."""
+
+    def __init__(self, rate: float = WRITE_RATE, burst: int = WRITE_BURST):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.last = time.monotonic()
+
+    def hold(self, seconds: float):
+        """Take all tokens and start refilling after seconds."""
+        self.tokens = 0.0
+        self.last = time.monotonic() + seconds
+
+    def delay(self) -> float:
+        """Return the seconds until the next token, 0 if there is one."""
+        now = time.monotonic()
+        if now > self.last:
+            self.tokens = min(float(self.burst), self.tokens + (now - self.last) * self.rate)
+            self.last = now
+        if self.tokens >= 1:
+            return 0.0
+        return self.last - now + (1 - self.tokens) / self.rate
+
+    def take(self) -> bool:
+        """Take a token, False if there is none yet."""
+        if self.delay() > 0:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class NotificationDelegate(object):
+    """Peripheral delegate putting every notification of the board on the queue."""
+
+    def __init__(self, que: queue.Queue):
+        logger.debug("Init delegate for peri")
+        self.que = que
+
+    def handleNotification(self, cHandle, data):
+        logger.debug(f"BLE: Handle: {cHandle}, data: {data}")
+        self.que.put(data)
+
 
 class Transport(object):
 
-    def __init__(self, que: queue.Queue, read_characteristic: str, write_characteristic: str):
+    def __init__(self, que: queue.Queue, read_characteristic: str, write_characteristic: str, peripheral=None):
         """
         :param que: Queue that will receive events from chess board
+        :param peripheral: creates the device of an address, default is the bluepy Peripheral
         """
-        if not bluepy_ble_support:
+        if not bluepy_ble_support and peripheral is None:
             self.init = False
             return
         self.wrque: queue.Queue = queue.Queue()
         self.que = que
         self._read_characteristic = read_characteristic
         self._write_characteristic = write_characteristic
+        self.peripheral = peripheral if peripheral is not None else Peripheral
+        self.bucket = TokenBucket()
         self.init = True
         logger.debug("bluepy_ble init ok")
         self.scan_timeout = 10
         self.worker_thread_active = False
         self.worker_threader = None
         self.conn_state = None
+        self.fix_cmd = ""
+        if not bluepy_ble_support:
+            return
 
         self.bp_path = os.path.dirname(os.path.abspath(bluepy.__file__))
         self.bp_helper = os.path.join(self.bp_path, "bluepy-helper")
@@ -120,11 +175,11 @@ class Transport(object):
         """
         logger.debug("Starting worker-thread for bluepy ble")
         self.worker_thread_active = True
+        self.conn_state = None  # before the start, a fast connection would be lost otherwise
         self.worker_threader = threading.Thread(target=self._worker_thread, args=(address, self.wrque, self.que))
         self.worker_threader.setDaemon(True)
         self.worker_threader.start()
         timer = time.time()
-        self.conn_state = None
         while self.conn_state is None and time.time() - timer < 5.0:
             time.sleep(0.1)
         if self.conn_state is None:
@@ -151,19 +206,6 @@ class Transport(object):
         que.put("agent-state: " + state + " " + msg)
 
     def _device_open(self, address, device, que):
-
-        class PeriDelegate(DefaultDelegate):
-
-            def __init__(self, que):
-                self.que = que
-                logger.debug("Init delegate for peri")
-                DefaultDelegate.__init__(self)
-
-            def handleNotification(self, cHandle, data):
-                logger.debug(f"BLE: Handle: {cHandle}, data: {data}")
-                logger.debug(f"BLE received [{data}]")
-                que.put(data)
-
         logger.debug(f"Peripheral generated {address}")
         try:
             services = device.getServices()
@@ -176,7 +218,7 @@ class Transport(object):
 
         try:
             logger.debug("Installing peripheral delegate")
-            delegate = PeriDelegate(que)
+            delegate = NotificationDelegate(que)
             device.withDelegate(delegate)
         except Exception as e:
             emsg = f"Bluetooth LE: Failed to install peripheral delegate! {e}"
@@ -220,7 +262,7 @@ class Transport(object):
 
         rx, tx = self._device_open(address, device, que)
 
-        time_last_out = time.time() + 0.2
+        self.bucket.hold(CONNECT_HOLD)
 
         if rx is None or tx is None:
             bt_error = True
@@ -229,39 +271,36 @@ class Transport(object):
             bt_error = False
             self.conn_state = True
 
-        self._handle_device_data(device, address, rx, tx, que, wrque, bt_error, time_last_out)
+        self._handle_device_data(device, address, rx, tx, que, wrque, bt_error)
 
-    def _handle_device_data(self, device, address, rx, tx, que, wrque, bt_error, time_last_out):
-        message_delta_time = 0.1  # least 0.1 sec between outgoing btle messages
+    def _handle_device_data(self, device, address, rx, tx, que, wrque, bt_error):
+        """Send the queued writes as the token bucket allows, sleep in the notification wait in between."""
         while self.worker_thread_active:
             rep_err = False
-            while bt_error:
-                bt_error, rx, tx, time_last_out = self._try_connect(
-                    device, address, rx, tx, que, rep_err, time_last_out
-                )
+            while bt_error and self.worker_thread_active:
+                bt_error, rx, tx = self._try_connect(device, address, rx, tx, que, rep_err)
 
-            if not wrque.empty() and time.time() - time_last_out > message_delta_time:
+            while not bt_error and not wrque.empty() and self.bucket.take():
                 msg = wrque.get()
                 try:
                     tx.write(msg, withResponse=True)
-                    time_last_out = time.time()
                 except Exception as e:
                     logger.error(f"bluepy_ble: failed to write {msg}: {e}")
                     bt_error = True
                     self._agent_state(que, "offline", "BLE connection lost")
                 wrque.task_done()
+            if bt_error:
+                continue
 
             try:
-                self._read(device, rx)
+                device.waitForNotifications(NOTIFY_WAIT if wrque.empty() else self.bucket.delay())
             except Exception as e:
                 logger.warning(f"Bluetooth read error {e}")
                 bt_error = True
                 self._agent_state(que, "offline", "BLE connection lost")
-                continue
-            time.sleep(0.01)
         device.disconnect()
 
-    def _try_connect(self, device, address, rx, tx, que, rep_err, time_last_out):
+    def _try_connect(self, device, address, rx, tx, que, rep_err):
         time.sleep(1)
         bt_error = False
         self.init = False
@@ -273,20 +312,20 @@ class Transport(object):
                 rep_err = True
             bt_error = True
         if not bt_error:
-            rx, tx, time_last_out = self._on_connect(device, address, rx, tx, que, time_last_out)
-        return bt_error, rx, tx, time_last_out
+            rx, tx = self._on_connect(device, address, rx, tx, que)
+        return bt_error, rx, tx
 
-    def _on_connect(self, device, address, rx, tx, que, time_last_out):
+    def _on_connect(self, device, address, rx, tx, que):
         logger.info(f"Bluetooth reconnected to {address}")
         rx, tx = self._device_open(address, device, que)
-        time_last_out = time.time() + 0.2
+        self.bucket.hold(CONNECT_HOLD)
         self.init = True
-        return rx, tx, time_last_out
+        return rx, tx
 
     def _create_device(self, address, que):
         logger.debug(f"bluepy_ble open_mt {address}")
         try:
-            device = Peripheral(address)
+            device = self.peripheral(address)
             device.setMTU(40)
         except Exception as e:
             emsg = f"Failed to create BLE peripheral at {address}, {e}"
@@ -300,8 +339,3 @@ class Transport(object):
         device.connect(address)
         time.sleep(1)  # try to prevent race condition - see https://github.com/IanHarvey/bluepy/issues/325
         device.setMTU(40)
-
-    def _read(self, device, rx):
-        if rx.supportsRead():
-            rx.read()
-        device.waitForNotifications(0.05)
@@ -75,7 +75,7 @@ class ChessLinkBoard(EBoard):
         while True:
             if self.agent is not None:
                 try:
-                    result = self.appque.get(block=False)
+                    result = self.appque.get(timeout=1.0)  # sleep until the next board event
                     if "cmd" in result and result["cmd"] == "agent_state" and "state" in result and "message" in result:
                         if result["state"] == "offline":
                             text = self._display_text(result["message"], result["message"], "no/", bwait)
@@ -87,7 +87,8 @@ class ChessLinkBoard(EBoard):
                         DisplayMsg.show_sync(Message.DGT_FEN(fen=fen, raw=True))
                 except queue.Empty:
                     pass
-            time.sleep(0.1)
+            else:
+                time.sleep(0.1)
 
     def _connect(self):
         logger.info("connecting to board")
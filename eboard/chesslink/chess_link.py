@@ -242,6 +242,7 @@ class ChessLink:
         if self.trans is not None:
             self.trans.quit()
         self.thread_active = False
+        self.trque.put(None)
 
     def position_initialized(self):
         """
@@ -287,134 +288,132 @@ class ChessLink:
         """
         logger.debug("Chess Link worker thread started.")
         while self.thread_active:
-            if self.trque.empty() is False:
-                msg = self.trque.get()
-                token = "agent-state: "
-                if msg[: len(token)] == token:
-                    toks = msg[len(token):]
-                    i = toks.find(" ")
-                    if i != -1:
-                        state = toks[:i]
-                        emsg = toks[i + 1:]
-                    else:
-                        state = toks
-                        emsg = ""
-                    logger.info(f"Agent state of {self.name} changed to {state}, {emsg}")
-                    if state == "offline":
-                        self.error_condition = True
-                    else:
-                        self.error_condition = False
-                    self.appque.put(
-                        {
-                            "cmd": "agent_state",
-                            "state": state,
-                            "message": emsg,
-                            "version": f"{self.version} ChessLink: {self.board_version}",
-                            "class": "board",
-                            "actor": self.name,
-                        }
-                    )
-                    continue
-
-                if len(msg) > 0:
-                    if msg[0] == "s":
-                        if len(msg) == 67:
-                            rp = msg[1:65]
-                            val_pos = True
-                            position = [[0 for x in range(8)] for y in range(8)]
-                            if len(rp) == 64:
-                                for y in range(8):
-                                    for x in range(8):
-                                        c = rp[7 - x + y * 8]
-                                        i = self.figrep["ascii"].find(c)
-                                        if i == -1:
-                                            logger.warning(f"Invalid char in raw position: {c}")
-                                            val_pos = False
-                                            continue
+            msg = self.trque.get()  # blocks until the transport has something
+            if msg is None:  # woken up by quit()
+                continue
+            token = "agent-state: "
+            if msg[: len(token)] == token:
+                toks = msg[len(token):]
+                i = toks.find(" ")
+                if i != -1:
+                    state = toks[:i]
+                    emsg = toks[i + 1:]
+                else:
+                    state = toks
+                    emsg = ""
+                logger.info(f"Agent state of {self.name} changed to {state}, {emsg}")
+                if state == "offline":
+                    self.error_condition = True
+                else:
+                    self.error_condition = False
+                self.appque.put(
+                    {
+                        "cmd": "agent_state",
+                        "state": state,
+                        "message": emsg,
+                        "version": f"{self.version} ChessLink: {self.board_version}",
+                        "class": "board",
+                        "actor": self.name,
+                    }
+                )
+                continue
+
+            if len(msg) > 0:
+                if msg[0] == "s":
+                    if len(msg) == 67:
+                        rp = msg[1:65]
+                        val_pos = True
+                        position = [[0 for x in range(8)] for y in range(8)]
+                        if len(rp) == 64:
+                            for y in range(8):
+                                for x in range(8):
+                                    c = rp[7 - x + y * 8]
+                                    i = self.figrep["ascii"].find(c)
+                                    if i == -1:
+                                        logger.warning(f"Invalid char in raw position: {c}")
+                                        val_pos = False
+                                        continue
+                                    else:
+                                        f = self.figrep["int"][i]
+                                        if self.orientation is True:
+                                            position[y][x] = f
                                         else:
-                                            f = self.figrep["int"][i]
-                                            if self.orientation is True:
-                                                position[y][x] = f
-                                            else:
-                                                position[7 - y][7 - x] = f
-                            else:
-                                val_pos = False
-                                logger.warning(f"Error in board position, received {len(rp)}")
-                                continue
+                                            position[7 - y][7 - x] = f
                         else:
                             val_pos = False
-                            logger.error(f"Incomplete board position, {msg}")
-                        if val_pos is True:
-                            fen = self.position_to_fen(position)
-                            sfen = self.short_fen(fen)
-                            if sfen == "RNBKQBNR/PPPPPPPP/8/8/8/8/pppppppp/rnbkqbnr":
-                                if self.orientation is True:
-                                    logger.debug("Cable-left board detected.")
-                                    self.orientation = False
-                                    self.write_configuration()
-                                    position_inv = copy.deepcopy(position)
-                                    for x in range(8):
-                                        for y in range(8):
-                                            position[x][y] = position_inv[7 - x][7 - y]
-                                else:
-                                    logger.debug("Cable-right board detected.")
-                                    self.orientation = True
-                                    self.write_configuration()
-                                    position_inv = copy.deepcopy(position)
-                                    for x in range(8):
-                                        for y in range(8):
-                                            position[x][y] = position_inv[7 - x][7 - y]
-                            fen = self.position_to_fen(position)
-                            sfen = self.short_fen(fen)
-
-                            if sfen == "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR":
-                                if self.is_new_game is False:
-                                    self.is_new_game = True  # XXX changed on cleanup
-                                    cmd = {
-                                        "cmd": "new_game",
-                                        "actor": self.name,
-                                        "orientation": self.orientation,
-                                    }  # XXX: orientation?!
-                                    self.new_game(position)
-                                    self.appque.put(cmd)
+                            logger.warning(f"Error in board position, received {len(rp)}")
+                            continue
+                    else:
+                        val_pos = False
+                        logger.error(f"Incomplete board position, {msg}")
+                    if val_pos is True:
+                        fen = self.position_to_fen(position)
+                        sfen = self.short_fen(fen)
+                        if sfen == "RNBKQBNR/PPPPPPPP/8/8/8/8/pppppppp/rnbkqbnr":
+                            if self.orientation is True:
+                                logger.debug("Cable-left board detected.")
+                                self.orientation = False
+                                self.write_configuration()
+                                position_inv = copy.deepcopy(position)
+                                for x in range(8):
+                                    for y in range(8):
+                                        position[x][y] = position_inv[7 - x][7 - y]
                             else:
-                                self.is_new_game = False
-
-                            with mutex:
-                                self.position = copy.deepcopy(position)
-                                if self.reference_position is None:
-                                    self.reference_position = copy.deepcopy(position)
-                            self.appque.put({"cmd": "raw_board_position", "fen": fen, "actor": self.name})
-                            self._check_move(position)
-                    if msg[0] == "v":
-                        logger.debug("got version reply")
-                        if len(msg) == 7:
-                            version = "{}.{}".format(msg[1] + msg[2], msg[3] + msg[4])
-                            self.board_version = version
-                        else:
-                            logger.warning(f"Bad length of version-reply: {len(version)}")
-
-                    if msg[0] == "l":
-                        logger.debug("got led-set reply")
-                    if msg[0] == "x":
-                        logger.debug("got led-off reply")
-                    if msg[0] == "w":
-                        logger.debug("got write-register reply")
-                        if len(msg) == 7:
-                            reg_cont = "{}->{}".format(msg[1] + msg[2], msg[3] + msg[4])
-                            logger.debug(f"Register written: {reg_cont}")
+                                logger.debug("Cable-right board detected.")
+                                self.orientation = True
+                                self.write_configuration()
+                                position_inv = copy.deepcopy(position)
+                                for x in range(8):
+                                    for y in range(8):
+                                        position[x][y] = position_inv[7 - x][7 - y]
+                        fen = self.position_to_fen(position)
+                        sfen = self.short_fen(fen)
+
+                        if sfen == "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR":
+                            if self.is_new_game is False:
+                                self.is_new_game = True  # XXX changed on cleanup
+                                cmd = {
+                                    "cmd": "new_game",
+                                    "actor": self.name,
+                                    "orientation": self.orientation,
+                                }  # XXX: orientation?!
+                                self.new_game(position)
+                                self.appque.put(cmd)
                         else:
-                            logger.warning(f"Invalid length {len(msg)} for write-register reply")
-                    if msg[0] == "r":
-                        logger.debug("got read-register reply")
-                        if len(msg) == 7:
-                            reg_cont = "{}->{}".format(msg[1] + msg[2], msg[3] + msg[4])
-                            logger.debug(f"Register content: {reg_cont}")
-                        else:
-                            logger.warning(f"Invalid length {len(msg)} for read-register reply")
-
-            else:
-                time.sleep(0.01)
+                            self.is_new_game = False
+
+                        with mutex:
+                            self.position = copy.deepcopy(position)
+                            if self.reference_position is None:
+                                self.reference_position = copy.deepcopy(position)
+                        self.appque.put({"cmd": "raw_board_position", "fen": fen, "actor": self.name})
+                        self._check_move(position)
+                if msg[0] == "v":
+                    logger.debug("got version reply")
+                    if len(msg) == 7:
+                        version = "{}.{}".format(msg[1] + msg[2], msg[3] + msg[4])
+                        self.board_version = version
+                    else:
+                        logger.warning(f"Bad length of version-reply: {len(version)}")
+
+                if msg[0] == "l":
+                    logger.debug("got led-set reply")
+                if msg[0] == "x":
+                    logger.debug("got led-off reply")
+                if msg[0] == "w":
+                    logger.debug("got write-register reply")
+                    if len(msg) == 7:
+                        reg_cont = "{}->{}".format(msg[1] + msg[2], msg[3] + msg[4])
+                        logger.debug(f"Register written: {reg_cont}")
+                    else:
+                        logger.warning(f"Invalid length {len(msg)} for write-register reply")
+                if msg[0] == "r":
+                    logger.debug("got read-register reply")
+                    if len(msg) == 7:
+                        reg_cont = "{}->{}".format(msg[1] + msg[2], msg[3] + msg[4])
+                        logger.debug(f"Register content: {reg_cont}")
+                    else:
+                        logger.warning(f"Invalid length {len(msg)} for read-register reply")
 
     def new_game(self, pos):
         """
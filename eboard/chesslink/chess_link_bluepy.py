@@ -32,6 +32,7 @@ import time
 import os
 
 import eboard.chesslink.chess_link_protocol as clp
+from eboard.ble_transport import CONNECT_HOLD, NOTIFY_WAIT, TokenBucket
 
 try:
     import bluepy  # type: ignore
@@ -73,6 +74,7 @@ class Transport:
             return
         self.wrque = queue.Queue()
         self.que = que
+        self.bucket = TokenBucket()
         self.init = True
         logger.debug("bluepy_ble init ok")
         self.protocol_debug = protocol_dbg
@@ -160,11 +162,11 @@ class Transport:
         """
         logger.debug("Starting worker-thread for bluepy ble")
         self.worker_thread_active = True
+        self.conn_state = None  # before the start, a fast connection would be lost otherwise
         self.worker_threader = threading.Thread(target=self.worker_thread, args=(address, self.wrque, self.que))
         self.worker_threader.setDaemon(True)
         self.worker_threader.start()
         timer = time.time()
-        self.conn_state = None
         while self.conn_state is None and time.time() - timer < 5.0:
             time.sleep(0.1)
         if self.conn_state is None:
@@ -278,8 +280,6 @@ class Transport:
         Background thread that handles bluetooth sending and forwards data received via
         bluetooth to the queue `que`.
         """
-        message_delta_time = 0.1  # least 0.1 sec between outgoing btle messages
-
         logger.debug(f"bluepy_ble open_mt {address}")
         try:
             logger.debug("per1")
@@ -295,7 +295,7 @@ class Transport:
 
         rx, tx = self.mil_open(address, mil, que)
 
-        time_last_out = time.time() + 0.2
+        self.bucket.hold(CONNECT_HOLD)
 
         if rx is None or tx is None:
             bt_error = True
@@ -305,7 +305,7 @@ class Transport:
             self.conn_state = True
         while self.worker_thread_active is True:
             rep_err = False
-            while bt_error is True:
+            while bt_error is True and self.worker_thread_active is True:
                 time.sleep(1)
                 bt_error = False
                 self.init = False
@@ -319,10 +319,10 @@ class Transport:
                 if bt_error is False:
                     logger.info(f"Bluetooth reconnected to {address}")
                     rx, tx = self.mil_open(address, mil, que)
-                    time_last_out = time.time() + 0.2
+                    self.bucket.hold(CONNECT_HOLD)
                     self.init = True
 
-            if wrque.empty() is False and time.time() - time_last_out > message_delta_time:
+            while bt_error is False and wrque.empty() is False and self.bucket.take():
                 msg = wrque.get()
                 gpar = 0
                 for b in msg:
@@ -339,21 +339,19 @@ class Transport:
                     logger.debug(f"Sending: <{btsx}>")
                 try:
                     tx.write(btsx, withResponse=True)
-                    time_last_out = time.time()
                 except Exception as e:
                     logger.error(f"bluepy_ble: failed to write {msg}: {e}")
                     bt_error = True
                     self.agent_state(que, "offline", f"Connection to Bluetooth peripheral lost: {e}")
                 wrque.task_done()
+            if bt_error is True:
+                continue
 
             try:
-                rx.read()
-                mil.waitForNotifications(0.05)
-                # time.sleep(0.1)
+                # blocks until a notification arrives or the next write is due
+                mil.waitForNotifications(NOTIFY_WAIT if wrque.empty() else self.bucket.delay())
             except Exception as e:
                 logger.warning(f"Bluetooth read error {e}")
                 bt_error = True
                 self.agent_state(que, "offline", f"Connection to Bluetooth peripheral lost: {e}")
-                continue
-            time.sleep(0.01)
         mil.disconnect()
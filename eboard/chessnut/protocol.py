@@ -147,6 +147,7 @@ class Protocol(ParserCallback):
         if self.trans is not None:
             self.trans.quit()
         self.thread_active = False
+        self.trque.put(None)
 
     def position_initialized(self):
         """
@@ -183,29 +184,28 @@ class Protocol(ParserCallback):
         """
         logger.debug("Chessnut worker thread started.")
         while self.thread_active:
-            if not self.trque.empty():
-                msg = self.trque.get()
-                token = "agent-state: "
-                if msg[: len(token)] == token:
-                    toks = msg[len(token):]
-                    i = toks.find(" ")
-                    if i != -1:
-                        state = toks[:i]
-                        emsg = toks[i + 1:]
-                    else:
-                        state = toks
-                        emsg = ""
-                    logger.info(f"Agent state of {self.name} changed to {state}, {emsg}")
-                    if state == "offline":
-                        self.error_condition = True
-                    else:
-                        self.error_condition = False
-                    self.appque.put({"cmd": "agent_state", "state": state, "message": emsg})
-                    continue
-
-                self.parser.parse(msg)
-            else:
-                time.sleep(0.01)
+            msg = self.trque.get()  # blocks until the transport has something
+            if msg is None:  # woken up by quit()
+                continue
+            token = "agent-state: "
+            if msg[: len(token)] == token:
+                toks = msg[len(token):]
+                i = toks.find(" ")
+                if i != -1:
+                    state = toks[:i]
+                    emsg = toks[i + 1:]
+                else:
+                    state = toks
+                    emsg = ""
+                logger.info(f"Agent state of {self.name} changed to {state}, {emsg}")
+                if state == "offline":
+                    self.error_condition = True
+                else:
+                    self.error_condition = False
+                self.appque.put({"cmd": "agent_state", "state": state, "message": emsg})
+                continue
+
+            self.parser.parse(msg)
 
     def board_update(self, short_fen: str):
         self.debouncer.update(short_fen)
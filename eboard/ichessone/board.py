@@ -26,6 +26,7 @@ from eboard.ichessone.parser import Battery
 
 
 logger = logging.getLogger(__name__)
+BATTERY_REQUEST_TIME = 30  # seconds
 
 
 class IChessOneBoard(EBoard):
@@ -77,8 +78,10 @@ class IChessOneBoard(EBoard):
         last_battery_request = time.time()
         while True:
             if self.agent is not None:
+                # sleep until the next board event, at most until the battery request is due
+                timeout = max(last_battery_request + BATTERY_REQUEST_TIME - time.time(), 0.1)
                 try:
-                    result = self.appque.get(block=False)
+                    result = self.appque.get(timeout=timeout)
                     if "cmd" in result and result["cmd"] == "agent_state" and "state" in result and "message" in result:
                         self._process_board_state(result)
                     elif "cmd" in result and result["cmd"] == "raw_board_position" and "fen" in result:
@@ -89,11 +92,11 @@ class IChessOneBoard(EBoard):
                 except queue.Empty:
                     pass
                 current_time = time.time()
-                if current_time - last_battery_request > 30:  # request battery state every 30 seconds
+                if current_time - last_battery_request > BATTERY_REQUEST_TIME:
                     last_battery_request = current_time
                     self.agent.request_battery_status()
-
-            time.sleep(0.1)
+            else:
+                time.sleep(0.1)
 
     def _process_board_state(self, result):
         if result["state"] == "offline":
@@ -11,11 +11,15 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
-from typing import Callable, List, Optional
-from threading import Timer
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+from threading import Condition, Thread
+import time
 
 import chess  # type: ignore
 
+CACHE_POSITIONS = 8  # previous positions kept with their successors, two colours each
+
 
 class MoveDebouncer(object):
     """
@@ -26,6 +30,10 @@ class MoveDebouncer(object):
     Since this class has no game information, king moves are potentially always extendable, even if the king has already
     castled.
 
+    The successors of a previous position are computed once and kept in a small cache of
+    (previous_fen, colour) -> {successor board fen: extendable}, because the same previous fens are checked
+    again for every piece lift. One scheduler thread calls the callback after the debounce time.
+
     TODO: Consider direction. The current implementation does not check the direction of the moving piece,
           that is, even if there are no more squares available in the direction in which a piece is being moved,
           if there are other moves available for this piece in other directions, the move is currently determined to be
@@ -39,9 +47,14 @@ class MoveDebouncer(object):
         """
         self.debounce_time_millis = debounce_time_millis
         self.callback = callback
-        self.previous_fen = None
-        self.timer: Optional[Timer] = None
         self.previous_fens: List[str] = []
+        self.successors: OrderedDict[Tuple[str, str], Dict[str, bool]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.pending: Optional[Tuple[float, str]] = None  # (monotonic deadline, short fen) of the scheduler
+        self.condition = Condition()
+        self.scheduler: Optional[Thread] = None
+        self.running = False
 
     def update(self, short_fen: str):
         """
@@ -52,18 +65,48 @@ class MoveDebouncer(object):
         if self.debounce_time_millis <= 0:
             self.callback(short_fen)
             return
-        if self.timer is not None:
-            self.timer.cancel()
         if self._shall_start_timer(short_fen):
-            self.timer = Timer(self.debounce_time_millis / 1000, self.callback, [short_fen])
-            self.timer.start()
+            self._schedule(short_fen)
         else:
+            self._cancel()
             self.callback(short_fen)
         self.previous_fens.append(short_fen)
 
     def stop(self):
-        if self.timer is not None:
-            self.timer.cancel()
+        with self.condition:
+            self.pending = None
+            self.running = False
+            self.condition.notify()
+
+    def _schedule(self, short_fen: str):
+        with self.condition:
+            self.pending = (time.monotonic() + self.debounce_time_millis / 1000, short_fen)
+            if not self.running:
+                self.running = True
+                self.scheduler = Thread(target=self._scheduler_loop, name="move-debouncer", daemon=True)
+                self.scheduler.start()
+            self.condition.notify()
+
+    def _cancel(self):
+        with self.condition:
+            self.pending = None
+
+    def _scheduler_loop(self):
+        while True:
+            with self.condition:
+                while self.running:
+                    if self.pending is None:
+                        self.condition.wait()
+                        continue
+                    delay = self.pending[0] - time.monotonic()
+                    if delay <= 0:
+                        break
+                    self.condition.wait(delay)
+                if not self.running:
+                    return
+                short_fen = self.pending[1]
+                self.pending = None
+            self.callback(short_fen)
 
     def _shall_start_timer(self, short_fen: str):
         self.previous_fens = self.previous_fens[len(self.previous_fens) - 2:]  # keep two entries max
@@ -74,37 +117,76 @@ class MoveDebouncer(object):
         return False
 
     def _is_move_extendable(self, previous_fen: str, fen: str):
-        board = self._board_from_fen(previous_fen, "b")
-        legal_moves = board.legal_moves
-        legal_fens = self._legal_fens(board, legal_moves)
-        result = False
-        if fen in legal_fens:
-            result = self._is_extendable(board, legal_moves, legal_fens.index(fen))
-        else:
-            board = self._board_from_fen(previous_fen, "w")
-            legal_moves = board.legal_moves
-            legal_fens = self._legal_fens(board, legal_moves)
-            if fen in legal_fens:
-                result = self._is_extendable(board, legal_moves, legal_fens.index(fen))
-        return result
-
-    def _is_extendable(self, board: chess.Board, legal_moves: list, index: int):
-        move = list(legal_moves)[index]
-        if board.piece_type_at(move.from_square) == chess.KNIGHT:
-            return False
-        for m in legal_moves:
-            if m.from_square == move.from_square and m.to_square != move.to_square:
-                return True
-        return False
+        successors = self._successors(previous_fen, "b")
+        if fen not in successors:
+            successors = self._successors(previous_fen, "w")
+        return successors.get(fen, False)
+
+    def _successors(self, previous_fen: str, color: str) -> Dict[str, bool]:
+        key = (previous_fen, color)
+        successors = self.successors.get(key)
+        if successors is not None:
+            self.successors.move_to_end(key)
+            self.hits += 1
+            return successors
+        self.misses += 1
+        successors = self._successor_fens(self._board_from_fen(previous_fen, color))
+        self.successors[key] = successors
+        if len(self.successors) > CACHE_POSITIONS * 2:
+            self.successors.popitem(last=False)
+        return successors
 
     def _board_from_fen(self, board_fen: str, color: str):
         return chess.Board(board_fen + " " + color + " - - 0 1")
 
-    def _legal_fens(self, b: chess.Board, legal_moves: list):
-        board = b.copy()
-        fens = []
-        for move in legal_moves:
-            board.push(move)
-            fens.append(board.board_fen())
-            board.pop()
+    def _successor_fens(self, board: chess.Board) -> Dict[str, bool]:
+        """
+        Return the board fens after each legal move with the extendable flag of the move.
+        The target squares of a piece are collected into one bitboard: a move is extendable if its piece
+        (no knight) could go to another square. Without castling and en passant (the board has no
+        rights) a move only changes its from and to square, so only those ranks of the fen are rebuilt.
+        """
+        moves = list(board.generate_legal_moves())
+        targets: Dict[chess.Square, chess.Bitboard] = {}
+        for move in moves:
+            targets[move.from_square] = targets.get(move.from_square, chess.BB_EMPTY) | chess.BB_SQUARES[move.to_square]
+        rows = board.board_fen().split("/")  # rows[0] is rank 8
+        cells = [self._expand_row(row) for row in rows]
+        fens: Dict[str, bool] = {}
+        for move in moves:
+            piece = board.piece_at(move.from_square)
+            assert piece is not None  # a legal move starts on its piece
+            symbol = piece.symbol()
+            if move.promotion:
+                symbol = chess.Piece(move.promotion, piece.color).symbol()
+            from_row = 7 - chess.square_rank(move.from_square)
+            to_row = 7 - chess.square_rank(move.to_square)
+            changed = {from_row: list(cells[from_row])}
+            changed.setdefault(to_row, list(cells[to_row]))
+            changed[from_row][chess.square_file(move.from_square)] = ""
+            changed[to_row][chess.square_file(move.to_square)] = symbol
+            successor = list(rows)
+            for index, row in changed.items():
+                successor[index] = self._compress_row(row)
+            fen = "/".join(successor)
+            extendable = piece.piece_type != chess.KNIGHT and chess.popcount(targets[move.from_square]) > 1
+            fens.setdefault(fen, extendable)  # keep the first move like list.index() did
         return fens
+
+    @staticmethod
+    def _expand_row(row: str) -> List[str]:
+        cells: List[str] = []
+        for char in row:
+            cells.extend([""] * int(char) if char.isdigit() else [char])
+        return cells
+
+    @staticmethod
+    def _compress_row(cells: List[str]) -> str:
+        row, empty = "", 0
+        for cell in cells:
+            if cell:
+                row += (str(empty) if empty else "") + cell
+                empty = 0
+            else:
+                empty += 1
+        return row + (str(empty) if empty else "")
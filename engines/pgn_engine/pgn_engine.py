@@ -10,6 +10,8 @@
 ############################################################################
 
 import sys
+import os
+import json
 import time
 import chess
 import chess.pgn
@@ -17,6 +19,7 @@ import chess.engine
 import random
 import pygame
 from pathlib import Path
+from typing import Any, List
 
 ###########################################################################################
 # UCI Wrapper
@@ -60,8 +63,8 @@ i = 0
 
 move_list = []
 game_list = []
-orig_game_list = []
-pgn_file = ""
+orig_game_list: List[int] = []  # file offset of each game
+pgn_file: Any = ""  # the open pgn file after the first isready
 pgn_game = None
 board = None
 input_board = None
@@ -238,24 +241,51 @@ def pub_move():
     guess_ok = True
 
 
-def get_orig_game_index(find_game):
-    global orig_game_list
-    found = False
-    orig_index = 0
-    i = 0
+def build_offset_index(pgn_file):
+    ## one pass over the file: offset of every game without parsing the moves
+    offsets = []
+    pgn_file.seek(0)
+    while True:
+        offset = pgn_file.tell()
+        if not chess.pgn.skip_game(pgn_file):
+            break
+        offsets.append(offset)
+    return offsets
 
-    while not found:
-        if orig_game_list[i].headers == find_game.headers:
-            orig_index = i
-            found = True
-        i = i + 1
 
-    ##for game in orig_game_list:
-    ##    if game.headers == find_game.headers:
-    ##       orig_index = i
-    ##   i = i + 1
+def load_offset_index(pgn_file_name, pgn_file):
+    ## offsets are cached next to the pgn file as long as the file is unchanged
+    ## picochess writes the same format for uploaded files (utilities.write_offset_index)
+    index_file_name = pgn_file_name + ".idx"
+    stat = os.stat(pgn_file_name)
+    stamp = [stat.st_mtime_ns, stat.st_size]
+
+    try:
+        with open(index_file_name) as index_file:
+            index = json.load(index_file)
+        if index.get("stamp") == stamp:
+            return index["offsets"]
+    except (OSError, ValueError, KeyError, AttributeError):
+        pass
+
+    offsets = build_offset_index(pgn_file)
+
+    try:
+        with open(index_file_name, "w") as index_file:
+            json.dump({"stamp": stamp, "offsets": offsets}, index_file)
+    except OSError:
+        write_log("could not write offset index %s" % index_file_name)
+
+    return offsets
 
-    return orig_index
+
+def read_game_at(orig_index):
+    ## parse a game only when it is selected
+    global orig_game_list
+    global pgn_file
+
+    pgn_file.seek(orig_game_list[orig_index])
+    return chess.pgn.read_game(pgn_file)
 
 
 def newgame():
@@ -300,7 +330,7 @@ def newgame():
     if game_counter == 0:
         ## reset list to all games
         game_counter = max_games
-        game_list = orig_game_list.copy()
+        game_list = list(range(len(orig_game_list)))
 
     ## get game from remaining games by specified sequence
     if p_game_sequence == "random":
@@ -319,7 +349,8 @@ def newgame():
         log.write("game index: %s\n" % str(game_index))
 
     if l_continue:
-        pgn_game = game_list[game_index]
+        orig_index = game_list[game_index]
+        pgn_game = read_game_at(orig_index)
 
         if "FEN" in pgn_game.headers:
             fen = pgn_game.headers["FEN"]
@@ -405,8 +436,6 @@ def newgame():
     if log_p:
 
         if l_continue:
-            orig_index = get_orig_game_index(pgn_game)
-
             if p_pgn_game_file == "/opt/picochess/games/last_game.pgn":
                 event = "LastGame"
             elif "/opt/picochess/games/picochess_game_1.pgn" == p_pgn_game_file:
@@ -663,22 +692,23 @@ while True:
             ## load pgn file
             if p_pgn_game_file:
                 l_continue = True
+                if pgn_file:
+                    pgn_file.close()
                 try:
                     pgn_file = open(p_pgn_game_file)
                 except OSError:
                     l_continue = False
                     print2("# Error: opening file %s" % p_pgn_game_file)
 
+                ## orig_game_list holds the file offset of each game,
+                ## game_list the original indexes of the remaining games
+                orig_game_list = []
                 if l_continue:
-                    while True:
-                        game = chess.pgn.read_game(pgn_file)
-                        if game == None:
-                            break
-                        j = j + 1
-                        max_games = j
-                        game_list.append(game)
-
-                orig_game_list = game_list.copy()
+                    orig_game_list = load_offset_index(p_pgn_game_file, pgn_file)
+                    j = len(orig_game_list)
+                    max_games = j
+
+                game_list = list(range(len(orig_game_list)))
                 if max_games > 0:
                     game_counter = max_games
 
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+import mmap
+import struct
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+import chess  # type: ignore
+import chess.polyglot  # type: ignore
+
+EXPLORER_FILE = "obooksrv/opening.data"
+CACHE_SIZE = 1024  # positions
+
+# sorted by key, big endian: polyglot key, polyglot move, white wins %, draws %, games
+RECORD = struct.Struct(">QHBBI")
+KEY = struct.Struct(">Q")
+CASTLING = {
+    (chess.E1, chess.H1): chess.G1,
+    (chess.E1, chess.A1): chess.C1,
+    (chess.E8, chess.H8): chess.G8,
+    (chess.E8, chess.A8): chess.C8,
+}
+
+logger = logging.getLogger(__name__)
+
+
+def decode_move(board: chess.Board, raw: int) -> str:
+    """Return the uci text of a polyglot move, castling is stored as king takes rook."""
+    to_square = raw & 0x3F
+    from_square = (raw >> 6) & 0x3F
+    promotion = (raw >> 12) & 0x7
+    if promotion:
+        return chess.Move(from_square, to_square, promotion + 1).uci()
+    if board.king(board.turn) == from_square and not board.chess960:
+        to_square = CASTLING.get((from_square, to_square), to_square)
+    return chess.Move(from_square, to_square).uci()
+
+
+class OpeningExplorer(object):
+    """Opening statistics of the web page, read from the opening.data file of obooksrv.
+
+    The file is memory-mapped and searched by polyglot key, the answer of a position
+    is a list like the obooksrv json: move, whitewins, draws, blackwins and count.
+    The answers of recent positions are kept in an LRU. prefetch() looks up all
+    positions after the game position, the web page asks for one of them next.
+    """
+
+    def __init__(self, path: str = EXPLORER_FILE, cache_size: int = CACHE_SIZE):
+        self.path = path
+        self.cache_size = cache_size
+        self.data: Optional[mmap.mmap] = None
+        self.records = 0
+        self.cache: OrderedDict = OrderedDict()  # zobrist hash: moves
+        self.lock = threading.Lock()  # prefetch() runs in a worker thread
+        self.lookups = self.cache_hits = self.prefetched = 0
+        opening_explorers.append(self)
+
+    def open(self) -> bool:
+        """Map the data file, return False if it isn't available."""
+        try:
+            with open(self.path, "rb") as data_file:
+                self.data = mmap.mmap(data_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as error:  # ValueError: empty file
+            logger.warning("opening explorer %s not available: %s", self.path, error)
+            return False
+        self.records = len(self.data) // RECORD.size
+        logger.debug("opening explorer %s with %d moves", self.path, self.records)
+        return True
+
+    def close(self):
+        with self.lock:
+            if self.data is not None:
+                self.data.close()
+            self.data = None
+            self.records = 0
+            self.cache.clear()
+
+    def _first(self, data: mmap.mmap, key: int) -> int:
+        """Return the index of the first record with the key or a bigger one."""
+        low, high = 0, self.records
+        while low < high:
+            middle = (low + high) // 2
+            if KEY.unpack_from(data, middle * RECORD.size)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _load(self, board: chess.Board, key: int) -> List[dict]:
+        moves: List[dict] = []
+        data = self.data
+        if data is None:
+            return moves
+        for index in range(self._first(data, key), self.records):
+            record_key, raw, whitewins, draws, count = RECORD.unpack_from(data, index * RECORD.size)
+            if record_key != key:
+                break
+            moves.append(
+                {
+                    "move": decode_move(board, raw),
+                    "whitewins": whitewins,
+                    "draws": draws,
+                    "blackwins": max(100 - whitewins - draws, 0),
+                    "count": count,
+                }
+            )
+        return moves
+
+    def in_cache(self, board: chess.Board) -> bool:
+        with self.lock:
+            return chess.polyglot.zobrist_hash(board) in self.cache
+
+    def moves(self, board: chess.Board, prefetch: bool = False) -> List[dict]:
+        """Return the statistics of the moves played in the position, don't change them."""
+        key = chess.polyglot.zobrist_hash(board)
+        with self.lock:
+            if not prefetch:
+                self.lookups += 1
+            moves = self.cache.get(key)
+            if moves is not None:
+                self.cache.move_to_end(key)
+                if not prefetch:
+                    self.cache_hits += 1
+                return moves
+            moves = self._load(board, key)
+            self.cache[key] = moves
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+            if prefetch:
+                self.prefetched += 1
+            return moves
+
+    def prefetch(self, board: chess.Board) -> int:
+        """Look up the position and all positions after a legal move, return how many were new."""
+        if self.data is None:
+            return 0
+        board = board.copy(stack=False)
+        before = self.prefetched
+        self.moves(board, prefetch=True)
+        for move in board.legal_moves:
+            board.push(move)
+            self.moves(board, prefetch=True)
+            board.pop()
+        return self.prefetched - before
+
+    def stats(self) -> dict:
+        """Return the lookup counters, hit_rate is the share of lookups answered from memory."""
+        return {
+            "file": self.path,
+            "moves": self.records,
+            "positions": len(self.cache),
+            "lookups": self.lookups,
+            "cache_hits": self.cache_hits,
+            "prefetched": self.prefetched,
+            "hit_rate": round(self.cache_hits / self.lookups, 3) if self.lookups else 0.0,
+        }
+
+
+opening_explorers: List[OpeningExplorer] = []
+
+
+def explorer_stats() -> List[dict]:
+    """Return the counters of all opening explorers (for /debug/events)."""
+    return [explorer.stats() for explorer in opening_explorers]
@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import heapq
+import io
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import chess  # type: ignore
+import chess.pgn  # type: ignore
+import chess.polyglot  # type: ignore
+
+INDEX_FILE = "gamesdb/games.idx"
+PGN_SOURCES = ("gamesdb/games.pgn", "games")  # default pgn files and folders of the index
+SKIP_FILES = ("last_game.pgn", "last_replay.pgn")  # copies of games saved elsewhere
+GAMES_LIMIT = 50  # games of a position sent to the web page
+CACHE_SIZE = 256  # answers
+HEAD_SIZE = 65536  # bytes of a pgn file checked to notice it was rewritten, not appended
+ORDERS = ("elo", "date")
+
+# header: magic, length of the json file list, games, postings
+HEADER = struct.Struct(">4sIII")
+MAGIC = b"PGI1"
+# the games, best first: file, combined elo, date (yyyymmdd), offset and length in the file
+GAME = struct.Struct(">HHIQI")
+# sorted: zobrist key of a position, game
+POSTING = struct.Struct(">QI")
+KEY = struct.Struct(">Q")
+
+logger = logging.getLogger(__name__)
+
+Game = Tuple[int, int, int, int, int]  # GAME fields
+
+
+class PositionVisitor(chess.pgn.BaseVisitor):
+    """Collect the headers and the zobrist keys of the mainline positions of a game."""
+
+    def begin_game(self):
+        self.headers: Dict[str, str] = {}
+        self.keys: Set[int] = set()
+        self.moves = 0
+
+    def visit_header(self, tagname: str, tagvalue: str):
+        self.headers[tagname] = tagvalue
+
+    def begin_variation(self):
+        return chess.pgn.SKIP
+
+    def visit_move(self, board: chess.Board, move: chess.Move):
+        self.moves += 1
+
+    def visit_board(self, board: chess.Board):
+        self.keys.add(chess.polyglot.zobrist_hash(board))
+
+    def handle_error(self, error: Exception):
+        logger.debug("pgn error: %s", error)
+
+    def result(self) -> "PositionVisitor":
+        return self
+
+
+def combined_elo(headers) -> int:
+    total = 0
+    for tag in ("WhiteElo", "BlackElo"):
+        value = headers.get(tag, "")
+        total += int(value) if value.isdigit() else 0
+    return min(total, 0xFFFF)
+
+
+def date_number(headers) -> int:
+    """Return 20241217 for "2024.12.17", unknown parts are 0."""
+    number = 0
+    for part, size in zip((headers.get("Date", "") + "..").split(".")[:3], (10000, 100, 1)):
+        number += int(part) * size if part.isdigit() else 0
+    return number
+
+
+def scan_games(path: str, start: int = 0) -> Iterator[Tuple[Game, Set[int]]]:
+    """Yield the (game, position keys) of the pgn file from byte start on, the file number is 0."""
+    with open(path, encoding="utf-8", errors="replace", newline="") as handle:
+        handle.seek(start)
+        while True:
+            offset = handle.tell()
+            visitor = chess.pgn.read_game(handle, Visitor=PositionVisitor)
+            if visitor is None:
+                break
+            if visitor.headers or visitor.moves:
+                game = (0, combined_elo(visitor.headers), date_number(visitor.headers), offset, handle.tell() - offset)
+                yield game, visitor.keys
+
+
+def head_crc(path: str, size: int) -> int:
+    """Return the crc of the start of the file, it changes if the file is written again."""
+    with open(path, "rb") as handle:
+        return zlib.crc32(handle.read(min(size, HEAD_SIZE)))
+
+
+def rewritten(entry: dict) -> bool:
+    """Return True if the indexed pgn file is gone, shorter or has another start, not only appended to."""
+    path = entry["path"]
+    if not os.path.isfile(path) or os.path.getsize(path) < entry["size"]:
+        return True
+    return head_crc(path, entry["size"]) != entry["crc"]
+
+
+def pgn_files(sources: Iterable[str]) -> List[str]:
+    """Return the pgn files of the files and folders (not their sub folders)."""
+    paths = []
+    for source in sources:
+        if os.path.isdir(source):
+            for file_name in sorted(os.listdir(source)):
+                if file_name.lower().endswith(".pgn") and file_name not in SKIP_FILES:
+                    paths.append(os.path.normpath(os.path.join(source, file_name)))
+        elif os.path.isfile(source):
+            paths.append(os.path.normpath(source))
+    return paths
+
+
+def rank(game: Game) -> Tuple[int, int]:
+    return game[1], game[2]
+
+
+def read_index(index_path: str) -> Tuple[List[dict], List[Game], List[Tuple[int, int]]]:
+    """Return the files, games and postings of an index, all empty if there is none."""
+    try:
+        with open(index_path, "rb") as handle:
+            data = handle.read()
+        magic, files_length, game_count, posting_count = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("not a games index")
+    except (OSError, ValueError, struct.error) as error:
+        logger.debug("no games index %s: %s", index_path, error)
+        return [], [], []
+    position = HEADER.size
+    files = json.loads(data[position : position + files_length])
+    position += files_length
+    games = list(GAME.iter_unpack(data[position : position + game_count * GAME.size]))
+    position += game_count * GAME.size
+    postings = list(POSTING.iter_unpack(data[position : position + posting_count * POSTING.size]))
+    return files, games, postings
+
+
+def write_index(index_path: str, files: List[dict], games: List[Game], postings: List[Tuple[int, int]]):
+    """Write the index, the games are numbered by rank and the postings sorted by key."""
+    order = sorted(range(len(games)), key=lambda number: rank(games[number]), reverse=True)
+    numbers = [0] * len(games)
+    for new_number, number in enumerate(order):
+        numbers[number] = new_number
+    postings = sorted((key, numbers[number]) for key, number in postings)
+    file_list = json.dumps(files).encode()
+    with open(index_path + ".tmp", "wb") as handle:
+        handle.write(HEADER.pack(MAGIC, len(file_list), len(games), len(postings)))
+        handle.write(file_list)
+        handle.write(b"".join(GAME.pack(*games[number]) for number in order))
+        handle.write(b"".join(POSTING.pack(*posting) for posting in postings))
+    os.replace(index_path + ".tmp", index_path)
+
+
+def build_index(sources: Iterable[str] = PGN_SOURCES, index_path: str = INDEX_FILE) -> Tuple[int, int]:
+    """Write the index of the games in the pgn files and folders, return (games, scanned games).
+
+    The games of files that were only appended to since the last build are taken
+    from the old index, only the new games at their end are read.
+    """
+    old_files, old_games, old_postings = read_index(index_path)
+    old_by_path = {entry["path"]: number for number, entry in enumerate(old_files)}
+    files: List[dict] = []
+    games: List[Game] = []
+    postings: List[Tuple[int, int]] = []
+    reused: Dict[int, int] = {}  # old game number: new game number
+    scanned = 0
+    for path in pgn_files(sources):
+        size = os.path.getsize(path)
+        file_number = len(files)
+        start = 0
+        if path in old_by_path:
+            old = old_files[old_by_path[path]]
+            if old["size"] <= size and old["crc"] == head_crc(path, old["size"]):
+                start = old["size"]
+                for number, game in enumerate(old_games):
+                    if game[0] == old_by_path[path]:
+                        reused[number] = len(games)
+                        games.append((file_number,) + game[1:])
+        for game, keys in scan_games(path, start):
+            scanned += 1
+            postings.extend((key, len(games)) for key in keys)
+            games.append((file_number,) + game[1:])
+        files.append({"path": path, "size": size, "crc": head_crc(path, size)})
+    postings.extend((key, reused[number]) for key, number in old_postings if number in reused)
+    write_index(index_path, files, games, postings)
+    return len(games), scanned
+
+
+class GamesIndex(object):
+    """The games of the web page which reached a position, best or newest first.
+
+    The index (see build_index) is memory-mapped: the postings of a position are
+    found by binary search and the games are numbered best first, so the best games
+    are the first postings. Games appended to an indexed pgn file later, e.g. the
+    games.pgn of PgnDisplay, are added by update() and kept in memory until the next
+    build. A pgn file that was written again instead of appended to is left out.
+    """
+
+    def __init__(self, path: str = INDEX_FILE, cache_size: int = CACHE_SIZE):
+        self.path = path
+        self.cache_size = cache_size
+        self.data: Optional[mmap.mmap] = None
+        self.files: List[dict] = []
+        self.stale: Set[int] = set()  # file numbers
+        self.games: List[Game] = []
+        self.base_games = 0  # games of the index file, the others were added by update()
+        self.postings_start = 0
+        self.postings = 0
+        self.added: Dict[int, List[int]] = {}  # key: games added by update()
+        self.cache: OrderedDict = OrderedDict()  # (key, order, limit): games
+        self.lock = threading.Lock()  # update() and the lookups of the web server run in worker threads
+        self.lookups = self.cache_hits = 0
+        games_indexes.append(self)
+
+    def open(self) -> bool:
+        """Map the index file and catch up with the pgn files, return False if it isn't available."""
+        try:
+            with open(self.path, "rb") as index_file:
+                self.data = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, files_length, game_count, posting_count = HEADER.unpack_from(self.data)
+            if magic != MAGIC:
+                raise ValueError("not a games index")
+        except (OSError, ValueError, struct.error) as error:  # ValueError: empty file
+            logger.warning("games index %s not available: %s", self.path, error)
+            return False
+        position = HEADER.size
+        self.files = json.loads(self.data[position : position + files_length])
+        position += files_length
+        self.games = list(GAME.iter_unpack(self.data[position : position + game_count * GAME.size]))
+        self.base_games = game_count
+        self.postings_start = position + game_count * GAME.size
+        self.postings = posting_count
+        for number, entry in enumerate(self.files):
+            if rewritten(entry):
+                self.stale.add(number)
+            elif os.path.getsize(entry["path"]) > entry["size"]:
+                self.update(entry["path"])
+        if self.stale:
+            logger.warning("games index %s: pgn files changed, rebuild it", self.path)
+        logger.debug("games index %s with %d games", self.path, len(self.games))
+        return True
+
+    def close(self):
+        with self.lock:
+            if self.data is not None:
+                self.data.close()
+            self.data = None
+            self.games = []
+            self.postings = 0
+            self.added.clear()
+            self.cache.clear()
+
+    def update(self, path: str) -> int:
+        """Add the games appended to the pgn file since the last time, return how many.
+
+        A file that was written again or truncated since is left out from then on, like in open().
+        """
+        path = os.path.normpath(path)
+        with self.lock:
+            numbers = [number for number, entry in enumerate(self.files) if entry["path"] == path]
+            if numbers and numbers[0] in self.stale:
+                return 0
+            if numbers and rewritten(self.files[numbers[0]]):
+                self.stale.add(numbers[0])
+                self.cache.clear()
+                logger.warning("games index %s: %s changed, rebuild it", self.path, path)
+                return 0
+            start = self.files[numbers[0]]["size"] if numbers else 0
+        found = list(scan_games(path, start))
+        size = os.path.getsize(path)
+        with self.lock:
+            if numbers:
+                file_number = numbers[0]
+            else:
+                file_number = len(self.files)
+                self.files.append({"path": path})
+            self.files[file_number].update(size=size, crc=head_crc(path, size))
+            for game, keys in found:
+                for key in keys:
+                    self.added.setdefault(key, []).append(len(self.games))
+                self.games.append((file_number,) + game[1:])
+            if found:
+                self.cache.clear()
+        return len(found)
+
+    def _first(self, data: mmap.mmap, key: int) -> int:
+        """Return the index of the first posting with the key or a bigger one."""
+        low, high = 0, self.postings
+        while low < high:
+            middle = (low + high) // 2
+            if KEY.unpack_from(data, self.postings_start + middle * POSTING.size)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _numbers(self, key: int, limit: Optional[int]) -> List[int]:
+        """Return the numbers of the indexed games with the position, the first limit ones if given.
+
+        Games of stale files are left out while the postings are read, so they don't count for limit.
+        """
+        data = self.data
+        if data is None:
+            return []
+        first, last = self._first(data, key), self._first(data, key + 1)
+        numbers: List[int] = []
+        while first < last and (limit is None or len(numbers) < limit):
+            end = last if limit is None else min(last, first + limit - len(numbers))
+            postings = data[self.postings_start + first * POSTING.size : self.postings_start + end * POSTING.size]
+            numbers += [
+                number for _, number in POSTING.iter_unpack(postings) if self.games[number][0] not in self.stale
+            ]
+            first = end
+        return numbers
+
+    def _game(self, number: int, handles: dict) -> dict:
+        """Return the game like the old games server: white, black, result, event and pgn."""
+        file_number, _, _, offset, length = self.games[number]
+        if file_number not in handles:
+            handles[file_number] = open(self.files[file_number]["path"], "rb")
+        handle = handles[file_number]
+        handle.seek(offset)
+        text = handle.read(length).decode("utf-8", errors="replace").strip() + "\n"
+        headers = chess.pgn.read_headers(io.StringIO(text)) or chess.pgn.Headers()
+
+        def player(color: str) -> str:
+            elo = headers.get(color + "Elo", "")
+            name = headers.get(color, "?")
+            return f"{name} ({elo})" if elo.isdigit() and int(elo) else name
+
+        year = headers.get("Date", "????")[:4]
+        return {
+            "white": player("White"),
+            "black": player("Black"),
+            "result": headers.get("Result", "*"),
+            "event": f"{year}, {headers.get('Event', '?')}",
+            "pgn": text,
+        }
+
+    def in_cache(self, board: chess.Board, order: str = "elo", limit: int = GAMES_LIMIT) -> bool:
+        with self.lock:
+            return (chess.polyglot.zobrist_hash(board), order, limit) in self.cache
+
+    def find(self, board: chess.Board, order: str = "elo", limit: int = GAMES_LIMIT) -> List[dict]:
+        """Return up to limit games with the position, by combined elo ("elo") or newest first ("date")."""
+        key = chess.polyglot.zobrist_hash(board)
+        with self.lock:
+            self.lookups += 1
+            found = self.cache.get((key, order, limit))
+            if found is not None:
+                self.cache.move_to_end((key, order, limit))
+                self.cache_hits += 1
+                return found
+            added = [number for number in self.added.get(key, []) if self.games[number][0] not in self.stale]
+            numbers = self._numbers(key, limit if order == "elo" else None) + added
+            if order == "date":
+                best = heapq.nlargest(limit, numbers, key=lambda number: (self.games[number][2], self.games[number][1]))
+            else:
+                best = heapq.nlargest(limit, numbers, key=lambda number: (rank(self.games[number]), -number))
+            handles: dict = {}
+            try:
+                found = [self._game(number, handles) for number in best]
+            finally:
+                for handle in handles.values():
+                    handle.close()
+            self.cache[(key, order, limit)] = found
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+            return found
+
+    def stats(self) -> dict:
+        """Return the lookup counters, hit_rate is the share of lookups answered from memory."""
+        return {
+            "file": self.path,
+            "games": len(self.games),
+            "added_games": len(self.games) - self.base_games,
+            "stale_files": [self.files[number]["path"] for number in sorted(self.stale)],
+            "lookups": self.lookups,
+            "cache_hits": self.cache_hits,
+            "hit_rate": round(self.cache_hits / self.lookups, 3) if self.lookups else 0.0,
+        }
+
+
+games_indexes: List[GamesIndex] = []
+
+
+def games_index_stats() -> List[dict]:
+    """Return the counters of all games indexes (for /debug/events)."""
+    return [games_index.stats() for games_index in games_indexes]
@@ -1,2 +0,0 @@
-#!/bin/sh
-./$(uname -m)/tcscid get_games.tcl --server 7778
@@ -247,12 +247,24 @@ sudo -u pi "$REPO_DIR/venv/bin/pip3" install --upgrade pip
 sudo -u pi "$REPO_DIR/venv/bin/pip3" install --upgrade -r requirements.txt
 
 echo " ------- "
-echo "setting up picochess, obooksrv, gamesdb, and update services"
+echo "precompressing the web page files..."
+sudo -u pi "$REPO_DIR/venv/bin/python3" build/static.py > /dev/null
+
+echo " ------- "
+echo "indexing the games of the web page..."
+sudo -u pi "$REPO_DIR/venv/bin/python3" -m build.games
+
+echo " ------- "
+echo "setting up picochess and update services"
 cp etc/picochess.service /etc/systemd/system/
-ln -sf "$REPO_DIR/obooksrv/$(uname -m)/obooksrv" "$REPO_DIR/obooksrv/obooksrv"
-cp etc/obooksrv.service /etc/systemd/system/
-ln -sf "$REPO_DIR/gamesdb/$(uname -m)/tcscid" "$REPO_DIR/gamesdb/tcscid"
-cp etc/gamesdb.service /etc/systemd/system/
+# the opening explorer and the games index are part of the web server now, remove the old services
+for service in obooksrv gamesdb; do
+    if [ -f "/etc/systemd/system/$service.service" ]; then
+        systemctl disable --now "$service.service"
+        rm "/etc/systemd/system/$service.service"
+    fi
+done
+rm -f "$REPO_DIR/obooksrv/obooksrv" "$REPO_DIR/gamesdb/tcscid"
 cp etc/picochess-update.service /etc/systemd/system/
 cp etc/run-picochess-if-flagged.sh /usr/local/bin/
 chmod +x /usr/local/bin/run-picochess-if-flagged.sh
@@ -270,8 +282,6 @@ touch /var/log/picochess-update.log /var/log/picochess-last-update
 chown root:root /var/log/picochess-*
 systemctl daemon-reload
 systemctl enable picochess.service
-systemctl enable obooksrv.service
-systemctl enable gamesdb.service
 systemctl enable picochess-update.service
 
 # setcap for DGT board, bluetooth etc
@@ -21,6 +21,7 @@ import logging
 import os
 import mimetypes
 import asyncio
+import time
 
 from email import encoders
 from email.mime.multipart import MIMEMultipart
@@ -28,7 +29,7 @@ from email.mime.audio import MIMEAudio
 from email.mime.base import MIMEBase
 from email.mime.image import MIMEImage
 from email.mime.text import MIMEText
-from typing import Optional
+from typing import List, Optional
 from smtplib import SMTP_SSL as SMTP
 from smtplib import SMTP
 from ssl import create_default_context
@@ -46,6 +47,11 @@ from picotutor import PicoTutor
 
 logger = logging.getLogger(__name__)
 
+MAIL_TIMEOUT = 30  # seconds for connecting and talking to the mail server
+MAIL_BATCH_SIZE = 5  # max games sent in one mail
+MAIL_RETRY_MIN = 30  # seconds until a failed mail is sent again, doubled after each failure
+MAIL_RETRY_MAX = 3600
+
 
 # molli: support for player names from online game
 class ModeInfo:
@@ -217,7 +223,34 @@ class Emailer(object):
         else:
             self.mailgun_key = False
 
-    def _use_smtp(self, subject, body, path):
+    def is_configured(self) -> bool:
+        """Return True if an email address and a way to send mails is provided."""
+        return bool(self.email and (self.mailgun_key or self.smtp_server))
+
+    @staticmethod
+    def _attachment(path):
+        ctype, encoding = mimetypes.guess_type(path)
+        if ctype is None or encoding is not None:
+            ctype = "application/octet-stream"
+        maintype, subtype = ctype.split("/", 1)
+        if maintype == "text":
+            with open(path) as fpath:
+                msg = MIMEText(fpath.read(), _subtype=subtype)
+        elif maintype == "image":
+            with open(path, "rb") as fpath:
+                msg = MIMEImage(fpath.read(), _subtype=subtype)
+        elif maintype == "audio":
+            with open(path, "rb") as fpath:
+                msg = MIMEAudio(fpath.read(), _subtype=subtype)
+        else:
+            with open(path, "rb") as fpath:
+                msg = MIMEBase(maintype, subtype)
+                msg.set_payload(fpath.read())
+            encoders.encode_base64(msg)
+        msg.add_header("Content-Disposition", "attachment", filename=os.path.basename(path))
+        return msg
+
+    def _use_smtp(self, subject, body, paths) -> bool:
         # if self.smtp_server is not provided than don't try to send email via smtp service
         logger.debug("SMTP Mail delivery: Started")
         # change to smtp based mail delivery
@@ -230,34 +263,16 @@ class Emailer(object):
         else:
             # lib without encryption (SMTP-port 21)
             logger.debug("SMTP Mail delivery: Import standard SMTP Lib (no SSL encryption)")
-        conn = False
+        conn: Optional[SMTP] = None
+        delivered = False
         try:
             outer = MIMEMultipart()
             outer["Subject"] = subject  # put subject to mail
             outer["From"] = "Your PicoChess computer <{}>".format(self.smtp_from)
             outer["To"] = self.email
             outer.attach(MIMEText(body, "plain"))  # pack the pgn to Email body
-
-            ctype, encoding = mimetypes.guess_type(path)
-            if ctype is None or encoding is not None:
-                ctype = "application/octet-stream"
-            maintype, subtype = ctype.split("/", 1)
-            if maintype == "text":
-                with open(path) as fpath:
-                    msg = MIMEText(fpath.read(), _subtype=subtype)
-            elif maintype == "image":
-                with open(path, "rb") as fpath:
-                    msg = MIMEImage(fpath.read(), _subtype=subtype)
-            elif maintype == "audio":
-                with open(path, "rb") as fpath:
-                    msg = MIMEAudio(fpath.read(), _subtype=subtype)
-            else:
-                with open(path, "rb") as fpath:
-                    msg = MIMEBase(maintype, subtype)
-                    msg.set_payload(fpath.read())
-                encoders.encode_base64(msg)
-            msg.add_header("Content-Disposition", "attachment", filename=os.path.basename(path))
-            outer.attach(msg)
+            for path in paths:
+                outer.attach(self._attachment(path))
 
             if self.smtp_starttls:
 
@@ -266,7 +281,7 @@ class Emailer(object):
                     "SMTP Mail delivery: trying to connect to " + self.smtp_server + " via port " + str(self.smtp_port)
                 )
                 context = create_default_context()
-                conn = SMTP(self.smtp_server, self.smtp_port)
+                conn = SMTP(self.smtp_server, self.smtp_port, timeout=MAIL_TIMEOUT)
                 conn.set_debuglevel(1)
                 # conn.ehlo()  # Can be omitted
                 conn.starttls(context=context)
@@ -276,7 +291,7 @@ class Emailer(object):
             else:
 
                 logger.debug("SMTP Mail delivery: trying to connect to " + self.smtp_server)
-                conn = SMTP(self.smtp_server)  # contact smtp server
+                conn = SMTP(self.smtp_server, timeout=MAIL_TIMEOUT)  # contact smtp server
                 conn.set_debuglevel(False)  # no debug info from smtp lib
 
             if self.smtp_user is not None and self.smtp_pass is not None:
@@ -286,26 +301,34 @@ class Emailer(object):
             logger.debug("SMTP Mail delivery: trying to send email")
             conn.sendmail(self.smtp_from, self.email, outer.as_string())
             logger.debug("SMTP Mail delivery: successfuly delivered message to SMTP server")
+            delivered = True
         except Exception as smtp_exc:
             logger.error("SMTP Mail delivery: Failed")
             logger.error("SMTP Mail delivery: " + str(smtp_exc))
         finally:
-            if conn:
+            if conn is not None:
                 conn.close()
             logger.debug("SMTP Mail delivery: Ended")
+        return delivered
 
-    def _use_mailgun(self, subject, body):
-        out = requests.post(
-            "https://api.mailgun.net/v3/picochess.org/messages",
-            auth=("api", self.mailgun_key),
-            data={
-                "from": "Your PicoChess computer <no-reply@picochess.org>",
-                "to": self.email,
-                "subject": subject,
-                "text": body,
-            },
-        )
+    def _use_mailgun(self, subject, body) -> bool:
+        try:
+            out = requests.post(
+                "https://api.mailgun.net/v3/picochess.org/messages",
+                auth=("api", self.mailgun_key),
+                data={
+                    "from": "Your PicoChess computer <no-reply@picochess.org>",
+                    "to": self.email,
+                    "subject": subject,
+                    "text": body,
+                },
+                timeout=MAIL_TIMEOUT,
+            )
+        except requests.RequestException as mailgun_exc:
+            logger.error("Mailgun delivery: " + str(mailgun_exc))
+            return False
         logger.debug(out)
+        return out.ok
 
     def set_smtp(self, sserver=None, sencryption=None, suser=None, spass=None, sfrom=None, sport=None, sstarttls=None):
         """Store information for SMTP based mail delivery."""
@@ -317,23 +340,127 @@ class Emailer(object):
         self.smtp_port = sport
         self.smtp_starttls = sstarttls
 
-    def send(self, subject: str, body: str, path: str):
-        """Send the email out."""
+    def channels(self) -> List[str]:
+        """Return the configured ways to deliver a mail, "mailgun" and "smtp"."""
+        channels = []
         if self.email:  # check if email address to send the pgn to is provided
             if self.mailgun_key:  # check if we have mailgun-key available to send the pgn successful
-                self._use_mailgun(subject=subject, body=body)
+                channels.append("mailgun")
             if self.smtp_server:  # check if smtp server address provided
-                self._use_smtp(subject=subject, body=body, path=path)
+                channels.append("smtp")
+        return channels
+
+    def send(self, subject: str, body: str, paths: List[str], channels: Optional[List[str]] = None) -> List[str]:
+        """Send the email out through the channels (all configured ones by default) - blocking.
+
+        Return the channels that delivered it.
+        """
+        delivered = []
+        for channel in self.channels() if channels is None else channels:
+            if channel == "mailgun" and self._use_mailgun(subject=subject, body=body):
+                delivered.append(channel)
+            elif channel == "smtp" and self._use_smtp(subject=subject, body=body, paths=paths):
+                delivered.append(channel)
+        return delivered
+
+
+class MailOutbox(object):
+    """Keep game emails in a folder until they are delivered by a background task.
+
+    Each game is one pgn file in the folder, so games not yet delivered survive a restart.
+    Up to batch_size waiting games are sent in one mail, failed mails are tried again later.
+    With mailgun and smtp both configured, <game>.pgn.sent lists the channels that already
+    delivered the game, a retry only uses the others.
+    """
+
+    def __init__(self, emailer: Emailer, folder: str, batch_size: int = MAIL_BATCH_SIZE):
+        self.emailer = emailer
+        self.folder = folder
+        self.batch_size = batch_size
+        self.retry_delay = MAIL_RETRY_MIN
+        self._wakeup = asyncio.Event()
+        os.makedirs(folder, exist_ok=True)
+
+    def add(self, pgn: str) -> str:
+        """Store a game to be sent and return its file name."""
+        file_name = os.path.join(self.folder, "game_{}.pgn".format(time.time_ns()))
+        with open(file_name + ".tmp", "w") as file:
+            file.write(pgn)
+        os.replace(file_name + ".tmp", file_name)  # worker never sees half written games
+        self._wakeup.set()
+        return file_name
+
+    def pending(self) -> List[str]:
+        """Return the file names of the games waiting to be sent, oldest first."""
+        return sorted(
+            os.path.join(self.folder, file_name) for file_name in os.listdir(self.folder) if file_name.endswith(".pgn")
+        )
+
+    @staticmethod
+    def sent_channels(path: str) -> List[str]:
+        """Return the channels that already delivered the game."""
+        try:
+            with open(path + ".sent") as file:
+                return file.read().split()
+        except FileNotFoundError:
+            return []
+
+    def send_batch(self) -> bool:
+        """Send the oldest waiting games in one mail - blocking, return True if delivered."""
+        paths = self.pending()
+        if not paths:
+            return True
+        sent = self.sent_channels(paths[0])
+        # a mail only holds games still missing on the same channels
+        paths = [path for path in paths if self.sent_channels(path) == sent][: self.batch_size]
+        games = []
+        for path in paths:
+            with open(path) as file:
+                games.append(file.read().strip())
+        subject = "Game PGN" if len(paths) == 1 else "Game PGN ({} games)".format(len(paths))
+        channels = [channel for channel in self.emailer.channels() if channel not in sent]
+        delivered = self.emailer.send(subject, "\n\n".join(games), paths, channels)
+        if len(delivered) < len(channels):
+            if delivered:
+                for path in paths:
+                    with open(path + ".sent", "w") as file:
+                        file.write("\n".join(sent + delivered))
+            return False
+        for path in paths:
+            os.remove(path)
+            if sent:
+                os.remove(path + ".sent")
+        return True
+
+    async def run(self):
+        """Background task delivering the games."""
+        try:
+            while True:
+                if not self.pending():
+                    await self._wakeup.wait()
+                self._wakeup.clear()
+                if await asyncio.to_thread(self.send_batch):
+                    self.retry_delay = MAIL_RETRY_MIN
+                else:
+                    logger.warning("game mail not delivered - trying again in %d seconds", self.retry_delay)
+                    await asyncio.sleep(self.retry_delay)
+                    self.retry_delay = min(2 * self.retry_delay, MAIL_RETRY_MAX)
+        except asyncio.CancelledError:
+            logger.debug("mail outbox cancelled")
 
 
 class PgnDisplay(DisplayMsg):
     """Deal with DisplayMessages related to pgn."""
 
     def __init__(self, file_name: str, emailer: Emailer, shared: dict, loop: asyncio.AbstractEventLoop):
-        super(PgnDisplay, self).__init__(loop)
+        super(PgnDisplay, self).__init__(loop, low_priority=True)  # reduce priority for PGN
         self.file_name = file_name
         self.last_file_name = "games" + os.sep + "last_game.pgn"
         self.emailer = emailer
+        self.outbox: MailOutbox | None = None
+        if emailer is not None and emailer.is_configured():
+            self.outbox = MailOutbox(emailer, "games" + os.sep + "outbox")
+            asyncio.create_task(self.outbox.run())  # background mail delivery
 
         self.engine_name = "?"
         self.old_engine = ""
@@ -531,7 +658,8 @@ class PgnDisplay(DisplayMsg):
                     else:
                         logger.debug("skipped move %s-%s picotutor eval mismatch", pgn_move.uci(), user_move.uci())
 
-    def _get_picotutor_eval_comments(self, nag: int, value: dict, turn: chess.Color) -> str:
+    @staticmethod
+    def _get_picotutor_eval_comments(nag: int, value: dict, turn: chess.Color) -> str:
         """get comments found in picotutor evaluations value dict"""
         if nag != chess.pgn.NAG_NULL:
             comment = PicoTutor.nag_to_symbol(nag)  # back to !!, ! etc
@@ -597,7 +725,14 @@ class PgnDisplay(DisplayMsg):
             exporter = chess.pgn.FileExporter(file)
             pgn_game.accept(exporter)
 
-        self.emailer.send("Game PGN", str(pgn_game), self.file_name)
+        if self.outbox:
+            self.outbox.add(str(pgn_game))  # only this game, not the whole games file
+
+    async def _index_saved_games(self):
+        """Add the games appended to the games file to the games index of the web page."""
+        games_index = self.shared.get("games_index")
+        if games_index is not None:
+            await asyncio.to_thread(games_index.update, self.file_name)
 
     def _save_pgn(self, message):
         l_file_name = "games" + os.sep + message.pgn_filename
@@ -619,7 +754,6 @@ class PgnDisplay(DisplayMsg):
         logger.debug("molli: save pgn finished")
 
     async def _process_message(self, message):
-        await asyncio.sleep(0.1)  # reduce priority for PGN
         if False:  # switch-case
             pass
 
@@ -747,6 +881,7 @@ class PgnDisplay(DisplayMsg):
                 # note that neither PGNREPLAY nor PONDER (ANALYSIS) modes overwrite last_game.pgn
                 # we do not have pgn_filename in GAME_ENDS as we have in SAVE_GAME message
                 self._save_and_email_pgn(message)
+                await self._index_saved_games()
             elif message.mode == Mode.PGNREPLAY:
                 message.pgn_filename = "last_replay.pgn"
                 self._save_pgn(message)
@@ -790,6 +925,5 @@ class PgnDisplay(DisplayMsg):
                 # asyncio.create_task(self._process_message(message))
                 await self._process_message(message)
                 self.msg_queue.task_done()
-                await asyncio.sleep(0.05)  # balancing message queues
         except asyncio.CancelledError:
             logger.debug("PGN msg_queue cancelled")
@@ -31,7 +31,8 @@ import gc
 import logging
 from logging.handlers import RotatingFileHandler
 import math
-from typing import Any, List, Optional, Set, Tuple
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
 import asyncio
 from pathlib import Path
 import platform
@@ -47,6 +48,8 @@ import dgt.util
 from configuration import Configuration
 from uci.engine import UciShell, UciEngine
 from uci.engine_provider import EngineProvider
+from uci.engine_pool import EnginePool
+from uci.remote import REMOTE_PREFIX, remote_pool
 from uci.rating import Rating, determine_result
 
 from timecontrol import TimeControl
@@ -67,12 +70,13 @@ from utilities import (
     DisplayMsg,
     version,
     evt_queue,
+    event_stats,
     write_picochess_ini,
     get_engine_mame_par,
 )
-from utilities import AsyncRepeatingTimer
+from utilities import AsyncRepeatingTimer, GameSnapshot, StartupProfile
 from pgn import Emailer, PgnDisplay, ModeInfo
-from server import WebDisplay, WebServer, WebVr, EventHandler
+from server import WebDisplay, WebServer, WebVr, publish_state
 from picotalker import PicoTalkerDisplay
 from dispatcher import Dispatcher
 
@@ -91,6 +95,11 @@ from eboard.ichessone.board import IChessOneBoard
 from eboard.certabo.board import CertaboBoard
 from picotutor import PicoTutor
 from picotutor_constants import DEEP_DEPTH
+from tablebase import Tablebase
+from book import OpeningBook, book_files
+from explorer import OpeningExplorer
+from games_index import GamesIndex
+from batch_analysis import BatchAnalysis
 
 FLOAT_MIN_BACKGROUND_TIME = 1.0  # how often to send PV,SCORE,DEPTH
 # Limit analysis of engine
@@ -103,6 +112,7 @@ FLOAT_TUTOR_MAX_ANALYSIS_DEPTH = 22  # higher than DEEP_DEPTH, lower than above
 FLOAT_MAX_ANALYSE_TIME = 0.1  # asking for hint while not pondering
 
 ONLINE_PREFIX = "Online"
+STATUS_SCRIPT_TIMEOUT = 10  # seconds for the update and git status scripts at startup
 
 logger = logging.getLogger(__name__)
 
@@ -121,7 +131,7 @@ class AlternativeMover:
             return set(game.legal_moves)
         return searchmoves
 
-    def book(self, bookreader: chess.polyglot.MemoryMappedReader, game_copy: chess.Board):
+    def book(self, bookreader: OpeningBook, game_copy: chess.Board):
         """Get a BookMove or None from game position."""
         try:
             choice = bookreader.weighted_choice(game_copy, exclude_moves=self._excludedmoves)
@@ -221,7 +231,7 @@ class PicochessState:
         self.best_move_posted = False  # True when "extra" computer move already posted to Picotutor
         self.book_in_use = ""
         self.comment_file = ""
-        self.dgtmenu = None
+        self.dgtmenu: DgtMenu | None = None
         self.dgttranslate = None
         self.done_computer_fen = None  # FEN of last done computer move when not yet pushed to game board
         self.done_move = chess.Move.null()  # last done move by computer, not yet pushed to game board
@@ -247,10 +257,10 @@ class PicochessState:
         self.engine_move_was_book = False
         self.game_declared = False  # User declared resignation or draw
         self.interaction_mode = Mode.NORMAL
-        self.last_legal_fens: List[Any] = []
+        self.last_legal_fens: Dict[str, chess.Move] = {}
         self.last_move = None
-        self.legal_fens: List[Any] = []
-        self.legal_fens_after_cmove: List[Any] = []
+        self.legal_fens: Dict[str, chess.Move] = {}
+        self.legal_fens_after_cmove: Dict[str, chess.Move] = {}
         self.max_guess = 0
         self.max_guess_black = 0
         self.max_guess_white = 0
@@ -625,19 +635,56 @@ def compare_fen(fen_board_external="", fen_board_internal="") -> str:
     return put_field
 
 
-def compute_legal_fens(game_copy: chess.Board):
+class LegalFenIndex:
+    """Remember the legal successor board fens of recently seen positions.
+
+    The eboard sends many fens for the same game position (piece lifts, sliding moves).
+    Instead of pushing/popping every legal move for each of them the successors are
+    generated once per position and kept under the Zobrist hash of that position.
+    The returned dicts are shared - callers must not modify them."""
+
+    def __init__(self, max_positions: int = 16):
+        self.max_positions = max_positions
+        self._index: OrderedDict[Tuple[int, bool], Dict[str, chess.Move]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def successors(self, game: chess.Board) -> Dict[str, chess.Move]:
+        """Return a dict of board_fen -> legal move for the given game position."""
+        key = (chess.polyglot.zobrist_hash(game), game.chess960)
+        fens = self._index.get(key)
+        if fens is not None:
+            self._index.move_to_end(key)
+            self.hits += 1
+            return fens
+        self.misses += 1
+        fens = {}
+        game_copy = game.copy(stack=False)
+        for move in game_copy.legal_moves:
+            game_copy.push(move)
+            fens.setdefault(game_copy.board_fen(), move)  # keep the first move like list.index() did
+            game_copy.pop()
+        self._index[key] = fens
+        if len(self._index) > self.max_positions:
+            self._index.popitem(last=False)
+        return fens
+
+    def clear(self) -> None:
+        """Forget all positions."""
+        self._index.clear()
+
+
+legal_fen_index = LegalFenIndex()
+
+
+def compute_legal_fens(game: chess.Board) -> Dict[str, chess.Move]:
     """
-    Compute a list of legal FENs for the given game.
+    Compute the legal FENs for the given game.
 
-    :param game_copy: The game
-    :return: A list of legal FENs
+    :param game: The game - it is not modified
+    :return: A dict of legal board FENs and the move leading to it
     """
-    fens = []
-    for move in game_copy.legal_moves:
-        game_copy.push(move)
-        fens.append(game_copy.board_fen())
-        game_copy.pop()
-    return fens
+    return legal_fen_index.successors(game)
 
 
 async def main() -> None:
@@ -655,7 +702,7 @@ async def main() -> None:
 
     async def display_ip_info(state: PicochessState):
         """Fire an IP_INFO message with the IP adr."""
-        location, ext_ip, int_ip = get_location()
+        location, ext_ip, int_ip = await asyncio.to_thread(get_location)
 
         if state.set_location == "auto":
             pass
@@ -683,11 +730,13 @@ async def main() -> None:
     # log the startup parameters but hide the password fields
     a_copy = copy.copy(vars(args))
     a_copy["mailgun_key"] = a_copy["smtp_pass"] = a_copy["engine_remote_key"] = a_copy["engine_remote_pass"] = "*****"
+    a_copy["engine_remote_secret"] = "*****"
     logger.debug("startup parameters: %s", a_copy)
     if unknown:
         logger.warning("invalid parameter given %s", unknown)
 
     EngineProvider.init()
+    remote_pool.secret = args.engine_remote_secret
 
     Rev2Info.set_dgtpi(args.dgtpi)
     state.flag_flexible_ponder = args.flexible_analysis
@@ -802,7 +851,11 @@ async def main() -> None:
     # Launch web server
     if args.web_server_port:
         my_web_server = WebServer()
-        shared: dict = {}
+        explorer = OpeningExplorer()  # opening statistics of the web page
+        explorer.open()
+        games_index = GamesIndex()  # games of the web page
+        games_index.open()
+        shared: dict = {"explorer": explorer, "games_index": games_index}
         # moved starting WebDisplayt and WebVr here so that they are in same main loop
         logger.info("initializing message queues")
         my_web_display = WebDisplay(shared, main_loop)
@@ -813,7 +866,15 @@ async def main() -> None:
         logger.info("message queues ready - starting web server")
         dgtdispatcher.register("web")
         theme: str = calc_theme(args.theme, state.set_location)
-        web_app = my_web_server.make_app(theme, shared)
+        batch_analysis = BatchAnalysis(
+            args.tutor_engine,
+            UciShell(hostname="", username="", key_file="", password=""),
+            main_loop,
+            workers=args.batch_workers,
+            depth=args.batch_depth,
+            nodes=args.batch_nodes,
+        )
+        web_app = my_web_server.make_app(theme, shared, batch_analysis)
         try:
             web_app.listen(args.web_server_port)
         except PermissionError:
@@ -911,6 +972,54 @@ async def main() -> None:
             self.non_main_tasks = non_main_tasks
             self.update_status = None
             self.git_status = None
+            # event class: handler coroutine for process_main_events
+            self.event_handlers = {
+                Event.FEN: self.handle_fen,
+                Event.KEYBOARD_MOVE: self.handle_keyboard_move,
+                Event.LEVEL: self.handle_level,
+                Event.NEW_ENGINE: self.handle_new_engine,
+                Event.SETUP_POSITION: self.handle_setup_position,
+                Event.NEW_GAME: self.handle_new_game,
+                Event.PAUSE_RESUME: self.handle_pause_resume,
+                Event.ALTERNATIVE_MOVE: self.handle_alternative_move,
+                Event.SWITCH_SIDES: self.handle_switch_sides,
+                Event.DRAWRESIGN: self.handle_drawresign,
+                Event.REMOTE_MOVE: self.handle_remote_move,
+                Event.BEST_MOVE: self.handle_best_move,
+                Event.NEW_PV: self.handle_new_pv,
+                Event.NEW_SCORE: self.handle_new_score,
+                Event.NEW_DEPTH: self.handle_new_depth,
+                Event.START_SEARCH: self.handle_start_search,
+                Event.STOP_SEARCH: self.handle_stop_search,
+                Event.SET_INTERACTION_MODE: self.handle_set_interaction_mode,
+                Event.SET_OPENING_BOOK: self.handle_set_opening_book,
+                Event.SHOW_ENGINENAME: self.handle_show_enginename,
+                Event.SAVE_GAME: self.handle_save_game,
+                Event.READ_GAME: self.handle_read_game,
+                Event.CONTLAST: self.handle_contlast,
+                Event.ALTMOVES: self.handle_altmoves,
+                Event.PICOWATCHER: self.handle_picowatcher,
+                Event.PICOCOACH: self.handle_picocoach,
+                Event.PICOEXPLORER: self.handle_picoexplorer,
+                Event.RSPEED: self.handle_rspeed,
+                Event.TAKE_BACK: self.handle_take_back,
+                Event.PICOCOMMENT: self.handle_picocomment,
+                Event.SET_TIME_CONTROL: self.handle_set_time_control,
+                Event.CLOCK_TIME: self.handle_clock_time,
+                Event.OUT_OF_TIME: self.handle_out_of_time,
+                Event.SHUTDOWN: self.handle_shutdown,
+                Event.REBOOT: self.handle_reboot,
+                Event.EXIT: self.handle_exit,
+                Event.EMAIL_LOG: self.handle_email_log,
+                Event.SET_VOICE: self.handle_set_voice,
+                Event.KEYBOARD_BUTTON: self.handle_keyboard_button,
+                Event.KEYBOARD_FEN: self.handle_keyboard_fen,
+                Event.EXIT_MENU: self.handle_exit_menu,
+                Event.UPDATE_PICO: self.handle_update_pico,
+                Event.UPDATE_ENGINES: self.handle_update_engines,
+                Event.REMOTE_ROOM: self.handle_remote_room,
+                Event.PROMOTION: self.handle_promotion,
+            }
             ###########################################
 
             # try the given engine first and if that fails the first from "engines.ini" then exit
@@ -921,6 +1030,11 @@ async def main() -> None:
             self.uci_remote_shell = None
 
             self.uci_local_shell = UciShell(hostname="", username="", key_file="", password="")
+            self.engine_pool = EnginePool(
+                self.loop, size=self.args.engine_pool_size, max_memory=self.args.engine_pool_memory
+            )
+            self.prewarm_task = None
+            self.tablebase = Tablebase(self.args.tablebase_path)
 
             if self.state.engine_file is None:
                 self.state.engine_file = EngineProvider.installed_engines[0]["file"]
@@ -938,7 +1052,8 @@ async def main() -> None:
                 logger.warning("selected book not present, defaulting to %s", self.all_books[7]["file"])
                 self.book_index = 7
             self.state.book_in_use = self.args.book
-            self.bookreader = chess.polyglot.open_reader(self.all_books[self.book_index]["file"])
+            self.bookreader = OpeningBook(book_files(self.all_books[self.book_index]["file"], self.args.book_mix))
+            self.book_prefetch_task: Optional[asyncio.Task] = None
             self.state.searchmoves = AlternativeMover()
             self.state.artwork_in_use = False
             self.always_run_tutor = self.args.coach_analyser if self.args.coach_analyser else False
@@ -949,39 +1064,43 @@ async def main() -> None:
 
         async def initialise(self, time_text):
             """Due to use of async some initialisation is moved here"""
+            # independent phases run at the same time: the status scripts and ip lookup
+            # in threads, the playing and tutor engines are started in parallel
+            profile = StartupProfile()
+            update_task = profile.task("update status", asyncio.to_thread(self.get_last_update_status))
+            git_task = profile.task("git status", asyncio.to_thread(self.get_git_status))
+            ip_task = profile.task("ip info", display_ip_info(state))
+
+            engine_file_to_load = self.state.engine_file  # assume not mame
+            if "/mame/" in self.state.engine_file and self.state.dgtmenu.get_engine_rdisplay():
+                engine_file_art = self.state.engine_file + "_art"
+                my_file = Path(engine_file_art)
+                if my_file.is_file():
+                    self.state.artwork_in_use = True
+                    engine_file_to_load = engine_file_art  # load mame
+
+            engine_task = profile.task(
+                "engine",
+                self.engine_pool.acquire(engine_file_to_load, self.uci_local_shell, self.calc_engine_mame_par()),
+            )
+            tutor_task = profile.task("tutor engine", self.open_picotutor())
 
             # issue 106 - get update and git status information for the user
-            self.update_status = self.get_last_update_status()
+            self.update_status = await update_task
             logger.info("Update status: %s", self.update_status)
             # This is shown for a very short time - you can also see it in the menu
             if self.update_status:
                 self.state.dgttranslate.set_last_updated_info(self.update_status)
                 msg = Message.SHOW_TEXT(text_string=self.update_status)
                 await DisplayMsg.show(msg)
-            self.git_status = self.get_git_status()
+            self.git_status = await git_task
             if self.git_status:
                 self.state.dgttranslate.set_git_info(self.git_status)
 
-            engine_file_to_load = self.state.engine_file  # assume not mame
-            if "/mame/" in self.state.engine_file and self.state.dgtmenu.get_engine_rdisplay():
-                engine_file_art = self.state.engine_file + "_art"
-                my_file = Path(engine_file_art)
-                if my_file.is_file():
-                    self.state.artwork_in_use = True
-                    engine_file_to_load = engine_file_art  # load mame
-
-            self.engine = UciEngine(
-                file=engine_file_to_load,
-                uci_shell=self.uci_local_shell,
-                mame_par=self.calc_engine_mame_par(),
-                loop=self.loop,
-            )
-            await self.engine.open_engine()
+            self.engine = await engine_task
             if engine_file_to_load != self.state.engine_file:
                 await asyncio.sleep(1)  # mame artwork wait
-
-            await display_ip_info(state)
-            await asyncio.sleep(1.0)
+            await ip_task
 
             if not self.engine.loaded_ok():
                 logger.error("engine %s not started", self.state.engine_file)
@@ -991,8 +1110,9 @@ async def main() -> None:
                 sys.exit(-1)
 
             # Startup - internal
+            game_start = profile.elapsed()
             self.state.game = chess.Board()  # Create the current game
-            self.state.legal_fens = compute_legal_fens(self.state.game.copy())  # Compute the legal FENs
+            self.state.legal_fens = compute_legal_fens(self.state.game)  # Compute the legal FENs
             self.state.flag_startup = True
 
             if self.args.pgn_elo and self.args.pgn_elo.isnumeric() and self.args.rating_deviation:
@@ -1093,13 +1213,44 @@ async def main() -> None:
 
             if self.online_mode():
                 ModeInfo.set_online_mode(mode=True)
-                await self.set_wait_state(Message.START_NEW_GAME(game=self.state.game.copy(), newgame=True))
+                await self.set_wait_state(Message.START_NEW_GAME(game=GameSnapshot.of(self.state.game), newgame=True))
             else:
                 ModeInfo.set_online_mode(mode=False)
                 await self.engine.newgame(self.state.game.copy())
 
             await DisplayMsg.show(Message.PICOCOMMENT(picocomment="ok"))
+            profile.add("game setup", game_start, after=("engine", "update status", "git status", "ip info"))
+
+            self.state.picotutor = await tutor_task
+            my_pgn_display.set_picotutor(self.state.picotutor)  # needed for comments in pgn
+            # set_mode in picotutor init set to False
+
+            ModeInfo.set_game_ending(result="*")
+
+            text = self.state.dgtmenu.get_current_engine_name()
+            self.state.engine_text = text
+            self.state.dgtmenu.enter_top_menu()
+
+            if self.state.dgtmenu.get_enginename():
+                msg = Message.ENGINE_NAME(engine_name=self.state.engine_text)
+                await DisplayMsg.show(msg)
+
+            await self._start_or_stop_analysis_as_needed()  # start analysis if needed
+            self.background_analyse_timer.start()  # always run background analyser
+            profile.add("ready", profile.elapsed(), after=("game setup", "tutor engine"))
+            logger.info("startup phases in seconds:\n%s", profile.report())
+            if self.args.startup_profile:
+                print(profile.report(), flush=True)
+            # start the favorite engines in the background for a quick engine change
+            favorites = [
+                eng["file"] for eng in EngineProvider.favorite_engines if eng["file"] != self.state.engine_file
+            ]
+            self.prewarm_task = asyncio.create_task(
+                self.engine_pool.prewarm(favorites, self.uci_local_shell, self.calc_engine_mame_par())
+            )
 
+        async def open_picotutor(self) -> PicoTutor:
+            """Create the PicoTutor and start its engine."""
             self.state.comment_file = self.get_comment_file()
             tutor_engine = self.args.tutor_engine
             if self.remote_engine_mode() and self.uci_remote_shell:
@@ -1107,37 +1258,26 @@ async def main() -> None:
             else:
                 uci_shell = self.uci_local_shell
             # not using self.args.coach_analyser any more
-            self.state.picotutor = PicoTutor(
+            picotutor = PicoTutor(
                 i_ucishell=uci_shell,
                 i_engine_path=tutor_engine,
                 i_comment_file=self.state.comment_file,
                 i_lang=self.args.language,
                 i_always_run_tutor=self.always_run_tutor,
                 loop=self.loop,
+                tablebase=self.tablebase,
             )
             # @ todo first init status should be set in init above
-            await self.state.picotutor.set_status(
-                self.state.dgtmenu.get_picowatcher(),
-                self.state.dgtmenu.get_picocoach(),
-                self.state.dgtmenu.get_picoexplorer(),
-                self.state.dgtmenu.get_picocomment(),
+            dgtmenu = self.state.dgtmenu
+            assert dgtmenu is not None  # main() creates the menu before the startup phases
+            await picotutor.set_status(
+                dgtmenu.get_picowatcher(),
+                dgtmenu.get_picocoach(),
+                dgtmenu.get_picoexplorer(),
+                dgtmenu.get_picocomment(),
             )
-            await self.state.picotutor.open_engine()
-            my_pgn_display.set_picotutor(self.state.picotutor)  # needed for comments in pgn
-            # set_mode in picotutor init set to False
-
-            ModeInfo.set_game_ending(result="*")
-
-            text = self.state.dgtmenu.get_current_engine_name()
-            self.state.engine_text = text
-            self.state.dgtmenu.enter_top_menu()
-
-            if self.state.dgtmenu.get_enginename():
-                msg = Message.ENGINE_NAME(engine_name=self.state.engine_text)
-                await DisplayMsg.show(msg)
-
-            await self._start_or_stop_analysis_as_needed()  # start analysis if needed
-            self.background_analyse_timer.start()  # always run background analyser
+            await picotutor.open_engine()
+            return picotutor
 
         def get_last_update_status(self) -> str | None:
             """
@@ -1154,6 +1294,7 @@ async def main() -> None:
                     stderr=subprocess.PIPE,
                     text=True,  # capture as string
                     check=False,  # don't raise exception on non-zero exit
+                    timeout=STATUS_SCRIPT_TIMEOUT,
                 )
 
                 # Return stripped output
@@ -1179,6 +1320,7 @@ async def main() -> None:
                     stderr=subprocess.PIPE,
                     text=True,  # capture output as string
                     check=False,  # don't raise exception on non-zero exit
+                    timeout=STATUS_SCRIPT_TIMEOUT,
                 )
 
                 # Return the full output string from the shell script
@@ -1197,6 +1339,13 @@ async def main() -> None:
                 # ping it (isready) in handle_bestmove_0000() to decide between resignation and crash.
                 self.state.pending_engine_result = await self.engine.handle_bestmove_0000(self.state.game.copy())
 
+        def prefetch_book(self, move: chess.Move):
+            """Load the book continuations after the engine book move while the user thinks."""
+            if self.book_prefetch_task is None or self.book_prefetch_task.done():
+                board = self.state.game.copy(stack=False)
+                board.push(move)
+                self.book_prefetch_task = asyncio.create_task(asyncio.to_thread(self.bookreader.prefetch, board))
+
         async def think(
             self,
             msg: Message,
@@ -1211,10 +1360,22 @@ async def main() -> None:
             if not self.online_mode() or self.state.game.fullmove_number > 1:
                 await self.state.start_clock()
             book_res = self.state.searchmoves.book(self.bookreader, self.state.game.copy())
+            tablebase_info = None
+            if (
+                not book_res
+                and self.args.tablebase_moves
+                and not (self.emulation_mode() or self.online_mode() or self.pgn_mode())
+            ):
+                tablebase_info = await asyncio.to_thread(self.tablebase.analysis, self.state.game.copy())
             if (book_res and not self.emulation_mode() and not self.online_mode() and not self.pgn_mode()) or (
                 book_res and (self.pgn_mode() and self.state.pgn_book_test)
             ):
+                self.prefetch_book(book_res.move)
                 await Observable.fire(Event.BEST_MOVE(move=book_res.move, ponder=book_res.ponder, inbook=True))
+            elif tablebase_info:
+                # perfect endgame move without an engine search
+                await self.send_analyse(tablebase_info[0], self.state.game.fen(), send_pv=False)
+                await Observable.fire(Event.BEST_MOVE(move=tablebase_info[0]["pv"][0], ponder=None, inbook=False))
             else:
                 while not self.engine.is_waiting():
                     await asyncio.sleep(0.05)
@@ -1355,7 +1516,7 @@ async def main() -> None:
                         san_move = game_tutor.san(t_best_move)
                         game_tutor.push(t_best_move)  # for picotalker (last move spoken)
                         tutor_str = "BEST" + san_move
-                        msg = Message.PICOTUTOR_MSG(eval_str=tutor_str, game=game_tutor.copy())
+                        msg = Message.PICOTUTOR_MSG(eval_str=tutor_str, game=GameSnapshot.of(game_tutor))
                         await DisplayMsg.show(msg)
                         await asyncio.sleep(5)
                 else:
@@ -1380,7 +1541,7 @@ async def main() -> None:
                             game_tutor.push(alt_move)  # for picotalker (last move spoken)
 
                             tutor_str = "BEST" + san_move
-                            msg = Message.PICOTUTOR_MSG(eval_str=tutor_str, game=game_tutor.copy())
+                            msg = Message.PICOTUTOR_MSG(eval_str=tutor_str, game=GameSnapshot.of(game_tutor))
                             await DisplayMsg.show(msg)
                             await asyncio.sleep(5)
                         else:
@@ -1427,9 +1588,9 @@ async def main() -> None:
                 self.state.done_move = self.state.pb_move = chess.Move.null()
                 self.state.searchmoves.reset()
                 self.state.game_declared = False
-                self.state.legal_fens = compute_legal_fens(self.state.game.copy())
-                self.state.legal_fens_after_cmove = []
-                self.state.last_legal_fens = []
+                self.state.legal_fens = compute_legal_fens(self.state.game)
+                self.state.legal_fens_after_cmove = {}
+                self.state.last_legal_fens = {}
                 await self.set_picotutor_position(new_game=True)
             else:
                 logger.debug("molli PGN fen is invalid!")
@@ -1477,8 +1638,8 @@ async def main() -> None:
         async def set_wait_state(self, msg: Message, start_search=True):
             """Enter engine waiting (normal mode) and maybe (by parameter) start pondering."""
             if not self.state.done_computer_fen:
-                self.state.legal_fens = compute_legal_fens(self.state.game.copy())
-                self.state.last_legal_fens = []
+                self.state.legal_fens = compute_legal_fens(self.state.game)
+                self.state.last_legal_fens = {}
             if self.state.interaction_mode in (Mode.NORMAL, Mode.BRAIN):  # @todo handle Mode.REMOTE too and TRAINING?
                 if self.state.done_computer_fen:
                     logger.debug("best move displayed, dont search and also keep play mode: %s", self.state.play_mode)
@@ -1557,7 +1718,7 @@ async def main() -> None:
                 self.state.takeback_active = True
                 # it seems call to set_wait_state assumes its always user move
                 # so after engine move takeback user needs to press lever
-                await self.set_wait_state(Message.TAKE_BACK(game=self.state.game.copy()))
+                await self.set_wait_state(Message.TAKE_BACK(game=GameSnapshot.of(self.state.game)))
 
                 if self.pgn_mode():  # molli pgn
                     log_pgn(self.state)
@@ -1586,8 +1747,8 @@ async def main() -> None:
             if not self.engine.is_waiting():
                 await self.stop_search_and_clock()
 
-            self.state.last_legal_fens = []
-            self.state.legal_fens_after_cmove = []
+            self.state.last_legal_fens = {}
+            self.state.legal_fens_after_cmove = {}
             self.state.best_move_displayed = self.state.done_computer_fen
             if self.state.best_move_displayed:
                 self.state.done_computer_fen = None
@@ -1605,7 +1766,7 @@ async def main() -> None:
             if self.state.time_control.mode == TimeMode.FIXED:
                 self.state.time_control.reset()
 
-            self.state.legal_fens = []
+            self.state.legal_fens = {}
 
             cond1 = self.state.game.turn == chess.WHITE and self.state.play_mode == PlayMode.USER_BLACK
             cond2 = self.state.game.turn == chess.BLACK and self.state.play_mode == PlayMode.USER_WHITE
@@ -1615,7 +1776,7 @@ async def main() -> None:
             else:
                 await DisplayMsg.show(msg)
                 await self.state.start_clock()
-                self.state.legal_fens = compute_legal_fens(self.state.game.copy())
+                self.state.legal_fens = compute_legal_fens(self.state.game)
 
         async def switch_online(self):
             color = ""
@@ -1656,9 +1817,9 @@ async def main() -> None:
 
                     await self.stop_search_and_clock()
 
-                    self.state.last_legal_fens = []
-                    self.state.legal_fens_after_cmove = []
-                    self.state.legal_fens = []
+                    self.state.last_legal_fens = {}
+                    self.state.legal_fens_after_cmove = {}
+                    self.state.legal_fens = {}
 
                     await self.think(msg)
 
@@ -1674,7 +1835,7 @@ async def main() -> None:
             """Process given fen like doMove, undoMove, takebackPosition, handleSliding."""
             handled_fen = True
             self.state.error_fen = None
-            legal_fens_pico = compute_legal_fens(self.state.game.copy())
+            legal_fens_pico = compute_legal_fens(self.state.game)
 
             # Check for same position
             if fen == self.state.game.board_fen():
@@ -1697,7 +1858,7 @@ async def main() -> None:
                     if self.state.delay_fen_error == 1:
                         # position finally alright!
                         tutor_str = "POSOK"
-                        msg = Message.PICOTUTOR_MSG(eval_str=tutor_str, game=self.state.game.copy())
+                        msg = Message.PICOTUTOR_MSG(eval_str=tutor_str, game=GameSnapshot.of(self.state.game))
                         await DisplayMsg.show(msg)
                         self.state.delay_fen_error = 4
                         await asyncio.sleep(1)
@@ -1787,18 +1948,16 @@ async def main() -> None:
                         # @todo - check valid here - dont reset position if valid
                         await self.set_picotutor_position()
                     logger.info("wrong color move -> sliding, reverting to: %s", self.state.game.fen())
-                legal_moves = list(self.state.game.legal_moves)
-                move = legal_moves[state.last_legal_fens.index(fen)]
+                move = state.last_legal_fens[fen]
                 await self.user_move(move, sliding=True)
                 if self.state.interaction_mode in (Mode.NORMAL, Mode.BRAIN, Mode.REMOTE, Mode.TRAINING):
-                    self.state.legal_fens = []
+                    self.state.legal_fens = {}
                 else:
-                    self.state.legal_fens = compute_legal_fens(self.state.game.copy())
+                    self.state.legal_fens = compute_legal_fens(self.state.game)
 
             # allow playing/correcting moves for pico's side in TRAINING mode:
             elif fen in legal_fens_pico and self.state.interaction_mode in (Mode.TRAINING, Mode.PGNREPLAY):
-                legal_moves = list(self.state.game.legal_moves)
-                move = legal_moves[legal_fens_pico.index(fen)]
+                move = legal_fens_pico[fen]
 
                 if self.state.done_computer_fen:
                     if fen == self.state.done_computer_fen:
@@ -1812,12 +1971,18 @@ async def main() -> None:
                             await asyncio.sleep(3)
                             # display set pieces again and accept new players move as pico's move
                             await DisplayMsg.show(
-                                Message.ALTERNATIVE_MOVE(game=self.state.game.copy(), play_mode=self.state.play_mode)
+                                Message.ALTERNATIVE_MOVE(
+                                    game=GameSnapshot.of(self.state.game), play_mode=self.state.play_mode
+                                )
                             )
                             await asyncio.sleep(2)
                             await DisplayMsg.show(
                                 Message.COMPUTER_MOVE(
-                                    move=move, ponder=False, game=self.state.game.copy(), wait=False, is_user_move=False
+                                    move=move,
+                                    ponder=False,
+                                    game=GameSnapshot.of(self.state.game),
+                                    wait=False,
+                                    is_user_move=False,
                                 )
                             )
                             await asyncio.sleep(2)
@@ -1826,22 +1991,21 @@ async def main() -> None:
                 await self.user_move(move, sliding=False)
                 self.state.last_legal_fens = self.state.legal_fens
                 if self.state.interaction_mode in (Mode.NORMAL, Mode.BRAIN, Mode.REMOTE, Mode.TRAINING):
-                    self.state.legal_fens = []
+                    self.state.legal_fens = {}
                 else:
-                    self.state.legal_fens = compute_legal_fens(self.state.game.copy())
+                    self.state.legal_fens = compute_legal_fens(self.state.game)
 
             # standard legal move
             elif fen in self.state.legal_fens:
                 logger.debug("standard move detected")
                 self.state.newgame_happened = False
-                legal_moves = list(self.state.game.legal_moves)
-                move = legal_moves[state.legal_fens.index(fen)]
+                move = state.legal_fens[fen]
                 await self.user_move(move, sliding=False)
                 self.state.last_legal_fens = self.state.legal_fens
                 if self.state.interaction_mode in (Mode.NORMAL, Mode.BRAIN, Mode.REMOTE):
-                    self.state.legal_fens = []
+                    self.state.legal_fens = {}
                 else:
-                    self.state.legal_fens = compute_legal_fens(self.state.game.copy())
+                    self.state.legal_fens = compute_legal_fens(self.state.game)
 
             # molli: allow direct play of an alternative move for pico
             elif (
@@ -1856,10 +2020,9 @@ async def main() -> None:
                 and self.state.dgtmenu.get_game_altmove()
                 and not self.state.takeback_active
             ):
-                legal_moves = list(self.state.game.legal_moves)
-                self.state.done_move = legal_moves[legal_fens_pico.index(fen)]
+                self.state.done_move = legal_fens_pico[fen]
                 await DisplayMsg.show(
-                    Message.ALTERNATIVE_MOVE(game=self.state.game.copy(), play_mode=self.state.play_mode)
+                    Message.ALTERNATIVE_MOVE(game=GameSnapshot.of(self.state.game), play_mode=self.state.play_mode)
                 )
                 await asyncio.sleep(1.5)
                 if self.state.done_move:
@@ -1867,7 +2030,7 @@ async def main() -> None:
                         Message.COMPUTER_MOVE(
                             move=self.state.done_move,
                             ponder=False,
-                            game=self.state.game.copy(),
+                            game=GameSnapshot.of(self.state.game),
                             wait=False,
                             is_user_move=False,
                         )
@@ -1896,8 +2059,8 @@ async def main() -> None:
                 self.state.done_move = chess.Move.null()
                 game_end = self.state.check_game_state()
                 if game_end:
-                    self.state.legal_fens = []
-                    self.state.legal_fens_after_cmove = []
+                    self.state.legal_fens = {}
+                    self.state.legal_fens_after_cmove = {}
                     if self.online_mode():
                         await self.stop_search_and_clock()
                         self.state.stop_fen_timer()
@@ -1925,10 +2088,8 @@ async def main() -> None:
 
                     await self.state.start_clock()
 
-                self.state.legal_fens = compute_legal_fens(
-                    self.state.game.copy()
-                )  # calc. new legal moves based on alt. move
-                self.state.last_legal_fens = []
+                self.state.legal_fens = compute_legal_fens(self.state.game)  # calc. new legal moves based on alt. move
+                self.state.last_legal_fens = {}
 
             # Player has done the computer or remote move on the board
             elif fen == self.state.done_computer_fen:
@@ -1962,8 +2123,8 @@ async def main() -> None:
                 game_end = self.state.check_game_state()
                 if game_end:
                     await self.update_elo(game_end.result)
-                    self.state.legal_fens = []
-                    self.state.legal_fens_after_cmove = []
+                    self.state.legal_fens = {}
+                    self.state.legal_fens_after_cmove = {}
                     if self.online_mode():
                         await self.stop_search_and_clock()
                         self.state.stop_fen_timer()
@@ -1997,28 +2158,28 @@ async def main() -> None:
                         await DisplayMsg.show(Message.EXIT_MENU())  # show clock
                         end_time_cmove_done = 0
 
-                    self.state.legal_fens = compute_legal_fens(self.state.game.copy())
+                    self.state.legal_fens = compute_legal_fens(self.state.game)
 
                     if self.pgn_mode():
                         log_pgn(self.state)
                         if self.state.game.turn == chess.WHITE:
                             if self.state.max_guess_white > 0:
                                 if self.state.no_guess_white > self.state.max_guess_white:
-                                    self.state.last_legal_fens = []
+                                    self.state.last_legal_fens = {}
                                     await self.get_next_pgn_move()
                             else:
-                                self.state.last_legal_fens = []
+                                self.state.last_legal_fens = {}
                                 await self.get_next_pgn_move()
                         elif self.state.game.turn == chess.BLACK:
                             if self.state.max_guess_black > 0:
                                 if self.state.no_guess_black > self.state.max_guess_black:
-                                    self.state.last_legal_fens = []
+                                    self.state.last_legal_fens = {}
                                     await self.get_next_pgn_move()
                             else:
-                                self.state.last_legal_fens = []
+                                self.state.last_legal_fens = {}
                                 await self.get_next_pgn_move()
 
-                self.state.last_legal_fens = []
+                self.state.last_legal_fens = {}
                 self.state.newgame_happened = False
 
                 if self.state.game.fullmove_number < 1:
@@ -2059,22 +2220,19 @@ async def main() -> None:
                     )
                     await DisplayMsg.show(msg)
 
-                self.state.last_legal_fens = []
-                self.state.legal_fens_after_cmove = []
-                self.state.legal_fens = compute_legal_fens(
-                    self.state.game.copy()
-                )  # molli new legal fance based on cmove
+                self.state.last_legal_fens = {}
+                self.state.legal_fens_after_cmove = {}
+                self.state.legal_fens = compute_legal_fens(self.state.game)  # molli new legal fance based on cmove
 
                 # standard user move handling
-                legal_moves = list(self.state.game.legal_moves)
-                move = legal_moves[state.legal_fens.index(fen)]
+                move = state.legal_fens[fen]
                 await self.user_move(move, sliding=False)
                 self.state.last_legal_fens = self.state.legal_fens
                 self.state.newgame_happened = False
                 if self.state.interaction_mode in (Mode.NORMAL, Mode.BRAIN, Mode.REMOTE, Mode.TRAINING):
-                    self.state.legal_fens = []
+                    self.state.legal_fens = {}
                 else:
-                    self.state.legal_fens = compute_legal_fens(self.state.game.copy())
+                    self.state.legal_fens = compute_legal_fens(self.state.game)
 
             # Check if this is a previous legal position and allow user to restart from this position
             else:
@@ -2109,7 +2267,7 @@ async def main() -> None:
                             self.state.searchmoves.reset()
                             self.state.takeback_active = True
                             await self.set_wait_state(
-                                Message.TAKE_BACK(game=self.state.game.copy())
+                                Message.TAKE_BACK(game=GameSnapshot.of(self.state.game))
                             )  # new: force stop no matter if picochess turn
 
                             break
@@ -2133,7 +2291,7 @@ async def main() -> None:
                 self.state.fen_error_occured = False
                 if self.state.position_mode and self.state.delay_fen_error == 1:
                     tutor_str = "POSOK"
-                    msg = Message.PICOTUTOR_MSG(eval_str=tutor_str, game=self.state.game.copy())
+                    msg = Message.PICOTUTOR_MSG(eval_str=tutor_str, game=GameSnapshot.of(self.state.game))
                     await DisplayMsg.show(msg)
                     await asyncio.sleep(1)
                     if not self.state.done_computer_fen:
@@ -2146,7 +2304,7 @@ async def main() -> None:
                     self.state.error_fen = None
                     if self.state.position_mode and self.state.delay_fen_error == 1:
                         tutor_str = "POSOK"
-                        msg = Message.PICOTUTOR_MSG(eval_str=tutor_str, game=self.state.game.copy())
+                        msg = Message.PICOTUTOR_MSG(eval_str=tutor_str, game=GameSnapshot.of(self.state.game))
                         await DisplayMsg.show(msg)
                         if not self.state.done_computer_fen:
                             await self.state.start_clock()
@@ -2317,7 +2475,7 @@ async def main() -> None:
                                 game_tutor.push(t_pv_user_move[1])  # 1st counter move
 
                                 tutor_str = "THREAT" + san_move
-                                msg = Message.PICOTUTOR_MSG(eval_str=tutor_str, game=game_tutor.copy())
+                                msg = Message.PICOTUTOR_MSG(eval_str=tutor_str, game=GameSnapshot.of(game_tutor))
                                 pending_picotutor_msgs.append((msg, 5.0))
 
                             if t_hint_move != chess.Move.null():
@@ -2325,7 +2483,7 @@ async def main() -> None:
                                 san_move = game_tutor.san(t_hint_move)
                                 game_tutor.push(t_hint_move)
                                 tutor_str = "HINT" + san_move
-                                msg = Message.PICOTUTOR_MSG(eval_str=tutor_str, game=game_tutor.copy())
+                                msg = Message.PICOTUTOR_MSG(eval_str=tutor_str, game=GameSnapshot.of(game_tutor))
                                 pending_picotutor_msgs.append((msg, 5.0))
 
                     if self.state.game.fullmove_number < 1:
@@ -2336,7 +2494,7 @@ async def main() -> None:
                 #
                 if self.state.interaction_mode in (Mode.NORMAL, Mode.BRAIN, Mode.TRAINING):
                     msg = Message.USER_MOVE_DONE(
-                        move=move, fen=game_before.fen(), turn=game_before.turn, game=self.state.game.copy()
+                        move=move, fen=game_before.fen(), turn=game_before.turn, game=GameSnapshot.of(self.state.game)
                     )
                     game_end = self.state.check_game_state()
                     if game_end:
@@ -2353,13 +2511,13 @@ async def main() -> None:
                             await self._deliver_picotutor_messages(pending_picotutor_msgs)
                             self.game_end_event()
                             await DisplayMsg.show(game_end)
-                            self.state.legal_fens_after_cmove = []  # molli
+                            self.state.legal_fens_after_cmove = {}  # molli
                         else:
                             await DisplayMsg.show(msg)
                             await self._deliver_picotutor_messages(pending_picotutor_msgs)
                             self.game_end_event()
                             await DisplayMsg.show(game_end)
-                            self.state.legal_fens_after_cmove = []  # molli
+                            self.state.legal_fens_after_cmove = {}  # molli
                     else:
                         if self.state.interaction_mode in (Mode.NORMAL, Mode.TRAINING):
                             if not self.state.check_game_state():
@@ -2372,7 +2530,9 @@ async def main() -> None:
                                     else:
                                         self.state.takeback_active = True
                                         self.state.automatic_takeback = True  # to be reset in think!
-                                        await self.set_wait_state(Message.TAKE_BACK(game=self.state.game.copy()))
+                                        await self.set_wait_state(
+                                            Message.TAKE_BACK(game=GameSnapshot.of(self.state.game))
+                                        )
                                 else:
                                     # send move to engine
                                     logger.debug("starting think()")
@@ -2387,7 +2547,7 @@ async def main() -> None:
                     self.state.last_move = move
                 elif self.state.interaction_mode == Mode.REMOTE:
                     msg = Message.USER_MOVE_DONE(
-                        move=move, fen=game_before.fen(), turn=game_before.turn, game=self.state.game.copy()
+                        move=move, fen=game_before.fen(), turn=game_before.turn, game=GameSnapshot.of(self.state.game)
                     )
                     game_end = self.state.check_game_state()
                     await DisplayMsg.show(msg)
@@ -2399,7 +2559,7 @@ async def main() -> None:
                         await self.observe()
                 elif self.state.interaction_mode == Mode.OBSERVE:
                     msg = Message.REVIEW_MOVE_DONE(
-                        move=move, fen=game_before.fen(), turn=game_before.turn, game=self.state.game.copy()
+                        move=move, fen=game_before.fen(), turn=game_before.turn, game=GameSnapshot.of(self.state.game)
                     )
                     game_end = self.state.check_game_state()
                     if game_end:
@@ -2413,7 +2573,7 @@ async def main() -> None:
                         await self.observe()
                 else:  # self.state.interaction_mode in (Mode.ANALYSIS, Mode.KIBITZ, Mode.PONDER, Mode.PGNREPLAY):
                     msg = Message.REVIEW_MOVE_DONE(
-                        move=move, fen=game_before.fen(), turn=game_before.turn, game=self.state.game.copy()
+                        move=move, fen=game_before.fen(), turn=game_before.turn, game=GameSnapshot.of(self.state.game)
                     )
                     game_end = self.state.check_game_state()
                     if game_end:
@@ -2704,6 +2864,10 @@ async def main() -> None:
                 return
             # ask for score from white's perspective
             (move, score, mate) = PicoTutor.get_score(info)
+            tablebase_score = await asyncio.to_thread(self.tablebase.score, self.state.game.copy())
+            if tablebase_score is not None:
+                # exact endgame score instead of the engine estimate
+                _, score, mate = PicoTutor.get_score({"score": tablebase_score})
             if "depth" in info:
                 depth = info.get("depth")
                 cache_ponder = move
@@ -2746,7 +2910,7 @@ async def main() -> None:
                             tc_init=self.state.time_control.get_parameters(),
                             result=result,
                             play_mode=self.state.play_mode,
-                            game=self.state.game.copy(),
+                            game=GameSnapshot.of(self.state.game),
                             mode=self.state.interaction_mode,
                         )
                     )
@@ -2814,11 +2978,13 @@ async def main() -> None:
                             self.state.done_move = self.state.pb_move = chess.Move.null()
                             self.state.searchmoves.reset()
                             self.state.game_declared = False
-                            self.state.legal_fens = compute_legal_fens(self.state.game.copy())
-                            self.state.legal_fens_after_cmove = []
-                            self.state.last_legal_fens = []
+                            self.state.legal_fens = compute_legal_fens(self.state.game)
+                            self.state.legal_fens_after_cmove = {}
+                            self.state.last_legal_fens = {}
                             await DisplayMsg.show(Message.SHOW_TEXT(text_string="NEW_POSITION"))
-                            await DisplayMsg.show(Message.START_NEW_GAME(game=self.state.game.copy(), newgame=False))
+                            await DisplayMsg.show(
+                                Message.START_NEW_GAME(game=GameSnapshot.of(self.state.game), newgame=False)
+                            )
                             await self.set_picotutor_position(new_game=True)  # issue #78 new code
                         else:
                             # ask python-chess to correct the castling string
@@ -2832,12 +2998,12 @@ async def main() -> None:
                                 self.state.done_move = self.state.pb_move = chess.Move.null()
                                 self.state.searchmoves.reset()
                                 self.state.game_declared = False
-                                self.state.legal_fens = compute_legal_fens(self.state.game.copy())
-                                self.state.legal_fens_after_cmove = []
-                                self.state.last_legal_fens = []
+                                self.state.legal_fens = compute_legal_fens(self.state.game)
+                                self.state.legal_fens_after_cmove = {}
+                                self.state.last_legal_fens = {}
                                 await DisplayMsg.show(Message.SHOW_TEXT(text_string="NEW_POSITION"))
                                 await DisplayMsg.show(
-                                    Message.START_NEW_GAME(game=self.state.game.copy(), newgame=False)
+                                    Message.START_NEW_GAME(game=GameSnapshot.of(self.state.game), newgame=False)
                                 )
                                 await self.set_picotutor_position(new_game=True)  # issue #78 new code
                             else:
@@ -2854,7 +3020,7 @@ async def main() -> None:
                                 Message.COMPUTER_MOVE(
                                     move=self.state.done_move,
                                     ponder=False,
-                                    game=self.state.game.copy(),
+                                    game=GameSnapshot.of(self.state.game),
                                     wait=False,
                                     is_user_move=False,
                                 )
@@ -3148,20 +3314,19 @@ async def main() -> None:
             self.state.searchmoves.reset()
             self.state.game_declared = False
 
-            self.state.legal_fens = compute_legal_fens(self.state.game.copy())
-            self.state.legal_fens_after_cmove = []
-            self.state.last_legal_fens = []
+            self.state.legal_fens = compute_legal_fens(self.state.game)
+            self.state.legal_fens_after_cmove = {}
+            self.state.last_legal_fens = {}
             await self.stop_search_and_clock()
 
             self.shared["headers"] = l_game_pgn.headers  # update headers from file
-            EventHandler.write_to_clients({"event": "Header", "headers": dict(self.shared["headers"])})
-            await asyncio.sleep(0.1)  # give time to write_to_clients
+            publish_state(self.shared)
 
             game_end = self.state.check_game_state()
             if game_end:
                 self.state.play_mode = PlayMode.USER_WHITE if turn == chess.WHITE else PlayMode.USER_BLACK
-                self.state.legal_fens = []
-                self.state.legal_fens_after_cmove = []
+                self.state.legal_fens = {}
+                self.state.legal_fens_after_cmove = {}
                 self.game_end_event()
                 await DisplayMsg.show(game_end)
             else:
@@ -3317,6 +3482,10 @@ async def main() -> None:
             else:
                 return False
 
+        def remote_tcp_file(self, engine_name: str) -> str:
+            """Return the tcp://server:port/engine file of an engine on the picochess engine server."""
+            return f"{REMOTE_PREFIX}{self.args.engine_remote_server}:{self.args.engine_remote_port}/{engine_name}"
+
         async def _pv_score_depth_analyser(self):
             """Analyse PV score depth in the background"""
             if self.state.game:
@@ -3336,7 +3505,7 @@ async def main() -> None:
                     # issue #45 still let main loop create tasks
                     # @todo check if this should not do create_task either
                     # create_task should make program more responsive to user tasks
-                    asyncio.create_task(self.process_main_events(event))
+                    asyncio.create_task(self.process_main_events(event, evt_queue.latency))
                     evt_queue.task_done()
                     await asyncio.sleep(0.05)  # balancing message queues
             except asyncio.CancelledError:
@@ -3351,7 +3520,11 @@ async def main() -> None:
             # as we wait 5 secs before exiting we only want to prevent timer actions
             await self.stop_search()
             await self.state.stop_clock()
+            if self.prewarm_task:
+                self.prewarm_task.cancel()
             await self.engine.quit()
+            await self.engine_pool.close()
+            remote_pool.close()
             if self.state.picotutor:
                 # close all the picotutor engines
                 await self.state.picotutor.exit_or_reboot_cleanups()
@@ -3417,8 +3590,8 @@ async def main() -> None:
             #  @todo2 should be more state variables to reset here?
             self.state.autoplay_pgn_file = False  # prevent autoplay starting for next pgn read
 
-        async def process_main_events(self, event):
-            """Consume event from evt_queue"""
+        async def process_main_events(self, event, wait=0.0):
+            """Consume event from evt_queue, wait is the time it waited in the queue"""
             if (
                 not isinstance(event, Event.CLOCK_TIME)
                 and not isinstance(event, Event.NEW_DEPTH)
@@ -3426,94 +3599,132 @@ async def main() -> None:
                 and not isinstance(event, Event.NEW_SCORE)
             ):
                 logger.debug("received event from evt_queue: %s", event)
-            if isinstance(event, Event.FEN):
-                await self.process_fen(event.fen, self.state)
-
-            elif isinstance(event, Event.KEYBOARD_MOVE):
-                move = event.move
-                logger.debug("keyboard move [%s]", move)
-                if move not in self.state.game.legal_moves:
-                    logger.warning("illegal move. fen: [%s]", self.state.game.fen())
-                else:
-                    game_copy = self.state.game.copy()
-                    game_copy.push(move)
-                    fen = game_copy.board_fen()
-                    await DisplayMsg.show(Message.DGT_FEN(fen=fen, raw=False))
+            handler = self.event_handlers.get(type(event))
+            start = time.monotonic()
+            try:
+                if handler:
+                    await handler(event)
+                else:  # Default
+                    logger.info("event not handled : [%s]", event)
+                    await asyncio.sleep(0.05)  # balance message queues
+            finally:
+                event_stats.add(repr(event), wait, time.monotonic() - start)
+
+        async def handle_fen(self, event):
+            await self.process_fen(event.fen, self.state)
+
+        async def handle_keyboard_move(self, event):
+            move = event.move
+            logger.debug("keyboard move [%s]", move)
+            if move not in self.state.game.legal_moves:
+                logger.warning("illegal move. fen: [%s]", self.state.game.fen())
+            else:
+                game_copy = self.state.game.copy()
+                game_copy.push(move)
+                fen = game_copy.board_fen()
+                await DisplayMsg.show(Message.DGT_FEN(fen=fen, raw=False))
 
-            elif isinstance(event, Event.LEVEL):
-                if event.options:
-                    await self.engine.startup(event.options, self.state.rating)
-                self.state.new_engine_level = event.level_name
-                await DisplayMsg.show(
-                    Message.LEVEL(
-                        level_text=event.level_text,
-                        level_name=event.level_name,
-                        do_speak=bool(event.options),
-                    )
+        async def handle_level(self, event):
+            if event.options:
+                await self.engine.startup(event.options, self.state.rating)
+            self.state.new_engine_level = event.level_name
+            await DisplayMsg.show(
+                Message.LEVEL(
+                    level_text=event.level_text,
+                    level_name=event.level_name,
+                    do_speak=bool(event.options),
                 )
+            )
 
-            elif isinstance(event, Event.NEW_ENGINE):
-                # if we are waiting for an engine move, get rid of that first
-                await self.get_rid_of_engine_move()
-                self.state.best_sent_depth.reset()
-                old_file = self.state.engine_file
-                old_options = {}
-                old_options = self.engine.get_pgn_options()
-                engine_fallback = False
-                # Stop the old engine cleanly
-                if not self.emulation_mode():
-                    await self.stop_search()
-                # Closeout the engine process and threads
+        async def handle_new_engine(self, event):
+            # if we are waiting for an engine move, get rid of that first
+            await self.get_rid_of_engine_move()
+            self.state.best_sent_depth.reset()
+            old_file = self.state.engine_file
+            old_options = {}
+            old_options = self.engine.get_pgn_options()
+            engine_fallback = False
+            # Stop the old engine cleanly
+            if not self.emulation_mode():
+                await self.stop_search()
+            # Closeout the engine process and threads
 
-                self.state.engine_file = event.eng["file"]
-                self.state.artwork_in_use = False
-                engine_file_to_load = self.state.engine_file  # assume not mame
-                if "/mame/" in self.state.engine_file and self.state.dgtmenu.get_engine_rdisplay():
-                    engine_file_art = self.state.engine_file + "_art"
-                    my_file = Path(engine_file_art)
-                    if my_file.is_file():
-                        self.state.artwork_in_use = True
-                        engine_file_to_load = engine_file_art  # load mame
-                    else:
-                        await DisplayMsg.show(Message.SHOW_TEXT(text_string="NO_ARTWORK"))
+            self.state.engine_file = event.eng["file"]
+            self.state.artwork_in_use = False
+            engine_file_to_load = self.state.engine_file  # assume not mame
+            if "/mame/" in self.state.engine_file and self.state.dgtmenu.get_engine_rdisplay():
+                engine_file_art = self.state.engine_file + "_art"
+                my_file = Path(engine_file_art)
+                if my_file.is_file():
+                    self.state.artwork_in_use = True
+                    engine_file_to_load = engine_file_art  # load mame
+                else:
+                    await DisplayMsg.show(Message.SHOW_TEXT(text_string="NO_ARTWORK"))
 
-                help_str = engine_file_to_load.rsplit(os.sep, 1)[1]
-                remote_file = self.engine_remote_home + os.sep + help_str
+            help_str = engine_file_to_load.rsplit(os.sep, 1)[1]
+            remote_file = self.engine_remote_home + os.sep + help_str
+            if self.remote_engine_mode() and self.args.engine_remote_port:
+                # the engine runs on the engine server, the connection is kept by uci.remote
+                engine_file_to_load = self.remote_tcp_file(help_str)
 
-                flag_eng = False
-                # V4 removed paramiko check_ssh - it has to be rewritten anyway
-                logger.debug("molli check_ssh:%s", flag_eng)
-                await DisplayMsg.show(Message.ENGINE_SETUP())
+            flag_eng = False
+            # V4 removed paramiko check_ssh - it has to be rewritten anyway
+            logger.debug("molli check_ssh:%s", flag_eng)
+            await DisplayMsg.show(Message.ENGINE_SETUP())
 
-                if self.remote_engine_mode():
-                    if flag_eng:
-                        if not self.uci_remote_shell:
-                            if self.remote_windows():
-                                logger.info("molli: Remote Windows Connection")
-                                self.uci_remote_shell = UciShell(
-                                    hostname=self.args.engine_remote_server,
-                                    username=self.args.engine_remote_user,
-                                    key_file=self.args.engine_remote_key,
-                                    password=self.args.engine_remote_pass,
-                                    windows=True,
-                                )
-                            else:
-                                logger.info("molli: Remote Mac/UNIX Connection")
-                                self.uci_remote_shell = UciShell(
-                                    hostname=self.args.engine_remote_server,
-                                    username=self.args.engine_remote_user,
-                                    key_file=self.args.engine_remote_key,
-                                    password=self.args.engine_remote_pass,
-                                )
-                    else:
-                        engine_fallback = True
-                        await DisplayMsg.show(Message.ONLINE_FAILED())
-                        await asyncio.sleep(2)
-                        await DisplayMsg.show(Message.REMOTE_FAIL())
-                        await asyncio.sleep(2)
+            if self.remote_engine_mode() and not self.args.engine_remote_port:
+                if flag_eng:
+                    if not self.uci_remote_shell:
+                        if self.remote_windows():
+                            logger.info("molli: Remote Windows Connection")
+                            self.uci_remote_shell = UciShell(
+                                hostname=self.args.engine_remote_server,
+                                username=self.args.engine_remote_user,
+                                key_file=self.args.engine_remote_key,
+                                password=self.args.engine_remote_pass,
+                                windows=True,
+                            )
+                        else:
+                            logger.info("molli: Remote Mac/UNIX Connection")
+                            self.uci_remote_shell = UciShell(
+                                hostname=self.args.engine_remote_server,
+                                username=self.args.engine_remote_user,
+                                key_file=self.args.engine_remote_key,
+                                password=self.args.engine_remote_pass,
+                            )
+                else:
+                    engine_fallback = True
+                    await DisplayMsg.show(Message.ONLINE_FAILED())
+                    await asyncio.sleep(2)
+                    await DisplayMsg.show(Message.REMOTE_FAIL())
+                    await asyncio.sleep(2)
+
+            # the old engine stays running in the pool if it is a local one
+            await self.engine_pool.release(self.engine)
+            # Load the new one and send self.args.
+            if self.remote_engine_mode() and flag_eng and self.uci_remote_shell:
+                self.engine = UciEngine(
+                    file=remote_file,
+                    uci_shell=self.uci_remote_shell,
+                    mame_par=self.calc_engine_mame_par(),
+                    loop=self.loop,
+                )
+                await self.engine.open_engine()
+            else:
+                self.engine = await self.engine_pool.acquire(
+                    engine_file_to_load, self.uci_local_shell, self.calc_engine_mame_par()
+                )
+                if self.state.artwork_in_use:
+                    await asyncio.sleep(1)  # mame artwork wait
+            if not self.engine.loaded_ok():
+                # New engine failed to start, restart old engine
+                logger.error("new engine failed to start, reverting to %s", old_file)
+                engine_fallback = True
+                event.options = old_options
+                self.state.engine_file = old_file
+                help_str = old_file.rsplit(os.sep, 1)[1]
+                remote_file = self.engine_remote_home + os.sep + help_str
 
-                await self.engine.quit()
-                # Load the new one and send self.args.
                 if self.remote_engine_mode() and flag_eng and self.uci_remote_shell:
                     self.engine = UciEngine(
                         file=remote_file,
@@ -3523,21 +3734,66 @@ async def main() -> None:
                     )
                     await self.engine.open_engine()
                 else:
-                    self.engine = UciEngine(
-                        file=engine_file_to_load,
-                        uci_shell=self.uci_local_shell,
-                        mame_par=self.calc_engine_mame_par(),
-                        loop=self.loop,
+                    # restart old mame engine?
+                    self.state.artwork_in_use = False
+                    if "/mame/" in old_file and self.state.dgtmenu.get_engine_rdisplay():
+                        old_file_art = old_file + "_art"
+                        my_file = Path(old_file_art)
+                        if my_file.is_file():
+                            self.state.artwork_in_use = True
+                            old_file = old_file_art
+
+                    self.engine = await self.engine_pool.acquire(
+                        old_file, self.uci_local_shell, self.calc_engine_mame_par()
                     )
-                    await self.engine.open_engine()
-                    if engine_file_to_load != self.state.engine_file:
-                        await asyncio.sleep(1)  # mame artwork wait
                 if not self.engine.loaded_ok():
-                    # New engine failed to start, restart old engine
-                    logger.error("new engine failed to start, reverting to %s", old_file)
+                    # Help - old engine failed to restart. There is no engine
+                    logger.error("no engines started")
+                    await DisplayMsg.show(Message.ENGINE_FAIL())
+                    await asyncio.sleep(3)
+                    sys.exit(-1)
+            # All done - rock'n'roll
+
+            if (
+                self.emulation_mode()
+                and self.state.dgtmenu.get_engine_rdisplay()
+                and self.state.artwork_in_use
+                and not self.state.dgtmenu.get_engine_rwindow()
+            ):
+                # switch to fullscreen
+                cmd = "xdotool keydown alt key F11; sleep 0.2 xdotool keyup alt"
+                process = await asyncio.create_subprocess_shell(
+                    cmd,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                )
+                stdout, stderr = await process.communicate()
+                if process.returncode != 0:
+                    logger.error("Command failed with return code %s: %s", process.returncode, stderr.decode())
+
+            await self.engine.startup(event.options, self.state.rating)
+
+            if self.online_mode():
+                await self.state.stop_clock()
+                await DisplayMsg.show(Message.ONLINE_LOGIN())
+                # check if login successful (correct server & correct user)
+                (
+                    self.login,
+                    own_color,
+                    self.self.own_user,
+                    self.self.opp_user,
+                    self.game_time,
+                    self.fischer_inc,
+                ) = read_online_user_info()
+                logger.debug("molli online login: %s", self.login)
+
+                if "ok" not in self.login:
+                    # server connection failed: check settings!
+                    await DisplayMsg.show(Message.ONLINE_FAILED())
+                    await asyncio.sleep(3)
                     engine_fallback = True
-                    event.options = old_options
-                    self.state.engine_file = old_file
+                    event.options = dict()
+                    old_file = "engines/aarch64/a-stockf"
                     help_str = old_file.rsplit(os.sep, 1)[1]
                     remote_file = self.engine_remote_home + os.sep + help_str
 
@@ -3550,15 +3806,6 @@ async def main() -> None:
                         )
                         await self.engine.open_engine()
                     else:
-                        # restart old mame engine?
-                        self.state.artwork_in_use = False
-                        if "/mame/" in old_file and self.state.dgtmenu.get_engine_rdisplay():
-                            old_file_art = old_file + "_art"
-                            my_file = Path(old_file_art)
-                            if my_file.is_file():
-                                self.state.artwork_in_use = True
-                                old_file = old_file_art
-
                         self.engine = UciEngine(
                             file=old_file,
                             uci_shell=self.uci_local_shell,
@@ -3572,360 +3819,399 @@ async def main() -> None:
                         await DisplayMsg.show(Message.ENGINE_FAIL())
                         await asyncio.sleep(3)
                         sys.exit(-1)
-                # All done - rock'n'roll
-
-                if (
-                    self.emulation_mode()
-                    and self.state.dgtmenu.get_engine_rdisplay()
-                    and self.state.artwork_in_use
-                    and not self.state.dgtmenu.get_engine_rwindow()
-                ):
-                    # switch to fullscreen
-                    cmd = "xdotool keydown alt key F11; sleep 0.2 xdotool keyup alt"
-                    process = await asyncio.create_subprocess_shell(
-                        cmd,
-                        stdout=asyncio.subprocess.PIPE,
-                        stderr=asyncio.subprocess.PIPE,
-                    )
-                    stdout, stderr = await process.communicate()
-                    if process.returncode != 0:
-                        logger.error("Command failed with return code %s: %s", process.returncode, stderr.decode())
-
-                await self.engine.startup(event.options, self.state.rating)
-
-                if self.online_mode():
-                    await self.state.stop_clock()
-                    await DisplayMsg.show(Message.ONLINE_LOGIN())
-                    # check if login successful (correct server & correct user)
-                    (
-                        self.login,
-                        own_color,
-                        self.self.own_user,
-                        self.self.opp_user,
-                        self.game_time,
-                        self.fischer_inc,
-                    ) = read_online_user_info()
-                    logger.debug("molli online login: %s", self.login)
-
-                    if "ok" not in self.login:
-                        # server connection failed: check settings!
-                        await DisplayMsg.show(Message.ONLINE_FAILED())
-                        await asyncio.sleep(3)
-                        engine_fallback = True
-                        event.options = dict()
-                        old_file = "engines/aarch64/a-stockf"
-                        help_str = old_file.rsplit(os.sep, 1)[1]
-                        remote_file = self.engine_remote_home + os.sep + help_str
-
-                        if self.remote_engine_mode() and flag_eng and self.uci_remote_shell:
-                            self.engine = UciEngine(
-                                file=remote_file,
-                                uci_shell=self.uci_remote_shell,
-                                mame_par=self.calc_engine_mame_par(),
-                                loop=self.loop,
-                            )
-                            await self.engine.open_engine()
-                        else:
-                            self.engine = UciEngine(
-                                file=old_file,
-                                uci_shell=self.uci_local_shell,
-                                mame_par=self.calc_engine_mame_par(),
-                                loop=self.loop,
-                            )
-                            await self.engine.open_engine()
-                        if not self.engine.loaded_ok():
-                            # Help - old engine failed to restart. There is no engine
-                            logger.error("no engines started")
-                            await DisplayMsg.show(Message.ENGINE_FAIL())
-                            await asyncio.sleep(3)
-                            sys.exit(-1)
-                        await self.engine.startup(event.options, self.state.rating)
-                    else:
-                        await asyncio.sleep(2)
-                elif self.emulation_mode() or self.pgn_mode():
-                    # molli for emulation engines we have to reset to starting position
-                    await self.stop_search_and_clock()
-                    game_fen = self.state.game.board_fen()
-                    self.state.game = chess.Board()
-                    self.state.game.turn = chess.WHITE
-                    self.state.play_mode = PlayMode.USER_WHITE
-                    # issue #61 - pgn_engine needs newgame at this point for pgn_game_info file
-                    await self.engine.newgame(self.state.game.copy())
-                    await asyncio.sleep(0.5)  # give pgn_engine time to write the pgn_game_info file
-                    self.state.best_sent_depth.reset()
-                    self.state.done_computer_fen = None
-                    self.state.done_move = self.state.pb_move = chess.Move.null()
-                    self.state.searchmoves.reset()
-                    self.state.game_declared = False
-                    self.state.legal_fens = compute_legal_fens(self.state.game.copy())
-                    self.state.last_legal_fens = []
-                    self.state.legal_fens_after_cmove = []
-                    self.is_out_of_time_already = False
-                    real_new_game = game_fen != chess.STARTING_BOARD_FEN
-                    msg = Message.START_NEW_GAME(game=self.state.game.copy(), newgame=real_new_game)
-                    await DisplayMsg.show(msg)
+                    await self.engine.startup(event.options, self.state.rating)
                 else:
-                    # issue #72 - avoid problems by not sending newgame to new engine
-                    await self.engine.newgame(self.state.game.copy(), send_ucinewgame=False)
-
-                await self.engine_mode()
-
-                if engine_fallback:
-                    msg = Message.ENGINE_FAIL()
-                    # molli: in case of engine fail, set correct old engine display settings
-                    for index in range(0, len(EngineProvider.installed_engines)):
-                        if EngineProvider.installed_engines[index]["file"] == old_file:
-                            logger.debug("molli index:%s", str(index))
-                            self.state.dgtmenu.set_engine_index(index)
-                    # in case engine fails, reset level as well
-                    if self.state.old_engine_level:
-                        level_text = self.state.dgttranslate.text("B00_level", self.state.old_engine_level)
-                        level_text.beep = False
-                    else:
-                        level_text = None
-                    await DisplayMsg.show(
-                        Message.LEVEL(
-                            level_text=level_text,
-                            level_name=self.state.old_engine_level,
-                            do_speak=False,
-                        )
-                    )
-                    self.state.new_engine_level = self.state.old_engine_level
+                    await asyncio.sleep(2)
+            elif self.emulation_mode() or self.pgn_mode():
+                # molli for emulation engines we have to reset to starting position
+                await self.stop_search_and_clock()
+                game_fen = self.state.game.board_fen()
+                self.state.game = chess.Board()
+                self.state.game.turn = chess.WHITE
+                self.state.play_mode = PlayMode.USER_WHITE
+                # issue #61 - pgn_engine needs newgame at this point for pgn_game_info file
+                await self.engine.newgame(self.state.game.copy())
+                await asyncio.sleep(0.5)  # give pgn_engine time to write the pgn_game_info file
+                self.state.best_sent_depth.reset()
+                self.state.done_computer_fen = None
+                self.state.done_move = self.state.pb_move = chess.Move.null()
+                self.state.searchmoves.reset()
+                self.state.game_declared = False
+                self.state.legal_fens = compute_legal_fens(self.state.game)
+                self.state.last_legal_fens = {}
+                self.state.legal_fens_after_cmove = {}
+                self.is_out_of_time_already = False
+                real_new_game = game_fen != chess.STARTING_BOARD_FEN
+                msg = Message.START_NEW_GAME(game=GameSnapshot.of(self.state.game), newgame=real_new_game)
+                await DisplayMsg.show(msg)
+            else:
+                # issue #72 - avoid problems by not sending newgame to new engine
+                await self.engine.newgame(self.state.game.copy(), send_ucinewgame=False)
+
+            await self.engine_mode()
+
+            if engine_fallback:
+                msg = Message.ENGINE_FAIL()
+                # molli: in case of engine fail, set correct old engine display settings
+                for index in range(0, len(EngineProvider.installed_engines)):
+                    if EngineProvider.installed_engines[index]["file"] == old_file:
+                        logger.debug("molli index:%s", str(index))
+                        self.state.dgtmenu.set_engine_index(index)
+                # in case engine fails, reset level as well
+                if self.state.old_engine_level:
+                    level_text = self.state.dgttranslate.text("B00_level", self.state.old_engine_level)
+                    level_text.beep = False
                 else:
-                    self.state.searchmoves.reset()
-                    msg = Message.ENGINE_READY(
-                        eng=event.eng,
-                        eng_text=event.eng_text,
-                        engine_name=self.engine.get_name(),
-                        has_levels=self.engine.has_levels(),
-                        has_960=self.engine.has_chess960(),
-                        has_ponder=self.engine.has_ponder(),
-                        show_ok=event.show_ok,
+                    level_text = None
+                await DisplayMsg.show(
+                    Message.LEVEL(
+                        level_text=level_text,
+                        level_name=self.state.old_engine_level,
+                        do_speak=False,
                     )
-                # Schedule cleanup of old objects
-                gc.collect()
+                )
+                self.state.new_engine_level = self.state.old_engine_level
+            else:
+                self.state.searchmoves.reset()
+                msg = Message.ENGINE_READY(
+                    eng=event.eng,
+                    eng_text=event.eng_text,
+                    engine_name=self.engine.get_name(),
+                    has_levels=self.engine.has_levels(),
+                    has_960=self.engine.has_chess960(),
+                    has_ponder=self.engine.has_ponder(),
+                    show_ok=event.show_ok,
+                )
+            # Schedule cleanup of old objects
+            gc.collect()
+
+            await self.set_wait_state(msg, not engine_fallback)
+            if self.state.interaction_mode in (
+                Mode.NORMAL,
+                Mode.BRAIN,
+                Mode.TRAINING,
+            ):  # engine isnt started/searching => stop the clock
+                await self.state.stop_clock()
+            self.state.engine_text = state.dgtmenu.get_current_engine_name()
+            self.state.dgtmenu.exit_menu()
+
+            self.state.old_engine_level = self.state.new_engine_level
+            self.state.engine_level = self.state.new_engine_level
+            self.state.dgtmenu.set_state_current_engine(self.state.engine_file)
+            self.state.dgtmenu.exit_menu()
+            # here dont care if engine supports pondering, cause Mode.NORMAL from startup
+            if not self.remote_engine_mode() and not self.online_mode() and not self.pgn_mode() and not engine_fallback:
+                # dont write engine(_level) if remote/online engine or engine failure
+                write_picochess_ini("engine", event.eng["file"])
+                write_picochess_ini("engine-level", self.state.engine_level)
 
-                await self.set_wait_state(msg, not engine_fallback)
-                if self.state.interaction_mode in (
-                    Mode.NORMAL,
-                    Mode.BRAIN,
-                    Mode.TRAINING,
-                ):  # engine isnt started/searching => stop the clock
-                    await self.state.stop_clock()
-                self.state.engine_text = state.dgtmenu.get_current_engine_name()
-                self.state.dgtmenu.exit_menu()
+            if self.pgn_mode():
+                if not self.state.flag_last_engine_pgn:
+                    self.state.tc_init_last = self.state.time_control.get_parameters()
 
-                self.state.old_engine_level = self.state.new_engine_level
-                self.state.engine_level = self.state.new_engine_level
-                self.state.dgtmenu.set_state_current_engine(self.state.engine_file)
-                self.state.dgtmenu.exit_menu()
-                # here dont care if engine supports pondering, cause Mode.NORMAL from startup
+                await self.det_pgn_guess_tctrl()
+
+                self.state.flag_last_engine_pgn = True
+            elif self.emulation_mode():
+                if not self.state.flag_last_engine_emu:
+                    self.state.tc_init_last = self.state.time_control.get_parameters()
+                self.state.flag_last_engine_emu = True
+            else:
+                # molli restore last saved timecontrol
                 if (
-                    not self.remote_engine_mode()
+                    (self.state.flag_last_engine_pgn or self.state.flag_last_engine_emu)
+                    and self.state.tc_init_last is not None
                     and not self.online_mode()
+                    and not self.emulation_mode()
                     and not self.pgn_mode()
-                    and not engine_fallback
                 ):
-                    # dont write engine(_level) if remote/online engine or engine failure
-                    write_picochess_ini("engine", event.eng["file"])
-                    write_picochess_ini("engine-level", self.state.engine_level)
-
-                if self.pgn_mode():
-                    if not self.state.flag_last_engine_pgn:
-                        self.state.tc_init_last = self.state.time_control.get_parameters()
-
-                    await self.det_pgn_guess_tctrl()
-
-                    self.state.flag_last_engine_pgn = True
-                elif self.emulation_mode():
-                    if not self.state.flag_last_engine_emu:
-                        self.state.tc_init_last = self.state.time_control.get_parameters()
-                    self.state.flag_last_engine_emu = True
-                else:
-                    # molli restore last saved timecontrol
-                    if (
-                        (self.state.flag_last_engine_pgn or self.state.flag_last_engine_emu)
-                        and self.state.tc_init_last is not None
-                        and not self.online_mode()
-                        and not self.emulation_mode()
-                        and not self.pgn_mode()
-                    ):
-                        await self.state.stop_clock()
-                        text = self.state.dgttranslate.text("N00_oktime")
-                        await Observable.fire(
-                            Event.SET_TIME_CONTROL(tc_init=self.state.tc_init_last, time_text=text, show_ok=True)
-                        )
-                        await self.state.stop_clock()
-                        await DisplayMsg.show(Message.EXIT_MENU())
-                    self.state.flag_last_engine_pgn = False
-                    self.state.flag_last_engine_emu = False
-                    self.state.tc_init_last = None
+                    await self.state.stop_clock()
+                    text = self.state.dgttranslate.text("N00_oktime")
+                    await Observable.fire(
+                        Event.SET_TIME_CONTROL(tc_init=self.state.tc_init_last, time_text=text, show_ok=True)
+                    )
+                    await self.state.stop_clock()
+                    await DisplayMsg.show(Message.EXIT_MENU())
+                self.state.flag_last_engine_pgn = False
+                self.state.flag_last_engine_emu = False
+                self.state.tc_init_last = None
 
-                self.state.comment_file = self.get_comment_file()  # for picotutor game comments like Boris & Sargon
-                self.state.picotutor.init_comments(self.state.comment_file)
+            self.state.comment_file = self.get_comment_file()  # for picotutor game comments like Boris & Sargon
+            self.state.picotutor.init_comments(self.state.comment_file)
 
-                if self.emulation_mode():
-                    await self.set_emulation_tctrl()
+            if self.emulation_mode():
+                await self.set_emulation_tctrl()
 
-                if self.pgn_mode():
-                    pgn_fen = ""
-                    (
-                        pgn_game_name,
-                        pgn_problem,
-                        pgn_fen,
-                        pgn_result,
-                        pgn_white,
-                        pgn_black,
-                    ) = read_pgn_info()
-                    if "mate in" in pgn_problem or "Mate in" in pgn_problem or pgn_fen != "":
-                        await self.set_fen_from_pgn(pgn_fen)
-                        self.state.play_mode = (
-                            PlayMode.USER_WHITE if self.state.game.turn == chess.WHITE else PlayMode.USER_BLACK
-                        )
-                        msg = Message.PLAY_MODE(
-                            play_mode=self.state.play_mode,
-                            play_mode_text=self.state.dgttranslate.text(self.state.play_mode.value),
-                        )
-                        await DisplayMsg.show(msg)
-                        await asyncio.sleep(1)
-
-                if self.online_mode():
-                    ModeInfo.set_online_mode(mode=True)
-                    logger.debug("online game fen: %s", self.state.game.fen())
-                    if (not self.state.flag_last_engine_online) or (
-                        self.state.game.board_fen() == chess.STARTING_BOARD_FEN
-                    ):
-                        pos960 = 518
-                        await Observable.fire(Event.NEW_GAME(pos960=pos960))
-                    self.state.flag_last_engine_online = True
-                else:
-                    self.state.flag_last_engine_online = False
-                    ModeInfo.set_online_mode(mode=False)
+            if self.pgn_mode():
+                pgn_fen = ""
+                (
+                    pgn_game_name,
+                    pgn_problem,
+                    pgn_fen,
+                    pgn_result,
+                    pgn_white,
+                    pgn_black,
+                ) = read_pgn_info()
+                if "mate in" in pgn_problem or "Mate in" in pgn_problem or pgn_fen != "":
+                    await self.set_fen_from_pgn(pgn_fen)
+                    self.state.play_mode = (
+                        PlayMode.USER_WHITE if self.state.game.turn == chess.WHITE else PlayMode.USER_BLACK
+                    )
+                    msg = Message.PLAY_MODE(
+                        play_mode=self.state.play_mode,
+                        play_mode_text=self.state.dgttranslate.text(self.state.play_mode.value),
+                    )
+                    await DisplayMsg.show(msg)
+                    await asyncio.sleep(1)
 
-                if self.pgn_mode():
-                    ModeInfo.set_pgn_mode(mode=True)
+            if self.online_mode():
+                ModeInfo.set_online_mode(mode=True)
+                logger.debug("online game fen: %s", self.state.game.fen())
+                if (not self.state.flag_last_engine_online) or (
+                    self.state.game.board_fen() == chess.STARTING_BOARD_FEN
+                ):
                     pos960 = 518
                     await Observable.fire(Event.NEW_GAME(pos960=pos960))
-                else:
-                    ModeInfo.set_pgn_mode(mode=False)
+                self.state.flag_last_engine_online = True
+            else:
+                self.state.flag_last_engine_online = False
+                ModeInfo.set_online_mode(mode=False)
 
-                await self.update_elo_display()
+            if self.pgn_mode():
+                ModeInfo.set_pgn_mode(mode=True)
+                pos960 = 518
+                await Observable.fire(Event.NEW_GAME(pos960=pos960))
+            else:
+                ModeInfo.set_pgn_mode(mode=False)
 
-                # new engine might change result of tutor_depth() to use - inform tutor
-                await self.state.picotutor.set_mode(self.pgn_mode() or not self.eng_plays(), self.tutor_depth())
-                # also state of main analyser might have changed
-                await self._start_or_stop_analysis_as_needed()
-                # end of NEW_ENGINE
+            await self.update_elo_display()
 
-            elif isinstance(event, Event.SETUP_POSITION):
-                logger.debug("setting up custom fen: %s", event.fen)
-                uci960 = event.uci960
-                self.state.position_mode = False
+            # new engine might change result of tutor_depth() to use - inform tutor
+            await self.state.picotutor.set_mode(self.pgn_mode() or not self.eng_plays(), self.tutor_depth())
+            # also state of main analyser might have changed
+            await self._start_or_stop_analysis_as_needed()
+            # end of NEW_ENGINE
+
+        async def handle_setup_position(self, event):
+            logger.debug("setting up custom fen: %s", event.fen)
+            uci960 = event.uci960
+            self.state.position_mode = False
+
+            if self.state.game.move_stack:
+                if not (self.state.game.is_game_over() or self.state.game_declared):
+                    result = GameResult.ABORT
+                    self.game_end_event()
+                    await DisplayMsg.show(
+                        Message.GAME_ENDS(
+                            tc_init=self.state.time_control.get_parameters(),
+                            result=result,
+                            play_mode=self.state.play_mode,
+                            game=GameSnapshot.of(self.state.game),
+                            mode=self.state.interaction_mode,
+                        )
+                    )
+            self.state.game = chess.Board(event.fen)  # check what uci960 should do here
+            # see new_game
+            await self.stop_search_and_clock()
+            if self.engine.has_chess960():
+                self.engine.option("UCI_Chess960", uci960)
+                await self.engine.send()
 
-                if self.state.game.move_stack:
-                    if not (self.state.game.is_game_over() or self.state.game_declared):
-                        result = GameResult.ABORT
-                        self.game_end_event()
-                        await DisplayMsg.show(
-                            Message.GAME_ENDS(
-                                tc_init=self.state.time_control.get_parameters(),
-                                result=result,
-                                play_mode=self.state.play_mode,
-                                game=self.state.game.copy(),
-                                mode=self.state.interaction_mode,
-                            )
+            await DisplayMsg.show(Message.SHOW_TEXT(text_string="NEW_POSITION_SCAN"))
+            await self.engine.newgame(self.state.game.copy())
+            self.state.best_sent_depth.reset()
+            self.state.done_computer_fen = None
+            self.state.done_move = self.state.pb_move = chess.Move.null()
+            self.state.legal_fens_after_cmove = {}
+            self.is_out_of_time_already = False
+            self.state.time_control.reset()
+            self.state.searchmoves.reset()
+            self.state.game_declared = False
+
+            await self.set_picotutor_position(new_game=True)
+            await self.set_wait_state(Message.START_NEW_GAME(game=GameSnapshot.of(self.state.game), newgame=True))
+            if self.emulation_mode():
+                if self.state.dgtmenu.get_engine_rdisplay() and self.state.artwork_in_use:
+                    # switch windows/tasks
+                    cmd = "xdotool keydown alt key Tab; sleep 0.2; xdotool keyup alt"
+                    process = await asyncio.create_subprocess_shell(
+                        cmd,
+                        stdout=asyncio.subprocess.PIPE,
+                        stderr=asyncio.subprocess.PIPE,
+                    )
+                    stdout, stderr = await process.communicate()
+                    if process.returncode != 0:
+                        logger.error("Command failed with return code %s: %s", process.returncode, stderr.decode())
+                await DisplayMsg.show(Message.SHOW_TEXT(text_string="NEW_POSITION"))
+                self.engine.is_ready()
+            self.state.position_mode = False
+            tutor_str = "POSOK"
+            msg = Message.PICOTUTOR_MSG(eval_str=tutor_str, game=GameSnapshot.of(self.state.game))
+            await DisplayMsg.show(msg)
+            await asyncio.sleep(1)
+
+        async def handle_new_game(self, event):
+            await self.get_rid_of_engine_move()
+            self.state.autoplay_pgn_file = False  # stop auto replay of pgn file if new game started
+            last_move_no = self.state.game.fullmove_number
+            self.state.takeback_active = False
+            self.state.automatic_takeback = False
+            self.state.reset_auto = False
+            self.state.flag_startup = False
+            self.state.flag_pgn_game_over = False
+            ModeInfo.set_game_ending(result="*")  # initialize game result for game saving status
+            self.state.position_mode = False
+            self.state.fen_error_occured = False
+            self.state.error_fen = None
+            self.state.newgame_happened = True
+            newgame = (
+                self.state.game.move_stack
+                or (self.state.game.chess960_pos() != event.pos960)
+                or self.state.best_move_posted
+                or self.state.done_computer_fen
+            )
+            if newgame:
+                logger.debug("starting a new game with code: %s", event.pos960)
+                uci960 = event.pos960 != 518
+
+                if not (self.state.game.is_game_over() or self.state.game_declared) or self.pgn_mode():
+                    if self.emulation_mode():  # force abortion for mame
+                        if self.state.is_not_user_turn():
+                            # clock must be stopped BEFORE the "book_move"
+                            # event cause SetNRun resets the clock display
+                            await self.state.stop_clock()
+                            self.state.best_move_posted = True
+                            # @todo 8/8/R6P/1R6/7k/2B2K1p/8/8 and sliding Ra6 over a5 to a4
+                            # handle this in correct way!!
+                            self.state.game_declared = True
+                            self.state.stop_fen_timer()
+                            self.state.legal_fens_after_cmove = {}
+
+                    result = GameResult.ABORT
+                    self.game_end_event()
+                    await DisplayMsg.show(
+                        Message.GAME_ENDS(
+                            tc_init=self.state.time_control.get_parameters(),
+                            result=result,
+                            play_mode=self.state.play_mode,
+                            game=GameSnapshot.of(self.state.game),
+                            mode=self.state.interaction_mode,
                         )
-                self.state.game = chess.Board(event.fen)  # check what uci960 should do here
-                # see new_game
+                    )
+                    await asyncio.sleep(0.3)
+
+                self.state.game = chess.Board()
+                self.state.game.turn = chess.WHITE
+
+                if uci960:
+                    self.state.game.set_chess960_pos(event.pos960)
+
+                if self.state.play_mode != PlayMode.USER_WHITE:
+                    self.state.play_mode = PlayMode.USER_WHITE
+                    msg = Message.PLAY_MODE(
+                        play_mode=self.state.play_mode,
+                        play_mode_text=self.state.dgttranslate.text(str(self.state.play_mode.value)),
+                    )
+                    await DisplayMsg.show(msg)
                 await self.stop_search_and_clock()
+
+                if self.engine:
+                    # need to stop analyser for all modes
+                    self.engine.stop()
+
+                # see setup_position
                 if self.engine.has_chess960():
                     self.engine.option("UCI_Chess960", uci960)
                     await self.engine.send()
 
-                await DisplayMsg.show(Message.SHOW_TEXT(text_string="NEW_POSITION_SCAN"))
+                if self.online_mode():
+                    await DisplayMsg.show(Message.SEEKING())
+                    self.state.seeking_flag = True
+                    self.state.stop_fen_timer()
+                    ModeInfo.set_online_mode(mode=True)
+                else:
+                    ModeInfo.set_online_mode(mode=False)
+
                 await self.engine.newgame(self.state.game.copy())
+
                 self.state.best_sent_depth.reset()
                 self.state.done_computer_fen = None
                 self.state.done_move = self.state.pb_move = chess.Move.null()
-                self.state.legal_fens_after_cmove = []
-                self.is_out_of_time_already = False
                 self.state.time_control.reset()
+                self.state.best_move_posted = False
                 self.state.searchmoves.reset()
                 self.state.game_declared = False
+                await self.update_elo_display()
 
-                await self.set_picotutor_position(new_game=True)
-                await self.set_wait_state(Message.START_NEW_GAME(game=self.state.game.copy(), newgame=True))
-                if self.emulation_mode():
-                    if self.state.dgtmenu.get_engine_rdisplay() and self.state.artwork_in_use:
-                        # switch windows/tasks
-                        cmd = "xdotool keydown alt key Tab; sleep 0.2; xdotool keyup alt"
-                        process = await asyncio.create_subprocess_shell(
-                            cmd,
-                            stdout=asyncio.subprocess.PIPE,
-                            stderr=asyncio.subprocess.PIPE,
-                        )
-                        stdout, stderr = await process.communicate()
-                        if process.returncode != 0:
-                            logger.error("Command failed with return code %s: %s", process.returncode, stderr.decode())
-                    await DisplayMsg.show(Message.SHOW_TEXT(text_string="NEW_POSITION"))
-                    self.engine.is_ready()
-                self.state.position_mode = False
-                tutor_str = "POSOK"
-                msg = Message.PICOTUTOR_MSG(eval_str=tutor_str, game=self.state.game.copy())
-                await DisplayMsg.show(msg)
-                await asyncio.sleep(1)
+                if self.online_mode():
+                    await asyncio.sleep(0.5)
+                    (
+                        self.login,
+                        own_color,
+                        self.own_user,
+                        self.opp_user,
+                        self.game_time,
+                        self.fischer_inc,
+                    ) = read_online_user_info()
+                    if "no_user" in self.own_user and not self.login == "ok":
+                        # user login failed check login settings!!!
+                        await DisplayMsg.show(Message.ONLINE_USER_FAILED())
+                        await asyncio.sleep(3)
+                    elif "no_player" in self.opp_user:
+                        # no opponent found start new game or engine again!!!
+                        await DisplayMsg.show(Message.ONLINE_NO_OPPONENT())
+                        await asyncio.sleep(3)
+                    else:
+                        await DisplayMsg.show(Message.ONLINE_NAMES(own_user=self.own_user, opp_user=self.opp_user))
+                        await asyncio.sleep(3)
+                    self.state.seeking_flag = False
+                    self.state.best_move_displayed = None
 
-            elif isinstance(event, Event.NEW_GAME):
-                await self.get_rid_of_engine_move()
-                self.state.autoplay_pgn_file = False  # stop auto replay of pgn file if new game started
-                last_move_no = self.state.game.fullmove_number
-                self.state.takeback_active = False
-                self.state.automatic_takeback = False
-                self.state.reset_auto = False
-                self.state.flag_startup = False
-                self.state.flag_pgn_game_over = False
-                ModeInfo.set_game_ending(result="*")  # initialize game result for game saving status
-                self.state.position_mode = False
-                self.state.fen_error_occured = False
-                self.state.error_fen = None
-                self.state.newgame_happened = True
-                newgame = (
-                    self.state.game.move_stack
-                    or (self.state.game.chess960_pos() != event.pos960)
-                    or self.state.best_move_posted
-                    or self.state.done_computer_fen
+                self.state.legal_fens = compute_legal_fens(self.state.game)
+                self.state.last_legal_fens = {}
+                self.state.legal_fens_after_cmove = {}
+                self.is_out_of_time_already = False
+                if self.pgn_mode():
+                    if self.state.max_guess > 0:
+                        self.state.max_guess_white = self.state.max_guess
+                        self.state.max_guess_black = 0
+                    pgn_fen = ""
+                    (
+                        pgn_game_name,
+                        pgn_problem,
+                        pgn_fen,
+                        pgn_result,
+                        pgn_white,
+                        pgn_black,
+                    ) = read_pgn_info()
+                    if "mate in" in pgn_problem or "Mate in" in pgn_problem or pgn_fen != "":
+                        await self.set_fen_from_pgn(pgn_fen)
+                if self.state.interaction_mode == Mode.PGNREPLAY:
+                    # V4 built-in pgn replay done - no game to replay
+                    self.state.interaction_mode = Mode.NORMAL  # switch to NORMAL plyaing mode
+                    await self.engine_mode()  # see INTERACTION_MODE handling
+                await self.set_wait_state(
+                    Message.START_NEW_GAME(game=GameSnapshot.of(self.state.game), newgame=newgame)
                 )
-                if newgame:
+                if "no_player" not in self.opp_user and "no_user" not in self.own_user:
+                    await self.switch_online()
+                if self.picotutor_mode():
+                    self.state.picotutor.newgame()
+                    if not self.state.flag_startup:
+                        if self.state.play_mode == PlayMode.USER_BLACK:
+                            await self.state.picotutor.set_user_color(
+                                chess.BLACK, self.pgn_mode() or not self.eng_plays()
+                            )
+                        else:
+                            await self.state.picotutor.set_user_color(
+                                chess.WHITE, self.pgn_mode() or not self.eng_plays()
+                            )
+            else:
+                if self.online_mode():
                     logger.debug("starting a new game with code: %s", event.pos960)
                     uci960 = event.pos960 != 518
+                    await self.state.stop_clock()
 
-                    if not (self.state.game.is_game_over() or self.state.game_declared) or self.pgn_mode():
-                        if self.emulation_mode():  # force abortion for mame
-                            if self.state.is_not_user_turn():
-                                # clock must be stopped BEFORE the "book_move"
-                                # event cause SetNRun resets the clock display
-                                await self.state.stop_clock()
-                                self.state.best_move_posted = True
-                                # @todo 8/8/R6P/1R6/7k/2B2K1p/8/8 and sliding Ra6 over a5 to a4
-                                # handle this in correct way!!
-                                self.state.game_declared = True
-                                self.state.stop_fen_timer()
-                                self.state.legal_fens_after_cmove = []
-
-                        result = GameResult.ABORT
-                        self.game_end_event()
-                        await DisplayMsg.show(
-                            Message.GAME_ENDS(
-                                tc_init=self.state.time_control.get_parameters(),
-                                result=result,
-                                play_mode=self.state.play_mode,
-                                game=self.state.game.copy(),
-                                mode=self.state.interaction_mode,
-                            )
-                        )
-                        await asyncio.sleep(0.3)
-
-                    self.state.game = chess.Board()
                     self.state.game.turn = chess.WHITE
 
                     if uci960:
@@ -3938,69 +4224,65 @@ async def main() -> None:
                             play_mode_text=self.state.dgttranslate.text(str(self.state.play_mode.value)),
                         )
                         await DisplayMsg.show(msg)
-                    await self.stop_search_and_clock()
-
-                    if self.engine:
-                        # need to stop analyser for all modes
-                        self.engine.stop()
 
                     # see setup_position
+                    await self.stop_search_and_clock()
+                    self.state.stop_fen_timer()
+
                     if self.engine.has_chess960():
                         self.engine.option("UCI_Chess960", uci960)
                         await self.engine.send()
 
-                    if self.online_mode():
-                        await DisplayMsg.show(Message.SEEKING())
-                        self.state.seeking_flag = True
-                        self.state.stop_fen_timer()
-                        ModeInfo.set_online_mode(mode=True)
-                    else:
-                        ModeInfo.set_online_mode(mode=False)
+                    self.state.time_control.reset()
+                    self.state.searchmoves.reset()
+
+                    await DisplayMsg.show(Message.SEEKING())
+                    self.state.seeking_flag = True
 
                     await self.engine.newgame(self.state.game.copy())
 
+                    (
+                        self.login,
+                        own_color,
+                        self.own_user,
+                        self.opp_user,
+                        self.game_time,
+                        self.fischer_inc,
+                    ) = read_online_user_info()
+                    if "no_user" in self.own_user:
+                        # user login failed check login settings!!!
+                        await DisplayMsg.show(Message.ONLINE_USER_FAILED())
+                        await asyncio.sleep(3)
+                    elif "no_player" in self.opp_user:
+                        # no opponent found start new game & search!!!
+                        await DisplayMsg.show(Message.ONLINE_NO_OPPONENT())
+                        await asyncio.sleep(3)
+                    else:
+                        await DisplayMsg.show(Message.ONLINE_NAMES(own_user=self.own_user, opp_user=self.opp_user))
+                        await asyncio.sleep(1)
                     self.state.best_sent_depth.reset()
+                    self.state.seeking_flag = False
+                    self.state.best_move_displayed = None
+                    self.state.takeback_active = False
+                    self.state.automatic_takeback = False
                     self.state.done_computer_fen = None
                     self.state.done_move = self.state.pb_move = chess.Move.null()
-                    self.state.time_control.reset()
-                    self.state.best_move_posted = False
-                    self.state.searchmoves.reset()
-                    self.state.game_declared = False
-                    await self.update_elo_display()
-
-                    if self.online_mode():
-                        await asyncio.sleep(0.5)
-                        (
-                            self.login,
-                            own_color,
-                            self.own_user,
-                            self.opp_user,
-                            self.game_time,
-                            self.fischer_inc,
-                        ) = read_online_user_info()
-                        if "no_user" in self.own_user and not self.login == "ok":
-                            # user login failed check login settings!!!
-                            await DisplayMsg.show(Message.ONLINE_USER_FAILED())
-                            await asyncio.sleep(3)
-                        elif "no_player" in self.opp_user:
-                            # no opponent found start new game or engine again!!!
-                            await DisplayMsg.show(Message.ONLINE_NO_OPPONENT())
-                            await asyncio.sleep(3)
-                        else:
-                            await DisplayMsg.show(Message.ONLINE_NAMES(own_user=self.own_user, opp_user=self.opp_user))
-                            await asyncio.sleep(3)
-                        self.state.seeking_flag = False
-                        self.state.best_move_displayed = None
-
-                    self.state.legal_fens = compute_legal_fens(self.state.game.copy())
-                    self.state.last_legal_fens = []
-                    self.state.legal_fens_after_cmove = []
+                    self.state.legal_fens = compute_legal_fens(self.state.game)
+                    self.state.last_legal_fens = {}
+                    self.state.legal_fens_after_cmove = {}
                     self.is_out_of_time_already = False
+                    self.state.game_declared = False
+                    await self.set_wait_state(
+                        Message.START_NEW_GAME(game=GameSnapshot.of(self.state.game), newgame=newgame),
+                    )
+                    if "no_player" not in self.opp_user and "no_user" not in self.own_user:
+                        await self.switch_online()
+                else:
+                    logger.debug("no need to start a new game")
                     if self.pgn_mode():
-                        if self.state.max_guess > 0:
-                            self.state.max_guess_white = self.state.max_guess
-                            self.state.max_guess_black = 0
                         pgn_fen = ""
+                        self.state.takeback_active = False
+                        self.state.automatic_takeback = False
                         (
                             pgn_game_name,
                             pgn_problem,
@@ -4011,660 +4293,525 @@ async def main() -> None:
                         ) = read_pgn_info()
                         if "mate in" in pgn_problem or "Mate in" in pgn_problem or pgn_fen != "":
                             await self.set_fen_from_pgn(pgn_fen)
-                    if self.state.interaction_mode == Mode.PGNREPLAY:
-                        # V4 built-in pgn replay done - no game to replay
-                        self.state.interaction_mode = Mode.NORMAL  # switch to NORMAL plyaing mode
-                        await self.engine_mode()  # see INTERACTION_MODE handling
-                    await self.set_wait_state(Message.START_NEW_GAME(game=self.state.game.copy(), newgame=newgame))
-                    if "no_player" not in self.opp_user and "no_user" not in self.own_user:
-                        await self.switch_online()
-                    if self.picotutor_mode():
-                        self.state.picotutor.newgame()
-                        if not self.state.flag_startup:
-                            if self.state.play_mode == PlayMode.USER_BLACK:
-                                await self.state.picotutor.set_user_color(
-                                    chess.BLACK, self.pgn_mode() or not self.eng_plays()
-                                )
-                            else:
-                                await self.state.picotutor.set_user_color(
-                                    chess.WHITE, self.pgn_mode() or not self.eng_plays()
-                                )
-                else:
-                    if self.online_mode():
-                        logger.debug("starting a new game with code: %s", event.pos960)
-                        uci960 = event.pos960 != 518
-                        await self.state.stop_clock()
-
-                        self.state.game.turn = chess.WHITE
-
-                        if uci960:
-                            self.state.game.set_chess960_pos(event.pos960)
-
-                        if self.state.play_mode != PlayMode.USER_WHITE:
-                            self.state.play_mode = PlayMode.USER_WHITE
-                            msg = Message.PLAY_MODE(
-                                play_mode=self.state.play_mode,
-                                play_mode_text=self.state.dgttranslate.text(str(self.state.play_mode.value)),
+                            await self.set_wait_state(
+                                Message.START_NEW_GAME(game=GameSnapshot.of(self.state.game), newgame=newgame),
                             )
-                            await DisplayMsg.show(msg)
+                        else:
+                            await DisplayMsg.show(
+                                Message.START_NEW_GAME(game=GameSnapshot.of(self.state.game), newgame=newgame)
+                            )
+                    else:
+                        await DisplayMsg.show(
+                            Message.START_NEW_GAME(game=GameSnapshot.of(self.state.game), newgame=newgame)
+                        )
 
-                        # see setup_position
-                        await self.stop_search_and_clock()
-                        self.state.stop_fen_timer()
+            if self.picotutor_mode():
+                self.state.picotutor.newgame()
+                if not self.state.flag_startup:
+                    if self.state.play_mode == PlayMode.USER_BLACK:
+                        await self.state.picotutor.set_user_color(chess.BLACK, self.pgn_mode() or not self.eng_plays())
+                    else:
+                        await self.state.picotutor.set_user_color(chess.WHITE, self.pgn_mode() or not self.eng_plays())
 
-                        if self.engine.has_chess960():
-                            self.engine.option("UCI_Chess960", uci960)
-                            await self.engine.send()
+            if self.state.interaction_mode != Mode.REMOTE and not self.online_mode():
+                if self.state.dgtmenu.get_enginename():
+                    await asyncio.sleep(0.7)  # give time for ABORT message
+                    msg = Message.ENGINE_NAME(engine_name=self.state.engine_text)
+                    await DisplayMsg.show(msg)
+                if self.pgn_mode():
+                    pgn_white = ""
+                    pgn_black = ""
+                    await asyncio.sleep(1)
+                    (
+                        pgn_game_name,
+                        pgn_problem,
+                        pgn_fen,
+                        pgn_result,
+                        pgn_white,
+                        pgn_black,
+                    ) = read_pgn_info()
 
-                        self.state.time_control.reset()
-                        self.state.searchmoves.reset()
-
-                        await DisplayMsg.show(Message.SEEKING())
-                        self.state.seeking_flag = True
+                    update_speed = 1.0
+                    if not pgn_white:
+                        pgn_white = "????"
+                    await DisplayMsg.show(Message.SHOW_TEXT(text_string=pgn_white))
+                    await asyncio.sleep(update_speed)
+
+                    await DisplayMsg.show(Message.SHOW_TEXT(text_string="versus"))
+                    await asyncio.sleep(update_speed)
+
+                    if not pgn_black:
+                        pgn_black = "????"
+                    await DisplayMsg.show(Message.SHOW_TEXT(text_string=pgn_black))
+                    await asyncio.sleep(update_speed)
+
+                    if pgn_result:
+                        await DisplayMsg.show(Message.SHOW_TEXT(text_string=pgn_result))
+                    await asyncio.sleep(update_speed)
+                    if "mate in" in pgn_problem or "Mate in" in pgn_problem:
+                        await DisplayMsg.show(Message.SHOW_TEXT(text_string=pgn_problem))
+                    else:
+                        await DisplayMsg.show(Message.SHOW_TEXT(text_string=pgn_game_name))
+                    await asyncio.sleep(update_speed)
 
-                        await self.engine.newgame(self.state.game.copy())
+                    # reset pgn guess counters
+                    if last_move_no > 1:
+                        self.state.no_guess_black = 1
+                        self.state.no_guess_white = 1
+                    else:
+                        log_pgn(self.state)
+                        if self.state.max_guess_white > 0:
+                            if self.state.no_guess_white > self.state.max_guess_white:
+                                self.state.last_legal_fens = {}
+                                await self.get_next_pgn_move()
 
-                        (
-                            self.login,
-                            own_color,
-                            self.own_user,
-                            self.opp_user,
-                            self.game_time,
-                            self.fischer_inc,
-                        ) = read_online_user_info()
-                        if "no_user" in self.own_user:
-                            # user login failed check login settings!!!
-                            await DisplayMsg.show(Message.ONLINE_USER_FAILED())
-                            await asyncio.sleep(3)
-                        elif "no_player" in self.opp_user:
-                            # no opponent found start new game & search!!!
-                            await DisplayMsg.show(Message.ONLINE_NO_OPPONENT())
-                            await asyncio.sleep(3)
-                        else:
-                            await DisplayMsg.show(Message.ONLINE_NAMES(own_user=self.own_user, opp_user=self.opp_user))
-                            await asyncio.sleep(1)
-                        self.state.best_sent_depth.reset()
-                        self.state.seeking_flag = False
-                        self.state.best_move_displayed = None
-                        self.state.takeback_active = False
-                        self.state.automatic_takeback = False
-                        self.state.done_computer_fen = None
-                        self.state.done_move = self.state.pb_move = chess.Move.null()
-                        self.state.legal_fens = compute_legal_fens(self.state.game.copy())
-                        self.state.last_legal_fens = []
-                        self.state.legal_fens_after_cmove = []
-                        self.is_out_of_time_already = False
-                        self.state.game_declared = False
-                        await self.set_wait_state(
-                            Message.START_NEW_GAME(game=self.state.game.copy(), newgame=newgame),
+        async def handle_pause_resume(self, event):
+            if self.pgn_mode():
+                self.engine.pause_pgn_audio()
+            else:
+                if self.engine.is_thinking():
+                    self.engine.force_move()
+                elif self.eng_plays() and self.state.is_not_user_turn() and self.state.done_computer_fen is not None:
+                    # e-board: engine move still pending on the board; allow user to request another move
+                    # (when go() sees searchlist=True it removes already-played moves from the root list)
+                    if not self.state.check_game_state():
+                        # picotuter should be in sync as takeback already was done
+                        await self.think(
+                            Message.ALTERNATIVE_MOVE(
+                                game=GameSnapshot.of(self.state.game), play_mode=self.state.play_mode
+                            ),
+                            searchlist=True,
                         )
-                        if "no_player" not in self.opp_user and "no_user" not in self.own_user:
-                            await self.switch_online()
+                elif self.state.interaction_mode == Mode.PGNREPLAY:
+                    # Built in PGN Replay mode - toggle autoplay on or off
+                    if self.state.autoplay_pgn_file:
+                        self.state.autoplay_pgn_file = False  # stop auto replay of pgn
                     else:
-                        logger.debug("no need to start a new game")
-                        if self.pgn_mode():
-                            pgn_fen = ""
-                            self.state.takeback_active = False
-                            self.state.automatic_takeback = False
-                            (
-                                pgn_game_name,
-                                pgn_problem,
-                                pgn_fen,
-                                pgn_result,
-                                pgn_white,
-                                pgn_black,
-                            ) = read_pgn_info()
-                            if "mate in" in pgn_problem or "Mate in" in pgn_problem or pgn_fen != "":
-                                await self.set_fen_from_pgn(pgn_fen)
-                                await self.set_wait_state(
-                                    Message.START_NEW_GAME(game=self.state.game.copy(), newgame=newgame),
-                                )
-                            else:
-                                await DisplayMsg.show(
-                                    Message.START_NEW_GAME(game=self.state.game.copy(), newgame=newgame)
-                                )
+                        # if we are not already waiting for an autoplay move make the first move
+                        if self.can_do_next_pgn_replay_move():
+                            # avoid sending GAME_ENDS when autoplay is started
+                            auto_move = await self.autoplay_pgnreplay_move(allow_game_ends=False)
                         else:
-                            await DisplayMsg.show(Message.START_NEW_GAME(game=self.state.game.copy(), newgame=newgame))
-
-                if self.picotutor_mode():
-                    self.state.picotutor.newgame()
-                    if not self.state.flag_startup:
-                        if self.state.play_mode == PlayMode.USER_BLACK:
-                            await self.state.picotutor.set_user_color(
-                                chess.BLACK, self.pgn_mode() or not self.eng_plays()
-                            )
+                            auto_move = None
+                        if auto_move:
+                            self.state.autoplay_pgn_file = True  # start auto replay of pgn
                         else:
-                            await self.state.picotutor.set_user_color(
-                                chess.WHITE, self.pgn_mode() or not self.eng_plays()
-                            )
-
-                if self.state.interaction_mode != Mode.REMOTE and not self.online_mode():
-                    if self.state.dgtmenu.get_enginename():
-                        await asyncio.sleep(0.7)  # give time for ABORT message
-                        msg = Message.ENGINE_NAME(engine_name=self.state.engine_text)
-                        await DisplayMsg.show(msg)
-                    if self.pgn_mode():
-                        pgn_white = ""
-                        pgn_black = ""
-                        await asyncio.sleep(1)
-                        (
-                            pgn_game_name,
-                            pgn_problem,
-                            pgn_fen,
-                            pgn_result,
-                            pgn_white,
-                            pgn_black,
-                        ) = read_pgn_info()
-
-                        update_speed = 1.0
-                        if not pgn_white:
-                            pgn_white = "????"
-                        await DisplayMsg.show(Message.SHOW_TEXT(text_string=pgn_white))
-                        await asyncio.sleep(update_speed)
-
-                        await DisplayMsg.show(Message.SHOW_TEXT(text_string="versus"))
-                        await asyncio.sleep(update_speed)
-
-                        if not pgn_black:
-                            pgn_black = "????"
-                        await DisplayMsg.show(Message.SHOW_TEXT(text_string=pgn_black))
-                        await asyncio.sleep(update_speed)
-
-                        if pgn_result:
-                            await DisplayMsg.show(Message.SHOW_TEXT(text_string=pgn_result))
-                        await asyncio.sleep(update_speed)
-                        if "mate in" in pgn_problem or "Mate in" in pgn_problem:
-                            await DisplayMsg.show(Message.SHOW_TEXT(text_string=pgn_problem))
-                        else:
-                            await DisplayMsg.show(Message.SHOW_TEXT(text_string=pgn_game_name))
-                        await asyncio.sleep(update_speed)
-
-                        # reset pgn guess counters
-                        if last_move_no > 1:
-                            self.state.no_guess_black = 1
-                            self.state.no_guess_white = 1
-                        else:
-                            log_pgn(self.state)
-                            if self.state.max_guess_white > 0:
-                                if self.state.no_guess_white > self.state.max_guess_white:
-                                    self.state.last_legal_fens = []
-                                    await self.get_next_pgn_move()
-
-            elif isinstance(event, Event.PAUSE_RESUME):
-                if self.pgn_mode():
-                    self.engine.pause_pgn_audio()
-                else:
-                    if self.engine.is_thinking():
-                        self.engine.force_move()
-                    elif (
-                        self.eng_plays() and self.state.is_not_user_turn() and self.state.done_computer_fen is not None
-                    ):
-                        # e-board: engine move still pending on the board; allow user to request another move
-                        # (when go() sees searchlist=True it removes already-played moves from the root list)
-                        if not self.state.check_game_state():
-                            # picotuter should be in sync as takeback already was done
-                            await self.think(
-                                Message.ALTERNATIVE_MOVE(game=self.state.game.copy(), play_mode=self.state.play_mode),
-                                searchlist=True,
-                            )
-                    elif self.state.interaction_mode == Mode.PGNREPLAY:
-                        # Built in PGN Replay mode - toggle autoplay on or off
-                        if self.state.autoplay_pgn_file:
-                            self.state.autoplay_pgn_file = False  # stop auto replay of pgn
-                        else:
-                            # if we are not already waiting for an autoplay move make the first move
-                            if self.can_do_next_pgn_replay_move():
-                                # avoid sending GAME_ENDS when autoplay is started
-                                auto_move = await self.autoplay_pgnreplay_move(allow_game_ends=False)
-                            else:
-                                auto_move = None
-                            if auto_move:
-                                self.state.autoplay_pgn_file = True  # start auto replay of pgn
-                            else:
-                                msg = Message.SHOW_TEXT(text_string="no move")
-                                await DisplayMsg.show(msg)
-                    elif not self.state.done_computer_fen:
-                        if self.state.time_control.internal_running():
-                            await self.state.stop_clock()
-                        else:
-                            await self.state.start_clock()
+                            msg = Message.SHOW_TEXT(text_string="no move")
+                            await DisplayMsg.show(msg)
+                elif not self.state.done_computer_fen:
+                    if self.state.time_control.internal_running():
+                        await self.state.stop_clock()
                     else:
-                        logger.debug("best move displayed, dont start/stop clock")
+                        await self.state.start_clock()
+                else:
+                    logger.debug("best move displayed, dont start/stop clock")
 
-            elif isinstance(event, Event.ALTERNATIVE_MOVE):
-                if self.state.done_computer_fen and not self.emulation_mode():
-                    self.state.done_computer_fen = None
-                    self.state.done_move = chess.Move.null()
-                    if self.eng_plays():
-                        # @todo handle Mode.REMOTE too
-                        if self.state.time_control.mode == TimeMode.FIXED:
-                            self.state.time_control.reset()
-                        # set computer to move - in case the user just changed the engine
-                        self.state.play_mode = (
-                            PlayMode.USER_WHITE if self.state.game.turn == chess.BLACK else PlayMode.USER_BLACK
+        async def handle_alternative_move(self, event):
+            if self.state.done_computer_fen and not self.emulation_mode():
+                self.state.done_computer_fen = None
+                self.state.done_move = chess.Move.null()
+                if self.eng_plays():
+                    # @todo handle Mode.REMOTE too
+                    if self.state.time_control.mode == TimeMode.FIXED:
+                        self.state.time_control.reset()
+                    # set computer to move - in case the user just changed the engine
+                    self.state.play_mode = (
+                        PlayMode.USER_WHITE if self.state.game.turn == chess.BLACK else PlayMode.USER_BLACK
+                    )
+                    if not self.state.check_game_state():
+                        if self.picotutor_mode():
+                            await self.state.picotutor.pop_last_move(self.state.game)
+                        await self.think(
+                            Message.ALTERNATIVE_MOVE(
+                                game=GameSnapshot.of(self.state.game), play_mode=self.state.play_mode
+                            ),
+                            searchlist=True,
                         )
-                        if not self.state.check_game_state():
-                            if self.picotutor_mode():
-                                await self.state.picotutor.pop_last_move(self.state.game)
-                            await self.think(
-                                Message.ALTERNATIVE_MOVE(game=self.state.game.copy(), play_mode=self.state.play_mode),
-                                searchlist=True,
-                            )
-                    else:
-                        logger.warning("wrong function call [alternative]! mode: %s", self.state.interaction_mode)
+                else:
+                    logger.warning("wrong function call [alternative]! mode: %s", self.state.interaction_mode)
 
-            elif isinstance(event, Event.SWITCH_SIDES):
-                self.state.best_sent_depth.reset()  # safest to drop optimisation when switching sides
-                await self.get_rid_of_engine_move()
-                self.state.flag_startup = False
-                await DisplayMsg.show(Message.EXIT_MENU())
+        async def handle_switch_sides(self, event):
+            self.state.best_sent_depth.reset()  # safest to drop optimisation when switching sides
+            await self.get_rid_of_engine_move()
+            self.state.flag_startup = False
+            await DisplayMsg.show(Message.EXIT_MENU())
 
-                if self.state.interaction_mode == Mode.PONDER:
-                    # molli: allow switching sides in flexble ponder mode
-                    fen = self.state.game.board_fen()
+            if self.state.interaction_mode == Mode.PONDER:
+                # molli: allow switching sides in flexble ponder mode
+                fen = self.state.game.board_fen()
 
-                    if self.state.game.turn == chess.WHITE:
-                        fen += " b KQkq - 0 1"
-                    else:
-                        fen += " w KQkq - 0 1"
-                    # ask python-chess to correct the castling string
-                    bit_board = chess.Board(fen)
-                    bit_board.set_fen(bit_board.fen())
-                    if bit_board.is_valid():
-                        self.state.game = chess.Board(bit_board.fen())
-                        #  await self.stop_search_and_clock()
-                        await self.engine.newgame(self.state.game.copy())
-                        self.state.best_sent_depth.reset()
-                        self.state.done_computer_fen = None
-                        self.state.done_move = self.state.pb_move = chess.Move.null()
-                        self.state.time_control.reset()
-                        self.state.searchmoves.reset()
-                        self.state.game_declared = False
-                        self.state.legal_fens = compute_legal_fens(self.state.game.copy())
-                        self.state.legal_fens_after_cmove = []
-                        self.state.last_legal_fens = []
-                        # switching sides in PONDER (ANALYSIS in menu, not a playing mode)
-                        self.state.play_mode = (
-                            PlayMode.USER_WHITE if self.state.game.turn == chess.WHITE else PlayMode.USER_BLACK
-                        )
-                        msg = Message.PLAY_MODE(
-                            play_mode=self.state.play_mode,
-                            play_mode_text=self.state.dgttranslate.text(self.state.play_mode.value),
-                        )
-                        await DisplayMsg.show(msg)
-                        await self.set_picotutor_position(new_game=True)  # issue #78 inform tutor
-                        await self.analyse()  # #78 this should be last when all is done
-                    else:
-                        logger.debug("illegal fen %s", fen)
-                        await DisplayMsg.show(Message.WRONG_FEN())
-                        await DisplayMsg.show(Message.EXIT_MENU())
-
-                elif self.state.interaction_mode in (Mode.NORMAL, Mode.BRAIN, Mode.TRAINING):
-                    if not self.engine.is_waiting():
-                        await self.stop_search_and_clock()
-                    self.state.automatic_takeback = False
-                    self.state.takeback_active = False
-                    self.state.reset_auto = False
-                    self.state.last_legal_fens = []
-                    self.state.legal_fens_after_cmove = []
-                    self.state.best_move_displayed = self.state.done_computer_fen
-                    if self.state.best_move_displayed:
-                        move = self.state.done_move
-                        self.state.done_computer_fen = None
-                        self.state.done_move = self.state.pb_move = chess.Move.null()
-                    else:
-                        move = chess.Move.null()  # not really needed
-                    # switching sides in engine plays modes
+                if self.state.game.turn == chess.WHITE:
+                    fen += " b KQkq - 0 1"
+                else:
+                    fen += " w KQkq - 0 1"
+                # ask python-chess to correct the castling string
+                bit_board = chess.Board(fen)
+                bit_board.set_fen(bit_board.fen())
+                if bit_board.is_valid():
+                    self.state.game = chess.Board(bit_board.fen())
+                    #  await self.stop_search_and_clock()
+                    await self.engine.newgame(self.state.game.copy())
+                    self.state.best_sent_depth.reset()
+                    self.state.done_computer_fen = None
+                    self.state.done_move = self.state.pb_move = chess.Move.null()
+                    self.state.time_control.reset()
+                    self.state.searchmoves.reset()
+                    self.state.game_declared = False
+                    self.state.legal_fens = compute_legal_fens(self.state.game)
+                    self.state.legal_fens_after_cmove = {}
+                    self.state.last_legal_fens = {}
+                    # switching sides in PONDER (ANALYSIS in menu, not a playing mode)
                     self.state.play_mode = (
-                        PlayMode.USER_WHITE if self.state.play_mode == PlayMode.USER_BLACK else PlayMode.USER_BLACK
+                        PlayMode.USER_WHITE if self.state.game.turn == chess.WHITE else PlayMode.USER_BLACK
                     )
                     msg = Message.PLAY_MODE(
                         play_mode=self.state.play_mode,
                         play_mode_text=self.state.dgttranslate.text(self.state.play_mode.value),
                     )
+                    await DisplayMsg.show(msg)
+                    await self.set_picotutor_position(new_game=True)  # issue #78 inform tutor
+                    await self.analyse()  # #78 this should be last when all is done
+                else:
+                    logger.debug("illegal fen %s", fen)
+                    await DisplayMsg.show(Message.WRONG_FEN())
+                    await DisplayMsg.show(Message.EXIT_MENU())
 
-                    if self.state.time_control.mode == TimeMode.FIXED:
-                        self.state.time_control.reset()
+            elif self.state.interaction_mode in (Mode.NORMAL, Mode.BRAIN, Mode.TRAINING):
+                if not self.engine.is_waiting():
+                    await self.stop_search_and_clock()
+                self.state.automatic_takeback = False
+                self.state.takeback_active = False
+                self.state.reset_auto = False
+                self.state.last_legal_fens = {}
+                self.state.legal_fens_after_cmove = {}
+                self.state.best_move_displayed = self.state.done_computer_fen
+                if self.state.best_move_displayed:
+                    move = self.state.done_move
+                    self.state.done_computer_fen = None
+                    self.state.done_move = self.state.pb_move = chess.Move.null()
+                else:
+                    move = chess.Move.null()  # not really needed
+                # switching sides in engine plays modes
+                self.state.play_mode = (
+                    PlayMode.USER_WHITE if self.state.play_mode == PlayMode.USER_BLACK else PlayMode.USER_BLACK
+                )
+                msg = Message.PLAY_MODE(
+                    play_mode=self.state.play_mode,
+                    play_mode_text=self.state.dgttranslate.text(self.state.play_mode.value),
+                )
 
-                    if self.picotutor_mode():
-                        if self.state.play_mode == PlayMode.USER_BLACK:
-                            await self.state.picotutor.set_user_color(
-                                chess.BLACK, self.pgn_mode() or not self.eng_plays()
-                            )
-                        else:
-                            await self.state.picotutor.set_user_color(
-                                chess.WHITE, self.pgn_mode() or not self.eng_plays()
-                            )
-                        if self.state.best_move_posted:
-                            self.state.best_move_posted = False
-                            await self.state.picotutor.pop_last_move(self.state.game)
+                if self.state.time_control.mode == TimeMode.FIXED:
+                    self.state.time_control.reset()
+
+                if self.picotutor_mode():
+                    if self.state.play_mode == PlayMode.USER_BLACK:
+                        await self.state.picotutor.set_user_color(chess.BLACK, self.pgn_mode() or not self.eng_plays())
+                    else:
+                        await self.state.picotutor.set_user_color(chess.WHITE, self.pgn_mode() or not self.eng_plays())
+                    if self.state.best_move_posted:
+                        self.state.best_move_posted = False
+                        await self.state.picotutor.pop_last_move(self.state.game)
 
-                    self.state.legal_fens = []
+                self.state.legal_fens = {}
+
+                if self.pgn_mode():  # molli change pgn guessing game sides
+                    if self.state.max_guess_black > 0:
+                        self.state.max_guess_white = self.state.max_guess_black
+                        self.state.max_guess_black = 0
+                    elif self.state.max_guess_white > 0:
+                        self.state.max_guess_black = self.state.max_guess_white
+                        self.state.max_guess_white = 0
+                    self.state.no_guess_black = 1
+                    self.state.no_guess_white = 1
+
+                cond1 = self.state.game.turn == chess.WHITE and self.state.play_mode == PlayMode.USER_BLACK
+                cond2 = self.state.game.turn == chess.BLACK and self.state.play_mode == PlayMode.USER_WHITE
+                if cond1 or cond2:
+                    self.state.time_control.reset_start_time()
+                    await self.think(msg)  # PLAY_MODE
+                else:
+                    await DisplayMsg.show(msg)  # PLAY_MODE
+                    await self.state.start_clock()
+                    self.state.legal_fens = compute_legal_fens(self.state.game)
 
-                    if self.pgn_mode():  # molli change pgn guessing game sides
-                        if self.state.max_guess_black > 0:
-                            self.state.max_guess_white = self.state.max_guess_black
-                            self.state.max_guess_black = 0
-                        elif self.state.max_guess_white > 0:
-                            self.state.max_guess_black = self.state.max_guess_white
-                            self.state.max_guess_white = 0
-                        self.state.no_guess_black = 1
-                        self.state.no_guess_white = 1
+                if self.state.best_move_displayed:
+                    await DisplayMsg.show(Message.SWITCH_SIDES(game=GameSnapshot.of(self.state.game), move=move))
+
+            elif self.state.interaction_mode == Mode.REMOTE:
+                if not self.engine.is_waiting():
+                    await self.stop_search_and_clock()
 
+                self.state.last_legal_fens = {}
+                self.state.legal_fens_after_cmove = {}
+                self.state.best_move_displayed = self.state.done_computer_fen
+                if self.state.best_move_displayed:
+                    move = self.state.done_move
+                    self.state.done_computer_fen = None
+                    self.state.done_move = self.state.pb_move = chess.Move.null()
+                else:
+                    move = chess.Move.null()  # not really needed
+
+                self.state.play_mode = (
+                    PlayMode.USER_WHITE if self.state.play_mode == PlayMode.USER_BLACK else PlayMode.USER_BLACK
+                )
+                msg = Message.PLAY_MODE(
+                    play_mode=self.state.play_mode,
+                    play_mode_text=self.state.dgttranslate.text(self.state.play_mode.value),
+                )
+
+                if self.state.time_control.mode == TimeMode.FIXED:
+                    self.state.time_control.reset()
+
+                self.state.legal_fens = {}
+                game_end = self.state.check_game_state()
+                if game_end:
+                    await DisplayMsg.show(msg)
+                else:
                     cond1 = self.state.game.turn == chess.WHITE and self.state.play_mode == PlayMode.USER_BLACK
                     cond2 = self.state.game.turn == chess.BLACK and self.state.play_mode == PlayMode.USER_WHITE
                     if cond1 or cond2:
                         self.state.time_control.reset_start_time()
-                        await self.think(msg)  # PLAY_MODE
+                        await self.think(msg)
                     else:
-                        await DisplayMsg.show(msg)  # PLAY_MODE
+                        await DisplayMsg.show(msg)
                         await self.state.start_clock()
-                        self.state.legal_fens = compute_legal_fens(self.state.game.copy())
+                        self.state.legal_fens = compute_legal_fens(self.state.game)
 
-                    if self.state.best_move_displayed:
-                        await DisplayMsg.show(Message.SWITCH_SIDES(game=self.state.game.copy(), move=move))
+                if self.state.best_move_displayed:
+                    await DisplayMsg.show(Message.SWITCH_SIDES(game=GameSnapshot.of(self.state.game), move=move))
 
-                elif self.state.interaction_mode == Mode.REMOTE:
-                    if not self.engine.is_waiting():
-                        await self.stop_search_and_clock()
-
-                    self.state.last_legal_fens = []
-                    self.state.legal_fens_after_cmove = []
-                    self.state.best_move_displayed = self.state.done_computer_fen
-                    if self.state.best_move_displayed:
-                        move = self.state.done_move
-                        self.state.done_computer_fen = None
-                        self.state.done_move = self.state.pb_move = chess.Move.null()
-                    else:
-                        move = chess.Move.null()  # not really needed
-
-                    self.state.play_mode = (
-                        PlayMode.USER_WHITE if self.state.play_mode == PlayMode.USER_BLACK else PlayMode.USER_BLACK
-                    )
-                    msg = Message.PLAY_MODE(
+        async def handle_drawresign(self, event):
+            if not self.state.game_declared:  # in case user leaves kings in place while moving other pieces
+                await self.stop_search_and_clock()
+                l_result = ""
+                if event.result == GameResult.DRAW:
+                    l_result = "1/2-1/2"
+                elif event.result in (GameResult.WIN_WHITE, GameResult.WIN_BLACK):
+                    l_result = "1-0" if event.result == GameResult.WIN_WHITE else "0-1"
+                ModeInfo.set_game_ending(result=l_result)
+                self.game_end_event()
+                await DisplayMsg.show(
+                    Message.GAME_ENDS(
+                        tc_init=self.state.time_control.get_parameters(),
+                        result=event.result,
                         play_mode=self.state.play_mode,
-                        play_mode_text=self.state.dgttranslate.text(self.state.play_mode.value),
+                        game=GameSnapshot.of(self.state.game),
+                        mode=self.state.interaction_mode,
                     )
+                )
+                await asyncio.sleep(1.5)
+                self.state.game_declared = True
+                self.state.stop_fen_timer()
+                self.state.legal_fens_after_cmove = {}
+                await self.update_elo(event.result)
 
-                    if self.state.time_control.mode == TimeMode.FIXED:
-                        self.state.time_control.reset()
-
-                    self.state.legal_fens = []
-                    game_end = self.state.check_game_state()
-                    if game_end:
-                        await DisplayMsg.show(msg)
-                    else:
-                        cond1 = self.state.game.turn == chess.WHITE and self.state.play_mode == PlayMode.USER_BLACK
-                        cond2 = self.state.game.turn == chess.BLACK and self.state.play_mode == PlayMode.USER_WHITE
-                        if cond1 or cond2:
-                            self.state.time_control.reset_start_time()
-                            await self.think(msg)
-                        else:
-                            await DisplayMsg.show(msg)
-                            await self.state.start_clock()
-                            self.state.legal_fens = compute_legal_fens(self.state.game.copy())
-
-                    if self.state.best_move_displayed:
-                        await DisplayMsg.show(Message.SWITCH_SIDES(game=self.state.game.copy(), move=move))
-
-            elif isinstance(event, Event.DRAWRESIGN):
-                if not self.state.game_declared:  # in case user leaves kings in place while moving other pieces
+        async def handle_remote_move(self, event):
+            self.state.flag_startup = False
+            if self.board_type == dgt.util.EBoard.NOEBOARD:
+                await self.user_move(event.move, sliding=False)
+            else:
+                if self.state.interaction_mode == Mode.REMOTE and self.state.is_not_user_turn():
                     await self.stop_search_and_clock()
-                    l_result = ""
-                    if event.result == GameResult.DRAW:
-                        l_result = "1/2-1/2"
-                    elif event.result in (GameResult.WIN_WHITE, GameResult.WIN_BLACK):
-                        l_result = "1-0" if event.result == GameResult.WIN_WHITE else "0-1"
-                    ModeInfo.set_game_ending(result=l_result)
-                    self.game_end_event()
                     await DisplayMsg.show(
-                        Message.GAME_ENDS(
-                            tc_init=self.state.time_control.get_parameters(),
-                            result=event.result,
-                            play_mode=self.state.play_mode,
-                            game=self.state.game.copy(),
-                            mode=self.state.interaction_mode,
+                        Message.COMPUTER_MOVE(
+                            move=event.move,
+                            ponder=chess.Move.null(),
+                            game=GameSnapshot.of(self.state.game),
+                            wait=False,
+                            is_user_move=False,
                         )
                     )
-                    await asyncio.sleep(1.5)
-                    self.state.game_declared = True
-                    self.state.stop_fen_timer()
-                    self.state.legal_fens_after_cmove = []
-                    await self.update_elo(event.result)
-
-            elif isinstance(event, Event.REMOTE_MOVE):
-                self.state.flag_startup = False
-                if self.board_type == dgt.util.EBoard.NOEBOARD:
-                    await self.user_move(event.move, sliding=False)
+                    game_copy = self.state.game.copy()
+                    game_copy.push(event.move)
+                    self.state.done_computer_fen = game_copy.board_fen()
+                    self.state.done_move = event.move
+                    self.state.pb_move = chess.Move.null()
+                    self.state.legal_fens_after_cmove = compute_legal_fens(game_copy)
                 else:
-                    if self.state.interaction_mode == Mode.REMOTE and self.state.is_not_user_turn():
-                        await self.stop_search_and_clock()
-                        await DisplayMsg.show(
-                            Message.COMPUTER_MOVE(
-                                move=event.move,
-                                ponder=chess.Move.null(),
-                                game=self.state.game.copy(),
-                                wait=False,
-                                is_user_move=False,
-                            )
-                        )
-                        game_copy = self.state.game.copy()
-                        game_copy.push(event.move)
-                        self.state.done_computer_fen = game_copy.board_fen()
-                        self.state.done_move = event.move
-                        self.state.pb_move = chess.Move.null()
-                        self.state.legal_fens_after_cmove = compute_legal_fens(game_copy)
-                    else:
-                        logger.warning(
-                            "wrong function call [remote]! mode: %s turn: %s",
-                            self.state.interaction_mode,
-                            self.state.game.turn,
-                        )
+                    logger.warning(
+                        "wrong function call [remote]! mode: %s turn: %s",
+                        self.state.interaction_mode,
+                        self.state.game.turn,
+                    )
 
-            elif isinstance(event, Event.BEST_MOVE):
-                self.state.flag_startup = False
-                self.state.take_back_locked = False
-                self.state.best_move_posted = False
-                self.state.takeback_active = False
-                self.state.engine_move_was_book = bool(event.inbook) if self.eng_plays() else False
+        async def handle_best_move(self, event):
+            self.state.flag_startup = False
+            self.state.take_back_locked = False
+            self.state.best_move_posted = False
+            self.state.takeback_active = False
+            self.state.engine_move_was_book = bool(event.inbook) if self.eng_plays() else False
 
-                if self.state.interaction_mode in (Mode.NORMAL, Mode.BRAIN, Mode.TRAINING):
-                    if self.state.is_not_user_turn():
-                        # clock must be stopped BEFORE the "book_move" event cause SetNRun resets the clock display
-                        await self.state.stop_clock()
-                        self.state.best_move_posted = True
-                        # @todo 8/8/R6P/1R6/7k/2B2K1p/8/8 and sliding Ra6 over a5 to a4 - handle this in correct way!!
-                        if self.state.game.is_game_over() and not self.online_mode():
-                            logger.warning(
-                                "illegal move on game_end - sliding? move: %s fen: %s",
-                                event.move,
-                                self.state.game.fen(),
-                            )
-                        elif event.move is None:  # online game aborted or pgn move wrong or end of pgn game
-                            self.state.game_declared = True
-                            self.state.stop_fen_timer()
-                            self.state.legal_fens_after_cmove = []
-                            game_msg = self.state.game.copy()
-                            self.game_end_event()
-                            if self.online_mode():
-                                winner = ""
-                                result_str = ""
-                                await asyncio.sleep(0.5)
-                                result_str, winner = read_online_result()
-                                logger.debug("molli result_str:%s", result_str)
-                                logger.debug("molli winner:%s", winner)
-                                gameresult_tmp: Optional[GameResult] = None
-                                gameresult_tmp2: Optional[GameResult] = None
-
-                                if "Checkmate" in result_str or "checkmate" in result_str or "mate" in result_str:
-                                    gameresult_tmp = GameResult.MATE
-                                elif "Game abort" in result_str or "timeout" in result_str:
-                                    if winner:
-                                        if "white" in winner:
-                                            gameresult_tmp = GameResult.ABORT
-                                            gameresult_tmp2 = GameResult.WIN_WHITE
-                                        else:
-                                            gameresult_tmp = GameResult.ABORT
-                                            gameresult_tmp2 = GameResult.WIN_BLACK
+            if self.state.interaction_mode in (Mode.NORMAL, Mode.BRAIN, Mode.TRAINING):
+                if self.state.is_not_user_turn():
+                    # clock must be stopped BEFORE the "book_move" event cause SetNRun resets the clock display
+                    await self.state.stop_clock()
+                    self.state.best_move_posted = True
+                    # @todo 8/8/R6P/1R6/7k/2B2K1p/8/8 and sliding Ra6 over a5 to a4 - handle this in correct way!!
+                    if self.state.game.is_game_over() and not self.online_mode():
+                        logger.warning(
+                            "illegal move on game_end - sliding? move: %s fen: %s",
+                            event.move,
+                            self.state.game.fen(),
+                        )
+                    elif event.move is None:  # online game aborted or pgn move wrong or end of pgn game
+                        self.state.game_declared = True
+                        self.state.stop_fen_timer()
+                        self.state.legal_fens_after_cmove = {}
+                        game_msg = self.state.game.copy()
+                        self.game_end_event()
+                        if self.online_mode():
+                            winner = ""
+                            result_str = ""
+                            await asyncio.sleep(0.5)
+                            result_str, winner = read_online_result()
+                            logger.debug("molli result_str:%s", result_str)
+                            logger.debug("molli winner:%s", winner)
+                            gameresult_tmp: Optional[GameResult] = None
+                            gameresult_tmp2: Optional[GameResult] = None
+
+                            if "Checkmate" in result_str or "checkmate" in result_str or "mate" in result_str:
+                                gameresult_tmp = GameResult.MATE
+                            elif "Game abort" in result_str or "timeout" in result_str:
+                                if winner:
+                                    if "white" in winner:
+                                        gameresult_tmp = GameResult.ABORT
+                                        gameresult_tmp2 = GameResult.WIN_WHITE
                                     else:
                                         gameresult_tmp = GameResult.ABORT
-                                elif result_str == "Draw" or result_str == "draw":
-                                    gameresult_tmp = GameResult.DRAW
-                                elif "Out of time: White wins" in result_str:
-                                    gameresult_tmp = GameResult.OUT_OF_TIME
-                                    gameresult_tmp2 = GameResult.WIN_WHITE
-                                elif "Out of time: Black wins" in result_str:
-                                    gameresult_tmp = GameResult.OUT_OF_TIME
-                                    gameresult_tmp2 = GameResult.WIN_BLACK
-                                elif "Out of time" in result_str or "outoftime" in result_str:
-                                    if winner:
-                                        if "white" in winner:
-                                            gameresult_tmp = GameResult.OUT_OF_TIME
-                                            gameresult_tmp2 = GameResult.WIN_WHITE
-                                        else:
-                                            gameresult_tmp = GameResult.OUT_OF_TIME
-                                            gameresult_tmp2 = GameResult.WIN_BLACK
+                                        gameresult_tmp2 = GameResult.WIN_BLACK
+                                else:
+                                    gameresult_tmp = GameResult.ABORT
+                            elif result_str == "Draw" or result_str == "draw":
+                                gameresult_tmp = GameResult.DRAW
+                            elif "Out of time: White wins" in result_str:
+                                gameresult_tmp = GameResult.OUT_OF_TIME
+                                gameresult_tmp2 = GameResult.WIN_WHITE
+                            elif "Out of time: Black wins" in result_str:
+                                gameresult_tmp = GameResult.OUT_OF_TIME
+                                gameresult_tmp2 = GameResult.WIN_BLACK
+                            elif "Out of time" in result_str or "outoftime" in result_str:
+                                if winner:
+                                    if "white" in winner:
+                                        gameresult_tmp = GameResult.OUT_OF_TIME
+                                        gameresult_tmp2 = GameResult.WIN_WHITE
                                     else:
                                         gameresult_tmp = GameResult.OUT_OF_TIME
-                                elif "White wins" in result_str:
-                                    gameresult_tmp = GameResult.ABORT
-                                    gameresult_tmp2 = GameResult.WIN_WHITE
-                                elif "Black wins" in result_str:
-                                    gameresult_tmp = GameResult.ABORT
-                                    gameresult_tmp2 = GameResult.WIN_BLACK
-                                elif "OPP. resigns" in result_str or "resign" in result_str or "abort" in result_str:
-                                    gameresult_tmp = GameResult.ABORT
-                                    logger.debug("molli resign handling")
-                                    if winner == "":
-                                        logger.debug("molli winner not set")
-                                        if self.state.play_mode == PlayMode.USER_BLACK:
-                                            gameresult_tmp2 = GameResult.WIN_BLACK
-                                        else:
-                                            gameresult_tmp2 = GameResult.WIN_WHITE
+                                        gameresult_tmp2 = GameResult.WIN_BLACK
+                                else:
+                                    gameresult_tmp = GameResult.OUT_OF_TIME
+                            elif "White wins" in result_str:
+                                gameresult_tmp = GameResult.ABORT
+                                gameresult_tmp2 = GameResult.WIN_WHITE
+                            elif "Black wins" in result_str:
+                                gameresult_tmp = GameResult.ABORT
+                                gameresult_tmp2 = GameResult.WIN_BLACK
+                            elif "OPP. resigns" in result_str or "resign" in result_str or "abort" in result_str:
+                                gameresult_tmp = GameResult.ABORT
+                                logger.debug("molli resign handling")
+                                if winner == "":
+                                    logger.debug("molli winner not set")
+                                    if self.state.play_mode == PlayMode.USER_BLACK:
+                                        gameresult_tmp2 = GameResult.WIN_BLACK
                                     else:
-                                        logger.debug("molli winner %s", winner)
-                                        if "white" in winner:
-                                            gameresult_tmp2 = GameResult.WIN_WHITE
-                                        else:
-                                            gameresult_tmp2 = GameResult.WIN_BLACK
-
+                                        gameresult_tmp2 = GameResult.WIN_WHITE
                                 else:
-                                    logger.debug("molli unknown result")
-                                    gameresult_tmp = GameResult.ABORT
-
-                                logger.debug("molli result_tmp:%s", gameresult_tmp)
-                                logger.debug("molli result_tmp2:%s", gameresult_tmp2)
-
-                                if gameresult_tmp2 and not (
-                                    self.state.game.is_game_over() and gameresult_tmp == GameResult.ABORT
-                                ):
-                                    if gameresult_tmp == GameResult.OUT_OF_TIME:
-                                        await DisplayMsg.show(Message.LOST_ON_TIME())
-                                        await asyncio.sleep(2)
-                                        await DisplayMsg.show(
-                                            Message.GAME_ENDS(
-                                                tc_init=self.state.time_control.get_parameters(),
-                                                result=gameresult_tmp2,
-                                                play_mode=self.state.play_mode,
-                                                game=game_msg,
-                                                mode=self.state.interaction_mode,
-                                            )
-                                        )
+                                    logger.debug("molli winner %s", winner)
+                                    if "white" in winner:
+                                        gameresult_tmp2 = GameResult.WIN_WHITE
                                     else:
-                                        await DisplayMsg.show(
-                                            Message.GAME_ENDS(
-                                                tc_init=self.state.time_control.get_parameters(),
-                                                result=gameresult_tmp,
-                                                play_mode=self.state.play_mode,
-                                                game=game_msg,
-                                                mode=self.state.interaction_mode,
-                                            )
-                                        )
-                                        await asyncio.sleep(2)
-                                        await DisplayMsg.show(
-                                            Message.GAME_ENDS(
-                                                tc_init=self.state.time_control.get_parameters(),
-                                                result=gameresult_tmp2,
-                                                play_mode=self.state.play_mode,
-                                                game=game_msg,
-                                                mode=self.state.interaction_mode,
-                                            )
+                                        gameresult_tmp2 = GameResult.WIN_BLACK
+
+                            else:
+                                logger.debug("molli unknown result")
+                                gameresult_tmp = GameResult.ABORT
+
+                            logger.debug("molli result_tmp:%s", gameresult_tmp)
+                            logger.debug("molli result_tmp2:%s", gameresult_tmp2)
+
+                            if gameresult_tmp2 and not (
+                                self.state.game.is_game_over() and gameresult_tmp == GameResult.ABORT
+                            ):
+                                if gameresult_tmp == GameResult.OUT_OF_TIME:
+                                    await DisplayMsg.show(Message.LOST_ON_TIME())
+                                    await asyncio.sleep(2)
+                                    await DisplayMsg.show(
+                                        Message.GAME_ENDS(
+                                            tc_init=self.state.time_control.get_parameters(),
+                                            result=gameresult_tmp2,
+                                            play_mode=self.state.play_mode,
+                                            game=game_msg,
+                                            mode=self.state.interaction_mode,
                                         )
+                                    )
                                 else:
-                                    if gameresult_tmp == GameResult.ABORT and gameresult_tmp2:
-                                        await DisplayMsg.show(
-                                            Message.GAME_ENDS(
-                                                tc_init=self.state.time_control.get_parameters(),
-                                                result=gameresult_tmp2,
-                                                play_mode=self.state.play_mode,
-                                                game=game_msg,
-                                                mode=self.state.interaction_mode,
-                                            )
+                                    await DisplayMsg.show(
+                                        Message.GAME_ENDS(
+                                            tc_init=self.state.time_control.get_parameters(),
+                                            result=gameresult_tmp,
+                                            play_mode=self.state.play_mode,
+                                            game=game_msg,
+                                            mode=self.state.interaction_mode,
                                         )
-                                    else:
-                                        await DisplayMsg.show(
-                                            Message.GAME_ENDS(
-                                                tc_init=self.state.time_control.get_parameters(),
-                                                result=gameresult_tmp,
-                                                play_mode=self.state.play_mode,
-                                                game=game_msg,
-                                                mode=self.state.interaction_mode,
-                                            )
+                                    )
+                                    await asyncio.sleep(2)
+                                    await DisplayMsg.show(
+                                        Message.GAME_ENDS(
+                                            tc_init=self.state.time_control.get_parameters(),
+                                            result=gameresult_tmp2,
+                                            play_mode=self.state.play_mode,
+                                            game=game_msg,
+                                            mode=self.state.interaction_mode,
                                         )
+                                    )
                             else:
-                                if self.pgn_mode():
-                                    # molli: check if last move of pgn game file
-                                    await self.stop_search_and_clock()
-                                    log_pgn(self.state)
-                                    # in Pico V4 we cannot detect end of pgn game by depth
-                                    # if max_guess uci option is zero - this must be end of game
-                                    if self.state.max_guess == 0:
-                                        logger.debug("molli pgn: PGN END")
-                                        (
-                                            pgn_game_name,
-                                            pgn_problem,
-                                            pgn_fen,
-                                            pgn_result,
-                                            pgn_white,
-                                            pgn_black,
-                                        ) = read_pgn_info()
-                                        await DisplayMsg.show(Message.PGN_GAME_END(result=pgn_result))
-                                    elif self.state.pgn_book_test:
-                                        l_game_copy = self.state.game.copy()
-                                        l_game_copy.pop()
-                                        l_found = self.state.searchmoves.check_book(self.bookreader, l_game_copy)
-
-                                        if not l_found:
-                                            await DisplayMsg.show(Message.PGN_GAME_END(result="*"))
-                                        else:
-                                            logger.debug("molli pgn: Wrong Move! Try Again!")
-                                            # increase pgn guess counters
-                                            if self.state.max_guess_black > 0 and self.state.game.turn == chess.WHITE:
-                                                self.state.no_guess_black = self.state.no_guess_black + 1
-                                                if self.state.no_guess_black > self.state.max_guess_black:
-                                                    await DisplayMsg.show(Message.MOVE_WRONG())
-                                                else:
-                                                    await DisplayMsg.show(Message.MOVE_RETRY())
-                                            elif self.state.max_guess_white > 0 and self.state.game.turn == chess.BLACK:
-                                                self.state.no_guess_white = self.state.no_guess_white + 1
-                                                if self.state.no_guess_white > self.state.max_guess_white:
-                                                    await DisplayMsg.show(Message.MOVE_WRONG())
-                                                else:
-                                                    await DisplayMsg.show(Message.MOVE_RETRY())
-                                            else:
-                                                # user move wrong in pgn display mode only
-                                                await DisplayMsg.show(Message.MOVE_RETRY())
-                                            if self.board_type == dgt.util.EBoard.NOEBOARD:
-                                                await Observable.fire(Event.TAKE_BACK(take_back="PGN_TAKEBACK"))
-                                            else:
-                                                self.state.takeback_active = True
-                                                self.state.automatic_takeback = True
-                                                await self.set_wait_state(
-                                                    Message.TAKE_BACK(game=self.state.game.copy()),
-                                                )  # automatic takeback mode
+                                if gameresult_tmp == GameResult.ABORT and gameresult_tmp2:
+                                    await DisplayMsg.show(
+                                        Message.GAME_ENDS(
+                                            tc_init=self.state.time_control.get_parameters(),
+                                            result=gameresult_tmp2,
+                                            play_mode=self.state.play_mode,
+                                            game=game_msg,
+                                            mode=self.state.interaction_mode,
+                                        )
+                                    )
+                                else:
+                                    await DisplayMsg.show(
+                                        Message.GAME_ENDS(
+                                            tc_init=self.state.time_control.get_parameters(),
+                                            result=gameresult_tmp,
+                                            play_mode=self.state.play_mode,
+                                            game=game_msg,
+                                            mode=self.state.interaction_mode,
+                                        )
+                                    )
+                        else:
+                            if self.pgn_mode():
+                                # molli: check if last move of pgn game file
+                                await self.stop_search_and_clock()
+                                log_pgn(self.state)
+                                # in Pico V4 we cannot detect end of pgn game by depth
+                                # if max_guess uci option is zero - this must be end of game
+                                if self.state.max_guess == 0:
+                                    logger.debug("molli pgn: PGN END")
+                                    (
+                                        pgn_game_name,
+                                        pgn_problem,
+                                        pgn_fen,
+                                        pgn_result,
+                                        pgn_white,
+                                        pgn_black,
+                                    ) = read_pgn_info()
+                                    await DisplayMsg.show(Message.PGN_GAME_END(result=pgn_result))
+                                elif self.state.pgn_book_test:
+                                    l_game_copy = self.state.game.copy()
+                                    l_game_copy.pop()
+                                    l_found = self.state.searchmoves.check_book(self.bookreader, l_game_copy)
+
+                                    if not l_found:
+                                        await DisplayMsg.show(Message.PGN_GAME_END(result="*"))
                                     else:
                                         logger.debug("molli pgn: Wrong Move! Try Again!")
-
+                                        # increase pgn guess counters
                                         if self.state.max_guess_black > 0 and self.state.game.turn == chess.WHITE:
                                             self.state.no_guess_black = self.state.no_guess_black + 1
                                             if self.state.no_guess_black > self.state.max_guess_black:
@@ -4680,745 +4827,763 @@ async def main() -> None:
                                         else:
                                             # user move wrong in pgn display mode only
                                             await DisplayMsg.show(Message.MOVE_RETRY())
-
                                         if self.board_type == dgt.util.EBoard.NOEBOARD:
                                             await Observable.fire(Event.TAKE_BACK(take_back="PGN_TAKEBACK"))
                                         else:
                                             self.state.takeback_active = True
                                             self.state.automatic_takeback = True
                                             await self.set_wait_state(
-                                                Message.TAKE_BACK(game=self.state.game.copy())
+                                                Message.TAKE_BACK(game=GameSnapshot.of(self.state.game)),
                                             )  # automatic takeback mode
                                 else:
-                                    #  issue #14 0000 bestmove - not pgn replay - reload engine
-                                    result_str = self.state.pending_engine_result
-                                    self.state.pending_engine_result = None  # discard cached fallback once consumed
-                                    if not result_str:
-                                        # Same logic as above: ping every engine after an illegal move
-                                        # so we can distinguish a resignation from a crashed process.
-                                        result_str = await self.engine.handle_bestmove_0000(self.state.game.copy())
-                                    result = game_result_from_header(result_str)  # "*" maps to ABORT
-                                    if result != GameResult.ABORT:
+                                    logger.debug("molli pgn: Wrong Move! Try Again!")
+
+                                    if self.state.max_guess_black > 0 and self.state.game.turn == chess.WHITE:
+                                        self.state.no_guess_black = self.state.no_guess_black + 1
+                                        if self.state.no_guess_black > self.state.max_guess_black:
+                                            await DisplayMsg.show(Message.MOVE_WRONG())
+                                        else:
+                                            await DisplayMsg.show(Message.MOVE_RETRY())
+                                    elif self.state.max_guess_white > 0 and self.state.game.turn == chess.BLACK:
+                                        self.state.no_guess_white = self.state.no_guess_white + 1
+                                        if self.state.no_guess_white > self.state.max_guess_white:
+                                            await DisplayMsg.show(Message.MOVE_WRONG())
+                                        else:
+                                            await DisplayMsg.show(Message.MOVE_RETRY())
+                                    else:
+                                        # user move wrong in pgn display mode only
+                                        await DisplayMsg.show(Message.MOVE_RETRY())
+
+                                    if self.board_type == dgt.util.EBoard.NOEBOARD:
+                                        await Observable.fire(Event.TAKE_BACK(take_back="PGN_TAKEBACK"))
+                                    else:
+                                        self.state.takeback_active = True
+                                        self.state.automatic_takeback = True
+                                        await self.set_wait_state(
+                                            Message.TAKE_BACK(game=GameSnapshot.of(self.state.game))
+                                        )  # automatic takeback mode
+                            else:
+                                #  issue #14 0000 bestmove - not pgn replay - reload engine
+                                result_str = self.state.pending_engine_result
+                                self.state.pending_engine_result = None  # discard cached fallback once consumed
+                                if not result_str:
+                                    # Same logic as above: ping every engine after an illegal move
+                                    # so we can distinguish a resignation from a crashed process.
+                                    result_str = await self.engine.handle_bestmove_0000(self.state.game.copy())
+                                result = game_result_from_header(result_str)  # "*" maps to ABORT
+                                if result != GameResult.ABORT:
+                                    await DisplayMsg.show(
+                                        Message.GAME_ENDS(
+                                            tc_init=self.state.time_control.get_parameters(),
+                                            result=result,
+                                            play_mode=self.state.play_mode,
+                                            game=GameSnapshot.of(self.state.game),
+                                            mode=self.state.interaction_mode,
+                                        )
+                                    )
+                                else:
+                                    logger.error("engine crashed - game has not ended")
+                                    await DisplayMsg.show(Message.ENGINE_FAIL())
+                                    await asyncio.sleep(0.5)
+                                    # mimic the automatic-takeback logic used for mame blunders (see ~2360)
+                                    # so the user can try a different move or pick another engine
+                                    if self.board_type == dgt.util.EBoard.NOEBOARD:
+                                        await Observable.fire(Event.TAKE_BACK(take_back="ENGINE_FAIL"))
+                                    else:
+                                        self.state.takeback_active = True
+                                        self.state.automatic_takeback = True
+                                        await self.set_wait_state(
+                                            Message.TAKE_BACK(game=GameSnapshot.of(self.state.game))
+                                        )
+                                    loaded_ok = await self.engine.reopen_engine()
+                                    if loaded_ok:
+                                        level_index = self.state.dgtmenu.get_engine_level_index()
                                         await DisplayMsg.show(
-                                            Message.GAME_ENDS(
-                                                tc_init=self.state.time_control.get_parameters(),
-                                                result=result,
-                                                play_mode=self.state.play_mode,
-                                                game=self.state.game.copy(),
-                                                mode=self.state.interaction_mode,
+                                            Message.ENGINE_STARTUP(
+                                                installed_engines=EngineProvider.installed_engines,
+                                                file=self.state.engine_file,
+                                                level_index=level_index,
+                                                has_960=self.engine.has_chess960(),
+                                                has_ponder=self.engine.has_ponder(),
                                             )
                                         )
+                                        await asyncio.sleep(0.5)
+                                        await DisplayMsg.show(Message.ENGINE_SETUP())
                                     else:
-                                        logger.error("engine crashed - game has not ended")
+                                        logger.error("engine re-load failed")
                                         await DisplayMsg.show(Message.ENGINE_FAIL())
-                                        await asyncio.sleep(0.5)
-                                        # mimic the automatic-takeback logic used for mame blunders (see ~2360)
-                                        # so the user can try a different move or pick another engine
-                                        if self.board_type == dgt.util.EBoard.NOEBOARD:
-                                            await Observable.fire(Event.TAKE_BACK(take_back="ENGINE_FAIL"))
-                                        else:
-                                            self.state.takeback_active = True
-                                            self.state.automatic_takeback = True
-                                            await self.set_wait_state(Message.TAKE_BACK(game=self.state.game.copy()))
-                                        loaded_ok = await self.engine.reopen_engine()
-                                        if loaded_ok:
-                                            level_index = self.state.dgtmenu.get_engine_level_index()
-                                            await DisplayMsg.show(
-                                                Message.ENGINE_STARTUP(
-                                                    installed_engines=EngineProvider.installed_engines,
-                                                    file=self.state.engine_file,
-                                                    level_index=level_index,
-                                                    has_960=self.engine.has_chess960(),
-                                                    has_ponder=self.engine.has_ponder(),
-                                                )
-                                            )
-                                            await asyncio.sleep(0.5)
-                                            await DisplayMsg.show(Message.ENGINE_SETUP())
-                                        else:
-                                            logger.error("engine re-load failed")
-                                            await DisplayMsg.show(Message.ENGINE_FAIL())
-                            await asyncio.sleep(0.5)
-                        else:
-                            # normal computer move
-                            if event.inbook:
-                                await DisplayMsg.show(Message.BOOK_MOVE())
-                            self.state.searchmoves.exclude(event.move)
+                        await asyncio.sleep(0.5)
+                    else:
+                        # normal computer move
+                        if event.inbook:
+                            await DisplayMsg.show(Message.BOOK_MOVE())
+                        self.state.searchmoves.exclude(event.move)
 
-                            if self.online_mode() or self.emulation_mode():
-                                self.state.start_time_cmove_done = time.time()  # time should alraedy run for the player
-                            await DisplayMsg.show(Message.EXIT_MENU())
-                            await DisplayMsg.show(
-                                Message.COMPUTER_MOVE(
-                                    move=event.move,
-                                    ponder=event.ponder,
-                                    game=self.state.game.copy(),
-                                    wait=event.inbook,
-                                    is_user_move=False,
-                                )
+                        if self.online_mode() or self.emulation_mode():
+                            self.state.start_time_cmove_done = time.time()  # time should alraedy run for the player
+                        await DisplayMsg.show(Message.EXIT_MENU())
+                        await DisplayMsg.show(
+                            Message.COMPUTER_MOVE(
+                                move=event.move,
+                                ponder=event.ponder,
+                                game=GameSnapshot.of(self.state.game),
+                                wait=event.inbook,
+                                is_user_move=False,
                             )
-                            game_copy = self.state.game.copy()
-                            game_copy.push(event.move)
+                        )
+                        game_copy = self.state.game.copy()
+                        game_copy.push(event.move)
 
-                            if self.picotutor_mode():
-                                if self.pgn_mode():
-                                    t_color = self.state.picotutor.get_user_color()
-                                    if t_color == chess.BLACK:
-                                        await self.state.picotutor.set_user_color(
-                                            chess.WHITE, self.pgn_mode() or not self.eng_plays()
-                                        )
-                                    else:
-                                        await self.state.picotutor.set_user_color(
-                                            chess.BLACK, self.pgn_mode() or not self.eng_plays()
-                                        )
+                        if self.picotutor_mode():
+                            if self.pgn_mode():
+                                t_color = self.state.picotutor.get_user_color()
+                                if t_color == chess.BLACK:
+                                    await self.state.picotutor.set_user_color(
+                                        chess.WHITE, self.pgn_mode() or not self.eng_plays()
+                                    )
+                                else:
+                                    await self.state.picotutor.set_user_color(
+                                        chess.BLACK, self.pgn_mode() or not self.eng_plays()
+                                    )
+
+                            valid = await self.state.picotutor.push_move(event.move, game_copy)
+                            if valid and self.always_run_tutor:
+                                self.state.picotutor.get_user_move_eval()  # eval engine move
+                            if not valid:
+                                await self.set_picotutor_position()
+                        self.state.done_computer_fen = game_copy.board_fen()
+                        self.state.done_move = event.move
 
-                                valid = await self.state.picotutor.push_move(event.move, game_copy)
-                                if valid and self.always_run_tutor:
-                                    self.state.picotutor.get_user_move_eval()  # eval engine move
-                                if not valid:
-                                    await self.set_picotutor_position()
-                            self.state.done_computer_fen = game_copy.board_fen()
-                            self.state.done_move = event.move
+                        self.state.pb_move = event.ponder if event.ponder and not event.inbook else chess.Move.null()
+                        self.state.legal_fens_after_cmove = compute_legal_fens(game_copy)
 
-                            self.state.pb_move = (
-                                event.ponder if event.ponder and not event.inbook else chess.Move.null()
+                        if self.pgn_mode():
+                            # molli pgn: reset pgn guess counters
+                            if self.state.max_guess_black > 0 and not self.state.game.turn == chess.BLACK:
+                                self.state.no_guess_black = 1
+                            elif self.state.max_guess_white > 0 and not self.state.game.turn == chess.WHITE:
+                                self.state.no_guess_white = 1
+
+                        # molli: noeboard/WEB-Play
+                        if self.board_type == dgt.util.EBoard.NOEBOARD:
+                            logger.info("done move detected")
+                            assert self.state.interaction_mode in (
+                                Mode.NORMAL,
+                                Mode.BRAIN,
+                                Mode.REMOTE,
+                                Mode.TRAINING,
+                            ), (
+                                "wrong mode: %s" % self.state.interaction_mode
                             )
-                            self.state.legal_fens_after_cmove = compute_legal_fens(game_copy)
 
-                            if self.pgn_mode():
-                                # molli pgn: reset pgn guess counters
-                                if self.state.max_guess_black > 0 and not self.state.game.turn == chess.BLACK:
-                                    self.state.no_guess_black = 1
-                                elif self.state.max_guess_white > 0 and not self.state.game.turn == chess.WHITE:
-                                    self.state.no_guess_white = 1
-
-                            # molli: noeboard/WEB-Play
-                            if self.board_type == dgt.util.EBoard.NOEBOARD:
-                                logger.info("done move detected")
-                                assert self.state.interaction_mode in (
-                                    Mode.NORMAL,
-                                    Mode.BRAIN,
-                                    Mode.REMOTE,
-                                    Mode.TRAINING,
-                                ), (
-                                    "wrong mode: %s" % self.state.interaction_mode
-                                )
+                            await asyncio.sleep(0.5)
+                            await DisplayMsg.show(Message.COMPUTER_MOVE_DONE())
 
-                                await asyncio.sleep(0.5)
-                                await DisplayMsg.show(Message.COMPUTER_MOVE_DONE())
+                            self.state.best_move_posted = False
+                            self.state.game.push(self.state.done_move)  # computer move without human assistance
+                            self.state.done_computer_fen = None
+                            self.state.done_move = chess.Move.null()
 
-                                self.state.best_move_posted = False
-                                self.state.game.push(self.state.done_move)  # computer move without human assistance
-                                self.state.done_computer_fen = None
-                                self.state.done_move = chess.Move.null()
-
-                                if self.online_mode() or self.emulation_mode():
-                                    # for online or emulation engine the user time alraedy runs with move announcement
-                                    # => subtract time between announcement and execution
-                                    end_time_cmove_done = time.time()
-                                    cmove_time = math.floor(end_time_cmove_done - self.state.start_time_cmove_done)
-                                    if cmove_time > 0:
-                                        self.state.time_control.sub_online_time(self.state.game.turn, cmove_time)
-                                    cmove_time = 0
-                                    self.state.start_time_cmove_done = 0
-
-                                game_end = self.state.check_game_state()
-                                if game_end:
-                                    await self.update_elo(game_end)
-                                    self.state.legal_fens = []
-                                    self.state.legal_fens_after_cmove = []
-                                    if self.online_mode():
-                                        await self.stop_search_and_clock()
-                                        self.state.stop_fen_timer()
+                            if self.online_mode() or self.emulation_mode():
+                                # for online or emulation engine the user time alraedy runs with move announcement
+                                # => subtract time between announcement and execution
+                                end_time_cmove_done = time.time()
+                                cmove_time = math.floor(end_time_cmove_done - self.state.start_time_cmove_done)
+                                if cmove_time > 0:
+                                    self.state.time_control.sub_online_time(self.state.game.turn, cmove_time)
+                                cmove_time = 0
+                                self.state.start_time_cmove_done = 0
+
+                            game_end = self.state.check_game_state()
+                            if game_end:
+                                await self.update_elo(game_end)
+                                self.state.legal_fens = {}
+                                self.state.legal_fens_after_cmove = {}
+                                if self.online_mode():
                                     await self.stop_search_and_clock()
-                                    if not self.pgn_mode():
-                                        self.game_end_event()
-                                        await DisplayMsg.show(game_end)
+                                    self.state.stop_fen_timer()
+                                await self.stop_search_and_clock()
+                                if not self.pgn_mode():
+                                    self.game_end_event()
+                                    await DisplayMsg.show(game_end)
+                            else:
+                                self.state.searchmoves.reset()
+
+                                self.state.time_control.add_time(not self.state.game.turn)
+
+                                # molli new tournament time control
+                                if (
+                                    self.state.time_control.moves_to_go_orig > 0
+                                    and (self.state.game.fullmove_number - 1)
+                                    == self.state.time_control.moves_to_go_orig
+                                ):
+                                    self.state.time_control.add_game2(not self.state.game.turn)
+                                    t_player = False
+                                    msg = Message.TIMECONTROL_CHECK(
+                                        player=t_player,
+                                        movestogo=self.state.time_control.moves_to_go_orig,
+                                        time1=self.state.time_control.game_time,
+                                        time2=self.state.time_control.game_time2,
+                                    )
+                                    await DisplayMsg.show(msg)
+
+                                if not self.online_mode() or self.state.game.fullmove_number > 1:
+                                    await self.state.start_clock()
                                 else:
-                                    self.state.searchmoves.reset()
-
-                                    self.state.time_control.add_time(not self.state.game.turn)
-
-                                    # molli new tournament time control
-                                    if (
-                                        self.state.time_control.moves_to_go_orig > 0
-                                        and (self.state.game.fullmove_number - 1)
-                                        == self.state.time_control.moves_to_go_orig
-                                    ):
-                                        self.state.time_control.add_game2(not self.state.game.turn)
-                                        t_player = False
-                                        msg = Message.TIMECONTROL_CHECK(
-                                            player=t_player,
-                                            movestogo=self.state.time_control.moves_to_go_orig,
-                                            time1=self.state.time_control.game_time,
-                                            time2=self.state.time_control.game_time2,
-                                        )
-                                        await DisplayMsg.show(msg)
+                                    await DisplayMsg.show(Message.EXIT_MENU())  # show clock
+                                    end_time_cmove_done = 0
 
-                                    if not self.online_mode() or self.state.game.fullmove_number > 1:
-                                        await self.state.start_clock()
-                                    else:
-                                        await DisplayMsg.show(Message.EXIT_MENU())  # show clock
-                                        end_time_cmove_done = 0
-
-                                    self.state.legal_fens = compute_legal_fens(self.state.game.copy())
-
-                                    if self.pgn_mode():
-                                        log_pgn(self.state)
-                                        if self.state.game.turn == chess.WHITE:
-                                            if self.state.max_guess_white > 0:
-                                                if self.state.no_guess_white > self.state.max_guess_white:
-                                                    self.state.last_legal_fens = []
-                                                    await self.get_next_pgn_move()
-                                            else:
-                                                self.state.last_legal_fens = []
+                                self.state.legal_fens = compute_legal_fens(self.state.game)
+
+                                if self.pgn_mode():
+                                    log_pgn(self.state)
+                                    if self.state.game.turn == chess.WHITE:
+                                        if self.state.max_guess_white > 0:
+                                            if self.state.no_guess_white > self.state.max_guess_white:
+                                                self.state.last_legal_fens = {}
                                                 await self.get_next_pgn_move()
-                                        elif self.state.game.turn == chess.BLACK:
-                                            if self.state.max_guess_black > 0:
-                                                if self.state.no_guess_black > self.state.max_guess_black:
-                                                    self.state.last_legal_fens = []
-                                                    await self.get_next_pgn_move()
-                                            else:
-                                                self.state.last_legal_fens = []
+                                        else:
+                                            self.state.last_legal_fens = {}
+                                            await self.get_next_pgn_move()
+                                    elif self.state.game.turn == chess.BLACK:
+                                        if self.state.max_guess_black > 0:
+                                            if self.state.no_guess_black > self.state.max_guess_black:
+                                                self.state.last_legal_fens = {}
                                                 await self.get_next_pgn_move()
-
-                                self.state.last_legal_fens = []
-                                self.state.newgame_happened = False
-
-                                if self.state.game.fullmove_number < 1:
-                                    ModeInfo.reset_opening()
-                                if self.picotutor_mode() and self.state.dgtmenu.get_picoexplorer():
-                                    (
-                                        op_eco,
-                                        op_name,
-                                        op_moves,
-                                        op_in_book,
-                                    ) = self.state.picotutor.get_opening()
-                                    if op_in_book and op_name:
-                                        logger.debug("opening book set to %s", op_name)
-                                        ModeInfo.set_opening(self.state.book_in_use, str(op_name), op_eco)
-                                        await DisplayMsg.show(Message.SHOW_TEXT(text_string=op_name))
-                            # molli end noeboard/Web-Play
-                    else:
-                        logger.warning(
-                            "wrong function call [best]! mode: %s turn: %s",
-                            self.state.interaction_mode,
-                            self.state.game.turn,
-                        )
+                                        else:
+                                            self.state.last_legal_fens = {}
+                                            await self.get_next_pgn_move()
+
+                            self.state.last_legal_fens = {}
+                            self.state.newgame_happened = False
+
+                            if self.state.game.fullmove_number < 1:
+                                ModeInfo.reset_opening()
+                            if self.picotutor_mode() and self.state.dgtmenu.get_picoexplorer():
+                                (
+                                    op_eco,
+                                    op_name,
+                                    op_moves,
+                                    op_in_book,
+                                ) = self.state.picotutor.get_opening()
+                                if op_in_book and op_name:
+                                    logger.debug("opening book set to %s", op_name)
+                                    ModeInfo.set_opening(self.state.book_in_use, str(op_name), op_eco)
+                                    await DisplayMsg.show(Message.SHOW_TEXT(text_string=op_name))
+                        # molli end noeboard/Web-Play
                 else:
                     logger.warning(
                         "wrong function call [best]! mode: %s turn: %s",
                         self.state.interaction_mode,
                         self.state.game.turn,
                     )
+            else:
+                logger.warning(
+                    "wrong function call [best]! mode: %s turn: %s",
+                    self.state.interaction_mode,
+                    self.state.game.turn,
+                )
 
-            elif isinstance(event, Event.NEW_PV):
-                if event.pv[0]:
-                    # illegal moves can occur if a pv from the engine arrives
-                    # at the same time as an user move
-                    if self.state.game.is_legal(event.pv[0]):
-                        # only pv received from event
-                        await DisplayMsg.show(
-                            Message.NEW_PV(pv=event.pv, mode=self.state.interaction_mode, game=self.state.game.copy())
-                        )
-                    else:
-                        logger.info(
-                            "illegal move can not be displayed. move: %s fen: %s",
-                            event.pv[0],
-                            self.state.game.fen(),
+        async def handle_new_pv(self, event):
+            if event.pv[0]:
+                # illegal moves can occur if a pv from the engine arrives
+                # at the same time as an user move
+                if self.state.game.is_legal(event.pv[0]):
+                    # only pv received from event
+                    await DisplayMsg.show(
+                        Message.NEW_PV(
+                            pv=event.pv, mode=self.state.interaction_mode, game=GameSnapshot.of(self.state.game)
                         )
-                        logger.info("engine status: t:%s p:%s", self.engine.is_thinking(), self.engine.is_pondering())
+                    )
+                else:
+                    logger.info(
+                        "illegal move can not be displayed. move: %s fen: %s",
+                        event.pv[0],
+                        self.state.game.fen(),
+                    )
+                    logger.info("engine status: t:%s p:%s", self.engine.is_thinking(), self.engine.is_pondering())
 
-            elif isinstance(event, Event.NEW_SCORE):
-                if event.score:
-                    if event.score == 99999 or event.score == -99999:
-                        self.state.flag_pgn_game_over = True  # molli pgn mode: signal that pgn is at end
-                    else:
-                        self.state.flag_pgn_game_over = False
+        async def handle_new_score(self, event):
+            if event.score:
+                if event.score == 99999 or event.score == -99999:
+                    self.state.flag_pgn_game_over = True  # molli pgn mode: signal that pgn is at end
+                else:
+                    self.state.flag_pgn_game_over = False
 
-                    # only score and mate received from event, turn is missing
-                    await DisplayMsg.show(
-                        Message.NEW_SCORE(
-                            score=event.score,
-                            mate=event.mate,
-                            mode=self.state.interaction_mode,
-                            turn=self.state.game.turn,
-                        )
+                # only score and mate received from event, turn is missing
+                await DisplayMsg.show(
+                    Message.NEW_SCORE(
+                        score=event.score,
+                        mate=event.mate,
+                        mode=self.state.interaction_mode,
+                        turn=self.state.game.turn,
                     )
+                )
 
-            elif isinstance(event, Event.NEW_DEPTH):
-                if event.depth:
-                    if event.depth == 999:
-                        self.state.flag_pgn_game_over = True
-                    else:
-                        self.state.flag_pgn_game_over = False
-                    await DisplayMsg.show(Message.NEW_DEPTH(depth=event.depth))
-
-            elif isinstance(event, Event.START_SEARCH):
-                await DisplayMsg.show(Message.SEARCH_STARTED())
-
-            elif isinstance(event, Event.STOP_SEARCH):
-                await DisplayMsg.show(Message.SEARCH_STOPPED())
-
-            elif isinstance(event, Event.SET_INTERACTION_MODE):
-                self.state.best_sent_depth.reset()  # dont use optimisation when switching modes
-                if self.eng_plays() and event.mode not in (Mode.NORMAL, Mode.BRAIN, Mode.TRAINING):
-                    # things to do when we change from a playing mode to non-playing
-                    await self.get_rid_of_engine_move()  # force/get-rid of engine move
-                if not self.eng_plays() and event.mode in (Mode.NORMAL, Mode.BRAIN, Mode.TRAINING):
-                    # things to do i we change from a non-playing mode to a playing mode
-                    self.state.autoplay_pgn_file = False  # stop possible auto replay of pgn file
-                if (
-                    event.mode not in (Mode.NORMAL, Mode.REMOTE, Mode.TRAINING) and self.state.done_computer_fen
-                ):  # @todo check why still needed
-                    self.state.dgtmenu.set_mode(self.state.interaction_mode)  # undo the button4 stuff
-                    logger.warning("mode cant be changed to a pondering mode as long as a move is displayed")
-                    mode_text = self.state.dgttranslate.text("Y10_errormode")
-                    msg = Message.INTERACTION_MODE(mode=self.state.interaction_mode, mode_text=mode_text, show_ok=False)
-                    await DisplayMsg.show(msg)
+        async def handle_new_depth(self, event):
+            if event.depth:
+                if event.depth == 999:
+                    self.state.flag_pgn_game_over = True
                 else:
-                    if event.mode == Mode.PONDER:
-                        self.state.newgame_happened = False
-                    await self.stop_search_and_clock()
-                    if event.mode == Mode.PGNREPLAY:
-                        file_name_only = "last_game.pgn"
-                        await DisplayMsg.show(Message.READ_GAME(pgn_filename=file_name_only))
-                        await self.read_pgn_file(file_name_only)
-                        await self._start_or_stop_analysis_as_needed()
-                    else:
-                        self.state.interaction_mode = event.mode
-                        await self.engine_mode()
-                        msg = Message.INTERACTION_MODE(
-                            mode=event.mode, mode_text=event.mode_text, show_ok=event.show_ok
-                        )
-                        await self.set_wait_state(msg)  # dont clear searchmoves here
-
-            elif isinstance(event, Event.SET_OPENING_BOOK):
-                write_picochess_ini("book", event.book["file"])
-                logger.debug("changing opening book [%s]", event.book["file"])
-                self.bookreader = chess.polyglot.open_reader(event.book["file"])
-                await DisplayMsg.show(Message.OPENING_BOOK(book_text=event.book_text, show_ok=event.show_ok))
-                self.state.book_in_use = event.book["file"]
-                self.state.stop_fen_timer()
+                    self.state.flag_pgn_game_over = False
+                await DisplayMsg.show(Message.NEW_DEPTH(depth=event.depth))
+
+        async def handle_start_search(self, event):
+            await DisplayMsg.show(Message.SEARCH_STARTED())
+
+        async def handle_stop_search(self, event):
+            await DisplayMsg.show(Message.SEARCH_STOPPED())
+
+        async def handle_set_interaction_mode(self, event):
+            self.state.best_sent_depth.reset()  # dont use optimisation when switching modes
+            if self.eng_plays() and event.mode not in (Mode.NORMAL, Mode.BRAIN, Mode.TRAINING):
+                # things to do when we change from a playing mode to non-playing
+                await self.get_rid_of_engine_move()  # force/get-rid of engine move
+            if not self.eng_plays() and event.mode in (Mode.NORMAL, Mode.BRAIN, Mode.TRAINING):
+                # things to do i we change from a non-playing mode to a playing mode
+                self.state.autoplay_pgn_file = False  # stop possible auto replay of pgn file
+            if (
+                event.mode not in (Mode.NORMAL, Mode.REMOTE, Mode.TRAINING) and self.state.done_computer_fen
+            ):  # @todo check why still needed
+                self.state.dgtmenu.set_mode(self.state.interaction_mode)  # undo the button4 stuff
+                logger.warning("mode cant be changed to a pondering mode as long as a move is displayed")
+                mode_text = self.state.dgttranslate.text("Y10_errormode")
+                msg = Message.INTERACTION_MODE(mode=self.state.interaction_mode, mode_text=mode_text, show_ok=False)
+                await DisplayMsg.show(msg)
+            else:
+                if event.mode == Mode.PONDER:
+                    self.state.newgame_happened = False
+                await self.stop_search_and_clock()
+                if event.mode == Mode.PGNREPLAY:
+                    file_name_only = "last_game.pgn"
+                    await DisplayMsg.show(Message.READ_GAME(pgn_filename=file_name_only))
+                    await self.read_pgn_file(file_name_only)
+                    await self._start_or_stop_analysis_as_needed()
+                else:
+                    self.state.interaction_mode = event.mode
+                    await self.engine_mode()
+                    msg = Message.INTERACTION_MODE(mode=event.mode, mode_text=event.mode_text, show_ok=event.show_ok)
+                    await self.set_wait_state(msg)  # dont clear searchmoves here
+
+        async def handle_set_opening_book(self, event):
+            write_picochess_ini("book", event.book["file"])
+            logger.debug("changing opening book [%s]", event.book["file"])
+            self.bookreader.open(book_files(event.book["file"], self.args.book_mix))
+            await DisplayMsg.show(Message.OPENING_BOOK(book_text=event.book_text, show_ok=event.show_ok))
+            self.state.book_in_use = event.book["file"]
+            self.state.stop_fen_timer()
 
-            elif isinstance(event, Event.SHOW_ENGINENAME):
-                await DisplayMsg.show(Message.SHOW_ENGINENAME(show_enginename=event.show_enginename))
+        async def handle_show_enginename(self, event):
+            await DisplayMsg.show(Message.SHOW_ENGINENAME(show_enginename=event.show_enginename))
 
-            elif isinstance(event, Event.SAVE_GAME):
-                if event.pgn_filename:
-                    await self.state.stop_clock()
-                    await DisplayMsg.show(
-                        Message.SAVE_GAME(
-                            tc_init=self.state.time_control.get_parameters(),
-                            play_mode=self.state.play_mode,
-                            game=self.state.game.copy(),
-                            pgn_filename=event.pgn_filename,
-                            mode=self.state.interaction_mode,
-                        )
+        async def handle_save_game(self, event):
+            if event.pgn_filename:
+                await self.state.stop_clock()
+                await DisplayMsg.show(
+                    Message.SAVE_GAME(
+                        tc_init=self.state.time_control.get_parameters(),
+                        play_mode=self.state.play_mode,
+                        game=GameSnapshot.of(self.state.game),
+                        pgn_filename=event.pgn_filename,
+                        mode=self.state.interaction_mode,
                     )
+                )
 
-            elif isinstance(event, Event.READ_GAME):
-                if event.pgn_filename:
-                    await DisplayMsg.show(Message.READ_GAME(pgn_filename=event.pgn_filename))
-                    await self.read_pgn_file(event.pgn_filename)
-                    await self._start_or_stop_analysis_as_needed()
+        async def handle_read_game(self, event):
+            if event.pgn_filename:
+                await DisplayMsg.show(Message.READ_GAME(pgn_filename=event.pgn_filename))
+                await self.read_pgn_file(event.pgn_filename)
+                await self._start_or_stop_analysis_as_needed()
 
-            elif isinstance(event, Event.CONTLAST):
-                await DisplayMsg.show(Message.CONTLAST(contlast=event.contlast))
+        async def handle_contlast(self, event):
+            await DisplayMsg.show(Message.CONTLAST(contlast=event.contlast))
 
-            elif isinstance(event, Event.ALTMOVES):
-                await DisplayMsg.show(Message.ALTMOVES(altmoves=event.altmoves))
+        async def handle_altmoves(self, event):
+            await DisplayMsg.show(Message.ALTMOVES(altmoves=event.altmoves))
 
-            elif isinstance(event, Event.PICOWATCHER):
-                self.state.best_sent_depth.reset()
-                await self.state.picotutor.set_status(
-                    self.state.dgtmenu.get_picowatcher(),
-                    self.state.dgtmenu.get_picocoach(),
-                    self.state.dgtmenu.get_picoexplorer(),
-                    self.state.dgtmenu.get_picocomment(),
-                )
-                if event.picowatcher:
-                    self.state.flag_picotutor = True
-                    # @ todo - why do we need to re-set position in tutor?
-                    await self.set_picotutor_position()
-                elif self.state.dgtmenu.get_picocoach() != PicoCoach.COACH_OFF:
-                    self.state.flag_picotutor = True
-                elif self.state.dgtmenu.get_picoexplorer():
-                    self.state.flag_picotutor = True
-                else:
-                    self.state.flag_picotutor = False
+        async def handle_picowatcher(self, event):
+            self.state.best_sent_depth.reset()
+            await self.state.picotutor.set_status(
+                self.state.dgtmenu.get_picowatcher(),
+                self.state.dgtmenu.get_picocoach(),
+                self.state.dgtmenu.get_picoexplorer(),
+                self.state.dgtmenu.get_picocomment(),
+            )
+            if event.picowatcher:
+                self.state.flag_picotutor = True
+                # @ todo - why do we need to re-set position in tutor?
+                await self.set_picotutor_position()
+            elif self.state.dgtmenu.get_picocoach() != PicoCoach.COACH_OFF:
+                self.state.flag_picotutor = True
+            elif self.state.dgtmenu.get_picoexplorer():
+                self.state.flag_picotutor = True
+            else:
+                self.state.flag_picotutor = False
 
-                if self.state.flag_picotutor:
-                    await self.state.picotutor.set_mode(self.pgn_mode() or not self.eng_plays(), self.tutor_depth())
-                await DisplayMsg.show(Message.PICOWATCHER(picowatcher=event.picowatcher))
+            if self.state.flag_picotutor:
+                await self.state.picotutor.set_mode(self.pgn_mode() or not self.eng_plays(), self.tutor_depth())
+            await DisplayMsg.show(Message.PICOWATCHER(picowatcher=event.picowatcher))
 
-            elif isinstance(event, Event.PICOCOACH):
-                self.state.best_sent_depth.reset()
-                await self.state.picotutor.set_status(
-                    self.state.dgtmenu.get_picowatcher(),
-                    self.state.dgtmenu.get_picocoach(),
-                    self.state.dgtmenu.get_picoexplorer(),
-                    self.state.dgtmenu.get_picocomment(),
-                )
+        async def handle_picocoach(self, event):
+            self.state.best_sent_depth.reset()
+            await self.state.picotutor.set_status(
+                self.state.dgtmenu.get_picowatcher(),
+                self.state.dgtmenu.get_picocoach(),
+                self.state.dgtmenu.get_picoexplorer(),
+                self.state.dgtmenu.get_picocomment(),
+            )
 
-                if event.picocoach != PicoCoach.COACH_OFF:
-                    self.state.flag_picotutor = True
-                    # @ todo - why do we need to set tutor pos here?
-                    await self.set_picotutor_position()
-                elif self.state.dgtmenu.get_picowatcher():
-                    self.state.flag_picotutor = True
-                elif self.state.dgtmenu.get_picoexplorer():
+            if event.picocoach != PicoCoach.COACH_OFF:
+                self.state.flag_picotutor = True
+                # @ todo - why do we need to set tutor pos here?
+                await self.set_picotutor_position()
+            elif self.state.dgtmenu.get_picowatcher():
+                self.state.flag_picotutor = True
+            elif self.state.dgtmenu.get_picoexplorer():
+                self.state.flag_picotutor = True
+            else:
+                self.state.flag_picotutor = False
+
+            if self.state.flag_picotutor:
+                await self.state.picotutor.set_mode(self.pgn_mode() or not self.eng_plays(), self.tutor_depth())
+            if self.state.dgtmenu.get_picocoach() == PicoCoach.COACH_OFF:
+                await DisplayMsg.show(Message.PICOCOACH(picocoach=False))
+            elif self.state.dgtmenu.get_picocoach() == PicoCoach.COACH_ON and event.picocoach != 2:
+                await DisplayMsg.show(Message.PICOCOACH(picocoach=True))
+            elif self.state.dgtmenu.get_picocoach() == PicoCoach.COACH_LIFT and event.picocoach != 2:
+                await DisplayMsg.show(Message.PICOCOACH(picocoach=True))
+
+            if self.state.dgtmenu.get_picocoach() != PicoCoach.COACH_OFF and event.picocoach == 2:
+                # call pico coach in case it was already set to on
+                await self.call_pico_coach()
+
+        async def handle_picoexplorer(self, event):
+            self.state.best_sent_depth.reset()
+            await self.state.picotutor.set_status(
+                self.state.dgtmenu.get_picowatcher(),
+                self.state.dgtmenu.get_picocoach(),
+                self.state.dgtmenu.get_picoexplorer(),
+                self.state.dgtmenu.get_picocomment(),
+            )
+            if event.picoexplorer:
+                self.state.flag_picotutor = True
+            else:
+                if self.state.dgtmenu.get_picowatcher() or (self.state.dgtmenu.get_picocoach() != PicoCoach.COACH_OFF):
                     self.state.flag_picotutor = True
                 else:
                     self.state.flag_picotutor = False
 
-                if self.state.flag_picotutor:
-                    await self.state.picotutor.set_mode(self.pgn_mode() or not self.eng_plays(), self.tutor_depth())
-                if self.state.dgtmenu.get_picocoach() == PicoCoach.COACH_OFF:
-                    await DisplayMsg.show(Message.PICOCOACH(picocoach=False))
-                elif self.state.dgtmenu.get_picocoach() == PicoCoach.COACH_ON and event.picocoach != 2:
-                    await DisplayMsg.show(Message.PICOCOACH(picocoach=True))
-                elif self.state.dgtmenu.get_picocoach() == PicoCoach.COACH_LIFT and event.picocoach != 2:
-                    await DisplayMsg.show(Message.PICOCOACH(picocoach=True))
-
-                if self.state.dgtmenu.get_picocoach() != PicoCoach.COACH_OFF and event.picocoach == 2:
-                    # call pico coach in case it was already set to on
-                    await self.call_pico_coach()
+            if self.state.flag_picotutor:
+                await self.state.picotutor.set_mode(self.pgn_mode() or not self.eng_plays(), self.tutor_depth())
+            await DisplayMsg.show(Message.PICOEXPLORER(picoexplorer=event.picoexplorer))
 
-            elif isinstance(event, Event.PICOEXPLORER):
-                self.state.best_sent_depth.reset()
-                await self.state.picotutor.set_status(
-                    self.state.dgtmenu.get_picowatcher(),
-                    self.state.dgtmenu.get_picocoach(),
-                    self.state.dgtmenu.get_picoexplorer(),
-                    self.state.dgtmenu.get_picocomment(),
+        async def handle_rspeed(self, event):
+            if self.emulation_mode():
+                # restart engine with new retro speed
+                self.state.artwork_in_use = False
+                engine_file_to_load = self.state.engine_file  # assume not mame
+                if "/mame/" in self.state.engine_file and self.state.dgtmenu.get_engine_rdisplay():
+                    engine_file_art = self.state.engine_file + "_art"
+                    my_file = Path(engine_file_art)
+                    if my_file.is_file():
+                        self.state.artwork_in_use = True
+                        engine_file_to_load = engine_file_art  # load mame
+                old_options = self.engine.get_pgn_options()
+                await DisplayMsg.show(Message.ENGINE_SETUP())
+                await self.engine.quit()
+                self.engine = UciEngine(
+                    file=engine_file_to_load,
+                    uci_shell=self.uci_local_shell,
+                    mame_par=self.calc_engine_mame_par(),
+                    loop=self.loop,
                 )
-                if event.picoexplorer:
-                    self.state.flag_picotutor = True
-                else:
-                    if self.state.dgtmenu.get_picowatcher() or (
-                        self.state.dgtmenu.get_picocoach() != PicoCoach.COACH_OFF
-                    ):
-                        self.state.flag_picotutor = True
-                    else:
-                        self.state.flag_picotutor = False
-
-                if self.state.flag_picotutor:
-                    await self.state.picotutor.set_mode(self.pgn_mode() or not self.eng_plays(), self.tutor_depth())
-                await DisplayMsg.show(Message.PICOEXPLORER(picoexplorer=event.picoexplorer))
+                await self.engine.open_engine()
+                if engine_file_to_load != self.state.engine_file:
+                    await asyncio.sleep(1)  # mame artwork wait
+                await self.engine.startup(old_options, self.state.rating)
+                await self.stop_search_and_clock()
 
-            elif isinstance(event, Event.RSPEED):
-                if self.emulation_mode():
-                    # restart engine with new retro speed
-                    self.state.artwork_in_use = False
-                    engine_file_to_load = self.state.engine_file  # assume not mame
-                    if "/mame/" in self.state.engine_file and self.state.dgtmenu.get_engine_rdisplay():
-                        engine_file_art = self.state.engine_file + "_art"
-                        my_file = Path(engine_file_art)
-                        if my_file.is_file():
-                            self.state.artwork_in_use = True
-                            engine_file_to_load = engine_file_art  # load mame
-                    old_options = self.engine.get_pgn_options()
-                    await DisplayMsg.show(Message.ENGINE_SETUP())
-                    await self.engine.quit()
-                    self.engine = UciEngine(
-                        file=engine_file_to_load,
-                        uci_shell=self.uci_local_shell,
-                        mame_par=self.calc_engine_mame_par(),
-                        loop=self.loop,
+                if (
+                    self.state.dgtmenu.get_engine_rdisplay()
+                    and not self.state.dgtmenu.get_engine_rwindow()
+                    and self.state.artwork_in_use
+                ):
+                    # switch to fullscreen
+                    cmd = "xdotool keydown alt key F11; sleep 0.2 xdotool keyup alt"
+                    process = await asyncio.create_subprocess_shell(
+                        cmd,
+                        stdout=asyncio.subprocess.PIPE,
+                        stderr=asyncio.subprocess.PIPE,
                     )
-                    await self.engine.open_engine()
-                    if engine_file_to_load != self.state.engine_file:
-                        await asyncio.sleep(1)  # mame artwork wait
-                    await self.engine.startup(old_options, self.state.rating)
-                    await self.stop_search_and_clock()
-
-                    if (
-                        self.state.dgtmenu.get_engine_rdisplay()
-                        and not self.state.dgtmenu.get_engine_rwindow()
-                        and self.state.artwork_in_use
-                    ):
-                        # switch to fullscreen
-                        cmd = "xdotool keydown alt key F11; sleep 0.2 xdotool keyup alt"
-                        process = await asyncio.create_subprocess_shell(
-                            cmd,
-                            stdout=asyncio.subprocess.PIPE,
-                            stderr=asyncio.subprocess.PIPE,
-                        )
-                        stdout, stderr = await process.communicate()
-                        if process.returncode != 0:
-                            logger.error("Command failed with return code %s: %s", process.returncode, stderr.decode())
-                    game_fen = self.state.game.board_fen()
-                    self.state.game = chess.Board()
-                    self.state.game.turn = chess.WHITE
-                    self.state.play_mode = PlayMode.USER_WHITE
-                    if game_fen != chess.STARTING_BOARD_FEN:
-                        msg = Message.START_NEW_GAME(game=self.state.game.copy(), newgame=True)
-                        await DisplayMsg.show(msg)
-                    await self.engine.newgame(self.state.game.copy())
-                    self.state.best_sent_depth.reset()
-                    self.state.done_computer_fen = None
-                    self.state.done_move = self.state.pb_move = chess.Move.null()
-                    self.state.searchmoves.reset()
-                    self.state.game_declared = False
-                    self.state.legal_fens = compute_legal_fens(self.state.game.copy())
-                    self.state.last_legal_fens = []
-                    self.state.legal_fens_after_cmove = []
-                    self.is_out_of_time_already = False
-                    await self.engine_mode()
-                    await DisplayMsg.show(Message.RSPEED(rspeed=event.rspeed))
-                    await self.update_elo_display()
-
-            elif isinstance(event, Event.TAKE_BACK):
+                    stdout, stderr = await process.communicate()
+                    if process.returncode != 0:
+                        logger.error("Command failed with return code %s: %s", process.returncode, stderr.decode())
+                game_fen = self.state.game.board_fen()
+                self.state.game = chess.Board()
+                self.state.game.turn = chess.WHITE
+                self.state.play_mode = PlayMode.USER_WHITE
+                if game_fen != chess.STARTING_BOARD_FEN:
+                    msg = Message.START_NEW_GAME(game=GameSnapshot.of(self.state.game), newgame=True)
+                    await DisplayMsg.show(msg)
+                await self.engine.newgame(self.state.game.copy())
                 self.state.best_sent_depth.reset()
-                if self.state.game.move_stack and (
-                    event.take_back == "PGN_TAKEBACK"
-                    or not (
-                        self.state.take_back_locked
-                        or self.online_mode()
-                        or (self.emulation_mode() and not self.state.automatic_takeback)
-                    )
-                ):
-                    await self.get_rid_of_engine_move()  # unnecessary engine move not yet done
-                    await self.takeback()
+                self.state.done_computer_fen = None
+                self.state.done_move = self.state.pb_move = chess.Move.null()
+                self.state.searchmoves.reset()
+                self.state.game_declared = False
+                self.state.legal_fens = compute_legal_fens(self.state.game)
+                self.state.last_legal_fens = {}
+                self.state.legal_fens_after_cmove = {}
+                self.is_out_of_time_already = False
+                await self.engine_mode()
+                await DisplayMsg.show(Message.RSPEED(rspeed=event.rspeed))
+                await self.update_elo_display()
 
-            elif isinstance(event, Event.PICOCOMMENT):
-                if event.picocomment == "comment-factor":
-                    self.pico_talker.set_comment_factor(comment_factor=self.state.dgtmenu.get_comment_factor())
-                    await DisplayMsg.show(Message.PICOCOMMENT(picocomment="ok"))
-                else:
-                    await DisplayMsg.show(Message.PICOCOMMENT(picocomment=event.picocomment))
+        async def handle_take_back(self, event):
+            self.state.best_sent_depth.reset()
+            if self.state.game.move_stack and (
+                event.take_back == "PGN_TAKEBACK"
+                or not (
+                    self.state.take_back_locked
+                    or self.online_mode()
+                    or (self.emulation_mode() and not self.state.automatic_takeback)
+                )
+            ):
+                await self.get_rid_of_engine_move()  # unnecessary engine move not yet done
+                await self.takeback()
 
-            elif isinstance(event, Event.SET_TIME_CONTROL):
-                self.state.time_control.stop_internal(log=False)
-                tc_init = event.tc_init
+        async def handle_picocomment(self, event):
+            if event.picocomment == "comment-factor":
+                self.pico_talker.set_comment_factor(comment_factor=self.state.dgtmenu.get_comment_factor())
+                await DisplayMsg.show(Message.PICOCOMMENT(picocomment="ok"))
+            else:
+                await DisplayMsg.show(Message.PICOCOMMENT(picocomment=event.picocomment))
 
-                self.state.time_control = TimeControl(**tc_init)
+        async def handle_set_time_control(self, event):
+            self.state.time_control.stop_internal(log=False)
+            tc_init = event.tc_init
 
-                if not self.pgn_mode() and not self.online_mode():
-                    if tc_init["moves_to_go"] > 0:
-                        if self.state.time_control.mode == TimeMode.BLITZ:
-                            write_picochess_ini(
-                                "time",
-                                "{:d} {:d} 0 {:d}".format(tc_init["moves_to_go"], tc_init["blitz"], tc_init["blitz2"]),
-                            )
-                        elif self.state.time_control.mode == TimeMode.FISCHER:
-                            write_picochess_ini(
-                                "time",
-                                "{:d} {:d} {:d} {:d}".format(
-                                    tc_init["moves_to_go"],
-                                    tc_init["blitz"],
-                                    tc_init["fischer"],
-                                    tc_init["blitz2"],
-                                ),
-                            )
-                    elif self.state.time_control.mode == TimeMode.BLITZ:
-                        write_picochess_ini("time", "{:d} 0".format(tc_init["blitz"]))
-                    elif self.state.time_control.mode == TimeMode.FISCHER:
-                        write_picochess_ini("time", "{:d} {:d}".format(tc_init["blitz"], tc_init["fischer"]))
-                    elif self.state.time_control.mode == TimeMode.FIXED:
-                        write_picochess_ini("time", "{:d}".format(tc_init["fixed"]))
-                        # issue 87 - store user override depth/node if flag set
-                        # New user choice overrides possibly loaded engine dummy uci options
-                        # Node/Depth is a pair - drop both from uci and write both to ini
-                        # this guarantees that we dont mix ini and uci file settings
-                        # 671 (11 minutes 11 seconds) is the flag
-                        if self.state.time_control.move_time == 671:
-                            self.engine.drop_engine_uci_option("PicoDepth")  # user override
-                            write_picochess_ini("depth", "{:d}".format(tc_init["depth"]))
-                            self.engine.drop_engine_uci_option("PicoNode")  # user overrides
-                            write_picochess_ini("node", "{:d}".format(tc_init["node"]))
-                text = Message.TIME_CONTROL(time_text=event.time_text, show_ok=event.show_ok, tc_init=tc_init)
-                await DisplayMsg.show(text)
-                self.state.stop_fen_timer()
+            self.state.time_control = TimeControl(**tc_init)
 
-            elif isinstance(event, Event.CLOCK_TIME):
-                if self.dgtdispatcher.is_prio_device(
-                    event.dev, event.connect
-                ):  # transfer only the most prio clock's time
-                    # avoid debugs for every second
-                    #                    logger.debug(
-                    #                        "setting tc clock time - prio: %s w:%s b:%s",
-                    #                        event.dev,
-                    #                        hms_time(event.time_white),
-                    #                        hms_time(event.time_black),
-                    #                    )
-
-                    if self.state.time_control.mode != TimeMode.FIXED and (
-                        event.time_white == self.state.time_control.game_time
-                        and event.time_black == self.state.time_control.game_time
-                    ):
-                        pass
-                    else:
-                        moves_to_go = self.state.time_control.moves_to_go_orig - self.state.game.fullmove_number + 1
-                        if moves_to_go < 0:
-                            moves_to_go = 0
-                        # logger.debug("setting tc clock times")
-                        self.state.time_control.set_clock_times(
-                            white_time=event.time_white,
-                            black_time=event.time_black,
-                            moves_to_go=moves_to_go,
+            if not self.pgn_mode() and not self.online_mode():
+                if tc_init["moves_to_go"] > 0:
+                    if self.state.time_control.mode == TimeMode.BLITZ:
+                        write_picochess_ini(
+                            "time",
+                            "{:d} {:d} 0 {:d}".format(tc_init["moves_to_go"], tc_init["blitz"], tc_init["blitz2"]),
                         )
-
-                    low_time = False  # molli allow the speech output even for less than 60 seconds
-                    self.dgtboard.low_time = low_time
-                    if self.state.interaction_mode == Mode.TRAINING or self.state.position_mode:
-                        pass
-                    else:
-                        await DisplayMsg.show(
-                            Message.CLOCK_TIME(
-                                time_white=event.time_white,
-                                time_black=event.time_black,
-                                low_time=low_time,
-                            )
+                    elif self.state.time_control.mode == TimeMode.FISCHER:
+                        write_picochess_ini(
+                            "time",
+                            "{:d} {:d} {:d} {:d}".format(
+                                tc_init["moves_to_go"],
+                                tc_init["blitz"],
+                                tc_init["fischer"],
+                                tc_init["blitz2"],
+                            ),
                         )
+                elif self.state.time_control.mode == TimeMode.BLITZ:
+                    write_picochess_ini("time", "{:d} 0".format(tc_init["blitz"]))
+                elif self.state.time_control.mode == TimeMode.FISCHER:
+                    write_picochess_ini("time", "{:d} {:d}".format(tc_init["blitz"], tc_init["fischer"]))
+                elif self.state.time_control.mode == TimeMode.FIXED:
+                    write_picochess_ini("time", "{:d}".format(tc_init["fixed"]))
+                    # issue 87 - store user override depth/node if flag set
+                    # New user choice overrides possibly loaded engine dummy uci options
+                    # Node/Depth is a pair - drop both from uci and write both to ini
+                    # this guarantees that we dont mix ini and uci file settings
+                    # 671 (11 minutes 11 seconds) is the flag
+                    if self.state.time_control.move_time == 671:
+                        self.engine.drop_engine_uci_option("PicoDepth")  # user override
+                        write_picochess_ini("depth", "{:d}".format(tc_init["depth"]))
+                        self.engine.drop_engine_uci_option("PicoNode")  # user overrides
+                        write_picochess_ini("node", "{:d}".format(tc_init["node"]))
+            text = Message.TIME_CONTROL(time_text=event.time_text, show_ok=event.show_ok, tc_init=tc_init)
+            await DisplayMsg.show(text)
+            self.state.stop_fen_timer()
+
+        async def handle_clock_time(self, event):
+            if self.dgtdispatcher.is_prio_device(event.dev, event.connect):  # transfer only the most prio clock's time
+                # avoid debugs for every second
+                #                    logger.debug(
+                #                        "setting tc clock time - prio: %s w:%s b:%s",
+                #                        event.dev,
+                #                        hms_time(event.time_white),
+                #                        hms_time(event.time_black),
+                #                    )
+
+                if self.state.time_control.mode != TimeMode.FIXED and (
+                    event.time_white == self.state.time_control.game_time
+                    and event.time_black == self.state.time_control.game_time
+                ):
+                    pass
                 else:
-                    logger.debug("ignore clock time - too low prio: %s", event.dev)
-            elif isinstance(event, Event.OUT_OF_TIME):
-                # molli: allow further playing even when run out of time
-                if (
-                    not self.is_out_of_time_already and not self.online_mode()
-                ):  # molli in online mode the server decides
-                    await self.state.stop_clock()
-                    result = GameResult.OUT_OF_TIME
-                    self.game_end_event()
-                    await DisplayMsg.show(
-                        Message.GAME_ENDS(
-                            tc_init=self.state.time_control.get_parameters(),
-                            result=result,
-                            play_mode=self.state.play_mode,
-                            game=self.state.game.copy(),
-                            mode=self.state.interaction_mode,
-                        )
+                    moves_to_go = self.state.time_control.moves_to_go_orig - self.state.game.fullmove_number + 1
+                    if moves_to_go < 0:
+                        moves_to_go = 0
+                    # logger.debug("setting tc clock times")
+                    self.state.time_control.set_clock_times(
+                        white_time=event.time_white,
+                        black_time=event.time_black,
+                        moves_to_go=moves_to_go,
                     )
-                    self.is_out_of_time_already = True
-                    await self.update_elo(result)
 
-            elif isinstance(event, Event.SHUTDOWN):
-                await self.get_rid_of_engine_move()
-                await self.pre_exit_or_reboot_cleanups()
-                try:
-                    if self.uci_remote_shell:
-                        if self.uci_remote_shell.get():
-                            try:
-                                self.uci_remote_shell.get().__exit__(
-                                    None, None, None
-                                )  # force to call __exit__ (close shell connection)
-                            except Exception:
-                                pass
-                except Exception:
+                low_time = False  # molli allow the speech output even for less than 60 seconds
+                self.dgtboard.low_time = low_time
+                if self.state.interaction_mode == Mode.TRAINING or self.state.position_mode:
                     pass
-
-                result = GameResult.ABORT
-                self.game_end_event()
-                await DisplayMsg.show(
-                    Message.GAME_ENDS(
-                        tc_init=self.state.time_control.get_parameters(),
-                        result=result,
-                        play_mode=self.state.play_mode,
-                        game=self.state.game.copy(),
-                        mode=self.state.interaction_mode,
+                else:
+                    await DisplayMsg.show(
+                        Message.CLOCK_TIME(
+                            time_white=event.time_white,
+                            time_black=event.time_black,
+                            low_time=low_time,
+                        )
                     )
-                )
-                await DisplayMsg.show(Message.SYSTEM_SHUTDOWN())
-                # no messaging or events beyond this point
-                await asyncio.sleep(3)  # molli allow more time (5) for commentary chat
-                shutdown(self.args.dgtpi, dev=event.dev)  # @todo make independant of remote eng
-                await self.final_exit_or_reboot_cleanups()
+            else:
+                logger.debug("ignore clock time - too low prio: %s", event.dev)
 
-            elif isinstance(event, Event.REBOOT):
-                await self.get_rid_of_engine_move()
-                await self.pre_exit_or_reboot_cleanups()
-                result = GameResult.ABORT
+        async def handle_out_of_time(self, event):
+            # molli: allow further playing even when run out of time
+            if not self.is_out_of_time_already and not self.online_mode():  # molli in online mode the server decides
+                await self.state.stop_clock()
+                result = GameResult.OUT_OF_TIME
                 self.game_end_event()
                 await DisplayMsg.show(
                     Message.GAME_ENDS(
                         tc_init=self.state.time_control.get_parameters(),
                         result=result,
                         play_mode=self.state.play_mode,
-                        game=self.state.game.copy(),
+                        game=GameSnapshot.of(self.state.game),
                         mode=self.state.interaction_mode,
                     )
                 )
-                await DisplayMsg.show(Message.SYSTEM_REBOOT())
-                # no messaging or events beyond this point
-                await asyncio.sleep(3)  # molli allow more time (5) for commentary chat
-                reboot(
-                    self.args.dgtpi and self.uci_local_shell.get() is None, dev=event.dev
-                )  # @todo make independant of remote eng
-                await self.final_exit_or_reboot_cleanups()
+                self.is_out_of_time_already = True
+                await self.update_elo(result)
 
-            elif isinstance(event, Event.EXIT):
-                await self.get_rid_of_engine_move()
-                await self.pre_exit_or_reboot_cleanups()
-                result = GameResult.ABORT
-                self.game_end_event()
-                await DisplayMsg.show(
-                    Message.GAME_ENDS(
-                        tc_init=self.state.time_control.get_parameters(),
-                        result=result,
-                        play_mode=self.state.play_mode,
-                        game=self.state.game.copy(),
-                        mode=self.state.interaction_mode,
-                    )
-                )
-                # await DisplayMsg.show(Message.SYSTEM_EXIT())
-                # no messaging or events beyond this point
-                await asyncio.sleep(3)  # molli allow more time (5) for commentary chat
-                exit_pico(self.args.dgtpi, dev=event.dev)  # @todo make independant of remote eng
-                await self.final_exit_or_reboot_cleanups()
+        async def handle_shutdown(self, event):
+            await self.get_rid_of_engine_move()
+            await self.pre_exit_or_reboot_cleanups()
+            try:
+                if self.uci_remote_shell:
+                    if self.uci_remote_shell.get():
+                        try:
+                            self.uci_remote_shell.get().__exit__(
+                                None, None, None
+                            )  # force to call __exit__ (close shell connection)
+                        except Exception:
+                            pass
+            except Exception:
+                pass
 
-            elif isinstance(event, Event.EMAIL_LOG):
-                email_logger = Emailer(email=self.args.email, mailgun_key=self.args.mailgun_key)
-                email_logger.set_smtp(
-                    sserver=self.args.smtp_server,
-                    suser=self.args.smtp_user,
-                    spass=self.args.smtp_pass,
-                    sencryption=self.args.smtp_encryption,
-                    sstarttls=args.smtp_starttls,
-                    sport=args.smtp_port,
-                    sfrom=self.args.smtp_from,
+            result = GameResult.ABORT
+            self.game_end_event()
+            await DisplayMsg.show(
+                Message.GAME_ENDS(
+                    tc_init=self.state.time_control.get_parameters(),
+                    result=result,
+                    play_mode=self.state.play_mode,
+                    game=GameSnapshot.of(self.state.game),
+                    mode=self.state.interaction_mode,
                 )
-                body = "You probably want to forward this file to a picochess developer ;-)"
-                email_logger.send("Picochess LOG", body, "/opt/picochess/logs/{}".format(self.args.log_file))
-
-            elif isinstance(event, Event.SET_VOICE):
-                await DisplayMsg.show(
-                    Message.SET_VOICE(type=event.type, lang=event.lang, speaker=event.speaker, speed=event.speed)
+            )
+            await DisplayMsg.show(Message.SYSTEM_SHUTDOWN())
+            # no messaging or events beyond this point
+            await asyncio.sleep(3)  # molli allow more time (5) for commentary chat
+            shutdown(self.args.dgtpi, dev=event.dev)  # @todo make independant of remote eng
+            await self.final_exit_or_reboot_cleanups()
+
+        async def handle_reboot(self, event):
+            await self.get_rid_of_engine_move()
+            await self.pre_exit_or_reboot_cleanups()
+            result = GameResult.ABORT
+            self.game_end_event()
+            await DisplayMsg.show(
+                Message.GAME_ENDS(
+                    tc_init=self.state.time_control.get_parameters(),
+                    result=result,
+                    play_mode=self.state.play_mode,
+                    game=GameSnapshot.of(self.state.game),
+                    mode=self.state.interaction_mode,
                 )
+            )
+            await DisplayMsg.show(Message.SYSTEM_REBOOT())
+            # no messaging or events beyond this point
+            await asyncio.sleep(3)  # molli allow more time (5) for commentary chat
+            reboot(
+                self.args.dgtpi and self.uci_local_shell.get() is None, dev=event.dev
+            )  # @todo make independant of remote eng
+            await self.final_exit_or_reboot_cleanups()
+
+        async def handle_exit(self, event):
+            await self.get_rid_of_engine_move()
+            await self.pre_exit_or_reboot_cleanups()
+            result = GameResult.ABORT
+            self.game_end_event()
+            await DisplayMsg.show(
+                Message.GAME_ENDS(
+                    tc_init=self.state.time_control.get_parameters(),
+                    result=result,
+                    play_mode=self.state.play_mode,
+                    game=GameSnapshot.of(self.state.game),
+                    mode=self.state.interaction_mode,
+                )
+            )
+            # await DisplayMsg.show(Message.SYSTEM_EXIT())
+            # no messaging or events beyond this point
+            await asyncio.sleep(3)  # molli allow more time (5) for commentary chat
+            exit_pico(self.args.dgtpi, dev=event.dev)  # @todo make independant of remote eng
+            await self.final_exit_or_reboot_cleanups()
+
+        async def handle_email_log(self, event):
+            email_logger = Emailer(email=self.args.email, mailgun_key=self.args.mailgun_key)
+            email_logger.set_smtp(
+                sserver=self.args.smtp_server,
+                suser=self.args.smtp_user,
+                spass=self.args.smtp_pass,
+                sencryption=self.args.smtp_encryption,
+                sstarttls=args.smtp_starttls,
+                sport=args.smtp_port,
+                sfrom=self.args.smtp_from,
+            )
+            body = "You probably want to forward this file to a picochess developer ;-)"
+            log_file = "/opt/picochess/logs/{}".format(self.args.log_file)
+            await asyncio.to_thread(email_logger.send, "Picochess LOG", body, [log_file])
 
-            elif isinstance(event, Event.KEYBOARD_BUTTON):
-                await DisplayMsg.show(Message.DGT_BUTTON(button=event.button, dev=event.dev))
+        async def handle_set_voice(self, event):
+            await DisplayMsg.show(
+                Message.SET_VOICE(type=event.type, lang=event.lang, speaker=event.speaker, speed=event.speed)
+            )
 
-            elif isinstance(event, Event.KEYBOARD_FEN):
-                await DisplayMsg.show(Message.DGT_FEN(fen=event.fen, raw=False))
+        async def handle_keyboard_button(self, event):
+            await DisplayMsg.show(Message.DGT_BUTTON(button=event.button, dev=event.dev))
 
-            elif isinstance(event, Event.EXIT_MENU):
-                await DisplayMsg.show(Message.EXIT_MENU())
+        async def handle_keyboard_fen(self, event):
+            await DisplayMsg.show(Message.DGT_FEN(fen=event.fen, raw=False))
 
-            elif isinstance(event, Event.UPDATE_PICO):
-                await DisplayMsg.show(Message.UPDATE_PICO())
-                if not event.tag or event.tag == "":
-                    # full update at next boot for all scripts
-                    update_pico_v4()  # in utilities for now
-                else:
-                    # only update code to a specific tag
-                    checkout_tag(event.tag)
-                await DisplayMsg.show(Message.EXIT_MENU())
+        async def handle_exit_menu(self, event):
+            await DisplayMsg.show(Message.EXIT_MENU())
 
-            elif isinstance(event, Event.UPDATE_ENGINES):
-                await DisplayMsg.show(Message.UPDATE_PICO())
-                update_pico_engines()  # in utilities for now
-                await DisplayMsg.show(Message.EXIT_MENU())
+        async def handle_update_pico(self, event):
+            await DisplayMsg.show(Message.UPDATE_PICO())
+            if not event.tag or event.tag == "":
+                # full update at next boot for all scripts
+                update_pico_v4()  # in utilities for now
+            else:
+                # only update code to a specific tag
+                checkout_tag(event.tag)
+            await DisplayMsg.show(Message.EXIT_MENU())
 
-            elif isinstance(event, Event.REMOTE_ROOM):
-                await DisplayMsg.show(Message.REMOTE_ROOM(inside=event.inside))
+        async def handle_update_engines(self, event):
+            await DisplayMsg.show(Message.UPDATE_PICO())
+            update_pico_engines()  # in utilities for now
+            await DisplayMsg.show(Message.EXIT_MENU())
 
-            elif isinstance(event, Event.PROMOTION):
-                await DisplayMsg.show(Message.PROMOTION_DONE(move=event.move))
+        async def handle_remote_room(self, event):
+            await DisplayMsg.show(Message.REMOTE_ROOM(inside=event.inside))
 
-            else:  # Default
-                logger.info("event not handled : [%s]", event)
-                await asyncio.sleep(0.05)  # balance message queues
+        async def handle_promotion(self, event):
+            await DisplayMsg.show(Message.PROMOTION_DONE(move=event.move))
 
         def exit_sigterm(self, signum, frame):
             """A handler function to register for systemctl stop signal"""
@@ -23,6 +23,10 @@ import io
 from random import randint
 import os
 import asyncio
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Callable, Iterable, List, Tuple
 
 # import sys  # type: ignore - needed for redirecting stdout/stderr
 import contextlib
@@ -32,17 +36,120 @@ import subprocess
 with contextlib.redirect_stdout(io.StringIO()):
     import pygame
 
-# from pydub import AudioSegment  # type: ignore
 import chess  # type: ignore
 from utilities import DisplayMsg
 from dgt.api import Message
 from dgt.util import GameResult, PlayMode, Voice, EBoard
 
 logger = logging.getLogger(__name__)
-# base directory for picochess - needed for pydub AudioSegment file loading
-# @todo: make one global constant for this basedir, its used in many places
-# here its used only when audio speed is not 1.0, so pydub can load the sound file
-BASE_DIR = "/opt/picochess/"
+
+CLIP_CACHE_BYTES = 32 * 1024 * 1024  # decoded 16bit pcm, ~3 minutes of 44.1kHz stereo
+TEMPO_SEGMENT_MS = 40  # length of the overlapping segments when changing the tempo
+TEMPO_FADE_MS = 10  # cross fade between two segments
+# the clips of almost every spoken move - loaded for the active voices at startup
+PREWARM_CLIPS = [
+    "king.ogg",
+    "queen.ogg",
+    "rook.ogg",
+    "bishop.ogg",
+    "knight.ogg",
+    "pawn.ogg",
+    "takes.ogg",
+    "check.ogg",
+] + [square + ".ogg" for square in "abcdefgh12345678"]
+
+
+def stretch_tempo(samples: array, channels: int, rate: int, factor: float) -> array:
+    """Change the tempo of interleaved 16bit samples by factor without changing the pitch.
+
+    Like sox tempo the samples are cut in overlapping segments which are put together
+    with a shorter (factor > 1) or longer (factor < 1) step, only the cross fades are
+    calculated sample by sample.
+    """
+    if factor == 1.0 or not samples:
+        return samples
+    segment = int(rate * TEMPO_SEGMENT_MS / 1000) * channels
+    fade_frames = int(rate * TEMPO_FADE_MS / 1000)
+    fade = fade_frames * channels
+    hop_out = segment - fade
+    hop_in = max(1, round(hop_out * factor / channels)) * channels
+    result = samples[:segment]
+    pos = hop_in
+    while pos + fade < len(samples):
+        part = samples[pos : pos + segment]
+        tail = result[-fade:]
+        del result[-fade:]
+        for i in range(fade):
+            weight = (i // channels) / fade_frames
+            tail[i] = int(tail[i] * (1.0 - weight) + part[i] * weight)
+        result.extend(tail)
+        result.extend(part[fade:])
+        pos += hop_in
+    return result
+
+
+def decode_clip(path: str) -> Tuple[array, int, int]:
+    """Decode a voice file to the pcm format of the mixer, return (samples, channels, rate)."""
+    rate, size, channels = pygame.mixer.get_init()
+    if size != -16:
+        raise ValueError("mixer format {} not supported".format(size))
+    samples = array("h")
+    samples.frombytes(pygame.mixer.Sound(path).get_raw())
+    return samples, channels, rate
+
+
+class ClipCache(object):
+    """Keep decoded and tempo changed voice clips in a bounded LRU cache."""
+
+    def __init__(self, max_bytes: int = CLIP_CACHE_BYTES, decode: Callable = decode_clip):
+        self.max_bytes = max_bytes
+        self.decode = decode
+        self.clips = OrderedDict()  # type: OrderedDict
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()  # clips are loaded by the player and the prewarm thread
+
+    def clip(self, path: str, speed_factor: float) -> bytes:
+        """Return the pcm data of path played with speed_factor."""
+        key = (path, speed_factor)
+        with self.lock:
+            if key in self.clips:
+                self.clips.move_to_end(key)
+                self.hits += 1
+                return self.clips[key]
+            self.misses += 1
+        samples, channels, rate = self.decode(path)
+        data = stretch_tempo(samples, channels, rate, speed_factor).tobytes()
+        with self.lock:
+            if key not in self.clips:
+                self.clips[key] = data
+                self.size += len(data)
+            while self.size > self.max_bytes and len(self.clips) > 1:
+                _, old = self.clips.popitem(last=False)
+                self.size -= len(old)
+        return data
+
+    def utterance(self, paths: Iterable[str], speed_factor: float) -> bytes:
+        """Return the clips of paths joined to one buffer to be played without gaps."""
+        return b"".join(self.clip(path, speed_factor) for path in paths)
+
+    def prewarm(self, paths: Iterable[str], speed_factor: float) -> int:
+        """Load the clips of paths in advance, return the number of clips loaded."""
+        loaded = 0
+        for path in paths:
+            try:
+                self.clip(path, speed_factor)
+                loaded += 1
+            except (pygame.error, ValueError) as exc:
+                logger.debug("cant prewarm voice file %s: %s", path, exc)
+        return loaded
+
+    def clear(self):
+        """Remove all clips."""
+        with self.lock:
+            self.clips.clear()
+            self.size = 0
 
 
 class PicoTalker(object):
@@ -75,16 +182,23 @@ class PicoTalker(object):
             logger.debug("picotalker turned off")
             return False
 
-        result = False
+        voice_files = []
         for part in sounds:
             voice_file = self.voice_path + "/" + part
             if Path(voice_file).is_file():
-                # put in common queue in PicoTalkerDisplay to play one sound at a time
-                await self.sound_queue.put(voice_file)
-                result = True
+                voice_files.append(voice_file)
             else:
                 logger.warning("voice file not found %s", voice_file)
-        return result
+        if voice_files:
+            # put in common queue in PicoTalkerDisplay to play one sound at a time
+            await self.sound_queue.put(voice_files)
+        return bool(voice_files)
+
+    def voice_files(self, sounds: Iterable[str]) -> List[str]:
+        """Return the existing voice files of the sound parts."""
+        if not self.voice_path:
+            return []
+        return [self.voice_path + "/" + part for part in sounds if Path(self.voice_path + "/" + part).is_file()]
 
 
 class PicoTalkerDisplay(DisplayMsg):
@@ -130,7 +244,7 @@ class PicoTalkerDisplay(DisplayMsg):
         super(PicoTalkerDisplay, self).__init__(loop)
         # init pygame sound stuff
         pygame.mixer.init()  # keep all pygame.mixer here in PicoTalkerDisplay, not in PicoTalkers
-        self.sound_cache = {}  # cache for voice files
+        self.clip_cache = ClipCache()  # decoded voice files
         self.common_queue = asyncio.Queue()  # queue for sound_player
         asyncio.create_task(self.sound_player())  # background sound player
 
@@ -191,6 +305,16 @@ class PicoTalkerDisplay(DisplayMsg):
             beeper_sound = "en:beeper"
             logger.debug("creating beeper sound: [%s]", str(beeper_sound))
             self.set_beeper(PicoTalker(beeper_sound, self.speed_factor, self.common_queue))
+        asyncio.create_task(self.prewarm_voices())
+
+    async def prewarm_voices(self):
+        """Load the most used clips of the user and computer voice in the background."""
+        voice_files = []
+        for picotalker in (self.user_picotalker, self.computer_picotalker):
+            if picotalker:
+                voice_files += picotalker.voice_files(PREWARM_CLIPS)
+        loaded = await asyncio.to_thread(self.clip_cache.prewarm, voice_files, self.speed_factor)
+        logger.debug("picotalker prewarmed %d voice clips", loaded)
 
     async def exit_or_reboot_cleanups(self):
         """Clean up before exit or reboot."""
@@ -206,8 +330,7 @@ class PicoTalkerDisplay(DisplayMsg):
         # calling main picochess is waiting after this, but...
         # cannot clear cache before it finds None in the sound queue
         await asyncio.sleep(0.1)  # give sound player time to process None
-        self.sound_cache.clear()  # clear sound cache
-        self.sound_cache = {}
+        self.clip_cache.clear()  # clear sound cache
         if pygame.mixer.get_init():  # prevent mixer not initialized error in shutdown
             pygame.mixer.stop()  # stop all sounds
             pygame.mixer.quit()  # clean up mixer subsystem
@@ -219,17 +342,22 @@ class PicoTalkerDisplay(DisplayMsg):
         Both user, computer and beeper talker will use this queue to play sounds."""
         try:
             while True:
-                voice_file = await self.common_queue.get()
-                if voice_file is None:
+                voice_files = await self.common_queue.get()
+                if voice_files is None:
                     # stop sound player
                     logger.debug("picotalker sound player stopping")
                     break  # exit the loop
-                # self.pico3_sound_player(voice_file)  # blocking play
-                await asyncio.to_thread(self.pico3_sound_player, voice_file)
-                # issue #77 tmp commenting out Pico4 sound playing
-                # sound = await self.get_or_load_sound(voice_file)
-                # sound.play()  # returns immediately
-                # await asyncio.sleep(sound.get_length() + 0.3)  # wait until it's done
+                try:
+                    # decoding and changing the tempo blocks, playing does not, use thread here
+                    buffer = await asyncio.to_thread(self.clip_cache.utterance, voice_files, self.speed_factor)
+                except (pygame.error, ValueError) as exc:
+                    logger.warning("cant load voice files %s: %s => using sox", voice_files, exc)
+                    for voice_file in voice_files:
+                        await asyncio.to_thread(self.pico3_sound_player, voice_file)
+                    continue
+                sound = pygame.mixer.Sound(buffer=buffer)
+                sound.play()  # returns immediately
+                await asyncio.sleep(sound.get_length())  # wait until it's done
         except asyncio.CancelledError:
             logger.debug("picotalker sound player cancelled")
 
@@ -245,41 +373,6 @@ class PicoTalkerDisplay(DisplayMsg):
             logger.warning("OSError: %s => turn voice OFF", os_exc)
         return result
 
-    # async def get_or_load_sound(self, path):
-    #     """Async function to load or get sound from cache"""
-    #     key = (path, self.speed_factor)
-    #     if key not in self.sound_cache:
-    #         # loading sounds blocks, playing them does not, use thread here
-    #         sound = await asyncio.to_thread(self.load_and_transform, path)
-    #         self.sound_cache[key] = sound
-    #     return self.sound_cache[key]
-
-    # def load_and_transform(self, path: str):
-    #     """Load a sound file and change its playback speed if necessary."""
-    #     if self.speed_factor == 1.0:
-    #         # no speed change needed, load directly, dont use pydub, ffmpeg, io
-    #         return pygame.mixer.Sound(path)  # only AudioSegment needs BASE_DIR
-    #     # use pydub and ffmpeg to load the sound file and change playback speed
-    #     seg = AudioSegment.from_file(BASE_DIR + path)
-    #     seg = self.change_playback_speed(seg)
-    #     return self.audiosegment_to_pygame_sound(seg)
-
-    # # the following two member functions are used to change the playback speed of a sound
-    # # it requires pydub and ffmpeg to be installed - only used if speed_factor != 1.0
-    # # they are called from load_and_transform above
-    # def change_playback_speed(self, sound: AudioSegment):
-    #     """use pydub to change the playback speed of a sound"""
-    #     new_frame_rate = int(sound.frame_rate * self.speed_factor)
-    #     return sound._spawn(sound.raw_data, overrides={"frame_rate": new_frame_rate}).set_frame_rate(sound.frame_rate)
-
-    # def audiosegment_to_pygame_sound(self, seg: AudioSegment):
-    #     """Convert an AudioSegment to a pygame Sound object.
-    #     used to play pydub sounds in pygame, pydub is used to change playback speed."""
-    #     raw = io.BytesIO()
-    #     seg.export(raw, format="wav")
-    #     raw.seek(0)
-    #     return pygame.mixer.Sound(file=raw)
-
     def set_comment_factor(self, comment_factor: int):
         self.c_comment_factor = comment_factor
 
@@ -670,7 +763,6 @@ class PicoTalkerDisplay(DisplayMsg):
                 # asyncio.create_task(self.process_picotalker_messages(message))
                 await self.process_picotalker_messages(message)
                 self.msg_queue.task_done()
-                await asyncio.sleep(0.05)  # balancing message queues
         except asyncio.CancelledError:
             logger.debug("picotalker msg_queue cancelled")
 
@@ -1115,6 +1207,8 @@ class PicoTalkerDisplay(DisplayMsg):
                     self.sample_beeper = False
                 else:
                     self.sample_beeper = True
+            if message.type in (Voice.USER, Voice.COMP, Voice.SPEED):
+                asyncio.create_task(self.prewarm_voices())
             await self.talk(["confirm.ogg"], self.BEEPER)
             await self.talk(["ok.ogg"])
 
@@ -23,8 +23,10 @@ from __future__ import annotations
 
 import csv
 import logging
+import os
+import pickle
 from random import randint
-from typing import Tuple
+from typing import Dict, List, Tuple
 import platform
 import asyncio
 import chess  # type: ignore
@@ -33,6 +35,7 @@ import chess.engine
 import chess.pgn
 from uci.engine import UciShell, UciEngine
 from dgt.util import PicoComment, PicoCoach
+from tablebase import Tablebase
 
 # PicoTutor Constants
 import picotutor_constants as c
@@ -40,6 +43,101 @@ import picotutor_constants as c
 logger = logging.getLogger(__name__)
 
 
+class OpeningIndex:
+    """Opening names of chess-eco_pos.txt as a SAN move trie and of opening_name_fen.txt as a board fen map.
+
+    Both tables are compiled once and kept in a pickle cache file next to them,
+    the cache is compiled again if one of the text files changed.
+    """
+
+    VERSION = 1
+    ENTRY = ""  # trie key of the (eco, opening_name, moves) entry, SAN moves are never empty
+
+    def __init__(self, trie: Dict, fens: Dict[str, str]):
+        self.trie = trie
+        self.fens = fens
+
+    @staticmethod
+    def _san_key(san: str) -> str:
+        return san.rstrip("+#")
+
+    @classmethod
+    def compile(cls, eco_file: str, fen_file: str) -> "OpeningIndex":
+        trie: Dict = {}
+        try:
+            with open(eco_file) as fp:
+                for opening in csv.DictReader(filter(lambda row: row[0] != "#", fp.readlines()), delimiter="|"):
+                    moves = opening.get("moves")
+                    if not moves:
+                        continue  # start position never matches
+                    node = trie
+                    for san in moves.split():
+                        node = node.setdefault(cls._san_key(san), {})
+                    # first opening of same moves wins
+                    node.setdefault(cls.ENTRY, (opening.get("eco"), opening.get("opening_name"), moves))
+        except EnvironmentError:
+            logger.warning("opening file %s not found", eco_file)
+
+        fens: Dict[str, str] = {}
+        try:
+            with open(fen_file) as fp:
+                lines = fp.readlines()
+            for index, line in enumerate(lines[:-1]):
+                line_list = line.split()
+                if line_list and "/" in line_list[0] and line_list[0] not in fens:
+                    fens[line_list[0]] = lines[index + 1]
+        except EnvironmentError:
+            logger.warning("opening file %s not found", fen_file)
+        return cls(trie, fens)
+
+    @staticmethod
+    def _stamp(files: List[str]) -> List[Tuple[int, int]]:
+        stamp = []
+        for file_name in files:
+            try:
+                stat = os.stat(file_name)
+                stamp.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                stamp.append((0, 0))
+        return stamp
+
+    @classmethod
+    def load(cls, eco_file: str, fen_file: str, cache_file: str) -> "OpeningIndex":
+        """Return the index from cache_file - compile (and save) it if the cache is missing or too old."""
+        stamp = cls._stamp([eco_file, fen_file])
+        try:
+            with open(cache_file, "rb") as fp:
+                version, cache_stamp, trie, fens = pickle.load(fp)
+            if version == cls.VERSION and cache_stamp == stamp:
+                return cls(trie, fens)
+        except (EnvironmentError, pickle.UnpicklingError, EOFError, ValueError, TypeError):
+            pass
+        index = cls.compile(eco_file, fen_file)
+        try:
+            with open(cache_file, "wb") as fp:
+                pickle.dump((cls.VERSION, stamp, index.trie, index.fens), fp, protocol=pickle.HIGHEST_PROTOCOL)
+        except EnvironmentError as exc:
+            logger.debug("cant write opening cache %s: %s", cache_file, exc)
+        return index
+
+    def longest_opening(self, played: List[str]) -> Tuple[str, str, str]:
+        """Return (opening_name, moves, eco) of the longest opening the played SAN moves start with."""
+        opening_name = moves = eco = ""
+        node = self.trie
+        for san in played:
+            child = node.get(self._san_key(san))
+            if child is None:
+                break
+            node = child
+            if self.ENTRY in node:
+                eco, opening_name, moves = node[self.ENTRY]
+        return opening_name, moves, eco
+
+    def fen_opening(self, board_fen: str) -> str:
+        """Return the opening name of a board fen or ''."""
+        return self.fens.get(board_fen, "")
+
+
 class PicoTutor:
     def __init__(
         self,
@@ -51,6 +149,7 @@ class PicoTutor:
         i_lang="en",
         i_always_run_tutor=False,
         loop=None,
+        tablebase: Tablebase | None = None,
     ):
         self.user_color: chess.Color = i_player_color
         self.engine_path: str = i_engine_path
@@ -97,6 +196,7 @@ class PicoTutor:
         self.board = chess.Board()
         self.ucishell = i_ucishell
         self.loop = loop  # main loop everywhere
+        self.tablebase = tablebase  # exact endgame evaluations instead of engine analysis
         self.deep_limit_depth = None  # override picotutor value in set_mode
         # evaluated moves keeps a memory of all non zero evaluation strings
         # it can then be used to print comments in the PGN file
@@ -108,17 +208,7 @@ class PicoTutor:
         # new feature to be able to step through a PGN game
         self.pgn_game: chess.pgn.Game | None = None
 
-        try:
-            with open("chess-eco_pos.txt") as fp:
-                self.book_data = list(csv.DictReader(filter(lambda row: row[0] != "#", fp.readlines()), delimiter="|"))
-        except EnvironmentError:
-            self.book_data = []
-
-        try:
-            with open("opening_name_fen.txt") as fp:
-                self.book_fen_data = fp.readlines()
-        except FileNotFoundError:
-            self.book_fen_data = []
+        self.openings = OpeningIndex.load("chess-eco_pos.txt", "opening_name_fen.txt", "opening_index.pickle")
 
         self._setup_comments(i_lang, i_comment_file)
 
@@ -324,15 +414,7 @@ class PicoTutor:
             self.comments = []
 
     def _find_longest_matching_opening(self, played: str) -> Tuple[str, str, str]:
-        opening_name = moves = eco = ""
-        for opening in self.book_data:
-            # if len(opening.get('moves')) > 5:
-            if played[: len(opening.get("moves"))] == opening.get("moves"):
-                if len(opening.get("moves")) > len(moves):
-                    opening_name = opening.get("opening_name")
-                    moves = opening.get("moves")
-                    eco = opening.get("eco")
-        return opening_name, moves, eco
+        return self.openings.longest_opening(played.split())
 
     def get_opening(self) -> Tuple[str, str, str, bool]:
         # check if game started really from start position
@@ -352,9 +434,7 @@ class PicoTutor:
         if self.op == [] or diff > 2:
             return eco, opening_name, moves, inside_book_opening
 
-        played = "%s" % (" ".join(self.op))
-
-        opening_name, moves, eco = self._find_longest_matching_opening(played)
+        opening_name, moves, eco = self.openings.longest_opening(self.op)
 
         if self.expl_start_position and halfmoves <= len(moves.split()):
             inside_book_opening = True
@@ -380,15 +460,7 @@ class PicoTutor:
         if not fen:
             return "", False
 
-        index = 0
-        opening_name = ""
-
-        for line in self.book_fen_data:
-            line_list = line.split()
-            if line_list[0] == fen:
-                opening_name = self.book_fen_data[index + 1]
-                break
-            index = index + 1
+        opening_name = self.openings.fen_opening(fen)
 
         if opening_name:
             return opening_name, True
@@ -909,10 +981,18 @@ class PicoTutor:
                 logger.debug("can not evaluate empty board 1st move")
                 return
         # else situation is for get_pos_analysis() where no move is done yet
-        obvious_result = await self.obvious_engine.get_analysis(board_before_usermove)
-        self.obvious_info[turn] = obvious_result.get("info")
-        best_result = await self.best_engine.get_analysis(board_before_usermove)
-        self.best_info[turn] = best_result.get("info")
+        tablebase_info = None
+        if self.tablebase:
+            tablebase_info = await asyncio.to_thread(self.tablebase.analysis, board_before_usermove)
+        if tablebase_info:
+            # all legal moves with their exact tablebase score - deep and obvious are the same
+            self.obvious_info[turn] = tablebase_info
+            self.best_info[turn] = tablebase_info
+        else:
+            obvious_result = await self.obvious_engine.get_analysis(board_before_usermove)
+            self.obvious_info[turn] = obvious_result.get("info")
+            best_result = await self.best_engine.get_analysis(board_before_usermove)
+            self.best_info[turn] = best_result.get("info")
         if self.best_info[turn]:
             best_score = PicoTutor._eval_pv_list(turn, self.best_info[turn], self.best_moves[turn])
             if self.best_moves[turn]:
@@ -1025,6 +1105,78 @@ class PicoTutor:
             eval_string = ""
             return eval_string, 0
 
+        eval_string = PicoTutor.classify_move(
+            best_deep_diff,
+            deep_low_diff,
+            score_hist_diff,
+            approximations_in_use,
+            history_in_use,
+            legal_no,
+            best_score,
+            best_mate,
+            current_mate,
+        )
+
+        # remember this evaluation for later pgn generation in PgnDisplay
+        # key to find evaluation later =(ply halfmove number: int, move: chess.Move)
+        # not always unique if we have takeback sequence with other moves
+        # should work since we evaluate all moves and remove if no evaluation
+        e_key = (self.board.ply(), current_move, self.board.turn)  # ply, turn is AFTER current_move
+        e_value = {}  # collect eval values for the move here
+        e_value["nag"] = PicoTutor.symbol_to_nag(eval_string)
+        try:
+            # board_before_usermove is where we have popped the user move above
+            e_value["best_move"] = board_before_usermove.san(best_move)
+            e_value["user_move"] = board_before_usermove.san(current_move)
+            logger.debug("best move: %s, user move: %s", e_value["best_move"], e_value["user_move"])
+        except (KeyError, ValueError, AttributeError):
+            logger.warning("picotutor failed to convert to san for %s", current_move)
+        if e_value["nag"] == chess.pgn.NAG_NULL:
+            # no NAG to store, due to takeback make sure this e_key eval is empty
+            self.evaluated_moves.pop(e_key, None)  # None prevents KeyError
+            # special case, if inaccurate move store DS, also when approximated
+            if best_deep_diff > c.INACCURACY_TH:
+                e_value["CPL"] = best_deep_diff  # lost centipawns
+                if current_pv is not None:
+                    e_value["score"] = current_score
+                self.evaluated_moves[e_key] = e_value  # ok with current_pv None (approx)
+        elif current_pv is not None:
+            # user move identified, not approximated, ok to log to PGN file
+            e_value["CPL"] = best_deep_diff  # lost centipawns
+            if current_mate != 0:
+                e_value["mate"] = current_mate
+            e_value["score"] = current_score  # eval score
+            if low_pv is not None:  # low also identified, needs both current_pv AND low
+                e_value["deep_low_diff"] = deep_low_diff  # Cambridge delta S
+            if before_score is not None:  # not approximated, need both current_pv AND history
+                e_value["score_hist_diff"] = score_hist_diff
+            self.evaluated_moves[e_key] = e_value
+
+        self.log_sync_info()  # debug only
+
+        # information return in addition:
+        # threat move / bestmove/ pv line of user and best pv line so picochess can comment on that as well
+        # or call a pico talker method with that information
+        self.hint_move[self.board.turn] = best_move
+
+        logger.debug("evaluation %s", eval_string)
+        return eval_string, current_mate
+
+    @staticmethod
+    def classify_move(
+        best_deep_diff: int,
+        deep_low_diff: int,
+        score_hist_diff: int,
+        approximations_in_use: bool,
+        history_in_use: bool,
+        legal_no: int,
+        best_score: int,
+        best_mate: int,
+        current_mate: int,
+    ) -> str:
+        """return the evaluation symbol like ?? or !? for a move, empty string if nothing special
+        best_deep_diff is the CPL, deep_low_diff the deep minus shallow score of the move and
+        score_hist_diff the score change since the previous move of the same side"""
         ###############################################################
         # 1. bad moves
         ##############################################################
@@ -1078,51 +1230,7 @@ class PicoTutor:
         if eval_string2 != "":
             if eval_string == "":
                 eval_string = eval_string2
-
-        # remember this evaluation for later pgn generation in PgnDisplay
-        # key to find evaluation later =(ply halfmove number: int, move: chess.Move)
-        # not always unique if we have takeback sequence with other moves
-        # should work since we evaluate all moves and remove if no evaluation
-        e_key = (self.board.ply(), current_move, self.board.turn)  # ply, turn is AFTER current_move
-        e_value = {}  # collect eval values for the move here
-        e_value["nag"] = PicoTutor.symbol_to_nag(eval_string)
-        try:
-            # board_before_usermove is where we have popped the user move above
-            e_value["best_move"] = board_before_usermove.san(best_move)
-            e_value["user_move"] = board_before_usermove.san(current_move)
-            logger.debug("best move: %s, user move: %s", e_value["best_move"], e_value["user_move"])
-        except (KeyError, ValueError, AttributeError):
-            logger.warning("picotutor failed to convert to san for %s", current_move)
-        if e_value["nag"] == chess.pgn.NAG_NULL:
-            # no NAG to store, due to takeback make sure this e_key eval is empty
-            self.evaluated_moves.pop(e_key, None)  # None prevents KeyError
-            # special case, if inaccurate move store DS, also when approximated
-            if best_deep_diff > c.INACCURACY_TH:
-                e_value["CPL"] = best_deep_diff  # lost centipawns
-                if current_pv is not None:
-                    e_value["score"] = current_score
-                self.evaluated_moves[e_key] = e_value  # ok with current_pv None (approx)
-        elif current_pv is not None:
-            # user move identified, not approximated, ok to log to PGN file
-            e_value["CPL"] = best_deep_diff  # lost centipawns
-            if current_mate != 0:
-                e_value["mate"] = current_mate
-            e_value["score"] = current_score  # eval score
-            if low_pv is not None:  # low also identified, needs both current_pv AND low
-                e_value["deep_low_diff"] = deep_low_diff  # Cambridge delta S
-            if before_score is not None:  # not approximated, need both current_pv AND history
-                e_value["score_hist_diff"] = score_hist_diff
-            self.evaluated_moves[e_key] = e_value
-
-        self.log_sync_info()  # debug only
-
-        # information return in addition:
-        # threat move / bestmove/ pv line of user and best pv line so picochess can comment on that as well
-        # or call a pico talker method with that information
-        self.hint_move[self.board.turn] = best_move
-
-        logger.debug("evaluation %s", eval_string)
-        return eval_string, current_mate
+        return eval_string
 
     @staticmethod
     def symbol_to_nag(eval_string: str) -> int:
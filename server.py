@@ -18,16 +18,21 @@
 
 import datetime
 import logging
+import mimetypes
+import os
+import threading
 from collections import OrderedDict
-from typing import Set
+from typing import Any, Dict, List, Optional, Set
 import asyncio
+import json
 import platform
 
 import chess  # type: ignore
+import chess.engine  # type: ignore
 import chess.pgn as pgn  # type: ignore
 
+import tornado.locks  # type: ignore
 import tornado.web  # type: ignore
-import tornado.wsgi  # type: ignore
 from tornado.websocket import WebSocketHandler  # type: ignore
 
 from utilities import (
@@ -37,9 +42,17 @@ from utilities import (
     AsyncRepeatingTimer,
     keep_essential_headers,
     ensure_important_headers,
+    event_stats,
+    queue_stats,
 )
 from upload_pgn import UploadHandler
-from web.picoweb import picoweb as pw
+from batch_analysis import BatchAnalysis, read_game
+from uci.remote import remote_pool
+from tablebase import tablebase_stats
+from book import book_stats
+from explorer import explorer_stats
+from games_index import GAMES_LIMIT, ORDERS, games_index_stats
+from dgt.board import dgt_board_stats
 
 from dgt.api import Event, Message
 from dgt.util import PlayMode, Mode, ClockSide, GameResult
@@ -47,6 +60,9 @@ from dgt.iface import DgtIface
 from eboard.eboard import EBoard
 from pgn import ModeInfo
 
+LONG_POLL_TIMEOUT = 25.0  # seconds a /state request waits for a new version before the 304
+STATIC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "web", "picoweb", "static")
+
 # This needs to be reworked to be session based (probably by token)
 # Otherwise multiple clients behind a NAT can all play as the 'player'
 client_ips = []
@@ -78,6 +94,178 @@ def read_pgn_info():
         return info
 
 
+class GameStream:
+    """Keep the game of the web clients in sync with versioned move deltas.
+
+    Each change of the game gets the next sequence number. Clients apply "append",
+    "pop" and "sync" deltas to the game they already have. The full pgn is only
+    sent with a "reset": for a new game, on connect or when a client missed a
+    sequence number and asks for a resync. The SAN movelist grows with the game
+    so the pgn can be written without replaying all moves."""
+
+    def __init__(self):
+        self.seq = 0
+        self.root = chess.Board()
+        self.moves: List[chess.Move] = []
+        self.sans: List[str] = []
+        self.pending_game: Optional[chess.Board] = None  # computer move shown but not yet done
+
+    @staticmethod
+    def _san_list(root: chess.Board, moves: List[chess.Move]) -> List[str]:
+        board = root.copy()
+        return [board.san_and_push(move) for move in moves]
+
+    def _sans_of(self, game: chess.Board) -> List[str]:
+        """Return the SAN movelist of the game, using the cache as far as possible."""
+        count = len(self.moves)
+        root = game.root()
+        if root.fen() == self.root.fen() and game.move_stack[:count] == self.moves:
+            board = game.copy(stack=len(game.move_stack) - count)
+            extra = list(board.move_stack)
+            for _ in extra:
+                board.pop()
+            return self.sans + self._san_list(board, extra)
+        return self._san_list(root, game.move_stack)
+
+    def reset(self, game: chess.Board, headers) -> dict:
+        """Start over with the game and return the delta with the full pgn."""
+        self.seq += 1
+        self.root = game.root()
+        self.moves = list(game.move_stack)
+        self.sans = self._san_list(self.root, self.moves)
+        self.pending_game = None
+        return {"seq": self.seq, "op": "reset", "pgn": self.pgn(headers)}
+
+    def update(self, game: chess.Board, headers) -> dict:
+        """Take over the changed game and return the delta for the clients."""
+        moves = game.move_stack
+        count = len(self.moves)
+        if game.root().fen() != self.root.fen():
+            return self.reset(game, headers)
+        if len(moves) == count + 1 and moves[:count] == self.moves:
+            board = game.copy(stack=1)
+            move = board.pop()
+            delta: dict = {"op": "append", "san": board.san(move)}
+            self.moves.append(move)
+            self.sans.append(delta["san"])
+        elif len(moves) < count and self.moves[: len(moves)] == moves:
+            delta = {"op": "pop", "count": count - len(moves)}
+            del self.moves[len(moves) :]
+            del self.sans[len(moves) :]
+        elif moves == self.moves:
+            delta = {"op": "sync"}
+        else:
+            return self.reset(game, headers)
+        self.seq += 1
+        self.pending_game = None
+        delta["seq"] = self.seq
+        return delta
+
+    def snapshot(self, headers) -> dict:
+        """Return the full pgn of the current game for a new client or a resync."""
+        return {"seq": self.seq, "op": "reset", "pgn": self.pgn(headers, self.pending_game)}
+
+    def pgn(self, headers, game: Optional[chess.Board] = None) -> str:
+        """Return the pgn text of the game (default: the synced game) from the SAN movelist."""
+        sans = self.sans if game is None else self._sans_of(game)
+        root = self.root if game is None else game.root()
+        builder = [
+            '[{} "{}"]'.format(key, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+            for key, value in headers.items()
+        ]
+        builder.append("")
+        fullmove, turn = root.fullmove_number, root.turn
+        moves = []
+        for san in sans:
+            if turn == chess.WHITE:
+                moves.append("{}. {}".format(fullmove, san))
+            elif not moves:
+                moves.append("{}... {}".format(fullmove, san))
+            else:
+                moves.append(san)
+            if turn == chess.BLACK:
+                fullmove += 1
+            turn = not turn
+        moves.append(headers.get("Result", "*"))
+        builder.append(" ".join(moves))
+        return "\n".join(builder)
+
+
+def full_game_message(shared: dict) -> Optional[dict]:
+    """Return the last game message together with the full pgn (for a new client or a resync)."""
+    if "last_dgt_move_msg" not in shared or "game_stream" not in shared:
+        return None
+    result = dict(shared["last_dgt_move_msg"])
+    result.update(shared["game_stream"].snapshot(shared.get("headers", {})))
+    return result
+
+
+class WebState:
+    """One versioned document of what the web page shows besides the moves.
+
+    The parts are the game position, the pgn headers, the clock text, the system info and
+    the ip info. Each change gets the next version. The /event clients get only the changed
+    parts as {"event": "State", "version": n, "diff": {part: value}}. They get the whole
+    document when they connect or when they missed a version. Clients without a websocket
+    send the version they have as If-None-Match to /state. That request waits for the next
+    version, so an idle spectator costs one open request."""
+
+    def __init__(self):
+        self.version = 0
+        self.document: Dict[str, Any] = {}
+        self.condition = tornado.locks.Condition()
+
+    def update(self, parts: Dict[str, Any]) -> Optional[dict]:
+        """Take over the parts and return the diff for the clients, None if nothing changed."""
+        diff = {key: value for key, value in parts.items() if self.document.get(key) != value}
+        if not diff:
+            return None
+        self.document.update(diff)
+        self.version += 1
+        self.condition.notify_all()
+        return {"event": "State", "version": self.version, "diff": diff}
+
+    def snapshot(self) -> dict:
+        """Return the whole document for a new client or a resync."""
+        return {"event": "State", "version": self.version, "state": dict(self.document)}
+
+    def etag(self) -> str:
+        return '"{}"'.format(self.version)
+
+    async def wait(self, version: int, timeout: float) -> bool:
+        """Wait until the version is newer than the given one, return False after the timeout."""
+        if self.version == version:
+            await self.condition.wait(timeout=datetime.timedelta(seconds=timeout))
+        return self.version != version
+
+
+def web_state(shared: dict) -> WebState:
+    return shared.setdefault("web_state", WebState())
+
+
+def state_parts(shared: dict) -> Dict[str, Any]:
+    """Return copies of the shared entries the web page shows (the pgn is sent by the GameStream)."""
+    game = None
+    if "last_dgt_move_msg" in shared:
+        game = {key: value for key, value in shared["last_dgt_move_msg"].items() if key in ("fen", "move", "play")}
+        if "game_stream" in shared:
+            game["seq"] = shared["game_stream"].seq
+    return {
+        "game": game,
+        "headers": dict(shared["headers"]) if "headers" in shared else None,
+        "clock": shared.get("clock_text"),
+        "system": dict(shared["system_info"]) if "system_info" in shared else None,
+        "ip": dict(shared["ip_info"]) if "ip_info" in shared else None,
+    }
+
+
+def publish_state(shared: dict):
+    """Send the changed parts of the web state to the /event clients."""
+    diff = web_state(shared).update(state_parts(shared))
+    if diff:
+        EventHandler.write_to_clients(diff)
+
+
 class ServerRequestHandler(tornado.web.RequestHandler):
     def initialize(self, shared=None):
         self.shared = shared
@@ -86,8 +274,53 @@ class ServerRequestHandler(tornado.web.RequestHandler):
         pass
 
 
+async def stream_batch_analysis(batch_analysis: BatchAnalysis, game: pgn.Game):
+    """Analyse the game and send each ply and finally the annotated pgn to the /event clients.
+
+    BatchAnalysisDone is always sent, the web page waits for it.
+    """
+
+    async def send_ply(value: dict):
+        EventHandler.write_to_clients(dict(value, event="BatchAnalysis"))
+
+    done = {"event": "BatchAnalysisDone", "error": "batch analysis stopped"}
+    try:
+        done = {"event": "BatchAnalysisDone", "pgn": await batch_analysis.annotate_game(game, send_ply)}
+    except (chess.engine.EngineError, chess.engine.EngineTerminatedError, OSError) as e:
+        logger.warning("batch analysis failed: %s", e)
+        done["error"] = str(e)
+    except Exception as e:
+        logger.exception("batch analysis failed")
+        done["error"] = str(e) or type(e).__name__
+    finally:
+        EventHandler.write_to_clients(done)
+
+
 class ChannelHandler(ServerRequestHandler):
 
+    batch_tasks: Set[asyncio.Task] = set()
+
+    def initialize(self, shared=None, batch_analysis: Optional[BatchAnalysis] = None):
+        self.shared = shared
+        self.batch_analysis = batch_analysis
+
+    def start_batch_analysis(self) -> dict:
+        """Start the analysis of the posted game (pgn or move list) or of the current game."""
+        if self.batch_analysis is None or self.batch_analysis.is_running():
+            return {"success": False, "error": "batch analysis not available"}
+        text = self.get_argument("pgn", "")
+        if not text:
+            current = full_game_message(self.shared) if self.shared is not None else None
+            text = current.get("pgn", "") if current else ""
+        try:
+            game = read_game(text)
+        except ValueError as e:
+            return {"success": False, "error": str(e)}
+        task = asyncio.create_task(stream_batch_analysis(self.batch_analysis, game))
+        ChannelHandler.batch_tasks.add(task)
+        task.add_done_callback(ChannelHandler.batch_tasks.discard)
+        return {"success": True, "plies": len(list(game.mainline_moves()))}
+
     async def process_board_scan(self):
         """Simulate exact DGT menu steps for position setup"""
         try:
@@ -210,6 +443,8 @@ class ChannelHandler(ServerRequestHandler):
             result_fen = await self.process_board_scan()
             self.write({"success": result_fen is not None, "fen": result_fen})
             self.set_header("Content-Type", "application/json")
+        elif action == "analyse_game":
+            self.write(self.start_batch_analysis())
 
 
 class EventHandler(WebSocketHandler):
@@ -222,6 +457,19 @@ class EventHandler(WebSocketHandler):
 
     def on_message(self, message):
         logger.debug("WebSocket message " + message)
+        try:
+            action = json.loads(message).get("action")
+        except (ValueError, AttributeError):
+            return
+        if self.shared is None:
+            return
+        if action == "resync":  # the client missed a game delta
+            result = full_game_message(self.shared)
+            if result:
+                result["event"] = "Fen"
+                self.write_message(result)
+        elif action == "state":  # the client missed a state version
+            self.write_message(web_state(self.shared).snapshot())
 
     def data_received(self, chunk):
         pass
@@ -234,6 +482,13 @@ class EventHandler(WebSocketHandler):
     def open(self, *args: str, **kwargs: str):
         EventHandler.clients.add(self)
         client_ips.append(self.real_ip())
+        # a new client gets the full game once, afterwards only move deltas
+        result = full_game_message(self.shared) if self.shared is not None else None
+        if result:
+            result["event"] = "Fen"
+            self.write_message(result)
+        if self.shared is not None:
+            self.write_message(web_state(self.shared).snapshot())
 
     def on_close(self):
         EventHandler.clients.remove(self)
@@ -246,30 +501,70 @@ class EventHandler(WebSocketHandler):
             client.write_message(msg)
 
 
-class DGTHandler(ServerRequestHandler):
+class StateHandler(ServerRequestHandler):
+    """The web state for clients without a websocket, ?pgn=1 adds the full game."""
 
     async def get(self, *args, **kwargs):
-        action = self.get_argument("action")
-        if action == "get_last_move":
-            if "last_dgt_move_msg" in self.shared:
-                self.write(self.shared["last_dgt_move_msg"])
+        state = web_state(self.shared)
+        if self.request.headers.get("If-None-Match") == state.etag():
+            await state.wait(state.version, LONG_POLL_TIMEOUT)
+        self.set_header("Etag", state.etag())
+        self.set_header("Cache-Control", "no-cache")
+        if self.request.headers.get("If-None-Match") == state.etag():
+            self.set_status(304)
+            return
+        result = state.snapshot()
+        if self.get_argument("pgn", None):
+            result["game"] = full_game_message(self.shared)
+        self.write(result)
+
+
+class QueryHandler(ServerRequestHandler):
+    """The /query?action=...&fen=... answers of the old obooksrv and games servers, for the tables of the web page.
+
+    get_book_moves: the opening explorer statistics of the moves in the position
+    get_games: the games with the position, order=elo (default) or date, limit=50
+    """
 
-
-class InfoHandler(ServerRequestHandler):
     async def get(self, *args, **kwargs):
-        action = self.get_argument("action")
-        if action == "get_system_info":
-            if "system_info" in self.shared:
-                self.write(self.shared["system_info"])
-        if action == "get_ip_info":
-            if "ip_info" in self.shared:
-                self.write(self.shared["ip_info"])
-        if action == "get_headers":
-            if "headers" in self.shared:
-                self.write(dict(self.shared["headers"]))
-        if action == "get_clock_text":
-            if "clock_text" in self.shared:
-                self.write(self.shared["clock_text"])
+        action = self.get_argument("action", "")
+        if action not in ("get_book_moves", "get_games"):
+            self.set_status(400)
+            self.write({"error": f"unknown action: {action}"})
+            return
+        try:
+            board = chess.Board(self.get_argument("fen", chess.STARTING_FEN))
+        except ValueError:
+            self.set_status(400)
+            self.write({"data": []})
+            return
+        if action == "get_book_moves":
+            data = await self.book_moves(board)
+        else:
+            data = await self.games(board)
+        self.set_header("Cache-Control", "no-cache")
+        self.write({"data": data})
+
+    async def book_moves(self, board: chess.Board) -> list:
+        explorer = self.shared.get("explorer")
+        if explorer is None:
+            return []
+        if explorer.in_cache(board):
+            return explorer.moves(board)
+        return await asyncio.to_thread(explorer.moves, board)  # the lookup may have to read the sd card
+
+    async def games(self, board: chess.Board) -> list:
+        games_index = self.shared.get("games_index")
+        order = self.get_argument("order", "elo")
+        try:
+            limit = min(int(self.get_argument("limit", str(GAMES_LIMIT))), GAMES_LIMIT)
+        except ValueError:
+            limit = GAMES_LIMIT
+        if games_index is None or order not in ORDERS:
+            return []
+        if games_index.in_cache(board, order, limit):
+            return games_index.find(board, order, limit)
+        return await asyncio.to_thread(games_index.find, board, order, limit)
 
 
 class ChessBoardHandler(ServerRequestHandler):
@@ -293,25 +588,105 @@ class UploadPageHandler(tornado.web.RequestHandler):
         self.render("web/picoweb/templates/upload.html")
 
 
+class DebugEventsHandler(tornado.web.RequestHandler):
+    def get(self):
+        """Rolling p50/p99 of the main loop events, the message queue, remote engine, tablebase, book,
+        opening explorer, games index and board stats."""
+        self.set_header("Cache-Control", "no-store")
+        self.write(
+            {
+                "events": event_stats.report(),
+                "queues": queue_stats(),
+                "remote_engines": remote_pool.stats(),
+                "tablebases": tablebase_stats(),
+                "books": book_stats(),
+                "explorers": explorer_stats(),
+                "games_indexes": games_index_stats(),
+                "dgt_boards": dgt_board_stats(),
+            }
+        )
+
+
+class StaticAssetHandler(tornado.web.StaticFileHandler):
+    """Serve web/picoweb/static with the gzip/brotli variants written by build/static.py.
+
+    Templates link the assets with static_url(), which adds the content hash as ?v=...
+    Such urls never change their content, so browsers may keep them for a year without
+    asking again. The other urls get an ETag and a 304 if the browser has the file.
+    """
+
+    ENCODINGS = (("br", ".br"), ("gzip", ".gz"))  # preferred first
+
+    def validate_absolute_path(self, root: str, absolute_path: str) -> Optional[str]:
+        path = super().validate_absolute_path(root, absolute_path)
+        self.content_encoding = None
+        if path is None:
+            return None
+        self.source_path = path
+        accepted = self.accepted_encodings(self.request.headers.get("Accept-Encoding", ""))
+        for encoding, suffix in self.ENCODINGS:
+            variant = path + suffix
+            if encoding in accepted and os.path.isfile(variant):
+                if os.path.getmtime(variant) >= os.path.getmtime(path):  # not left over from an old file
+                    self.content_encoding = encoding
+                    return variant
+        return path
+
+    @staticmethod
+    def accepted_encodings(header: str) -> Set[str]:
+        """Return the encodings of an Accept-Encoding header, without those of q=0."""
+        accepted = set()
+        for item in header.split(","):
+            name, _, params = item.strip().partition(";")
+            if params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+                accepted.add(name.strip().lower())
+        return accepted
+
+    @classmethod
+    def hash_files(cls, static_path: str):
+        """Fill the content hash cache, so the first page load doesn't hash the files on the event loop."""
+        for folder, _, files in os.walk(static_path):
+            for file_name in files:
+                path = os.path.abspath(os.path.join(folder, file_name))
+                version = cls.get_content_version(path)  # outside of the lock, requests may use it meanwhile
+                with cls._lock:
+                    cls._static_hashes.setdefault(path, version)
+
+    def get_content_type(self) -> str:
+        mime_type, encoding = mimetypes.guess_type(self.source_path)
+        return mime_type if mime_type and encoding is None else "application/octet-stream"
+
+    def set_extra_headers(self, path: str):
+        self.set_header("Vary", "Accept-Encoding")
+        if self.content_encoding:
+            self.set_header("Content-Encoding", self.content_encoding)
+        if self.get_argument("v", None):
+            self.set_header("Cache-Control", "public, max-age=31536000, immutable")
+
+
 class WebServer:
     def __init__(self):
         pass
 
-    def make_app(self, theme: str, shared: dict) -> tornado.web.Application:
-        """define web pages and their handlers"""
-        wsgi_app = tornado.wsgi.WSGIContainer(pw)
+    def make_app(
+        self, theme: str, shared: dict, batch_analysis: Optional[BatchAnalysis] = None
+    ) -> tornado.web.Application:
+        """define web pages and their handlers, /static/ is served by the StaticAssetHandler"""
+        threading.Thread(target=StaticAssetHandler.hash_files, args=(STATIC_PATH,), daemon=True).start()
         return tornado.web.Application(
             [
                 (r"/", ChessBoardHandler, dict(theme=theme)),
                 (r"/event", EventHandler, dict(shared=shared)),
-                (r"/dgt", DGTHandler, dict(shared=shared)),
-                (r"/info", InfoHandler, dict(shared=shared)),
+                (r"/state", StateHandler, dict(shared=shared)),
+                (r"/query", QueryHandler, dict(shared=shared)),
                 (r"/help", HelpHandler, dict(theme=theme)),
-                (r"/channel", ChannelHandler, dict(shared=shared)),
+                (r"/channel", ChannelHandler, dict(shared=shared, batch_analysis=batch_analysis)),
                 (r"/upload-pgn", UploadHandler),
                 (r"/upload", UploadPageHandler),
-                (r".*", tornado.web.FallbackHandler, {"fallback": wsgi_app}),
-            ]
+                (r"/debug/events", DebugEventsHandler),
+            ],
+            static_path=STATIC_PATH,
+            static_handler_class=StaticAssetHandler,
         )
 
 
@@ -384,8 +759,7 @@ class WebVr(DgtIface):
             text = text_l + '&nbsp;<i class="fa ' + icon_d + '"></i>&nbsp;' + text_r
             self._create_clock_text()
             self.shared["clock_text"] = text
-            result = {"event": "Clock", "msg": text}
-            EventHandler.write_to_clients(result)
+            publish_state(self.shared)
 
     def display_move_on_clock(self, message):
         """Display a move on the web clock."""
@@ -410,8 +784,7 @@ class WebVr(DgtIface):
         self._create_clock_text()
         logger.debug("[%s]", text)
         self.shared["clock_text"] = text
-        result = {"event": "Clock", "msg": text}
-        EventHandler.write_to_clients(result)
+        publish_state(self.shared)
         return True
 
     def display_text_on_clock(self, message):
@@ -427,8 +800,7 @@ class WebVr(DgtIface):
         self._create_clock_text()
         logger.debug("[%s]", text)
         self.shared["clock_text"] = text
-        result = {"event": "Clock", "msg": text}
-        EventHandler.write_to_clients(result)
+        publish_state(self.shared)
         return True
 
     def display_time_on_clock(self, message):
@@ -523,6 +895,9 @@ class WebDisplay(DisplayMsg):
         self.shared = shared
         self._task = None  # task for message consumer
         self.starttime = datetime.datetime.now().strftime("%H:%M:%S")
+        self.stream = GameStream()
+        self.shared["game_stream"] = self.stream
+        self.prefetched_seq = -1  # game stream seq of the last opening explorer prefetch
 
     def _create_game_info(self):
         if "game_info" not in self.shared:
@@ -536,7 +911,7 @@ class WebDisplay(DisplayMsg):
         if "headers" not in self.shared:
             self.shared["headers"] = OrderedDict()
 
-    def _build_game_header(self, pgn_game: chess.pgn.Game, keep_these_headers: dict = None):
+    def _build_game_header(self, pgn_game: chess.pgn.Game, keep_these_headers: Optional[dict] = None):
         """Build the game headers for the current game"""
         if WebDisplay.result_sav:
             pgn_game.headers["Result"] = WebDisplay.result_sav
@@ -655,7 +1030,6 @@ class WebDisplay(DisplayMsg):
                 WebDisplay.level_name_sav = ""
 
             _build_headers()
-            _send_headers()
 
         def _oldstyle_fen(game: chess.Board):
             builder = []
@@ -673,18 +1047,17 @@ class WebDisplay(DisplayMsg):
             self._build_game_header(pgn_game)  # rebuilds game headers
             self.shared["headers"].update(pgn_game.headers)
 
-        def _send_headers():
-            EventHandler.write_to_clients({"event": "Header", "headers": dict(self.shared["headers"])})
-
-        def _send_title():
-            if "ip_info" in self.shared:
-                EventHandler.write_to_clients({"event": "Title", "ip_info": self.shared["ip_info"]})
-
-        def _transfer(game: chess.Board, keep_these_headers: dict = None):
-            pgn_game = pgn.Game().from_board(game)
+        def _update_headers(game: chess.Board, keep_these_headers: Optional[dict] = None):
+            pgn_game = pgn.Game()
+            pgn_game.setup(game.root())
+            pgn_game.headers["Result"] = game.result()
             self._build_game_header(pgn_game, keep_these_headers)
             self.shared["headers"] = pgn_game.headers
-            return pgn_game.accept(pgn.StringExporter(headers=True, comments=False, variations=False))
+            return pgn_game.headers
+
+        def _transfer(game: chess.Board, keep_these_headers: Optional[dict] = None):
+            """Update headers and the game stream, return the delta for the clients"""
+            return self.stream.update(game, _update_headers(game, keep_these_headers))
 
         def peek_uci(game: chess.Board):
             """Return last move in uci format."""
@@ -702,22 +1075,20 @@ class WebDisplay(DisplayMsg):
             else:
                 # #78 and #55 just a new position, keep headers
                 keep_these_headers = self.shared["headers"]
-            pgn_str = _transfer(message.game, keep_these_headers)
+            delta = self.stream.reset(message.game, _update_headers(message.game, keep_these_headers))
             fen = message.game.fen()
             result = {
-                "pgn": pgn_str,
                 "fen": fen,
                 "event": "Game",
                 "move": "0000",
                 "play": "newgame",
             }
             self.shared["last_dgt_move_msg"] = result
+            result = dict(result, **delta)
             EventHandler.write_to_clients(result)
             if message.newgame:
                 # issue #55 - dont reset headers if its not a real new game
                 _build_headers()
-                _send_headers()
-                _send_title()
 
         elif isinstance(message, Message.IP_INFO):
             self.shared["ip_info"] = message.info
@@ -747,7 +1118,6 @@ class WebDisplay(DisplayMsg):
                     #  probably  not needed as its set in SYSTEM_INFO on startup
                     break
             _build_headers()
-            _send_headers()
 
         elif isinstance(message, Message.ENGINE_READY):
             self._create_system_info()
@@ -760,7 +1130,6 @@ class WebDisplay(DisplayMsg):
                 if "level_name" in self.shared["game_info"]:
                     del self.shared["game_info"]["level_name"]
             _build_headers()
-            _send_headers()
 
         elif isinstance(message, Message.STARTUP_INFO):
             self.shared["game_info"] = message.info.copy()
@@ -838,7 +1207,6 @@ class WebDisplay(DisplayMsg):
                     del self.shared["game_info"]["level_name"]
 
             _build_headers()
-            _send_headers()
 
         elif isinstance(message, Message.PLAY_MODE):
             # issue 55 - dont reset headers when switching sides in PGN engine replay
@@ -846,7 +1214,6 @@ class WebDisplay(DisplayMsg):
                 self._create_game_info()
                 self.shared["game_info"]["play_mode"] = message.play_mode
                 _build_headers()
-                _send_headers()
 
         elif isinstance(message, Message.TIME_CONTROL):
             self._create_game_info()
@@ -878,16 +1245,18 @@ class WebDisplay(DisplayMsg):
             if not message.is_user_move:
                 game_copy = message.game.copy()
                 game_copy.push(message.move)
-                pgn_str = _transfer(game_copy)
+                _update_headers(game_copy)
+                self.stream.pending_game = game_copy
                 fen = _oldstyle_fen(game_copy)
                 mov = message.move.uci()
-                result = {"pgn": pgn_str, "fen": fen, "event": "Fen", "move": mov, "play": "computer"}
+                result = {"fen": fen, "event": "Fen", "move": mov, "play": "computer"}
                 self.shared["last_dgt_move_msg"] = result  # not send => keep it for COMPUTER_MOVE_DONE
 
         elif isinstance(message, Message.COMPUTER_MOVE_DONE):
             WebDisplay.result_sav = ""
-            result = self.shared["last_dgt_move_msg"]
-            EventHandler.write_to_clients(result)
+            if self.stream.pending_game is not None:
+                delta = self.stream.update(self.stream.pending_game, self.shared["headers"])
+                EventHandler.write_to_clients(dict(self.shared["last_dgt_move_msg"], **delta))
 
         elif isinstance(message, Message.DGT_FEN):
             # Update dgt_fen for board scan functionality
@@ -895,43 +1264,48 @@ class WebDisplay(DisplayMsg):
 
         elif isinstance(message, Message.USER_MOVE_DONE):
             WebDisplay.result_sav = ""
-            pgn_str = _transfer(message.game, self.shared["headers"])  # dont remake headers every move
+            delta = _transfer(message.game, self.shared["headers"])  # dont remake headers every move
             fen = _oldstyle_fen(message.game)
             mov = message.move.uci()
-            result = {"pgn": pgn_str, "fen": fen, "event": "Fen", "move": mov, "play": "user"}
+            result = {"fen": fen, "event": "Fen", "move": mov, "play": "user"}
             self.shared["last_dgt_move_msg"] = result
+            result = dict(result, **delta)
             EventHandler.write_to_clients(result)
 
         elif isinstance(message, Message.REVIEW_MOVE_DONE):
-            pgn_str = _transfer(message.game, self.shared["headers"])  # dont remake headers every move
+            delta = _transfer(message.game, self.shared["headers"])  # dont remake headers every move
             fen = _oldstyle_fen(message.game)
             mov = message.move.uci()
-            result = {"pgn": pgn_str, "fen": fen, "event": "Fen", "move": mov, "play": "review"}
+            result = {"fen": fen, "event": "Fen", "move": mov, "play": "review"}
             self.shared["last_dgt_move_msg"] = result
+            result = dict(result, **delta)
             EventHandler.write_to_clients(result)
 
         elif isinstance(message, Message.ALTERNATIVE_MOVE):
-            pgn_str = _transfer(message.game, self.shared["headers"])  # dont remake headers every move
+            delta = _transfer(message.game, self.shared["headers"])  # dont remake headers every move
             fen = _oldstyle_fen(message.game)
             mov = peek_uci(message.game)
-            result = {"pgn": pgn_str, "fen": fen, "event": "Fen", "move": mov, "play": "reload"}
+            result = {"fen": fen, "event": "Fen", "move": mov, "play": "reload"}
             self.shared["last_dgt_move_msg"] = result
+            result = dict(result, **delta)
             EventHandler.write_to_clients(result)
 
         elif isinstance(message, Message.SWITCH_SIDES):
-            pgn_str = _transfer(message.game)
+            delta = _transfer(message.game)
             fen = _oldstyle_fen(message.game)
             mov = message.move.uci()
-            result = {"pgn": pgn_str, "fen": fen, "event": "Fen", "move": mov, "play": "reload"}
+            result = {"fen": fen, "event": "Fen", "move": mov, "play": "reload"}
             self.shared["last_dgt_move_msg"] = result
+            result = dict(result, **delta)
             EventHandler.write_to_clients(result)
 
         elif isinstance(message, Message.TAKE_BACK):
-            pgn_str = _transfer(message.game)
+            delta = _transfer(message.game)
             fen = _oldstyle_fen(message.game)
             mov = peek_uci(message.game)
-            result = {"pgn": pgn_str, "fen": fen, "event": "Fen", "move": mov, "play": "reload"}
+            result = {"fen": fen, "event": "Fen", "move": mov, "play": "reload"}
             self.shared["last_dgt_move_msg"] = result
+            result = dict(result, **delta)
             EventHandler.write_to_clients(result)
 
         elif isinstance(message, Message.PROMOTION_DIALOG):
@@ -958,6 +1332,17 @@ class WebDisplay(DisplayMsg):
                 self.shared["headers"]["Result"] = WebDisplay.result_sav
             # dont rebuild headers here, use existing one
 
+    def prefetch_explorer(self):
+        """Look up the positions after the game position in a worker thread, the book table asks for them next."""
+        explorer = self.shared.get("explorer")
+        if explorer is None or self.stream.seq == self.prefetched_seq:
+            return
+        self.prefetched_seq = self.stream.seq
+        board = self.stream.root.copy()
+        for move in self.stream.moves:
+            board.push(move)
+        self.loop.run_in_executor(None, explorer.prefetch, board)
+
     async def message_consumer(self):
         """Message task consumer for WebDisplay messages"""
         logger.debug("WebDisplay msg_queue ready")
@@ -976,7 +1361,8 @@ class WebDisplay(DisplayMsg):
                 # issue #45 just process one message at a time - dont spawn task
                 # asyncio.create_task(self.task(message))
                 await self.task(message)
+                publish_state(self.shared)  # the parts the message changed
+                self.prefetch_explorer()
                 self.msg_queue.task_done()
-                await asyncio.sleep(0.05)  # balancing message queues
         except asyncio.CancelledError:
             logger.debug("WebDisplay msg_queue cancelled")
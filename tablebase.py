@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import chess  # type: ignore
+import chess.polyglot  # type: ignore
+import chess.syzygy  # type: ignore
+from chess.engine import Cp, InfoDict, Mate, PovScore, Score
+
+TABLEBASE_PATH = "tablebases" + os.sep + "syzygy"
+PROBE_CACHE_SIZE = 4096  # positions
+TB_WIN_SCORE = 20000  # centipawns of a won tablebase position, less the distance to zeroing
+
+logger = logging.getLogger(__name__)
+
+
+class Tablebase(object):
+    """Syzygy endgame tablebases for perfect moves and exact scores.
+
+    The tables of path (and its sub folders) are opened on the first probe, python-chess
+    memory-maps the table files. The (wdl, dtz) of recently probed positions are kept by
+    zobrist hash, so the tutor, the analysis display and the engine share the probes.
+    The probes read the table files, the callers on the event loop run them in a worker thread.
+    """
+
+    def __init__(self, path: str = TABLEBASE_PATH, cache_size: int = PROBE_CACHE_SIZE):
+        self.path = path
+        self.cache_size = cache_size
+        self.tables: Optional[chess.syzygy.Tablebase] = None
+        self.max_pieces = 0
+        self.opened = False
+        self.cache: OrderedDict = OrderedDict()  # zobrist hash: (wdl, dtz) or None if not in the tables
+        self.probes = self.cache_hits = self.misses = 0
+        self.lock = threading.Lock()  # the cache and the counters, probes run in worker threads
+        tablebases.append(self)
+
+    def _open(self):
+        self.opened = True
+        if not self.path or not os.path.isdir(self.path):
+            return
+        tables = chess.syzygy.Tablebase()
+        for folder, _, files in os.walk(self.path):
+            names = [os.path.splitext(file)[0] for file in files if file.endswith(".rtbw")]
+            if names:
+                tables.add_directory(folder)
+                self.max_pieces = max([self.max_pieces] + [len(name) - 1 for name in names])  # KQvK has 3 pieces
+        if self.max_pieces:
+            self.tables = tables
+            logger.info("syzygy tablebases for up to %d pieces found in %s", self.max_pieces, self.path)
+        else:
+            tables.close()
+
+    def covers(self, board: chess.Board) -> bool:
+        """Return True if the position has few enough pieces for the tables."""
+        if chess.popcount(board.occupied) > 7 or board.castling_rights:
+            return False  # the cheap test first, no table has more pieces
+        if not self.opened:
+            self._open()
+        return self.tables is not None and chess.popcount(board.occupied) <= self.max_pieces
+
+    def probe(self, board: chess.Board) -> Optional[Tuple[int, int]]:
+        """Return (wdl, dtz) for the side to move, None if the position isn't in the tables."""
+        with self.lock:
+            if not self.covers(board):
+                return None
+            self.probes += 1
+            key = chess.polyglot.zobrist_hash(board)
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                self.cache_hits += 1
+                result = self.cache[key]
+            else:
+                assert self.tables is not None  # covers() opened them
+                try:
+                    result = (self.tables.probe_wdl(board), self.tables.probe_dtz(board))
+                except KeyError:  # also MissingTableError
+                    result = None
+                self.cache[key] = result
+                if len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+            if result is None:
+                self.misses += 1
+            return result
+
+    @staticmethod
+    def wdl_score(wdl: int, dtz: int, halfmove_clock: int = 0) -> int:
+        """Centipawns for the side to move, faster zeroing is better and cursed wins are draws.
+
+        probe_wdl ignores the halfmove clock: a win that needs halfmove_clock + |dtz| > 100 plies
+        is a draw by the fifty-move rule and scores 0.
+        """
+        if abs(wdl) == 2 and halfmove_clock + abs(dtz) > 100:
+            return 0
+        if wdl == 2:
+            return TB_WIN_SCORE - abs(dtz)
+        if wdl == -2:
+            return -TB_WIN_SCORE + abs(dtz)
+        return 0
+
+    def score(self, board: chess.Board) -> Optional[PovScore]:
+        """Return the exact score of the position, None if it isn't in the tables."""
+        if board.is_checkmate():
+            return PovScore(Mate(0), board.turn)
+        result = self.probe(board)
+        if result is None:
+            return None
+        return PovScore(Cp(self.wdl_score(*result, board.halfmove_clock)), board.turn)
+
+    def move_score(self, board: chess.Board, move: chess.Move) -> Optional[Score]:
+        """Return the score of move for the side to move, None if a table is missing.
+
+        The child dtz counts from the next zeroing move, so the move is scored by the dtz it gives
+        the mover (python-chess: minmax the dtz of the side to move): a zeroing move has dtz 1,
+        any other move |child dtz| + 1. The winner minimises it and the loser maximises it.
+        """
+        zeroing = board.is_zeroing(move)
+        board.push(move)
+        try:
+            if board.is_checkmate():
+                return Mate(1)
+            result = self.probe(board)
+        finally:
+            board.pop()
+        if result is None:
+            return None
+        wdl, dtz = -result[0], 1 if zeroing else abs(result[1]) + 1
+        return Cp(self.wdl_score(wdl, dtz, 0 if zeroing else board.halfmove_clock))
+
+    def analysis(self, board: chess.Board) -> Optional[List[InfoDict]]:
+        """Return the InfoDict of every legal move, best first, like a multipv search of all moves."""
+        with self.lock:
+            covered = self.covers(board)
+        if not covered or board.is_game_over():
+            return None
+        scored = []
+        for move in board.legal_moves:
+            score = self.move_score(board, move)
+            if score is None:
+                return None  # a table is missing, the engine has to do it
+            scored.append((score, move))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [
+            {"pv": [move], "score": PovScore(score, board.turn), "multipv": number, "tbhits": 1}
+            for number, (score, move) in enumerate(scored, start=1)
+        ]
+
+    def stats(self) -> dict:
+        """Return the probe counters, hit_rate is the share of probes with a table result."""
+        return {
+            "path": self.path,
+            "max_pieces": self.max_pieces,
+            "probes": self.probes,
+            "cache_hits": self.cache_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.probes - self.misses) / self.probes, 3) if self.probes else 0.0,
+        }
+
+
+tablebases: List[Tablebase] = []
+
+
+def tablebase_stats() -> List[dict]:
+    """Return the counters of all tablebases (for /debug/events)."""
+    return [tablebase.stats() for tablebase in tablebases]
@@ -0,0 +1,100 @@
+import asyncio
+import os
+import stat
+import sys
+import tempfile
+import unittest
+
+import chess  # type: ignore
+import chess.pgn  # type: ignore
+
+from batch_analysis import BatchAnalysis, read_game
+from uci.engine import UciShell
+
+# a one ply UCI engine: the best move wins the most material
+FAKE_ENGINE = """#!{python}
+import sys
+import chess
+
+VALUES = {{chess.PAWN: 1, chess.KNIGHT: 3, chess.BISHOP: 3, chess.ROOK: 5, chess.QUEEN: 9, chess.KING: 0}}
+board = chess.Board()
+for line in sys.stdin:
+    command = line.split()
+    if command == ["uci"]:
+        print("id name onely")
+        print("option name Threads type spin default 1 min 1 max 64")
+        print("uciok", flush=True)
+    elif command == ["isready"]:
+        print("readyok", flush=True)
+    elif command[:1] == ["position"]:
+        board = chess.Board() if command[1] == "startpos" else chess.Board(" ".join(command[2:8]))
+        for move in command[command.index("moves") + 1:] if "moves" in command else []:
+            board.push_uci(move)
+    elif command[:1] == ["go"]:
+        gains = []
+        for move in board.legal_moves:
+            piece = board.piece_at(move.to_square)
+            gains.append((VALUES[piece.piece_type] if piece else 0, move.uci()))
+        gain, move = max(gains)
+        print("info depth 1 score cp {{}} pv {{}}".format(gain * 100, move))
+        print("bestmove " + move, flush=True)
+    elif command == ["quit"]:
+        break
+"""
+
+
+class TestBatchAnalysis(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self.folder.name, "onely")
+        with open(self.file, "w", encoding="utf-8") as engine:
+            engine.write(FAKE_ENGINE.format(python=sys.executable))
+        os.chmod(self.file, os.stat(self.file).st_mode | stat.S_IEXEC)
+        self.pgn_file = os.path.join(self.folder.name, "analysis.pgn")
+        self.shell = UciShell(hostname="", username="", key_file="", password="")
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_blunder_is_annotated(self):
+        plies = []
+
+        async def on_ply(value):
+            plies.append(value)
+
+        async def analyse():
+            batch = BatchAnalysis(self.file, self.shell, asyncio.get_running_loop(), workers=2, pgn_file=self.pgn_file)
+            return await batch.annotate_game(read_game("e4 d5 Qg4 Bxg4"), on_ply)
+
+        pgn_text = asyncio.run(analyse())
+        self.assertEqual([1, 2, 3, 4], [value["ply"] for value in plies])
+        blunder = plies[2]
+        self.assertEqual(
+            ("Qg4", "exd5", "??", 1000), (blunder["user_move"], blunder["best_move"], blunder["symbol"], blunder["CPL"])
+        )
+        self.assertEqual(("", 0), (plies[3]["symbol"], plies[3]["CPL"]))
+        self.assertIn("2. Qg4 $4 { ?? Score: -900 CPL: 1000 DS: 0 Best: exd5 }", pgn_text)
+        with open(self.pgn_file, "r", encoding="utf-8") as saved:
+            self.assertEqual(pgn_text, saved.read().strip())
+
+    def test_game_end_needs_no_engine(self):
+        async def analyse():
+            batch = BatchAnalysis(self.file, self.shell, asyncio.get_running_loop(), workers=4, pgn_file="")
+            return await batch.analyse(read_game("f3 e5 g4 Qh4#"))
+
+        plies = asyncio.run(analyse())
+        self.assertEqual("Qh4#", plies[-1]["user_move"])
+        self.assertEqual(99999, plies[-1]["score"])
+
+    def test_read_game(self):
+        self.assertEqual(
+            [chess.Move.from_uci("e2e4"), chess.Move.from_uci("e7e5")], list(read_game("e2e4 e7e5").mainline_moves())
+        )
+        self.assertEqual(2, len(list(read_game('[Event "x"]\n\n1. e4 e5 *').mainline_moves())))
+        with self.assertRaises(ValueError):
+            read_game("e4 e4")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import queue
+import time
+import unittest
+
+from eboard.ble_replay import ReplayPeripheral, read_recording
+from eboard.ble_transport import CONNECT_HOLD, TokenBucket, Transport
+
+READ = "6E400003-B5A3-F393-E0A9-E50E24DCCA9E"
+WRITE = "6E400002-B5A3-F393-E0A9-E50E24DCCA9E"
+RECORDING = """
+# seconds data
+0.05 010203
+0.30 0a0b  # second board update
+"""
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_rate(self):
+        bucket = TokenBucket(rate=10, burst=2)
+        self.assertTrue(bucket.take())
+        self.assertTrue(bucket.take())
+        self.assertFalse(bucket.take())
+        self.assertAlmostEqual(0.1, bucket.delay(), delta=0.01)
+
+    def test_hold(self):
+        bucket = TokenBucket(rate=10, burst=1)
+        bucket.hold(0.2)
+        self.assertAlmostEqual(0.3, bucket.delay(), delta=0.01)
+        self.assertFalse(bucket.take())
+
+
+class TestTransport(unittest.TestCase):
+
+    def setUp(self):
+        self.que = queue.Queue()
+        self.peripheral = ReplayPeripheral(READ, WRITE, read_recording(RECORDING.splitlines()))
+        self.transport = Transport(self.que, READ, WRITE, peripheral=self.peripheral)
+        self.assertTrue(self.transport.is_init())
+        self.assertTrue(self.transport.open_mt("00:11:22:33:44:55"))
+
+    def tearDown(self):
+        self.transport.quit()
+        self.transport.worker_threader.join(2)
+
+    def test_notifications_are_forwarded_when_sent(self):
+        self.assertTrue(self.que.get(timeout=1).startswith("agent-state: online"))
+        self.assertEqual(b"\x01\x02\x03", self.que.get(timeout=1))
+        received = time.monotonic()
+        self.assertEqual(b"\x0a\x0b", self.que.get(timeout=1))
+        self.assertLess(time.monotonic() - self.peripheral.sent[1][0], 0.02)
+        self.assertGreater(received, self.peripheral.sent[0][0])
+
+    def test_writes_are_paced(self):
+        for led in range(3):
+            self.transport.write_mt(bytes([led]))
+        self.transport.wrque.join()
+        times = [at for at, _ in self.peripheral.written]
+        self.assertEqual([b"\x00", b"\x01", b"\x02"], [data for _, data in self.peripheral.written])
+        self.assertGreaterEqual(times[0] - self.peripheral.connected_at, CONNECT_HOLD - 0.01)
+        self.assertGreaterEqual(min(b - a for a, b in zip(times, times[1:])), 0.09)
+
+    def test_lost_connection(self):
+        self.que.get(timeout=1)
+        self.peripheral.lose_connection()
+        self.assertEqual("agent-state: offline BLE connection lost", self.que.get(timeout=1))
+        self.assertTrue(self.que.get(timeout=3).startswith("agent-state: online"))
+
+
+if __name__ == "__main__":
+    unittest.main()
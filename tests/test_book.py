@@ -0,0 +1,92 @@
+import random
+import unittest
+
+import chess  # type: ignore
+import chess.polyglot
+
+from book import OpeningBook, book_files
+from picochess import AlternativeMover
+
+VARIED = "books/h-varied.bin"
+PERFECT = "books/Perfect2019.bin"
+
+
+class TestOpeningBook(unittest.TestCase):
+
+    def setUp(self):
+        self.book = OpeningBook(VARIED)
+        self.reader = chess.polyglot.open_reader(VARIED)
+
+    def tearDown(self):
+        self.book.close()
+        self.reader.close()
+
+    def test_same_answers_as_the_reader(self):
+        board = chess.Board()
+        for seed in range(8):
+            self.assertEqual(list(self.reader.find_all(board)), list(self.book.find_all(board)))
+            entry = self.reader.weighted_choice(board, random=random.Random(seed))
+            self.assertEqual(entry, self.book.weighted_choice(board, random=random.Random(seed)))
+            board.push(entry.move)
+
+    def test_position_not_in_book(self):
+        board = chess.Board("k7/8/1K6/8/8/8/7Q/8 w - - 0 1")
+        with self.assertRaises(IndexError):
+            self.book.weighted_choice(board)
+        moves = {entry.move for entry in self.book.find_all(chess.Board())}
+        with self.assertRaises(IndexError):
+            self.book.weighted_choice(chess.Board(), exclude_moves=moves)
+
+    def test_cache_hits(self):
+        self.book.weighted_choice(chess.Board())
+        self.book.weighted_choice(chess.Board())
+        stats = self.book.stats()
+        self.assertEqual((2, 1, 1), (stats["lookups"], stats["cache_hits"], stats["positions"]))
+
+    def test_prefetch(self):
+        board = chess.Board()
+        board.push_uci("e2e4")
+        self.assertGreater(self.book.prefetch(board, plies=2, width=2), 1)
+        reply = max(self.book.find_all(board), key=lambda entry: entry.weight)
+        board.push(reply.move)
+        list(self.book.find_all(board))
+        self.assertEqual(2, self.book.stats()["cache_hits"])
+        self.assertEqual(1, self.book.prefetch(chess.Board(), plies=0))
+
+    def test_alternative_mover(self):
+        game = chess.Board()
+        book_move = AlternativeMover().book(self.book, game)
+        self.assertIn(book_move.move, {entry.move for entry in self.reader.find_all(chess.Board())})
+        self.assertEqual(book_move.move, game.peek())
+
+    def test_switch_keeps_the_file_open(self):
+        reader = self.book.readers[VARIED]
+        self.book.open(PERFECT)
+        self.book.open(VARIED)
+        self.assertIs(reader, self.book.readers[VARIED])
+        self.assertEqual(0, self.book.stats()["positions"])
+
+
+class TestMergedBooks(unittest.TestCase):
+
+    def test_book_files(self):
+        self.assertEqual([(VARIED, 1.0)], book_files(VARIED))
+        self.assertEqual(
+            [(VARIED, 1.0), (PERFECT, 0.5), ("books/g-fun.bin", 1.0)],
+            book_files(VARIED, f"{PERFECT}:0.5, books/g-fun.bin, {VARIED}"),
+        )
+
+    def test_weights_are_shares_of_each_book(self):
+        book = OpeningBook([(VARIED, 1.0), (PERFECT, 1.0), ("books/missing.bin", 1.0)])
+        self.assertEqual(2, len(book.stats()["books"]))
+        board = chess.Board()
+        weights = {entry.move.uci(): entry.weight for entry in book.find_all(board)}
+        varied = list(chess.polyglot.open_reader(VARIED).find_all(board))
+        self.assertEqual(set(weights), {entry.move.uci() for entry in varied} | {"e2e4", "d2d4", "g1f3", "c2c4"})
+        self.assertAlmostEqual(2 * 0xFFFF, sum(weights.values()), delta=len(weights))
+        self.assertGreater(weights["e2e4"], weights["g2g3"])
+        book.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
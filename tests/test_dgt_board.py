@@ -0,0 +1,125 @@
+import asyncio
+import unittest
+
+from serial import SerialException  # type: ignore
+
+from dgt.board import CLOCK_QUEUE_SIZE, DgtBoard, DgtParser
+from dgt.util import DgtClk, DgtCmd, DgtMsg
+
+VERSION = bytes([DgtMsg.DGT_MSG_VERSION, 0x00, 0x05, 0x01, 0x02])
+LONG_SERIALNR = bytes([DgtMsg.DGT_MSG_LONG_SERIALNR, 0x00, 0x0D]) + b"0000000001"
+ASCII_ACK = bytes([DgtMsg.DGT_MSG_BWTIME, 0x00, 0x0A, 0x0A, 0x10, 0x0C, 0x0A, 0x00, 0x00, 0x00])
+
+
+class FakeSerial(object):
+    """Records the written commands instead of sending them to a board."""
+
+    def __init__(self, fail=False):
+        self.written = []
+        self.fail = fail
+        self.closed = False
+
+    def write(self, data: bytes):
+        if self.fail:
+            raise SerialException("write failed")
+        self.written.append(data)
+
+    def close(self):
+        self.closed = True
+
+
+class TestDgtParser(unittest.TestCase):
+
+    def test_message_split_over_reads(self):
+        parser = DgtParser()
+        stream = VERSION + LONG_SERIALNR
+        messages = []
+        for byte in stream:
+            messages.extend(parser.feed(bytes([byte])))
+        self.assertEqual(
+            [(DgtMsg.DGT_MSG_VERSION, (1, 2)), (DgtMsg.DGT_MSG_LONG_SERIALNR, tuple(b"0000000001"))], messages
+        )
+        self.assertEqual(2, len(parser.feed(VERSION + VERSION)))
+
+    def test_resync_after_garbage_and_broken_message(self):
+        parser = DgtParser()
+        messages = parser.feed(b"\x01\x02" + VERSION[:4] + VERSION)
+        self.assertEqual([(DgtMsg.DGT_MSG_VERSION, (1, 2))], messages)
+        self.assertEqual(6, parser.dropped)
+
+    def test_ee_moves_dump_is_skipped(self):
+        parser = DgtParser()
+        self.assertEqual([], parser.feed(bytes([0x8F, 0x3E, 0x03]) + bytes(0x1000)))
+        self.assertEqual([(DgtMsg.DGT_MSG_VERSION, (1, 2))], parser.feed(bytes(0xF00) + VERSION))
+
+
+class TestDgtBoardSerial(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.board = DgtBoard("", False, False, False, self.loop)
+        self.board.serial = FakeSerial()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_clock_commands_wait_for_the_ack(self):
+        self.assertTrue(self.board.set_text_3k(b"hello   ", 0))
+        self.assertTrue(self.board.set_text_3k(b"world   ", 0))
+        self.assertEqual(1, len(self.board.serial.written))
+        self.assertEqual(1, len(self.board.clock_queue))
+        self.board._process_serial_data(ASCII_ACK)
+        self.assertEqual(2, len(self.board.serial.written))
+        self.assertIn(b"world", self.board.serial.written[1])
+        self.board._process_serial_data(ASCII_ACK)
+        self.assertEqual(0.0, self.board.clock_lock)
+        round_trips = self.board.serial_stats()["round_trips"]
+        self.assertEqual(2, round_trips["DGT_CMD_CLOCK_ASCII"]["count"])
+
+    def test_lost_ack_is_resent_first(self):
+        self.board.set_text_3k(b"hello   ", 0)
+        self.board.set_text_3k(b"world   ", 0)
+        self.board.clock_lock -= 3
+        self.board._watchdog()
+        self.assertIn(b"hello", self.board.serial.written[1])
+        self.assertEqual(1, len(self.board.clock_queue))
+        self.assertEqual(1, self.board.serial_stats()["clock_resends"])
+
+    def test_full_clock_queue_keeps_set_and_run(self):
+        self.board.set_text_3k(b"sent    ", 0)
+        for number in range(CLOCK_QUEUE_SIZE // 2):
+            self.board.set_text_3k(b"old %i   " % number, 0)
+        self.board.set_and_run(0, 0, 5, 0, 0, 0, 5, 0)
+        self.board.end_text()
+        for number in range(CLOCK_QUEUE_SIZE):
+            self.board.set_text_3k(b"new %i   " % number, 0)
+        self.board.set_and_run(0, 0, 4, 0, 0, 0, 5, 0)
+        commands = [message[3] for message, _ in self.board.clock_queue]
+        self.assertEqual(CLOCK_QUEUE_SIZE, len(commands))
+        self.assertEqual(2, commands.count(DgtClk.DGT_CMD_CLOCK_SETNRUN))
+        self.assertEqual(1, commands.count(DgtClk.DGT_CMD_CLOCK_END))
+        self.assertEqual(DgtClk.DGT_CMD_CLOCK_SETNRUN, commands[-1])
+        texts = [data[4:9] for message, data in self.board.clock_queue if message[3] == DgtClk.DGT_CMD_CLOCK_ASCII]
+        self.assertEqual([b"old 1", b"old 2", b"old 3", b"new 0", b"new 7"], texts)
+        self.assertEqual(CLOCK_QUEUE_SIZE - 1, self.board.serial_stats()["clock_dropped"])
+
+    def test_board_reply_round_trip(self):
+        self.assertTrue(self.board.write_command([DgtCmd.DGT_RETURN_LONG_SERIALNR]))
+        self.board._process_serial_data(LONG_SERIALNR[:6])
+        self.board._process_serial_data(LONG_SERIALNR[6:])
+        stats = self.board.serial_stats()
+        self.assertEqual(1, stats["round_trips"]["DGT_RETURN_LONG_SERIALNR"]["count"])
+        self.assertEqual((1, len(LONG_SERIALNR)), (stats["messages_in"], stats["bytes_in"]))
+
+    def test_write_error_closes_the_port(self):
+        serial = self.board.serial = FakeSerial(fail=True)
+        self.board.set_text_3k(b"hello   ", 0)
+        self.assertFalse(self.board.write_command([DgtCmd.DGT_SEND_BRD]))
+        self.assertTrue(serial.closed)
+        self.assertIsNone(self.board.serial)
+        self.assertTrue(self.board.disconnected.is_set())
+        self.assertEqual(0, len(self.board.clock_queue))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+import json
+import os
+import tempfile
+import unittest
+from typing import List
+from urllib.parse import quote
+
+import chess  # type: ignore
+import chess.polyglot  # type: ignore
+import tornado.testing  # type: ignore
+import tornado.web  # type: ignore
+
+from explorer import RECORD, OpeningExplorer, decode_move
+from server import QueryHandler
+
+CASTLE = "r3k2r/pppq1ppp/2np1n2/2b1p3/2B1P3/2NP1N2/PPPQ1PPP/R3K2R w KQkq - 0 1"
+
+
+def raw_move(uci: str) -> int:
+    move = chess.Move.from_uci(uci)
+    return move.to_square | move.from_square << 6 | ((move.promotion - 1) << 12 if move.promotion else 0)
+
+
+def write_data(path: str, positions):
+    """Write an opening.data file of {fen: [(polyglot uci, whitewins, draws, count)]}."""
+    records: List[tuple] = []
+    for fen, moves in positions.items():
+        key = chess.polyglot.zobrist_hash(chess.Board(fen))
+        records.extend((key, raw_move(uci), white, draws, count) for uci, white, draws, count in moves)
+    with open(path, "wb") as data_file:
+        for record in sorted(records, key=lambda record: record[0]):
+            data_file.write(RECORD.pack(*record))
+
+
+class TestOpeningExplorer(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.folder.name, "opening.data")
+        after_e4 = chess.Board()
+        after_e4.push_uci("e2e4")
+        write_data(
+            self.path,
+            {
+                chess.STARTING_FEN: [("e2e4", 32, 44, 218543), ("d2d4", 32, 47, 205407)],
+                after_e4.fen(): [("c7c5", 30, 40, 90000)],
+                CASTLE: [("e1h1", 35, 40, 12), ("e1a1", 30, 40, 3)],
+            },
+        )
+        self.explorer = OpeningExplorer(self.path)
+        self.assertTrue(self.explorer.open())
+
+    def tearDown(self):
+        self.explorer.close()
+        self.folder.cleanup()
+
+    def test_moves_like_obooksrv(self):
+        moves = self.explorer.moves(chess.Board())
+        self.assertEqual(
+            {"move": "e2e4", "whitewins": 32, "draws": 44, "blackwins": 24, "count": 218543},
+            next(move for move in moves if move["move"] == "e2e4"),
+        )
+        self.assertEqual({"e2e4", "d2d4"}, {move["move"] for move in moves})
+        self.assertEqual([], self.explorer.moves(chess.Board("8/8/8/4k3/8/8/8/4K3 w - - 0 1")))
+
+    def test_castling_and_promotion(self):
+        self.assertEqual(["e1g1", "e1c1"], [move["move"] for move in self.explorer.moves(chess.Board(CASTLE))])
+        rook_board = chess.Board("4k3/8/8/8/8/8/8/4R2K w - - 0 1")
+        self.assertEqual("e1h1", decode_move(rook_board, raw_move("e1h1")))
+        self.assertEqual("a7a8q", decode_move(chess.Board("8/P7/8/8/8/8/8/k1K5 w - - 0 1"), raw_move("a7a8q")))
+
+    def test_cache(self):
+        self.explorer.moves(chess.Board())
+        self.explorer.moves(chess.Board())
+        stats = self.explorer.stats()
+        self.assertEqual((2, 1, 0.5), (stats["lookups"], stats["cache_hits"], stats["hit_rate"]))
+        self.assertEqual(5, stats["moves"])
+
+    def test_prefetch_of_the_successors(self):
+        self.assertEqual(21, self.explorer.prefetch(chess.Board()))
+        after_e4 = chess.Board()
+        after_e4.push_uci("e2e4")
+        self.assertTrue(self.explorer.in_cache(after_e4))
+        self.assertEqual("c7c5", self.explorer.moves(after_e4)[0]["move"])
+        self.assertEqual(1.0, self.explorer.stats()["hit_rate"])
+        self.assertEqual(0, self.explorer.prefetch(chess.Board()))
+
+    def test_lru(self):
+        explorer = OpeningExplorer(self.path, cache_size=2)
+        explorer.open()
+        boards = [chess.Board(), chess.Board(CASTLE), chess.Board("8/8/8/4k3/8/8/8/4K3 w - - 0 1")]
+        for board in boards:
+            explorer.moves(board)
+        self.assertFalse(explorer.in_cache(boards[0]))
+        self.assertTrue(explorer.in_cache(boards[2]))
+        explorer.close()
+
+    def test_missing_file(self):
+        explorer = OpeningExplorer(os.path.join(self.folder.name, "missing.data"))
+        self.assertFalse(explorer.open())
+        self.assertEqual([], explorer.moves(chess.Board()))
+        self.assertEqual(0, explorer.prefetch(chess.Board()))
+
+
+class TestQueryHandler(tornado.testing.AsyncHTTPTestCase):
+
+    def get_app(self):
+        self.folder = tempfile.TemporaryDirectory()
+        path = os.path.join(self.folder.name, "opening.data")
+        write_data(path, {chess.STARTING_FEN: [("g1f3", 30, 49, 53980)]})
+        self.explorer = OpeningExplorer(path)
+        self.explorer.open()
+        return tornado.web.Application([(r"/query", QueryHandler, dict(shared={"explorer": self.explorer}))])
+
+    def tearDown(self):
+        self.explorer.close()
+        self.folder.cleanup()
+        super().tearDown()
+
+    def test_get_book_moves(self):
+        for _ in range(2):
+            response = self.fetch("/query?action=get_book_moves&fen=" + quote(chess.STARTING_FEN))
+            self.assertEqual(200, response.code)
+            self.assertEqual(
+                {"data": [{"move": "g1f3", "whitewins": 30, "draws": 49, "blackwins": 21, "count": 53980}]},
+                json.loads(response.body),
+            )
+        self.assertEqual(1, self.explorer.stats()["cache_hits"])
+
+    def test_bad_requests(self):
+        self.assertEqual(400, self.fetch("/query?action=get_nothing").code)
+        response = self.fetch("/query?action=get_book_moves&fen=nonsense")
+        self.assertEqual((400, {"data": []}), (response.code, json.loads(response.body)))
+
+
+if __name__ == "__main__":
+    unittest.main()
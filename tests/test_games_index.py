@@ -0,0 +1,167 @@
+import json
+import os
+import tempfile
+import unittest
+from urllib.parse import quote
+
+import chess  # type: ignore
+import tornado.testing  # type: ignore
+import tornado.web  # type: ignore
+
+from games_index import GamesIndex, build_index, date_number, scan_games
+from server import QueryHandler
+
+GAMES = [
+    ("Old, A", "2500", "Young, B", "2400", "1999.05.01", "1-0", "1. e4 e5 2. Nf3 Nc6 3. Bb5 1-0"),
+    ("Strong, C", "2800", "Strong, D", "2790", "2010.01.01", "1/2-1/2", "1. e4 e5 2. Nf3 (2. f4) 2... Nf6 1/2-1/2"),
+    ("New, E", "", "New, F", "2100", "2024.12.17", "0-1", "1. e4 c5 2. Nf3 0-1"),
+]
+
+
+def pgn_text(white, white_elo, black, black_elo, date, result, moves) -> str:
+    headers = [("Event", "Test"), ("Date", date), ("White", white), ("Black", black), ("Result", result)]
+    headers += [(tag, elo) for tag, elo in (("WhiteElo", white_elo), ("BlackElo", black_elo)) if elo]
+    return "".join(f'[{tag} "{value}"]\n' for tag, value in headers) + "\n" + moves + "\n\n"
+
+
+def board_after(sans: str) -> chess.Board:
+    board = chess.Board()
+    for san in sans.split():
+        board.push_san(san)
+    return board
+
+
+class TestGamesIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.pgn = os.path.join(self.folder.name, "games.pgn")
+        self.index = os.path.join(self.folder.name, "games.idx")
+        with open(self.pgn, "w") as pgn_file:
+            pgn_file.write("".join(pgn_text(*game) for game in GAMES))
+        self.assertEqual((3, 3), build_index([self.folder.name], self.index))
+        self.games = GamesIndex(self.index)
+        self.assertTrue(self.games.open())
+
+    def tearDown(self):
+        self.games.close()
+        self.folder.cleanup()
+
+    def append(self, game):
+        with open(self.pgn, "a") as pgn_file:
+            pgn_file.write(pgn_text(*game))
+
+    def test_scan_offsets_and_mainline(self):
+        with open(self.pgn, "rb") as pgn_file:
+            for game, keys in scan_games(self.pgn):
+                pgn_file.seek(game[3])
+                self.assertTrue(pgn_file.read(game[4]).startswith(b"[Event"))
+        _, keys = list(scan_games(self.pgn))[1]
+        self.assertEqual(5, len(keys))  # the start position and four moves, not the variation
+        self.assertEqual(
+            (20241217, 19990000, 0), tuple(date_number({"Date": date}) for date in ("2024.12.17", "1999.??.??", ""))
+        )
+
+    def test_best_games_first(self):
+        found = self.games.find(board_after("e4 e5 Nf3"))
+        self.assertEqual(["Strong, C (2800)", "Old, A (2500)"], [game["white"] for game in found])
+        self.assertEqual("2010, Test", found[0]["event"])
+        self.assertEqual("1/2-1/2", found[0]["result"])
+        self.assertTrue(found[0]["pgn"].startswith('[Event "Test"]'))
+        self.assertEqual(["New, E"], [game["white"] for game in self.games.find(board_after("e4 c5"))])
+        self.assertEqual([], self.games.find(board_after("e4 e5 f4")))
+        self.assertEqual(1, len(self.games.find(chess.Board(), limit=1)))
+
+    def test_newest_games_first(self):
+        found = self.games.find(chess.Board(), order="date")
+        self.assertEqual(["New, E", "Strong, C (2800)", "Old, A (2500)"], [game["white"] for game in found])
+
+    def test_rebuild_reads_only_new_games(self):
+        self.append(("Next, G", "2900", "Next, H", "2900", "2025.01.01", "1-0", "1. e4 e5 2. Nf3 1-0"))
+        self.assertEqual((4, 1), build_index([self.pgn], self.index))
+        games = GamesIndex(self.index)
+        games.open()
+        self.assertEqual("Next, G (2900)", games.find(board_after("e4 e5 Nf3"))[0]["white"])
+        games.close()
+
+    def test_update_adds_saved_games(self):
+        self.games.find(chess.Board())
+        self.append(("Next, G", "2900", "Next, H", "2900", "2025.01.01", "1-0", "1. d4 d5 1-0"))
+        self.assertEqual(1, self.games.update(self.pgn))
+        self.assertEqual(0, self.games.update(self.pgn))
+        self.assertEqual("Next, G (2900)", self.games.find(chess.Board())[0]["white"])
+        self.assertEqual(1, len(self.games.find(board_after("d4 d5"))))
+        self.assertEqual(1, self.games.stats()["added_games"])
+        self.assertEqual(0, self.games.stats()["cache_hits"])
+
+    def test_appended_games_are_found_after_a_restart(self):
+        self.append(("Next, G", "2900", "Next, H", "2900", "2025.01.01", "1-0", "1. d4 d5 1-0"))
+        games = GamesIndex(self.index)
+        games.open()
+        self.assertEqual(1, len(games.find(board_after("d4 d5"))))
+        games.close()
+
+    def test_rewritten_file_is_left_out(self):
+        with open(self.pgn, "w") as pgn_file:
+            pgn_file.write(pgn_text(*GAMES[2]) + pgn_text(*GAMES[2]) + pgn_text(*GAMES[2]))
+        games = GamesIndex(self.index)
+        games.open()
+        self.assertEqual([], games.find(chess.Board()))
+        self.assertEqual([self.pgn], games.stats()["stale_files"])
+        games.close()
+        self.assertEqual((3, 3), build_index([self.pgn], self.index))
+
+    def test_file_rewritten_while_running_is_left_out(self):
+        self.assertEqual(3, len(self.games.find(chess.Board())))
+        with open(self.pgn, "w") as pgn_file:
+            pgn_file.write(pgn_text(*GAMES[2]))
+        self.assertEqual(0, self.games.update(self.pgn))
+        self.assertEqual([], self.games.find(chess.Board()))
+        self.assertEqual([self.pgn], self.games.stats()["stale_files"])
+
+    def test_stale_games_do_not_take_the_places_of_valid_ones(self):
+        strong = os.path.join(self.folder.name, "strong.pgn")
+        with open(strong, "w") as pgn_file:
+            pgn_file.write(pgn_text("Top, I", "2900", "Top, J", "2900", "2020.01.01", "1-0", "1. e4 e5 1-0") * 2)
+        build_index([self.pgn, strong], self.index)
+        with open(strong, "w") as pgn_file:
+            pgn_file.write(pgn_text(*GAMES[2]) * 2)
+        games = GamesIndex(self.index)
+        games.open()
+        self.assertEqual(
+            ["Strong, C (2800)", "Old, A (2500)"], [game["white"] for game in games.find(chess.Board(), limit=2)]
+        )
+        games.close()
+
+
+class TestGetGames(tornado.testing.AsyncHTTPTestCase):
+
+    def get_app(self):
+        self.folder = tempfile.TemporaryDirectory()
+        pgn = os.path.join(self.folder.name, "games.pgn")
+        with open(pgn, "w") as pgn_file:
+            pgn_file.write("".join(pgn_text(*game) for game in GAMES))
+        build_index([pgn], os.path.join(self.folder.name, "games.idx"))
+        self.games = GamesIndex(os.path.join(self.folder.name, "games.idx"))
+        self.games.open()
+        return tornado.web.Application([(r"/query", QueryHandler, dict(shared={"games_index": self.games}))])
+
+    def tearDown(self):
+        self.games.close()
+        self.folder.cleanup()
+        super().tearDown()
+
+    def test_get_games(self):
+        response = self.fetch("/query?action=get_games&fen=" + quote(chess.STARTING_FEN))
+        self.assertEqual(200, response.code)
+        data = json.loads(response.body)["data"]
+        self.assertEqual(["Strong, C (2800)", "Old, A (2500)", "New, E"], [game["white"] for game in data])
+        self.assertEqual({"white", "black", "result", "event", "pgn"}, set(data[0]))
+        response = self.fetch("/query?action=get_games&order=date&limit=1&fen=" + quote(chess.STARTING_FEN))
+        self.assertEqual(["New, E"], [game["white"] for game in json.loads(response.body)["data"]])
+        response = self.fetch("/query?action=get_games&order=random&fen=" + quote(chess.STARTING_FEN))
+        self.assertEqual([], json.loads(response.body)["data"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -13,48 +13,107 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
+import threading
 import unittest
-from unittest.mock import patch
 
 from eboard.move_debouncer import MoveDebouncer
 
+START = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR"
+E2_LIFTED = "rnbqkbnr/pppppppp/8/8/8/8/PPPP1PPP/RNBQKBNR"
+E3 = "rnbqkbnr/pppppppp/8/8/8/4P3/PPPP1PPP/RNBQKBNR"
+E4 = "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR"
+
+
+def pending_fen(debouncer: MoveDebouncer):
+    return debouncer.pending[1] if debouncer.pending else None
+
 
-@patch("eboard.move_debouncer.Timer.cancel")
-@patch("eboard.move_debouncer.Timer.start")
 class TestMoveDebouncer(unittest.TestCase):
 
-    def test_timer_is_started_for_extendable_move(self, MockedTimer_start, MockedTimer_cancel):
-        d = MoveDebouncer(1000, lambda fen: None)
-        d.update("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR")  # start position
-        d.update("rnbqkbnr/pppppppp/8/8/8/8/PPPP1PPP/RNBQKBNR")  # pawn on e2 picked up
-        d.update("rnbqkbnr/pppppppp/8/8/8/4P3/PPPP1PPP/RNBQKBNR")  # pawn put down on e3
-        MockedTimer_start.assert_called_once()
-        MockedTimer_cancel.assert_not_called()
-
-    def test_timer_is_canceled_for_non_extendable_move(self, MockedTimer_start, MockedTimer_cancel):
-        d = MoveDebouncer(1000, lambda fen: None)
-        d.update("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR")  # start position
-        d.update("rnbqkbnr/pppppppp/8/8/8/8/PPPP1PPP/RNBQKBNR")  # pawn on e2 picked up
-        d.update("rnbqkbnr/pppppppp/8/8/8/4P3/PPPP1PPP/RNBQKBNR")  # pawn put down on e3
-        MockedTimer_start.reset_mock()
-        d.update("rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR")  # pawn put down on e4
-        MockedTimer_cancel.assert_called_once()
-        MockedTimer_start.assert_not_called()
-
-    def test_rook_move_is_extendable(self, MockedTimer_start, MockedTimer_cancel):
-        d = MoveDebouncer(1000, lambda fen: None)
+    def setUp(self):
+        self.fens = []
+        self.debouncer = MoveDebouncer(60000, self.fens.append)
+
+    def tearDown(self):
+        self.debouncer.stop()
+
+    def test_timer_is_started_for_extendable_move(self):
+        d = self.debouncer
+        d.update(START)
+        d.update(E2_LIFTED)  # pawn on e2 picked up
+        d.update(E3)  # pawn put down on e3
+        self.assertEqual(E3, pending_fen(d))
+        self.assertEqual([START, E2_LIFTED], self.fens)
+
+    def test_timer_is_canceled_for_non_extendable_move(self):
+        d = self.debouncer
+        d.update(START)
+        d.update(E2_LIFTED)
+        d.update(E3)
+        d.update(E4)  # pawn put down on e4
+        self.assertIsNone(pending_fen(d))
+        self.assertEqual([START, E2_LIFTED, E4], self.fens)
+
+    def test_rook_move_is_extendable(self):
+        d = self.debouncer
         d.update("rn1qk2r/pp2ppbp/2p2np1/3p1b1P/3P4/4PN2/PPP1BPP1/RNBQK2R")
         d.update("rn1qk2r/pp2ppbp/2p2np1/3p1b1P/3P4/4PN2/PPP1BPP1/RNBQK3")  # remove rook from h1
         d.update("rn1qk2r/pp2ppbp/2p2np1/3p1b1P/3P4/4PN2/PPP1BPPR/RNBQK3")  # place rook on h2
+        self.assertEqual("rn1qk2r/pp2ppbp/2p2np1/3p1b1P/3P4/4PN2/PPP1BPPR/RNBQK3", pending_fen(d))
         d.update("rn1qk2r/pp2ppbp/2p2np1/3p1b1P/3P4/4PN1R/PPP1BPP1/RNBQK3")  # place rook on h3
-        self.assertEqual(2, MockedTimer_start.call_count)
+        self.assertEqual("rn1qk2r/pp2ppbp/2p2np1/3p1b1P/3P4/4PN1R/PPP1BPP1/RNBQK3", pending_fen(d))
+        self.assertEqual(2, len(self.fens))
 
-    def test_ignore_knight_move(self, MockedTimer_start, MockedTimer_cancel):
-        d = MoveDebouncer(1000, lambda fen: None)
-        d.update("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR")  # start position
+    def test_ignore_knight_move(self):
+        d = self.debouncer
+        d.update(START)
         d.update("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKB1R")  # Knight on g1 picked up
         d.update("rnbqkbnr/pppppppp/8/8/8/5N2/PPPPPPPP/RNBQKB1R")  # Knight put down on f3
-        MockedTimer_start.assert_not_called()
+        self.assertIsNone(pending_fen(d))
+        self.assertIsNone(d.scheduler)
+
+    def test_promotion_successors(self):
+        successors = self.debouncer._successors("8/P7/8/8/8/8/8/k6K", "w")
+        self.assertEqual(False, successors["Q7/8/8/8/8/8/8/k6K"])
+        self.assertEqual(False, successors["N7/8/8/8/8/8/8/k6K"])
+        self.assertEqual(True, successors["8/P7/8/8/8/8/7K/k7"])
+
+    def test_successors_are_cached(self):
+        d = self.debouncer
+        d.update(START)
+        d.update(E2_LIFTED)
+        d.update(E3)
+        self.assertEqual((2, 2), (d.misses, d.hits))  # both colours of the start position, once each
+        d.update(E2_LIFTED)
+        d.update(E4)
+        self.assertGreater(d.hits, 1)
+
+    def test_callback_after_debounce_time(self):
+        called = threading.Event()
+        fens = []
+
+        def callback(fen):
+            fens.append(fen)
+            if fen == E4:
+                called.set()
+
+        d = MoveDebouncer(20, callback)
+        d.update(START)
+        d.update(E2_LIFTED)
+        d.update(E3)
+        d.update(E2_LIFTED)  # the pawn is lifted again before the time passed
+        scheduler = d.scheduler
+        d.update("rnbqkbnr/pppppppp/8/8/8/8/PPPP1PPP/RNBQKBNR")
+        d.update(E4)
+        self.assertTrue(called.wait(5))
+        self.assertEqual([START, E2_LIFTED, E2_LIFTED, E2_LIFTED, E4], fens)
+        d.update(E3)
+        d.update(E2_LIFTED)
+        d.update(E3)
+        self.assertIs(scheduler, d.scheduler)
+        d.stop()
+        scheduler.join(5)
+        self.assertFalse(scheduler.is_alive())
 
 
 if __name__ == "__main__":
@@ -1,11 +1,17 @@
 import asyncio
+import email
+import os
+import socketserver
+import tempfile
+import threading
 
 import chess  # type: ignore[import]
 import datetime
 import unittest
+from unittest import mock
 
 from dgt.util import PlayMode
-from pgn import PgnDisplay
+from pgn import Emailer, MailOutbox, PgnDisplay
 
 EMPTY_GAME = """[Event "PicoChess Game"]
 [Site "?"]
@@ -45,3 +51,103 @@ class TestPgnDisplay(unittest.TestCase):
         empty_game = EMPTY_GAME.format(datetime.date.today().strftime("%Y.%m.%d"), self.testee.startime)
 
         self.assertEqual(str(pgn), empty_game)
+
+
+class SmtpHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP to take mails from smtplib."""
+
+    def reply(self, line):
+        self.wfile.write((line + "\r\n").encode())
+
+    def handle(self):
+        self.reply("220 stand-in")
+        while True:
+            command = self.rfile.readline().decode().strip()
+            verb = command[:4].upper()
+            if verb in ("EHLO", "HELO"):
+                self.reply("250 stand-in")
+            elif verb == "DATA":
+                self.reply("354 go ahead")
+                lines = []
+                while True:
+                    line = self.rfile.readline().decode()
+                    if line.rstrip("\r\n") == ".":
+                        break
+                    lines.append(line)
+                if self.server.fail:
+                    self.reply("451 try again later")
+                else:
+                    self.server.mails.append(email.message_from_string("".join(lines)))
+                    self.reply("250 queued")
+            elif verb == "QUIT" or not command:
+                self.reply("221 bye")
+                break
+            else:
+                self.reply("250 ok")
+
+
+class TestMailOutbox(unittest.TestCase):
+    def setUp(self):
+        self.server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), SmtpHandler)
+        self.server.mails = []
+        self.server.fail = False
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.emailer = Emailer(email="player@example.com")
+        self.emailer.set_smtp(sserver="127.0.0.1:{}".format(self.server.server_address[1]), sfrom="pico@example.com")
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.outbox = MailOutbox(self.emailer, os.path.join(self.tmp_dir.name, "outbox"), batch_size=2)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp_dir.cleanup()
+
+    def test_games_are_sent_in_batches(self):
+        for game in ("1. e4 e5 *", "1. d4 d5 *", "1. c4 c5 *"):
+            self.outbox.add(game)
+        self.assertTrue(self.outbox.send_batch())
+        self.assertTrue(self.outbox.send_batch())
+        self.assertEqual([], self.outbox.pending())
+        self.assertEqual(["Game PGN (2 games)", "Game PGN"], [mail["Subject"] for mail in self.server.mails])
+        attachments = [
+            part.get_payload(decode=True).decode() for part in self.server.mails[0].walk() if part.get_filename()
+        ]
+        self.assertEqual(["1. e4 e5 *", "1. d4 d5 *"], attachments)
+
+    def test_games_are_kept_when_delivery_fails(self):
+        self.outbox.add("1. e4 e5 *")
+        self.server.fail = True
+        self.assertFalse(self.outbox.send_batch())
+        self.assertEqual(1, len(self.outbox.pending()))
+        self.server.fail = False
+        self.assertTrue(self.outbox.send_batch())
+        self.assertEqual(1, len(self.server.mails))
+
+    def test_retry_only_uses_the_failed_channel(self):
+        self.emailer.mailgun_key = "key"
+        self.outbox.add("1. e4 e5 *")
+        self.server.fail = True
+        with mock.patch.object(Emailer, "_use_mailgun", return_value=True) as mailgun:
+            self.assertFalse(self.outbox.send_batch())
+            self.outbox.add("1. d4 d5 *")
+            self.server.fail = False
+            self.assertTrue(self.outbox.send_batch())
+            self.assertEqual(1, mailgun.call_count)
+            self.assertTrue(self.outbox.send_batch())
+            self.assertEqual(2, mailgun.call_count)
+        self.assertEqual(["Game PGN", "Game PGN"], [mail["Subject"] for mail in self.server.mails])
+        self.assertEqual([], os.listdir(self.outbox.folder))
+
+    def test_worker_sends_added_game(self):
+        async def deliver():
+            worker = asyncio.create_task(self.outbox.run())
+            self.outbox.add("1. e4 e5 *")
+            for _ in range(100):
+                if self.server.mails:
+                    break
+                await asyncio.sleep(0.02)
+            worker.cancel()
+
+        asyncio.run(deliver())
+        self.assertEqual(1, len(self.server.mails))
+        self.assertEqual([], self.outbox.pending())
@@ -4,7 +4,13 @@ import chess.engine
 import mock
 import unittest
 
-from picochess import AlternativeMover, read_pgn_info_from_file, read_online_result, read_online_user_info
+from picochess import (
+    AlternativeMover,
+    LegalFenIndex,
+    read_pgn_info_from_file,
+    read_online_result,
+    read_online_user_info,
+)
 
 
 class TestAlternativeMover(unittest.TestCase):
@@ -109,6 +115,50 @@ class TestAlternativeMover(unittest.TestCase):
         self.assertFalse(self.testee.check_book(bookreader, self.game))
 
 
+class TestLegalFenIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.testee = LegalFenIndex(max_positions=2)
+        self.game = chess.Board()
+
+    def test_successors_map_board_fen_to_move(self):
+        fens = self.testee.successors(self.game)
+
+        self.assertEqual(len(fens), 20)
+        self.assertEqual(fens["rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR"], chess.Move.from_uci("e2e4"))
+        self.assertEqual(self.game.move_stack, [])
+
+    def test_same_position_is_reused(self):
+        fens = self.testee.successors(self.game)
+        self.game.push_uci("g1f3")
+        self.game.push_uci("g8f6")
+        self.game.push_uci("f3g1")
+        self.game.push_uci("f6g8")
+
+        self.assertIs(self.testee.successors(self.game), fens)
+        self.assertEqual(self.testee.hits, 1)
+        self.assertEqual(self.testee.misses, 1)
+
+    def test_castling_rights_give_new_position(self):
+        game = chess.Board("r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1")
+        no_castling = chess.Board("r3k2r/8/8/8/8/8/8/R3K2R w - - 0 1")
+
+        self.assertIn("r3k2r/8/8/8/8/8/8/R4RK1", self.testee.successors(game))
+        self.assertNotIn("r3k2r/8/8/8/8/8/8/R4RK1", self.testee.successors(no_castling))
+
+    def test_oldest_position_is_evicted(self):
+        self.testee.successors(self.game)
+        self.game.push_uci("e2e4")
+        self.testee.successors(self.game)
+        self.game.push_uci("e7e5")
+        self.testee.successors(self.game)
+        self.game.pop()
+        self.game.pop()
+        self.testee.successors(self.game)
+
+        self.assertEqual(self.testee.misses, 4)
+
+
 class TestReadPGNInfo(unittest.TestCase):
     def test_read_pgn_info(self):
         game_name, problem, fen, result, white, black = read_pgn_info_from_file("tests/pgn_game_info.txt")
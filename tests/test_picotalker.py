@@ -0,0 +1,67 @@
+import unittest
+from array import array
+
+from picotalker import ClipCache, stretch_tempo
+
+RATE = 8000
+CHANNELS = 2
+
+
+def decode_tone(path):
+    """One second of a stereo tone, the length of the path selects the level."""
+    return array("h", [len(path) * 100] * RATE * CHANNELS), CHANNELS, RATE
+
+
+class TestStretchTempo(unittest.TestCase):
+
+    def test_same_tempo(self):
+        samples, channels, rate = decode_tone("a.ogg")
+        self.assertIs(samples, stretch_tempo(samples, channels, rate, 1.0))
+
+    def test_length_follows_factor(self):
+        samples, channels, rate = decode_tone("a.ogg")
+        for factor in (0.9, 1.2, 1.35):
+            stretched = stretch_tempo(samples, channels, rate, factor)
+            self.assertEqual(0, len(stretched) % channels)
+            self.assertAlmostEqual(len(samples) / factor, len(stretched), delta=len(samples) * 0.03)
+
+    def test_level_is_kept(self):
+        samples, channels, rate = decode_tone("a.ogg")
+        stretched = stretch_tempo(samples, channels, rate, 1.2)
+        self.assertEqual({samples[0]}, set(stretched))
+
+
+class TestClipCache(unittest.TestCase):
+
+    def test_clip_is_decoded_once(self):
+        cache = ClipCache(decode=decode_tone)
+        first = cache.clip("a.ogg", 1.0)
+        self.assertIs(first, cache.clip("a.ogg", 1.0))
+        self.assertEqual((1, 1), (cache.hits, cache.misses))
+        cache.clip("a.ogg", 1.2)
+        self.assertEqual(2, cache.misses)
+
+    def test_least_recently_used_clip_is_removed(self):
+        clip_size = RATE * CHANNELS * 2
+        cache = ClipCache(max_bytes=2 * clip_size, decode=decode_tone)
+        cache.clip("a.ogg", 1.0)
+        cache.clip("bb.ogg", 1.0)
+        cache.clip("a.ogg", 1.0)
+        cache.clip("ccc.ogg", 1.0)
+        self.assertEqual([("a.ogg", 1.0), ("ccc.ogg", 1.0)], list(cache.clips))
+        self.assertEqual(2 * clip_size, cache.size)
+
+    def test_utterance_joins_clips(self):
+        cache = ClipCache(decode=decode_tone)
+        buffer = cache.utterance(["a.ogg", "bb.ogg"], 1.0)
+        self.assertEqual(cache.clip("a.ogg", 1.0) + cache.clip("bb.ogg", 1.0), buffer)
+
+    def test_prewarm(self):
+        cache = ClipCache(decode=decode_tone)
+        self.assertEqual(2, cache.prewarm(["a.ogg", "bb.ogg"], 0.9))
+        cache.clip("bb.ogg", 0.9)
+        self.assertEqual((1, 2), (cache.hits, cache.misses))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,8 @@
+import os
+import tempfile
 import unittest
 
-from picotutor import PicoTutor
+from picotutor import OpeningIndex, PicoTutor
 from uci.engine import UciShell
 
 
@@ -31,3 +33,52 @@ class TestPicotutor(unittest.TestCase):
 
         opening_name, _, _ = tutor._find_longest_matching_opening("e4 e5")
         self.assertEqual(opening_name, "Open Game")
+
+    def test_get_fen_opening(self):
+        tutor = PicoTutor(i_ucishell=self.uci_shell, i_engine_path="engines/x86_64/a-stock8")
+        tutor.board.set_fen("rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1")
+        opening_name, in_book = tutor.get_fen_opening()
+        self.assertTrue(in_book)
+        self.assertEqual(opening_name.strip(), "Kings pawn opening")
+
+
+class TestOpeningIndex(unittest.TestCase):
+    ECO = '"eco"|"opening_name"|"moves"\n"B00"|"Kings Pawn"|"e4"\n"C44"|"Open Game"|"e4 e5 Nf3 Nc6"\n'
+    FEN = "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq -\nKings Pawn\n"
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.eco_file = os.path.join(self.tmp_dir.name, "eco.txt")
+        self.fen_file = os.path.join(self.tmp_dir.name, "fen.txt")
+        self.cache_file = os.path.join(self.tmp_dir.name, "index.pickle")
+        self._write(self.eco_file, self.ECO)
+        self._write(self.fen_file, self.FEN)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    @staticmethod
+    def _write(file_name, text):
+        with open(file_name, "w") as fp:
+            fp.write(text)
+
+    def test_longest_opening(self):
+        index = OpeningIndex.compile(self.eco_file, self.fen_file)
+        self.assertEqual(("Kings Pawn", "e4", "B00"), index.longest_opening(["e4", "e5", "Nf3"]))
+        self.assertEqual(("Open Game", "e4 e5 Nf3 Nc6", "C44"), index.longest_opening("e4 e5 Nf3 Nc6 Bb5".split()))
+        self.assertEqual(("", "", ""), index.longest_opening(["d4"]))
+
+    def test_fen_opening(self):
+        index = OpeningIndex.compile(self.eco_file, self.fen_file)
+        self.assertEqual("Kings Pawn\n", index.fen_opening("rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR"))
+        self.assertEqual("", index.fen_opening("8/8/8/8/8/8/8/8"))
+
+    def test_cache_is_compiled_again_after_change(self):
+        OpeningIndex.load(self.eco_file, self.fen_file, self.cache_file)
+        self.assertTrue(os.path.exists(self.cache_file))
+        self._write(self.eco_file, self.ECO + '"C50"|"Italian Game"|"e4 e5 Nf3 Nc6 Bc4"\n')
+        os.utime(self.eco_file, ns=(0, 1))
+        index = OpeningIndex.load(self.eco_file, self.fen_file, self.cache_file)
+        self.assertEqual("Italian Game", index.longest_opening("e4 e5 Nf3 Nc6 Bc4".split())[0])
+        cached = OpeningIndex.load(self.eco_file, self.fen_file, self.cache_file)
+        self.assertEqual(index.trie, cached.trie)
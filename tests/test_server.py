@@ -0,0 +1,290 @@
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import chess  # type: ignore
+import chess.pgn  # type: ignore
+import tornado.testing  # type: ignore
+import tornado.web  # type: ignore
+import tornado.websocket  # type: ignore
+
+from build.static import compress_static
+from server import (
+    ChannelHandler,
+    DebugEventsHandler,
+    EventHandler,
+    GameStream,
+    StateHandler,
+    StaticAssetHandler,
+    WebServer,
+    WebState,
+    state_parts,
+    stream_batch_analysis,
+    web_state,
+)
+from utilities import event_stats
+
+
+def exported_pgn(game: chess.Board) -> str:
+    pgn_game = chess.pgn.Game().from_board(game)
+    return pgn_game.accept(chess.pgn.StringExporter(headers=True, comments=False, variations=False))
+
+
+class TestGameStream(unittest.TestCase):
+
+    def setUp(self):
+        self.testee = GameStream()
+        self.game = chess.Board()
+        self.headers = chess.pgn.Game().headers
+
+    def test_moves_are_appended(self):
+        self.testee.reset(self.game, self.headers)
+        self.game.push_san("e4")
+        delta = self.testee.update(self.game, self.headers)
+
+        self.assertEqual(delta, {"seq": 2, "op": "append", "san": "e4"})
+        self.assertEqual(self.testee.sans, ["e4"])
+
+    def test_takeback_pops_moves(self):
+        for san in ("e4", "e5", "Nf3"):
+            self.game.push_san(san)
+        self.testee.reset(self.game, self.headers)
+        self.game.pop()
+        self.game.pop()
+        delta = self.testee.update(self.game, self.headers)
+
+        self.assertEqual(delta, {"seq": 2, "op": "pop", "count": 2})
+        self.assertEqual(self.testee.sans, ["e4"])
+
+    def test_unchanged_game_is_sync(self):
+        self.testee.reset(self.game, self.headers)
+
+        self.assertEqual(self.testee.update(self.game, self.headers)["op"], "sync")
+
+    def test_other_game_is_reset(self):
+        self.game.push_san("e4")
+        self.testee.reset(self.game, self.headers)
+        other = chess.Board()
+        other.push_san("d4")
+        delta = self.testee.update(other, self.headers)
+
+        self.assertEqual(delta["op"], "reset")
+        self.assertEqual(delta["pgn"].split(), exported_pgn(other).split())
+
+    def test_pgn_like_exporter(self):
+        game = chess.Board("rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1")
+        for san in ("c5", "Nf3", "d6", "d4"):
+            game.push_san(san)
+        self.testee.reset(game, chess.pgn.Game().from_board(game).headers)
+
+        self.assertEqual(self.testee.pgn(chess.pgn.Game().from_board(game).headers).split(), exported_pgn(game).split())
+
+    def test_snapshot_contains_pending_computer_move(self):
+        self.game.push_san("e4")
+        self.testee.reset(self.game, self.headers)
+        pending = self.game.copy()
+        pending.push_san("c5")
+        self.testee.pending_game = pending
+        snapshot = self.testee.snapshot(self.headers)
+
+        self.assertEqual(snapshot["seq"], 1)
+        self.assertTrue(snapshot["pgn"].endswith("1. e4 c5 *"))
+
+
+class TestWebState(unittest.TestCase):
+
+    def setUp(self):
+        self.shared = {"clock_text": "0:05.00", "system_info": {"version": "4.1"}}
+
+    def test_only_changed_parts_are_sent(self):
+        state = WebState()
+        self.assertEqual(
+            {"event": "State", "version": 1, "diff": {"clock": "0:05.00", "system": {"version": "4.1"}}},
+            state.update(state_parts(self.shared)),
+        )
+        self.assertIsNone(state.update(state_parts(self.shared)))
+        self.shared["system_info"]["engine_name"] = "Stockfish"  # changed in place like WebDisplay does
+        self.assertEqual(
+            {"event": "State", "version": 2, "diff": {"system": {"version": "4.1", "engine_name": "Stockfish"}}},
+            state.update(state_parts(self.shared)),
+        )
+        self.assertEqual("Stockfish", state.snapshot()["state"]["system"]["engine_name"])
+
+    def test_game_part_without_pgn(self):
+        self.shared["last_dgt_move_msg"] = {"fen": "8/8/8/8/8/8/8/8 w - - 0 1", "event": "Fen", "move": "e2e4"}
+        self.shared["game_stream"] = GameStream()
+        game = state_parts(self.shared)["game"]
+        self.assertEqual({"fen": "8/8/8/8/8/8/8/8 w - - 0 1", "move": "e2e4", "seq": 0}, game)
+
+
+class TestStateLongPoll(tornado.testing.AsyncHTTPTestCase):
+
+    def get_app(self):
+        self.shared = {"clock_text": "0:05.00"}
+        self.state = web_state(self.shared)
+        self.state.update(state_parts(self.shared))
+        return tornado.web.Application([(r"/state", StateHandler, dict(shared=self.shared))])
+
+    def test_etag_is_the_version(self):
+        response = self.fetch("/state")
+        self.assertEqual('"1"', response.headers["Etag"])
+        self.assertEqual("0:05.00", json.loads(response.body)["state"]["clock"])
+
+    @mock.patch("server.LONG_POLL_TIMEOUT", 0.05)
+    def test_unchanged_state_is_304(self):
+        response = self.fetch("/state", headers={"If-None-Match": '"1"'})
+        self.assertEqual(304, response.code)
+
+    def test_waits_for_the_next_version(self):
+        def tick():
+            self.shared["clock_text"] = "0:04.59"
+            self.state.update(state_parts(self.shared))
+
+        self.io_loop.call_later(0.05, tick)
+        response = self.fetch("/state", headers={"If-None-Match": '"1"'})
+        self.assertEqual(200, response.code)
+        self.assertEqual('"2"', response.headers["Etag"])
+        self.assertEqual("0:04.59", json.loads(response.body)["state"]["clock"])
+
+
+class TestEventSocket(tornado.testing.AsyncHTTPTestCase):
+
+    def get_app(self):
+        stream = GameStream()
+        game = chess.Board()
+        game.push_san("e4")
+        self.shared = {"game_stream": stream, "headers": {"White": "User"}, "clock_text": "0:05.00"}
+        stream.reset(game, self.shared["headers"])
+        self.shared["last_dgt_move_msg"] = {"fen": game.fen(), "event": "Fen", "move": "e2e4", "play": "user"}
+        web_state(self.shared).update(state_parts(self.shared))
+        return tornado.web.Application([(r"/event", EventHandler, dict(shared=self.shared))])
+
+    @tornado.testing.gen_test
+    async def test_game_and_state_on_connect_and_on_request(self):
+        url = "ws://127.0.0.1:{}/event".format(self.get_http_port())
+        socket = await tornado.websocket.websocket_connect(url)
+        game = json.loads(await socket.read_message())
+        self.assertEqual(("Fen", "reset", 1), (game["event"], game["op"], game["seq"]))
+        self.assertTrue(game["pgn"].endswith("1. e4 *"))
+        state = json.loads(await socket.read_message())
+        self.assertEqual({"event": "State", "version": 1}, {key: state[key] for key in ("event", "version")})
+        self.assertEqual({"White": "User"}, state["state"]["headers"])
+        socket.write_message(json.dumps({"action": "resync"}))
+        self.assertEqual("reset", json.loads(await socket.read_message())["op"])
+        socket.write_message(json.dumps({"action": "state"}))
+        self.assertEqual("0:05.00", json.loads(await socket.read_message())["state"]["clock"])
+        socket.close()
+
+
+class TestDebugEvents(tornado.testing.AsyncHTTPTestCase):
+
+    def get_app(self):
+        return tornado.web.Application([(r"/debug/events", DebugEventsHandler)])
+
+    def test_event_percentiles(self):
+        for duration in (0.001, 0.002, 0.003):
+            event_stats.add("EVT_TEST", 0.0005, duration)
+        response = self.fetch("/debug/events")
+        self.assertEqual(200, response.code)
+        report = json.loads(response.body)
+        self.assertEqual(
+            {"count": 3, "handler_p50_ms": 2.0, "handler_p99_ms": 3.0, "wait_p50_ms": 0.5},
+            {
+                key: value
+                for key, value in report["events"]["EVT_TEST"].items()
+                if key in ("count", "handler_p50_ms", "handler_p99_ms", "wait_p50_ms")
+            },
+        )
+        self.assertIn("events", [queue["name"] for queue in report["queues"]])
+
+
+class TestAnalyseGameAction(tornado.testing.AsyncHTTPTestCase):
+
+    def get_app(self):
+        return tornado.web.Application([(r"/channel", ChannelHandler, dict(shared={}, batch_analysis=None))])
+
+    def test_without_batch_analysis(self):
+        response = self.fetch("/channel", method="POST", body="action=analyse_game&pgn=e4")
+        self.assertEqual(200, response.code)
+        self.assertFalse(json.loads(response.body)["success"])
+
+
+class TestStreamBatchAnalysis(unittest.IsolatedAsyncioTestCase):
+
+    async def test_done_is_sent_after_an_unexpected_error(self):
+        batch_analysis = mock.Mock()
+        batch_analysis.annotate_game = mock.AsyncMock(side_effect=KeyError("score"))
+        with mock.patch.object(EventHandler, "write_to_clients") as write, self.assertLogs("server", "ERROR"):
+            await stream_batch_analysis(batch_analysis, chess.pgn.Game())
+        write.assert_called_once_with({"event": "BatchAnalysisDone", "error": "'score'"})
+
+
+class TestStaticAssets(tornado.testing.AsyncHTTPTestCase):
+
+    def get_app(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.css = "body { color: black; }\n" * 200
+        with open(os.path.join(self.folder.name, "site.css"), "w") as css:
+            css.write(self.css)
+        compress_static(self.folder.name)
+        return tornado.web.Application(
+            [(r"/page", PageHandler)], static_path=self.folder.name, static_handler_class=StaticAssetHandler
+        )
+
+    def tearDown(self):
+        super().tearDown()
+        self.folder.cleanup()
+
+    def test_precompressed_variant(self):
+        response = self.fetch(
+            "/static/site.css", headers={"Accept-Encoding": "br;q=0, gzip"}, decompress_response=False
+        )
+        self.assertEqual("gzip", response.headers["Content-Encoding"])
+        self.assertEqual("Accept-Encoding", response.headers["Vary"])
+        self.assertEqual("text/css", response.headers["Content-Type"])
+        self.assertEqual(self.css, gzip.decompress(response.body).decode())
+        response = self.fetch("/static/site.css", headers={"Accept-Encoding": "identity"}, decompress_response=False)
+        self.assertNotIn("Content-Encoding", response.headers)
+        self.assertEqual(self.css, response.body.decode())
+
+    def test_stale_variant_is_not_sent(self):
+        path = os.path.join(self.folder.name, "site.css")
+        os.utime(path + ".gz", (os.path.getmtime(path) - 10,) * 2)
+        response = self.fetch("/static/site.css", headers={"Accept-Encoding": "gzip"}, decompress_response=False)
+        self.assertNotIn("Content-Encoding", response.headers)
+
+    def test_hashed_url_is_immutable(self):
+        url = self.fetch("/page").body.decode()
+        self.assertIn("/static/site.css?v=", url)
+        response = self.fetch(url)
+        self.assertEqual("public, max-age=31536000, immutable", response.headers["Cache-Control"])
+        response = self.fetch(url, headers={"If-None-Match": response.headers["Etag"]})
+        self.assertEqual(304, response.code)
+
+    def test_accepted_encodings(self):
+        self.assertEqual({"gzip", "deflate"}, StaticAssetHandler.accepted_encodings("gzip, deflate, br;q=0"))
+
+
+class PageHandler(tornado.web.RequestHandler):
+    def get(self):
+        self.write(self.static_url("site.css"))
+
+
+class TestWebServerApp(tornado.testing.AsyncHTTPTestCase):
+
+    def get_app(self):
+        return WebServer().make_app("dark", {})
+
+    def test_pages_link_hashed_assets(self):
+        body = self.fetch("/").body.decode()
+        self.assertIn("/static/js/app.js?v=", body)
+        self.assertIn("/static/css/font-awesome.min.css?v=", self.fetch("/help").body.decode())
+        self.assertEqual(200, self.fetch("/static/js/app.js").code)
+        self.assertEqual(404, self.fetch("/no/such/page").code)
+
+
+if __name__ == "__main__":
+    unittest.main()
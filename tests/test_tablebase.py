@@ -0,0 +1,119 @@
+import os
+import tempfile
+import unittest
+
+import chess  # type: ignore
+
+from tablebase import TB_WIN_SCORE, Tablebase
+
+MATE_IN_ONE = "k7/8/1K6/8/8/8/7Q/8 w - - 0 1"
+
+
+class QueenTables(object):
+    """KQvK only: the side with the queen wins, the king distance stands for the dtz."""
+
+    def __init__(self):
+        self.probed = []
+
+    def probe_wdl(self, board: chess.Board) -> int:
+        self.probed.append(board.fen())
+        if chess.popcount(board.occupied) == 2:
+            return 0
+        if board.pieces(chess.QUEEN, chess.WHITE) and chess.popcount(board.occupied) == 3:
+            return 2 if board.turn == chess.WHITE else -2
+        raise KeyError("no such table")
+
+    def probe_dtz(self, board: chess.Board) -> int:
+        wdl = self.probe_wdl(board)
+        white_king, black_king = board.king(chess.WHITE), board.king(chess.BLACK)
+        assert white_king is not None and black_king is not None
+        distance = chess.square_distance(white_king, black_king)
+        return distance if wdl > 0 else -distance if wdl < 0 else 0
+
+
+class RookTables(QueenTables):
+    """KQvKR and KQvK: the queen wins, a capture starts the dtz count again like real tables."""
+
+    def probe_wdl(self, board: chess.Board) -> int:
+        if board.pieces(chess.ROOK, chess.BLACK) and board.pieces(chess.QUEEN, chess.WHITE):
+            self.probed.append(board.fen())
+            return 2 if board.turn == chess.WHITE else -2
+        return super().probe_wdl(board)
+
+    def probe_dtz(self, board: chess.Board) -> int:
+        wdl = self.probe_wdl(board)
+        distance = 2 if board.pieces(chess.ROOK, chess.BLACK) else 15
+        return distance if wdl > 0 else -distance if wdl < 0 else 0
+
+
+class TestTablebase(unittest.TestCase):
+
+    def setUp(self):
+        self.tablebase = Tablebase("")
+        self.tablebase.opened = True
+        self.tablebase.tables = QueenTables()
+        self.tablebase.max_pieces = 3
+
+    def test_covers(self):
+        self.assertFalse(self.tablebase.covers(chess.Board()))
+        self.assertTrue(self.tablebase.covers(chess.Board(MATE_IN_ONE)))
+        self.assertFalse(self.tablebase.covers(chess.Board("4k3/8/8/8/8/8/8/R3K3 w Q - 0 1")))
+
+    def test_missing_folder(self):
+        with tempfile.TemporaryDirectory() as folder:
+            tablebase = Tablebase(os.path.join(folder, "syzygy"))
+            self.assertFalse(tablebase.covers(chess.Board(MATE_IN_ONE)))
+            self.assertIsNone(tablebase.score(chess.Board(MATE_IN_ONE)))
+            self.assertIsNone(tablebase.analysis(chess.Board(MATE_IN_ONE)))
+
+    def test_score(self):
+        board = chess.Board(MATE_IN_ONE)
+        self.assertEqual(TB_WIN_SCORE - 2, self.tablebase.score(board).pov(chess.WHITE).score())
+        self.assertEqual(-(TB_WIN_SCORE - 2), self.tablebase.score(board).pov(chess.BLACK).score())
+        self.assertEqual(0, Tablebase.wdl_score(1, 5))
+        self.assertEqual(0, self.tablebase.score(chess.Board(MATE_IN_ONE.replace("0 1", "99 50"))).white().score())
+        self.assertEqual(0, Tablebase.wdl_score(-2, 10, 95))
+
+    def test_analysis_mates_first(self):
+        board = chess.Board(MATE_IN_ONE)
+        info = self.tablebase.analysis(board)
+        self.assertEqual(board.legal_moves.count(), len(info))
+        first = board.copy()
+        first.push(info[0]["pv"][0])
+        self.assertTrue(first.is_checkmate())
+        scores = [line["score"].pov(chess.WHITE) for line in info]
+        self.assertEqual(sorted(scores, reverse=True), scores)
+        self.assertEqual(board.fen(), MATE_IN_ONE)
+
+    def test_probe_cache(self):
+        board = chess.Board(MATE_IN_ONE)
+        self.tablebase.score(board)
+        self.tablebase.score(board)
+        self.assertEqual(1, len(self.tablebase.tables.probed) // 2)
+        stats = self.tablebase.stats()
+        self.assertEqual((2, 1, 1.0), (stats["probes"], stats["cache_hits"], stats["hit_rate"]))
+
+    def test_missing_table_falls_back_to_engine(self):
+        board = chess.Board("k7/8/1K6/8/8/8/8/1R6 w - - 0 1")
+        self.assertIsNone(self.tablebase.analysis(board))
+        self.assertEqual(1.0, self.tablebase.stats()["misses"] / self.tablebase.stats()["probes"])
+
+    def test_analysis_prefers_zeroing_win(self):
+        self.tablebase.tables = RookTables()
+        self.tablebase.max_pieces = 4
+        board = chess.Board("6k1/3r4/8/8/3Q4/8/8/K7 w - - 0 1")
+        info = self.tablebase.analysis(board)
+        self.assertEqual(chess.Move.from_uci("d4d7"), info[0]["pv"][0])
+        self.assertEqual(TB_WIN_SCORE - 1, info[0]["score"].white().score())
+        self.assertEqual(TB_WIN_SCORE - 3, info[1]["score"].white().score())
+        board.halfmove_clock = 98  # only the capture wins before the fifty-move rule
+        info = self.tablebase.analysis(board)
+        self.assertEqual(chess.Move.from_uci("d4d7"), info[0]["pv"][0])
+        self.assertEqual(0, info[1]["score"].white().score())
+        board.halfmove_clock = 100  # the capture starts the fifty moves again
+        info = self.tablebase.analysis(board)
+        self.assertEqual(TB_WIN_SCORE - 1, info[0]["score"].white().score())
+
+
+if __name__ == "__main__":
+    unittest.main()
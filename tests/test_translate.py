@@ -0,0 +1,71 @@
+import logging
+import re
+import unittest
+
+from dgt.translate import DgtTranslate, MsgText
+
+LANGUAGES = ("en", "de", "nl", "fr", "es", "it")
+MSGS = ("", "5", "12:30", "e2e4", "Level@12", "Stockfish 16 with a long name")
+
+
+def text_ids():
+    with open("dgt/translate.py", "r", encoding="utf-8") as source:
+        return sorted(set(re.findall(r'text_id == "(\w+)"', source.read())))
+
+
+def fields(txt):
+    return (txt.web_text, txt.large_text, txt.medium_text, txt.small_text, txt.wait, txt.beep, txt.maxtime, txt.devs)
+
+
+class TestDgtTranslate(unittest.TestCase):
+
+    def setUp(self):
+        logging.disable(logging.WARNING)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+
+    def test_compiled_texts_are_unchanged(self):
+        translate = DgtTranslate("some", 3, "en", "4.1.6")
+        for language in LANGUAGES:
+            translate.set_language(language)
+            for capital in (False, True):
+                translate.set_capital(capital)
+                for text_id in text_ids():
+                    for msg in MSGS:
+                        try:
+                            expected = translate.capital_text(translate._text(text_id, msg, True, 1.0, {"web"}))
+                        except (TypeError, ValueError, IndexError, AttributeError):
+                            continue
+                        txt = translate.text("Y10_" + text_id, msg, {"web"})
+                        self.assertEqual(fields(expected), fields(txt), (language, text_id, msg))
+        self.assertIn("okpico", translate.compiled)
+        self.assertIn("position_fail", translate.uncompiled)
+
+    def test_msg_becomes_format_spec(self):
+        translate = DgtTranslate("none", 0, "en", "4.1.6")
+        web_text, large_text, _, _, _ = translate._compile("default")
+        self.assertEqual(("", ".38", ""), web_text)
+        self.assertEqual("abcdefghijk", translate._fill(large_text, "abcdefghijkl"))
+
+    def test_status_change_compiles_again(self):
+        translate = DgtTranslate("none", 0, "en", "4.1.6")
+        translate.text("B10_pico_updated_status")
+        translate.set_last_updated_info("updated today")
+        self.assertEqual("updated today", translate.text("B10_pico_updated_status").web_text)
+
+    def test_unknown_text_id(self):
+        translate = DgtTranslate("all", 0, "en", "4.1.6")
+        txt = translate.text("N10_no_such_text")
+        self.assertEqual(("no_such_text", True, 0), (txt.web_text, txt.beep, txt.maxtime))
+        self.assertIn("no_such_text", translate.uncompiled)
+
+    def test_msg_text_refuses_values(self):
+        msg = MsgText()
+        for use in (len, lambda m: m == "x", lambda m: m.upper(), lambda m: m[2:], lambda m: "%s" % m):
+            with self.assertRaises(TypeError):
+                use(msg)
+
+
+if __name__ == "__main__":
+    unittest.main()
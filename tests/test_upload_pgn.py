@@ -0,0 +1,165 @@
+import base64
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import chess.pgn  # type: ignore
+import tornado.testing  # type: ignore
+import tornado.web  # type: ignore
+
+import upload_pgn
+from upload_pgn import MultipartStream, PgnScanner, UploadHandler
+
+PGN = (
+    '[Event "Test"]\n[White "A"]\n[Black "B"]\n[Result "1-0"]\n[WhiteElo "2500"]\n\n'
+    "1. e4 e5 {a comment\nover two lines} 2. Nf3 (2. f4 exf4) 2... Nc6 $1 3. Bb5 a6?! ; at the end\n1-0\n\n"
+    '[Event "Test"]\n[White "C"]\n[Black "D"]\n[Result "*"]\n\n1. d4 d5 2. c4 dxc4 3. O-O-O?? *\n'
+)
+BOUNDARY = "----picochessboundary"
+
+
+def multipart(file_name: str, content: bytes) -> bytes:
+    return (
+        (
+            f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="note"\r\n\r\nnot a file\r\n'
+            f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="file"; filename="{file_name}"\r\n'
+            "Content-Type: application/octet-stream\r\n\r\n"
+        ).encode()
+        + content
+        + f"\r\n--{BOUNDARY}--\r\n".encode()
+    )
+
+
+def scan(text: bytes, chunk: int = 7) -> list:
+    scanner = PgnScanner()
+    for start in range(0, len(text), chunk):
+        scanner.feed(text[start : start + chunk])
+    return scanner.close()
+
+
+class TestMultipartStream(unittest.TestCase):
+
+    def test_parts_split_over_chunks(self):
+        body = multipart("game.pgn", b"line\r\n--not the boundary\r\n" + PGN.encode())
+        for size in (1, 5, 64, len(body)):
+            stream = MultipartStream(BOUNDARY.encode())
+            parts: list = []
+            for start in range(0, len(body), size):
+                for part, data in stream.feed(body[start : start + size]):
+                    if part is not None:
+                        parts.append([part, b""])
+                    else:
+                        parts[-1][1] += data
+            self.assertTrue(stream.done)
+            self.assertEqual({"name": "note"}, parts[0][0])
+            self.assertEqual(b"not a file", parts[0][1])
+            self.assertEqual("game.pgn", parts[1][0]["filename"])
+            self.assertEqual(b"line\r\n--not the boundary\r\n" + PGN.encode(), parts[1][1])
+
+
+class TestPgnScanner(unittest.TestCase):
+
+    def test_game_offsets(self):
+        text = PGN.encode()
+        offsets = scan(text)
+        self.assertEqual(2, len(offsets))
+        self.assertEqual(0, offsets[0])
+        self.assertTrue(text[offsets[1] :].startswith(b'[Event "Test"]\n[White "C"]'))
+
+    def test_games_without_tags(self):
+        self.assertEqual(
+            [0, 15], scan("\ufeff1. e4 e5 *\n\n".encode() + '[Event "Caf\xe9"]\n1. d4 *'.encode("latin-1"))
+        )
+
+    def test_broken_files_are_refused(self):
+        for text, error in (
+            (b"PK\x03\x04\x14\x00\x00\x00", "no pgn text"),
+            (b'[Event "Test"\n1. e4 *', "Line 1: broken tag"),
+            (PGN.encode() + b"\n1. e4 hello *\n", "Line 18: unexpected 'hello'"),
+            (b"", "No games"),
+            (b"1. e4 " * 20000, "too long"),
+        ):
+            with self.assertRaisesRegex(ValueError, error):
+                scan(text, 4096)
+
+
+class NoPamUploadHandler(UploadHandler):
+
+    def authenticate(self, username, password):
+        return (username, password) == ("pico", "chess")
+
+
+class TestUploadHandler(tornado.testing.AsyncHTTPTestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        os.makedirs(os.path.join(self.folder.name, upload_pgn.UPLOAD_DIR))
+        patcher = mock.patch("upload_pgn.UPLOAD_BASE_DIR", self.folder.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        fire = mock.patch("upload_pgn.Observable.fire", new_callable=mock.AsyncMock)
+        self.fire = fire.start()
+        self.addCleanup(fire.stop)
+        super().setUp()
+
+    def tearDown(self):
+        super().tearDown()
+        self.folder.cleanup()
+
+    def get_app(self):
+        return tornado.web.Application([(r"/upload-pgn", NoPamUploadHandler)])
+
+    def upload(self, file_name: str, content: bytes, password: str = "chess"):
+        return self.fetch(
+            "/upload-pgn",
+            method="POST",
+            body=multipart(file_name, content),
+            headers={
+                "Authorization": "Basic " + base64.b64encode(f"pico:{password}".encode()).decode(),
+                "Content-Type": f"multipart/form-data; boundary={BOUNDARY}",
+            },
+        )
+
+    def uploads(self) -> list:
+        return sorted(os.listdir(os.path.join(self.folder.name, upload_pgn.UPLOAD_DIR)))
+
+    def test_upload_is_saved_with_its_game_index(self):
+        response = self.upload("../event.pgn", PGN.encode())
+        self.assertEqual(200, response.code)
+        self.assertIn(b"uploaded 'event.pgn' (2 games)", response.body)
+        self.assertEqual(["event.pgn", "event.pgn.idx"], self.uploads())
+        path = os.path.join(self.folder.name, upload_pgn.UPLOAD_DIR, "event.pgn")
+        with open(path, "rb") as pgn_file:
+            self.assertEqual(PGN.encode(), pgn_file.read())
+        with open(path + ".idx") as index_file:
+            index = json.load(index_file)
+        stat = os.stat(path)
+        self.assertEqual([stat.st_mtime_ns, stat.st_size], index["stamp"])  # what pgn_engine checks
+        self.assertEqual(scan(PGN.encode()), index["offsets"])
+        with open(path) as pgn_file:
+            pgn_file.seek(index["offsets"][1])
+            self.assertEqual("C", chess.pgn.read_game(pgn_file).headers["White"])
+        self.assertEqual(os.path.join("uploads", "event.pgn"), self.fire.await_args.args[0].pgn_filename)
+
+    def test_broken_upload_is_refused(self):
+        response = self.upload("event.pgn", b"1. e4 e5\n<html>not a game</html>\n")
+        self.assertEqual(400, response.code)
+        self.assertIn(b"Line 2: unexpected", response.body)
+        self.assertEqual([], self.uploads())
+        self.fire.assert_not_awaited()
+
+    def test_only_pgn_files(self):
+        response = self.upload("event.txt", PGN.encode())
+        self.assertEqual(400, response.code)
+        self.assertEqual(b"Only .pgn files are allowed.", response.body)
+        self.assertEqual([], self.uploads())
+
+    def test_authentication_required(self):
+        self.assertEqual(401, self.upload("event.pgn", PGN.encode(), password="wrong").code)
+        self.assertEqual([], self.uploads())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,20 @@
+import asyncio
+import copy
 import unittest
 
-from utilities import get_engine_mame_par
+import chess  # type: ignore
+
+from dgt.api import Message
+from utilities import (
+    COALESCED_MESSAGES,
+    DisplayMsg,
+    GameSnapshot,
+    MessageQueue,
+    StartupProfile,
+    get_engine_mame_par,
+    message_queues,
+    msgdisplay_devices,
+)
 
 
 class TestUtilities(unittest.TestCase):
@@ -12,5 +26,166 @@ class TestUtilities(unittest.TestCase):
         self.assertEqual("-nothrottle", get_engine_mame_par(0.009, True))
 
 
+class TestGameSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.game = chess.Board()
+        for move in ("e2e4", "e7e5", "g1f3", "b8c6"):
+            self.game.push_uci(move)
+
+    def test_snapshot_is_not_changed_by_game(self):
+        snapshot = GameSnapshot.of(self.game)
+        self.game.push_uci("f1b5")
+
+        self.assertEqual(len(snapshot.move_stack), 4)
+        self.assertEqual(snapshot.peek(), chess.Move.from_uci("b8c6"))
+        self.assertEqual(snapshot.san(chess.Move.from_uci("f1c4")), "Bc4")
+
+    def test_deepcopy_shares_snapshot(self):
+        snapshot = GameSnapshot.of(self.game)
+
+        self.assertIs(copy.deepcopy(snapshot), snapshot)
+        self.assertIs(GameSnapshot.of(snapshot), snapshot)
+
+    def test_copy_gives_normal_board(self):
+        snapshot = GameSnapshot.of(self.game)
+        board = snapshot.copy()
+        board.pop()
+
+        self.assertIs(type(board), chess.Board)
+        self.assertEqual(len(snapshot.move_stack), 4)
+        self.assertEqual(board.fen(), "rnbqkbnr/pppp1ppp/8/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R b KQkq - 1 2")
+
+    def test_snapshot_cannot_be_changed(self):
+        snapshot = GameSnapshot.of(self.game)
+
+        self.assertRaises(ValueError, snapshot.push, chess.Move.from_uci("f1c4"))
+        self.assertRaises(ValueError, snapshot.pop)
+        self.assertEqual(snapshot.san(chess.Move.from_uci("f1b5")), "Bb5")  # python-chess looks ahead
+        self.assertFalse(snapshot.is_repetition(2))
+        self.assertEqual(snapshot.fen(), self.game.fen())
+
+
+class FakeDisplay(DisplayMsg):
+    def __init__(self, loop):
+        super().__init__(loop)
+        self.messages = []
+
+    async def add_to_queue(self, message):
+        self.messages.append(message)
+
+
+class TestDisplayMsg(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.displays = [FakeDisplay(self.loop), FakeDisplay(self.loop)]
+
+    def tearDown(self):
+        for display in self.displays:
+            msgdisplay_devices.remove(display)
+        self.loop.close()
+
+    def test_show_shares_one_game_snapshot(self):
+        game = chess.Board()
+        game.push_uci("e2e4")
+        self.loop.run_until_complete(DisplayMsg.show(Message.TAKE_BACK(game=game)))
+        first, second = (display.messages[0] for display in self.displays)
+
+        self.assertIsNot(first, second)
+        self.assertIsInstance(first.game, GameSnapshot)
+        self.assertIs(first.game, second.game)
+
+
+class TestMessageQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.queue = MessageQueue("test", maxsize=3, coalesce=COALESCED_MESSAGES)
+
+    def tearDown(self):
+        message_queues.remove(self.queue)
+        self.loop.close()
+
+    def put(self, *messages):
+        for message in messages:
+            self.loop.run_until_complete(self.queue.put(message))
+
+    def get_all(self):
+        messages = []
+        while not self.queue.empty():
+            messages.append(self.loop.run_until_complete(self.queue.get()))
+            self.queue.task_done()
+        return messages
+
+    def test_latest_analysis_message_is_kept(self):
+        old_score, new_score = Message.NEW_SCORE(score=10), Message.NEW_SCORE(score=20)
+        take_back = Message.TAKE_BACK(game=chess.Board())
+        self.put(old_score, take_back, new_score)
+
+        self.assertEqual([take_back, new_score], self.get_all())
+        self.assertEqual(1, self.queue.stats()["coalesced"])
+
+    def test_clock_times_of_all_devices_are_kept(self):
+        board_time = Message.DGT_CLOCK_TIME(time_left=300, time_right=300, connect=True, dev="ser")
+        web_time = Message.DGT_CLOCK_TIME(time_left=299, time_right=300, connect=False, dev="web")
+        self.put(board_time, web_time)
+
+        self.assertEqual([board_time, web_time], self.get_all())
+        self.assertEqual(0, self.queue.stats()["coalesced"])
+
+    def test_full_queue_drops_oldest_analysis_message(self):
+        depth = Message.NEW_DEPTH(depth=12)
+        others = [Message.TAKE_BACK(game=chess.Board()) for _ in range(3)]
+        self.put(depth, *others[:2])
+        self.put(others[2])
+
+        self.assertEqual(others, self.get_all())
+        self.assertEqual(1, self.queue.stats()["dropped"])
+
+    def test_full_queue_drops_oldest_message(self):
+        others = [Message.TAKE_BACK(game=chess.Board()) for _ in range(4)]
+        self.put(*others)
+
+        self.assertEqual(others[1:], self.get_all())
+        stats = self.queue.stats()
+        self.assertEqual((3, 3, 1), (stats["messages"], stats["max_depth"], stats["dropped"]))
+
+    def test_consumer_puts_onto_its_own_full_queue(self):
+        others = [Message.TAKE_BACK(game=chess.Board()) for _ in range(4)]
+        wrong_fen = Message.WRONG_FEN()
+        self.put(*others[:3])
+
+        async def consume():
+            message = await self.queue.get()
+            await self.queue.put(others[3])  # full again
+            await asyncio.wait_for(self.queue.put(wrong_fen), 1)  # DgtDisplay shows WRONG_FEN
+            self.queue.task_done()
+            return message
+
+        self.assertIs(others[0], self.loop.run_until_complete(consume()))
+        self.assertEqual(others[2:] + [wrong_fen], self.get_all())
+        self.assertEqual(1, self.queue.stats()["dropped"])
+
+
+class TestStartupProfile(unittest.TestCase):
+
+    def test_parallel_phases_and_critical_path(self):
+        profile = StartupProfile()
+
+        async def startup():
+            short = profile.task("short", asyncio.sleep(0.01, result="short"))
+            long = profile.task("long", asyncio.sleep(0.05, result="long"))
+            self.assertEqual(["short", "long"], [await short, await long])
+            start = profile.elapsed()
+            await asyncio.sleep(0.01)
+            profile.add("ready", start, after=("short", "long"))
+
+        asyncio.run(startup())
+        self.assertLess(profile.phases["long"][0], profile.phases["short"][1])  # both ran at the same time
+        self.assertEqual(["long", "ready"], profile.critical_path())
+        self.assertIn("critical path", profile.report())
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -17,7 +17,10 @@ import asyncio
 import unittest
 from unittest.mock import patch
 
-from uci.engine import UciEngine, UciShell
+import chess
+from chess.engine import Limit
+
+from uci.engine import AnalysisCache, ContinuousAnalysis, EngineLease, UciEngine, UciShell
 from uci.rating import Rating, Result
 
 UCI_ELO = "UCI_Elo"
@@ -180,3 +183,86 @@ class TestEngine(unittest.IsolatedAsyncioTestCase):
         new_rating = await eng.update_rating(Rating(850.5, 123.0), Result.WIN)
         self.assertEqual(890, int(new_rating.rating))
         self.assertEqual(901, eng.engine_rating)
+
+
+class TestAnalysisCache(unittest.TestCase):
+    def test_hit_and_miss(self):
+        cache = AnalysisCache()
+        key = AnalysisCache.key(chess.Board(), "engine", 30)
+        self.assertIsNone(cache.get(key))
+        cache.put(key, [{"depth": 5}])
+        self.assertEqual([{"depth": 5}], cache.get(key))
+        self.assertEqual({"hits": 1, "misses": 1, "positions": 1}, cache.stats())
+
+    def test_key_by_position_not_move_order(self):
+        game1 = chess.Board()
+        game2 = chess.Board()
+        for move in ("g1f3", "g8f6", "b1c3"):
+            game1.push_uci(move)
+        for move in ("b1c3", "g8f6", "g1f3"):
+            game2.push_uci(move)
+        self.assertEqual(AnalysisCache.key(game1, "engine", 1), AnalysisCache.key(game2, "engine", None))
+        self.assertNotEqual(AnalysisCache.key(game1, "engine", 1), AnalysisCache.key(game1, "other", 1))
+
+    def test_keeps_deeper_analysis(self):
+        cache = AnalysisCache()
+        info = [{"depth": 10}]
+        cache.put("key", info)
+        info[0]["depth"] = 11  # running analysis keeps updating its InfoDict
+        cache.put("key", [{"depth": 8}])
+        self.assertEqual([{"depth": 10}], cache.get("key"))
+
+    def test_least_recently_used_is_removed(self):
+        cache = AnalysisCache(max_positions=2)
+        cache.put("a", [{"depth": 1}])
+        cache.put("b", [{"depth": 1}])
+        cache.get("a")
+        cache.put("c", [{"depth": 1}])
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+
+
+class TestContinuousAnalysisCache(unittest.IsolatedAsyncioTestCase):
+    async def test_cached_analysis_deep_enough_is_served(self):
+        cache = AnalysisCache()
+        game = chess.Board()
+        cache.put(AnalysisCache.key(game, "engine", 3), [{"depth": 17, "multipv": 1}])
+        analyser = ContinuousAnalysis(
+            engine=MockEngine(),
+            delay=0.01,
+            loop=asyncio.get_running_loop(),
+            engine_debug_name="test",
+            engine_lease=EngineLease(),
+            cache=cache,
+            engine_id="engine",
+        )
+        analyser.start(game, limit=Limit(depth=17), multipv=3)  # MockEngine cannot analyse
+        await asyncio.sleep(0.05)
+        self.assertTrue(analyser.is_limit_reached())
+        result = await analyser.get_analysis()
+        self.assertEqual([{"depth": 17, "multipv": 1}], result["info"])
+        self.assertEqual(game.fen(), result["fen"])
+        analyser.cancel()
+
+    async def test_option_change_misses_the_cache(self):
+        cache = AnalysisCache()
+        game = chess.Board()
+        eng = UciEngine("some_test_engine", UciShell(), "", asyncio.get_running_loop())
+        eng.engine = MockEngine()
+        eng.analyser = ContinuousAnalysis(
+            engine=eng.engine,
+            delay=0.01,
+            loop=asyncio.get_running_loop(),
+            engine_debug_name="test",
+            engine_lease=EngineLease(),
+            cache=cache,
+            engine_id=eng.analysis_engine_id(),
+        )
+        await eng.startup({UCI_ELO: "1400"})
+        cache.put(AnalysisCache.key(game, eng.analyser.engine_id, 1), [{"depth": 20, "multipv": 1}])
+        eng.option(UCI_ELO, "2000")
+        await eng.send()
+        self.assertIsNone(cache.get(AnalysisCache.key(game, eng.analyser.engine_id, 1)))
+        eng.option(UCI_ELO, "1400")
+        await eng.send()
+        self.assertIsNotNone(cache.get(AnalysisCache.key(game, eng.analyser.engine_id, 1)))
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import os
+import stat
+import sys
+import tempfile
+import unittest
+
+from uci.engine import UciShell
+from uci.engine_pool import EnginePool
+
+# a tiny UCI engine, enough for opening, configuring and quitting
+FAKE_ENGINE = """#!{python}
+import sys
+for line in sys.stdin:
+    command = line.split()
+    if command == ["uci"]:
+        print("id name {name}")
+        print("option name Hash type spin default 16 min 1 max 1024")
+        print("uciok", flush=True)
+    elif command == ["isready"]:
+        print("readyok", flush=True)
+    elif command == ["quit"]:
+        break
+"""
+
+
+class TestEnginePool(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.files = []
+        for name in ("alpha", "beta"):
+            file = os.path.join(self.folder.name, name)
+            with open(file, "w", encoding="utf-8") as engine:
+                engine.write(FAKE_ENGINE.format(python=sys.executable, name=name))
+            os.chmod(file, os.stat(file).st_mode | stat.S_IEXEC)
+            self.files.append(file)
+        self.shell = UciShell(hostname="", username="", key_file="", password="")
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_released_engine_is_reused(self):
+        async def switch():
+            pool = EnginePool(asyncio.get_running_loop(), size=1)
+            alpha = await pool.acquire(self.files[0], self.shell, "")
+            self.assertEqual("alpha", alpha.get_name())
+            alpha.option("Hash", 64)
+            await alpha.send()
+            await pool.release(alpha)
+            self.assertEqual({}, alpha.get_pgn_options())
+            self.assertIs(alpha, await pool.acquire(self.files[0], self.shell, ""))
+            await pool.release(alpha)
+            self.assertEqual((1, 1), (pool.hits, pool.misses))
+            self.assertIn(self.files[0], pool.stats()["spawn_times"])
+            await pool.close()
+            self.assertFalse(alpha.loaded_ok())
+
+        asyncio.run(switch())
+
+    def test_least_recently_used_engine_is_quit(self):
+        async def switch():
+            pool = EnginePool(asyncio.get_running_loop(), size=1)
+            alpha = await pool.acquire(self.files[0], self.shell, "")
+            beta = await pool.acquire(self.files[1], self.shell, "")
+            await pool.release(alpha)
+            await pool.release(beta)
+            self.assertEqual([self.files[1]], list(pool.idle))
+            await pool.close()
+            self.assertFalse(alpha.loaded_ok() or beta.loaded_ok())
+
+        asyncio.run(switch())
+
+    def test_stopped_idle_engine_is_closed_and_replaced(self):
+        async def switch():
+            pool = EnginePool(asyncio.get_running_loop(), size=1)
+            alpha = await pool.acquire(self.files[0], self.shell, "")
+            await pool.release(alpha)
+            alpha.transport.kill()
+            while alpha.transport.get_returncode() is None:
+                await asyncio.sleep(0.01)
+            again = await pool.acquire(self.files[0], self.shell, "")
+            self.assertIsNot(alpha, again)
+            self.assertEqual((0, 2), (pool.hits, pool.misses))
+            await pool.release(again)
+            await pool.close()
+            self.assertIsNone(alpha.transport)
+
+        asyncio.run(switch())
+
+    def test_prewarm_fills_the_pool(self):
+        async def prewarm():
+            pool = EnginePool(asyncio.get_running_loop(), size=1)
+            await pool.prewarm(self.files + ["engines/mame/mess"], self.shell, "")
+            self.assertEqual([self.files[0]], list(pool.idle))
+            await pool.close()
+
+        asyncio.run(prewarm())
+
+
+if __name__ == "__main__":
+    unittest.main()
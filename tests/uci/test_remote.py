@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import os
+import stat
+import sys
+import tempfile
+import unittest
+
+import chess  # type: ignore
+from chess.engine import Limit  # type: ignore
+
+import uci.remote
+from uci.engine import UciEngine, UciShell
+from uci.remote import RemotePool, UciServer, parse_remote_file
+
+# a tiny UCI engine which always plays its first legal move
+FAKE_ENGINE = """#!{python}
+import sys
+import chess
+board = chess.Board()
+for line in sys.stdin:
+    command = line.split()
+    if command == ["uci"]:
+        print("id name {name}")
+        print("uciok", flush=True)
+    elif command == ["isready"]:
+        print("readyok", flush=True)
+    elif command[:2] == ["position", "startpos"]:
+        board = chess.Board()
+        for move in command[3:]:
+            board.push_uci(move)
+    elif command[:1] == ["go"]:
+        move = next(iter(board.legal_moves)).uci()
+        print("info depth 1 score cp 10 pv " + move)
+        print("bestmove " + move, flush=True)
+    elif command == ["quit"]:
+        break
+"""
+
+
+class TestRemoteEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        for name in ("alpha", "beta"):
+            file = os.path.join(self.folder.name, name)
+            with open(file, "w", encoding="utf-8") as engine:
+                engine.write(FAKE_ENGINE.format(python=sys.executable, name=name))
+            os.chmod(file, os.stat(file).st_mode | stat.S_IEXEC)
+        self.shell = UciShell(hostname="", username="", key_file="", password="")
+        uci.remote.remote_pool = self.pool = RemotePool(secret="s3cret")
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def run_with_server(self, test, max_sessions=4):
+        async def run():
+            server = UciServer(self.folder.name, "s3cret", port=0, max_sessions=max_sessions)
+            port = await server.start()
+            try:
+                await test(server, f"tcp://127.0.0.1:{port}/")
+            finally:
+                self.pool.close()
+                await server.close()
+
+        asyncio.run(run())
+
+    def test_parse_remote_file(self):
+        self.assertIsNone(parse_remote_file("engines/x86_64/a-stockf"))
+        self.assertEqual(("box", 9966, "a-stockf"), parse_remote_file("tcp://box/a-stockf"))
+        self.assertEqual(("10.0.0.2", 7000, "lc0"), parse_remote_file("tcp://10.0.0.2:7000/lc0"))
+        with self.assertRaises(ValueError):
+            parse_remote_file("tcp://box:7000/../../bin/sh")
+
+    def test_connection_is_reused(self):
+        async def test(server, url):
+            alpha = UciEngine(url + "alpha", self.shell, "", asyncio.get_running_loop())
+            await alpha.open_engine()
+            self.assertEqual("alpha", alpha.get_name())
+            result = await alpha.engine.play(chess.Board(), Limit(depth=1))
+            self.assertIn(result.move, chess.Board().legal_moves)
+            await alpha.quit()
+            beta = UciEngine(url + "beta", self.shell, "", asyncio.get_running_loop())
+            await beta.open_engine()
+            self.assertEqual("beta", beta.get_name())
+            await beta.quit()
+            stats = self.pool.stats()["127.0.0.1:{}".format(server.port)]
+            self.assertEqual((1, 1), (stats["connects"], stats["reuses"]))
+            self.assertEqual({}, server.sessions)
+
+        self.run_with_server(test)
+
+    def test_session_resumes_after_broken_connection(self):
+        async def test(server, url):
+            alpha = UciEngine(url + "alpha", self.shell, "", asyncio.get_running_loop())
+            await alpha.open_engine()
+            process = next(iter(server.sessions.values())).process
+            alpha.transport.connection.writer.transport.abort()
+            await asyncio.wait_for(alpha.engine.ping(), 5)
+            self.assertIs(process, next(iter(server.sessions.values())).process)
+            stats = self.pool.stats()["127.0.0.1:{}".format(server.port)]
+            self.assertEqual((2, 1), (stats["connects"], stats["resumes"]))
+            self.assertGreater(stats["isready_p50_ms"], 0)
+            await alpha.quit()
+
+        self.run_with_server(test)
+
+    def test_unknown_engine(self):
+        async def test(server, url):
+            engine = UciEngine(url + "gamma", self.shell, "", asyncio.get_running_loop())
+            await engine.open_engine()
+            self.assertFalse(engine.loaded_ok())
+
+        self.run_with_server(test)
+
+    def test_secret_is_required(self):
+        async def test(server, url):
+            self.assertEqual("127.0.0.1", server.host)
+            self.pool.secret = "guess"
+            engine = UciEngine(url + "alpha", self.shell, "", asyncio.get_running_loop())
+            await engine.open_engine()
+            self.assertFalse(engine.loaded_ok())
+            self.assertEqual({}, server.sessions)
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            writer.write(b"#picochess open session alpha\nuci\n")
+            self.assertEqual(b"#picochess error not authorized\n", await reader.readline())
+            self.assertEqual(b"", await reader.readline())  # closed
+            writer.close()
+
+        self.run_with_server(test)
+        with self.assertRaises(ValueError):
+            UciServer(self.folder.name, "")
+
+    def test_sessions_are_limited(self):
+        async def test(server, url):
+            alpha = UciEngine(url + "alpha", self.shell, "", asyncio.get_running_loop())
+            await alpha.open_engine()
+            beta = UciEngine(url + "beta", self.shell, "", asyncio.get_running_loop())
+            await beta.open_engine()
+            self.assertTrue(alpha.loaded_ok())
+            self.assertFalse(beta.loaded_ok())
+            self.assertEqual(1, len(server.sessions))
+            await alpha.quit()
+
+        self.run_with_server(test, max_sessions=1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -20,22 +20,27 @@ from __future__ import annotations
 
 import asyncio
 from asyncio import CancelledError
+from collections import OrderedDict
 import os
 from typing import Optional, Iterable
 import logging
 import configparser
 import copy
+import hashlib
 
 import spur  # type: ignore
 import paramiko
 
 import chess.engine  # type: ignore
+import chess.polyglot  # type: ignore
 from chess.engine import InfoDict, Limit, UciProtocol, AnalysisResult, PlayResult, EngineTerminatedError
 from chess import Board  # type: ignore
 from uci.rating import Rating, Result
+from uci.remote import REMOTE_PREFIX, popen_remote_uci
 from utilities import write_picochess_ini
 
 FLOAT_ANALYSIS_WAIT = 0.1  # save CPU in ContinuousAnalysis
+ANALYSIS_CACHE_SIZE = 256  # analysed positions kept by the AnalysisCache
 
 # Seconds to wait for an engine to exit before escalating.
 ENGINE_QUIT_TIMEOUT = 3.0  # waiting seconds for a normal engine to quit
@@ -177,6 +182,63 @@ class UciShell(object):
         return self if self._shell is not None else None
 
 
+class AnalysisCache:
+    """Bounded LRU cache of the multipv analysis of positions.
+
+    The key is (zobrist hash, engine id, multipv), the value the list of InfoDict
+    with the deepest analysis seen for the position. The engine id includes a digest
+    of the options sent to the engine, a level or personality change starts afresh.
+    """
+
+    def __init__(self, max_positions: int = ANALYSIS_CACHE_SIZE):
+        self.max_positions = max_positions
+        self._positions: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(game: chess.Board, engine_id: str, multipv: int | None) -> tuple:
+        """return the cache key of a position analysed by engine_id"""
+        return chess.polyglot.zobrist_hash(game), engine_id, multipv or 1
+
+    @staticmethod
+    def depth(info: list[InfoDict] | None) -> int:
+        """return the depth of the first multipv line"""
+        return info[0].get("depth", 0) if info else 0
+
+    def get(self, key: tuple) -> list[InfoDict] | None:
+        """return the cached analysis or None"""
+        info = self._positions.get(key)
+        if info is None:
+            self.misses += 1
+            return None
+        self._positions.move_to_end(key)
+        self.hits += 1
+        return info
+
+    def put(self, key: tuple, info: list[InfoDict]):
+        """store a copy of info unless a deeper analysis is already cached"""
+        if self.depth(self._positions.get(key)) > self.depth(info):
+            return
+        # python-chess keeps updating the InfoDicts of a running analysis
+        self._positions[key] = copy.deepcopy(info)
+        self._positions.move_to_end(key)
+        while len(self._positions) > self.max_positions:
+            self._positions.popitem(last=False)
+
+    def clear(self):
+        """forget all positions"""
+        self._positions.clear()
+
+    def stats(self) -> dict:
+        """return hits, misses and number of cached positions"""
+        return {"hits": self.hits, "misses": self.misses, "positions": len(self._positions)}
+
+
+# shared by all engines - positions of different engines have different engine ids
+analysis_cache = AnalysisCache()
+
+
 class ContinuousAnalysis:
     """class for continous analysis from a chess engine"""
 
@@ -187,11 +249,15 @@ class ContinuousAnalysis:
         loop: asyncio.AbstractEventLoop,
         engine_debug_name: str,
         engine_lease: EngineLease,
+        cache: AnalysisCache | None = None,
+        engine_id: str = "",
     ):
         """
         A continuous analysis generator that runs as a background async task.
 
         :param delay: Time interval to do CPU saving sleep between analysis.
+        :param cache: Analysis of earlier seen positions, None means no caching.
+        :param engine_id: Identifies the engine in the cache keys.
         """
         self.game = None  # latest position requested to be analysed
         self.limit_reached = False  # True when limit reached for position
@@ -208,6 +274,10 @@ class ContinuousAnalysis:
         self.engine: UciProtocol = engine
         self.set_game_id(1)  # initial game identifier
         self.engine_lease = engine_lease
+        self.cache = cache
+        self.engine_id = engine_id
+        self.cache_key: tuple | None = None  # cache key of current_game
+        self.cached_depth = 0  # depth of the cached analysis of current_game
         if not self.engine:
             logger.error("%s ContinuousAnalysis initialised without engine", self.whoami)
 
@@ -245,9 +315,11 @@ class ContinuousAnalysis:
                     self.current_game = self.game.copy()  # position
                     self.limit_reached = False
                     self.current_game_id = self.game_id  # new id for each game
-                    self._analysis_data = None
+                    self._analysis_data = self._get_cached_analysis()
                 debug_once_limit = True  # ok to debug once more after coming here again
                 debug_once_game = True
+                if self.limit_reached:
+                    continue  # served from cache
                 await self._analyse_forever(self.limit, self.multipv)
             except asyncio.CancelledError:
                 logger.debug("%s cancelled", self.whoami)
@@ -323,12 +395,33 @@ class ContinuousAnalysis:
                 result = j.get("depth", 0)
         return result
 
+    def _get_cached_analysis(self) -> list[InfoDict] | None:
+        """internal function returning the cached analysis of current_game
+        sets limit_reached if the cached analysis is deep enough"""
+        # lock is on when we come here
+        self.cache_key = None
+        self.cached_depth = 0
+        if self.cache is None or self.current_game is None:
+            return None
+        self.cache_key = self.cache.key(self.current_game, self.engine_id, self.multipv)
+        info = self.cache.get(self.cache_key)
+        self.cached_depth = self.cache.depth(info)
+        if info and self.limit and self.limit.depth and self.cached_depth >= self.limit.depth:
+            self.limit_reached = True
+        return info
+
     def _update_analysis_data(self, analysis: AnalysisResult) -> bool:
         """internal function for updating while analysing
         returns True if data was updated"""
         # lock is on when we come here
         result = False
         if analysis.multipv:
+            depth = analysis.multipv[0].get("depth", 0)
+            if depth < self.cached_depth:
+                return result  # keep the cached analysis until the search gets deeper
+            if self.cache is not None and self.cache_key and depth > self.cached_depth:
+                self.cache.put(self.cache_key, analysis.multipv)
+                self.cached_depth = depth
             self._analysis_data = analysis.multipv
             result = True
         return result
@@ -677,10 +770,11 @@ class UciEngine(object):
         self.is_mame = "/mame/" in self.file
         self.is_script = "/script/" in self.file
         self.legacy_analysis_mode = False
-        self.transport = None  # find out correct type
+        self.transport: asyncio.SubprocessTransport | None = None
         self.engine: UciProtocol | None = None
         self.engine_name = "NN"
         self.options: dict = {}
+        self.sent_options: dict = {}  # options the engine was last configured with
         self.res: PlayResult = None
         self.level_support = False
         self.shell = None  # check if uci files can be used any more
@@ -699,7 +793,7 @@ class UciEngine(object):
                 mfile = [self.file]
             logger.info("mfile %s", mfile)
             logger.info("opening engine")
-            self.transport, self.engine = await chess.engine.popen_uci(mfile)
+            self.transport, self.engine = await self._popen_uci(mfile)
             # Instantiate the two “sisters”
             self.engine_lease = EngineLease()
             self.analyser = ContinuousAnalysis(
@@ -708,6 +802,8 @@ class UciEngine(object):
                 loop=self.loop,
                 engine_debug_name=self.whoami,
                 engine_lease=self.engine_lease,
+                cache=analysis_cache,
+                engine_id=self.analysis_engine_id(),
             )
             self.playing = PlayingContinuousAnalysis(
                 engine=self.engine,
@@ -736,6 +832,12 @@ class UciEngine(object):
             self.transport = None
             self.engine = None
 
+    async def _popen_uci(self, mfile: list):
+        """Start the engine process - or the engine on a remote engine server for a tcp:// file"""
+        if self.file.startswith(REMOTE_PREFIX):
+            return await popen_remote_uci(self.file)
+        return await chess.engine.popen_uci(mfile)
+
     async def reopen_engine(self) -> bool:
         """Re-open engine. Return True if engine re-opened ok."""
         try:
@@ -750,7 +852,7 @@ class UciEngine(object):
             else:
                 mfile = [self.file]
             logger.info("re-opening engine %s", mfile)
-            self.transport, self.engine = await chess.engine.popen_uci(mfile)
+            self.transport, self.engine = await self._popen_uci(mfile)
             # Dont instantiate the two “sisters” - they already exist, but update engine
             if self.analyser:
                 self.analyser.engine = self.engine
@@ -837,6 +939,7 @@ class UciEngine(object):
             # issue 85 - remove options not allowed by engine before sending
             options = self.filter_options(self.options, self.engine.options)
             await self.engine.configure(options)
+            self._set_sent_options(options)
             try:
                 await self.engine.ping()  # send isready and wait for answer
             except CancelledError:
@@ -844,6 +947,17 @@ class UciEngine(object):
         except chess.engine.EngineError as e:
             logger.warning(e)
 
+    def analysis_engine_id(self) -> str:
+        """Return the analysis cache id of the engine with the options it was last sent."""
+        options = repr(sorted((name, str(value)) for name, value in self.sent_options.items()))
+        digest = hashlib.sha1(options.encode()).hexdigest()[:12]
+        return self.file + ":" + self.whoami + ":" + digest
+
+    def _set_sent_options(self, options: dict):
+        self.sent_options = options.copy()
+        if self.analyser:
+            self.analyser.engine_id = self.analysis_engine_id()
+
     def has_levels(self):
         """Return engine level support."""
         has_lv = self.has_skill_level() or self.has_handicap_level() or self.has_limit_strength() or self.has_strength()
@@ -889,6 +1003,26 @@ class UciEngine(object):
             await self._shutdown_standard_engine()
         await asyncio.sleep(1)  # give it some time to quit
 
+    async def stand_by(self):
+        """Stop the analysis and reset the sent options, the engine process keeps running."""
+        if self.analyser and self.analyser.is_running():
+            self.analyser.cancel()
+        if self.playing and self.playing.is_waiting_for_move():
+            self.playing.cancel()
+        if self.engine:
+            defaults = {}
+            for name in self.options:
+                option = self.engine.options.get(name)
+                if option is not None and option.default is not None and not option.is_managed():
+                    defaults[name] = option.default
+            try:
+                await self.engine.configure(defaults)
+                await self.engine.ping()
+            except (chess.engine.EngineError, EngineTerminatedError) as e:
+                logger.warning(e)
+        self.options = {}
+        self._set_sent_options({})
+
     async def _shutdown_standard_engine(self) -> None:
         """Attempt a graceful shutdown and escalate if the engine ignores us."""
         if not self.engine and not self.transport:
@@ -1205,6 +1339,13 @@ class UciEngine(object):
             logger.debug("caller has forgot to start analysis")
         return result
 
+    async def analyse(self, game: chess.Board, limit: Limit) -> InfoDict:
+        """Analyse game until limit and return the final info - only for an engine not playing or analysing"""
+        if self.engine is None:
+            raise chess.engine.EngineError("engine {} not loaded".format(self.file))
+        async with self.engine_lock:
+            return await self.engine.analyse(game, limit, game=self.game_id)
+
     def is_analysis_limit_reached(self) -> bool:
         """return True if limit was reached for position being analysed"""
         if self.analyser and self.analyser.is_running():
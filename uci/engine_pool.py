@@ -0,0 +1,147 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import logging
+import time
+import weakref
+from collections import OrderedDict
+from typing import Dict, Iterable
+
+from uci.engine import UciEngine, UciShell
+
+ENGINE_POOL_SIZE = 2  # idle engines kept running
+ENGINE_POOL_MEMORY = 512  # MB the idle engines may use
+
+logger = logging.getLogger(__name__)
+
+
+def engine_memory(engine: UciEngine) -> int:
+    """Return the resident memory in bytes of the engine process, 0 if unknown."""
+    if engine.transport is None:
+        return 0
+    pid = engine.transport.get_pid()
+    if pid is None:  # a remote engine
+        return 0
+    try:
+        with open(f"/proc/{pid}/status", "r", encoding="utf-8") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return 0
+
+
+class EnginePool(object):
+    """Idle engine processes, so changing the engine is only a switch to an already started one.
+
+    The pool keeps the engines released by picochess and started favorites in least recently
+    used order, at most size engines using max_memory MB. Only engines started by the pool
+    which don't run in mame or a script are kept - all others are quit on release.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, size=ENGINE_POOL_SIZE, max_memory=ENGINE_POOL_MEMORY):
+        self.loop = loop
+        self.size = size
+        self.max_memory = max_memory * 1024 * 1024
+        self.idle: OrderedDict[str, UciEngine] = OrderedDict()  # file: engine, least recently used first
+        self.memory: Dict[str, int] = {}  # file: bytes used by the idle engine
+        self.spawn_times: Dict[str, float] = {}  # file: seconds of the last start
+        self.spawned: weakref.WeakSet = weakref.WeakSet()
+        self.quitting: set = set()  # tasks of evicted engines
+        self.hits = self.misses = 0
+
+    @staticmethod
+    def poolable_file(file: str) -> bool:
+        return "/mame/" not in file and "/script/" not in file
+
+    def _over_budget(self) -> bool:
+        return len(self.idle) > self.size or sum(self.memory.values()) > self.max_memory
+
+    async def spawn(self, file: str, uci_shell: UciShell, mame_par: str) -> UciEngine:
+        """Start a new engine process."""
+        start = time.monotonic()
+        engine = UciEngine(file=file, uci_shell=uci_shell, mame_par=mame_par, loop=self.loop)
+        await engine.open_engine()
+        self.spawn_times[file] = time.monotonic() - start
+        logger.info("engine %s started in %.2fs", file, self.spawn_times[file])
+        self.spawned.add(engine)
+        return engine
+
+    async def acquire(self, file: str, uci_shell: UciShell, mame_par: str) -> UciEngine:
+        """Return the idle engine of file or start a new one."""
+        engine = self.idle.pop(file, None)
+        self.memory.pop(file, None)
+        if engine is not None:
+            if engine.transport and engine.transport.get_returncode() is None:
+                self.hits += 1
+                logger.info("engine %s taken from the pool", file)
+                return engine
+            logger.warning("idle engine %s has stopped", file)
+            self._quit(engine)  # close its transport
+        self.misses += 1
+        return await self.spawn(file, uci_shell, mame_par)
+
+    async def release(self, engine: UciEngine):
+        """Keep the engine running in the pool or quit it."""
+        file = engine.get_file()
+        if engine not in self.spawned or not self.size or not engine.loaded_ok() or not self.poolable_file(file):
+            await engine.quit()
+            return
+        await engine.stand_by()
+        replaced = self.idle.pop(file, None)
+        if replaced is not None and replaced is not engine:
+            self._quit(replaced)
+        self.idle[file] = engine
+        self.memory[file] = engine_memory(engine)
+        while self.idle and self._over_budget():
+            old_file, old_engine = self.idle.popitem(last=False)
+            self.memory.pop(old_file, None)
+            logger.info("engine %s removed from the pool", old_file)
+            self._quit(old_engine)
+
+    def _quit(self, engine: UciEngine):
+        # quit takes more than a second, don't let the engine switch wait for it
+        task = self.loop.create_task(engine.quit())
+        self.quitting.add(task)
+        task.add_done_callback(self.quitting.discard)
+
+    async def prewarm(self, files: Iterable[str], uci_shell: UciShell, mame_par: str):
+        """Start engines of files (most wanted first) until the pool is full."""
+        for file in files:
+            if len(self.idle) >= self.size or sum(self.memory.values()) >= self.max_memory:
+                break
+            if file in self.idle or not self.poolable_file(file):
+                continue
+            engine = await self.spawn(file, uci_shell, mame_par)
+            if engine.loaded_ok():
+                await self.release(engine)
+
+    async def close(self):
+        """Quit all idle engines."""
+        while self.idle:
+            self._quit(self.idle.popitem()[1])
+        self.memory.clear()
+        if self.quitting:
+            await asyncio.gather(*self.quitting, return_exceptions=True)
+
+    def stats(self) -> dict:
+        """Return the idle engines, their memory, the spawn times and hit counts."""
+        return {
+            "idle": list(self.idle),
+            "memory_mb": round(sum(self.memory.values()) / 1024 / 1024, 1),
+            "spawn_times": {file: round(seconds, 2) for file, seconds in self.spawn_times.items()},
+            "hits": self.hits,
+            "misses": self.misses,
+        }
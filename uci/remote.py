@@ -0,0 +1,596 @@
+#!/usr/bin/env python3
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""UCI engines on another computer over TCP.
+
+An engine file like tcp://host:port/stockfish runs the engine stockfish of the engine folder
+served by a UciServer on host. The UCI lines are passed unchanged, the few control lines
+start with CONTROL:
+
+    client: CONTROL open <session> <engine> <secret>        server: CONTROL ok started
+    client: CONTROL resume <session> <received> <secret>    server: CONTROL ok resumed <received>
+    client: CONTROL kill                                    server: CONTROL exit <returncode>
+
+The secret is shared by the server and its clients (engine-remote-secret in picochess.ini), a
+connection that sends a wrong one is closed. It keeps other computers from starting engines, the
+lines themselves are not encrypted. The server listens on 127.0.0.1 unless told otherwise and runs
+at most MAX_SESSIONS engines at a time.
+
+A connection is kept after the engine quit and used for the next engine. If the connection
+breaks, the client connects again and resumes the session: the server keeps the engine
+running for RESUME_TIMEOUT seconds and both sides send again the lines the other side missed.
+
+Start a server for the engines of a folder with:
+python3 -m uci.remote --engine-home engines/x86_64 --host 0.0.0.0 --secret <secret>
+"""
+
+import argparse
+import asyncio
+import hmac
+import logging
+import os
+import platform
+import time
+import uuid
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from chess.engine import UciProtocol  # type: ignore
+
+REMOTE_PREFIX = "tcp://"
+REMOTE_ENGINE_PORT = 9966
+REMOTE_ENGINE_HOST = "127.0.0.1"  # the server only listens on other interfaces if told so
+SECRET_VARIABLE = "PICOCHESS_ENGINE_SECRET"  # environment variable with the secret of the server
+MAX_SESSIONS = 4  # engines the server runs at a time
+CONTROL = "#picochess"
+CONNECT_TIMEOUT = 5.0  # seconds for connecting and the open/resume answer
+RESUME_TIMEOUT = 30.0  # seconds the server keeps the engine of a broken connection
+RECONNECT_TRIES = 5
+RECONNECT_WAIT = 1.0  # seconds, multiplied by the try number
+REPLAY_LINES = 1000  # lines kept by both sides to resume a session
+REMOTE_POOL_SIZE = 2  # idle connections kept per server
+LATENCY_SAMPLES = 100
+
+logger = logging.getLogger(__name__)
+
+
+def parse_remote_file(file: str) -> Optional[Tuple[str, int, str]]:
+    """Return (host, port, engine) of a tcp://host:port/engine file, None for a local engine file."""
+    if not file.startswith(REMOTE_PREFIX):
+        return None
+    address, _, engine = file[len(REMOTE_PREFIX) :].partition("/")
+    host, _, port = address.partition(":")
+    if not host or not engine or "/" in engine:
+        raise ValueError("remote engine file must look like tcp://host:port/engine, not " + file)
+    return host, int(port) if port else REMOTE_ENGINE_PORT, engine
+
+
+def control_line(*words) -> bytes:
+    return (" ".join([CONTROL] + [str(word) for word in words]) + "\n").encode("utf-8")
+
+
+class RemoteStats(object):
+    """Connection, latency and throughput counters of one remote engine server."""
+
+    def __init__(self):
+        self.connects = self.reuses = self.reconnects = self.resumes = self.failures = 0
+        self.bytes_in = self.bytes_out = self.lines_in = self.lines_out = 0
+        self.session_time = 0.0  # seconds engines were running
+        self.connect_times: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self.round_trips: Deque[float] = deque(maxlen=LATENCY_SAMPLES)  # isready - readyok
+
+    @staticmethod
+    def _ms(samples: Deque[float]) -> float:
+        return round(sorted(samples)[len(samples) // 2] * 1000, 1) if samples else 0.0
+
+    def report(self) -> dict:
+        seconds = max(self.session_time, 0.001)
+        return {
+            "connects": self.connects,
+            "reuses": self.reuses,
+            "reconnects": self.reconnects,
+            "resumes": self.resumes,
+            "failures": self.failures,
+            "connect_p50_ms": self._ms(self.connect_times),
+            "isready_p50_ms": self._ms(self.round_trips),
+            "lines_in": self.lines_in,
+            "lines_out": self.lines_out,
+            "kb_in_per_s": round(self.bytes_in / 1024 / seconds, 2),
+            "kb_out_per_s": round(self.bytes_out / 1024 / seconds, 2),
+        }
+
+
+class RemoteConnection(object):
+    """One TCP connection to a UciServer, used by one engine after the other."""
+
+    def __init__(self, pool: "RemotePool", key: Tuple[str, int], reader, writer):
+        self.pool = pool
+        self.key = key
+        self.stats = pool.get_stats(key)
+        self.reader: asyncio.StreamReader = reader
+        self.writer: asyncio.StreamWriter = writer
+        self.transport: Optional["RemoteTransport"] = None
+        self.reply: Optional[asyncio.Future] = None
+        self.task = asyncio.create_task(self.read_lines())
+
+    def is_open(self) -> bool:
+        return not self.task.done() and not self.writer.is_closing()
+
+    def send(self, data: bytes):
+        self.stats.bytes_out += len(data)
+        self.writer.write(data)
+
+    async def request(self, *words) -> List[str]:
+        """Send a control line and return the words of the answer."""
+        self.reply = asyncio.get_running_loop().create_future()
+        self.send(control_line(*words))
+        try:
+            return await asyncio.wait_for(self.reply, CONNECT_TIMEOUT)
+        finally:
+            self.reply = None
+
+    async def read_lines(self):
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                self.stats.bytes_in += len(line)
+                if line.startswith(CONTROL.encode("utf-8")):
+                    self.control(line.decode("utf-8").split()[1:])
+                elif self.transport:
+                    self.transport.line_received(line)
+        except (OSError, ValueError):
+            pass  # broken connection or a line over the stream limit
+        finally:
+            self.writer.close()
+            self.pool.discard(self)
+            if self.reply and not self.reply.done():
+                self.reply.set_exception(ConnectionError("remote engine server closed the connection"))
+            if self.transport:
+                self.transport.connection_broken(self)
+
+    def control(self, words: List[str]):
+        if words[:1] in (["ok"], ["error"]) and self.reply and not self.reply.done():
+            self.reply.set_result(words)
+        elif words[:1] == ["exit"] and self.transport:
+            self.transport.exited(int(words[1]) if len(words) > 1 else -1)
+
+    def close(self):
+        self.writer.close()
+
+
+class RemoteTransport(asyncio.SubprocessTransport):
+    """The engine process for the UciProtocol, running on the other side of a RemoteConnection."""
+
+    def __init__(self, pool: "RemotePool", host: str, port: int, engine: str, protocol: UciProtocol):
+        super(RemoteTransport, self).__init__()
+        self.pool = pool
+        self.host = host
+        self.port = port
+        self.engine = engine
+        self.protocol = protocol
+        self.stats = pool.get_stats((host, port))
+        self.session = uuid.uuid4().hex
+        self.connection: Optional[RemoteConnection] = None
+        self.returncode: Optional[int] = None
+        self.sent: Deque[Tuple[int, bytes]] = deque(maxlen=REPLAY_LINES)
+        self.sent_no = self.received_no = 0
+        self.ping_time = 0.0
+        self.start_time = time.monotonic()
+        self.reconnect_task: Optional[asyncio.Task] = None
+
+    async def open(self):
+        """Start the engine on the server."""
+        connection = await self.pool.acquire(self.host, self.port)
+        connection.transport = self
+        try:
+            answer = await connection.request("open", self.session, self.engine, self.pool.secret)
+        except (OSError, asyncio.TimeoutError):
+            connection.close()
+            raise
+        if answer[:2] != ["ok", "started"]:
+            connection.transport = None
+            self.pool.release(connection)
+            raise OSError("remote engine {} not started: {}".format(self.engine, " ".join(answer[1:])))
+        self.connection = connection
+        self.start_time = time.monotonic()
+
+    # the SubprocessTransport (and stdin WriteTransport) methods used by chess.engine and UciEngine
+
+    def get_pid(self):
+        return None
+
+    def get_returncode(self) -> Optional[int]:
+        return self.returncode
+
+    def get_pipe_transport(self, fd):
+        return self
+
+    def is_closing(self) -> bool:
+        return self.returncode is not None
+
+    def write(self, data: bytes):
+        for line in data.splitlines(keepends=True):
+            self.sent_no += 1
+            self.sent.append((self.sent_no, line))
+            self.stats.lines_out += 1
+            if line.strip() == b"isready":
+                self.ping_time = time.monotonic()
+        if self.connection:
+            self.connection.send(data)
+        # without a connection the lines are sent again when the session is resumed
+
+    def terminate(self):
+        self.kill()
+
+    def kill(self):
+        if self.returncode is not None:
+            return
+        if self.connection:
+            self.connection.send(control_line("kill"))
+        else:
+            self.exited(-9)
+
+    def close(self):
+        self.kill()
+
+    def line_received(self, line: bytes):
+        self.received_no += 1
+        self.stats.lines_in += 1
+        if self.ping_time and line.strip() == b"readyok":
+            self.stats.round_trips.append(time.monotonic() - self.ping_time)
+            self.ping_time = 0.0
+        self.protocol.pipe_data_received(1, line)
+
+    def exited(self, returncode: int):
+        """The engine process ended, give the connection back to the pool."""
+        if self.returncode is not None:
+            return
+        self.returncode = returncode
+        self.stats.session_time += time.monotonic() - self.start_time
+        connection, self.connection = self.connection, None
+        if connection:
+            connection.transport = None
+            self.pool.release(connection)
+        if self.reconnect_task and self.reconnect_task is not asyncio.current_task():
+            self.reconnect_task.cancel()
+        self.protocol.process_exited()
+        self.protocol.connection_lost(None)
+
+    def connection_broken(self, connection: RemoteConnection):
+        if connection is not self.connection:
+            return
+        self.connection = None
+        if self.returncode is None and self.reconnect_task is None:
+            logger.warning("connection to remote engine %s broken - reconnecting", self.engine)
+            self.reconnect_task = asyncio.create_task(self.reconnect())
+
+    async def reconnect(self):
+        """Connect again and resume the session, the engine dies if that fails."""
+        try:
+            for attempt in range(RECONNECT_TRIES):
+                await asyncio.sleep(RECONNECT_WAIT * attempt)
+                self.stats.reconnects += 1
+                try:
+                    connection = await self.pool.connect(self.host, self.port)
+                    connection.transport = self
+                    answer = await connection.request("resume", self.session, self.received_no, self.pool.secret)
+                except (OSError, asyncio.TimeoutError) as e:
+                    logger.debug("reconnect %d to %s failed: %s", attempt + 1, self.host, e)
+                    continue
+                if answer[:2] == ["ok", "resumed"] and self.resume(connection, int(answer[2])):
+                    return
+                connection.transport = None
+                connection.close()
+                break  # the server has lost the session
+            logger.warning("remote engine %s lost", self.engine)
+            self.stats.failures += 1
+            self.exited(-1)
+        finally:
+            self.reconnect_task = None
+
+    def resume(self, connection: RemoteConnection, received_no: int) -> bool:
+        """Send again the lines the server missed, False if they aren't kept any more."""
+        if self.sent and self.sent[0][0] > received_no + 1:
+            return False
+        self.connection = connection
+        for number, line in self.sent:
+            if number > received_no:
+                connection.send(line)
+        self.stats.resumes += 1
+        logger.info("remote engine %s resumed", self.engine)
+        return True
+
+
+class RemotePool(object):
+    """Idle connections to the remote engine servers, and their counters."""
+
+    def __init__(self, size: int = REMOTE_POOL_SIZE, secret: str = ""):
+        self.size = size
+        self.secret = secret  # sent with open and resume, set from engine-remote-secret
+        self.idle: Dict[Tuple[str, int], List[RemoteConnection]] = {}
+        self.counters: Dict[Tuple[str, int], RemoteStats] = {}
+
+    def get_stats(self, key: Tuple[str, int]) -> RemoteStats:
+        return self.counters.setdefault(key, RemoteStats())
+
+    async def connect(self, host: str, port: int) -> RemoteConnection:
+        """Open a new connection."""
+        start = time.monotonic()
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), CONNECT_TIMEOUT)
+        stats = self.get_stats((host, port))
+        stats.connects += 1
+        stats.connect_times.append(time.monotonic() - start)
+        return RemoteConnection(self, (host, port), reader, writer)
+
+    async def acquire(self, host: str, port: int) -> RemoteConnection:
+        """Return an idle connection to the server or open a new one."""
+        idle = self.idle.get((host, port), [])
+        while idle:
+            connection = idle.pop()
+            if connection.is_open():
+                self.get_stats((host, port)).reuses += 1
+                return connection
+        return await self.connect(host, port)
+
+    def release(self, connection: RemoteConnection):
+        idle = self.idle.setdefault(connection.key, [])
+        if connection.is_open() and len(idle) < self.size:
+            idle.append(connection)
+        else:
+            connection.close()
+
+    def discard(self, connection: RemoteConnection):
+        idle = self.idle.get(connection.key, [])
+        if connection in idle:
+            idle.remove(connection)
+
+    def close(self):
+        """Close all idle connections."""
+        for idle in self.idle.values():
+            for connection in idle:
+                connection.close()
+        self.idle.clear()
+
+    def stats(self) -> dict:
+        return {"{}:{}".format(host, port): stats.report() for (host, port), stats in self.counters.items()}
+
+
+remote_pool = RemotePool()
+
+
+async def popen_remote_uci(file: str) -> Tuple[RemoteTransport, UciProtocol]:
+    """Like chess.engine.popen_uci() for a tcp://host:port/engine file."""
+    try:
+        remote = parse_remote_file(file)
+    except ValueError as e:
+        raise OSError(e) from e
+    if remote is None:
+        raise OSError("not a remote engine file: " + file)
+    host, port, engine = remote
+    protocol = UciProtocol()
+    transport = RemoteTransport(remote_pool, host, port, engine, protocol)
+    await transport.open()
+    protocol.connection_made(transport)
+    try:
+        await protocol.initialize()
+    except Exception:
+        transport.close()
+        raise
+    return transport, protocol
+
+
+class EngineSession(object):
+    """An engine process of the UciServer and the lines to resume it."""
+
+    def __init__(self, session_id: str, process: asyncio.subprocess.Process):
+        if process.stdin is None or process.stdout is None:
+            raise OSError("engine process of session {} has no pipes".format(session_id))
+        self.session_id = session_id
+        self.process = process
+        self.stdin: asyncio.StreamWriter = process.stdin
+        self.stdout: asyncio.StreamReader = process.stdout
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.sent: Deque[Tuple[int, bytes]] = deque(maxlen=REPLAY_LINES)
+        self.sent_no = self.received_no = 0
+        self.expire: Optional[asyncio.TimerHandle] = None
+
+    def is_running(self) -> bool:
+        return self.process.returncode is None
+
+
+class UciServer(object):
+    """Serve the engines of engine_home over TCP - a stand-in for a remote engine computer."""
+
+    def __init__(
+        self,
+        engine_home: str,
+        secret: str,
+        host: str = REMOTE_ENGINE_HOST,
+        port: int = REMOTE_ENGINE_PORT,
+        resume_timeout=RESUME_TIMEOUT,
+        max_sessions: int = MAX_SESSIONS,
+    ):
+        if not secret or len(secret.split()) != 1:
+            raise ValueError("the engine server needs a secret without blanks")
+        self.engine_home = engine_home
+        self.secret = secret
+        self.host = host
+        self.port = port
+        self.max_sessions = max_sessions
+        self.resume_timeout = resume_timeout
+        self.sessions: Dict[str, EngineSession] = {}
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.pumps: set = set()  # tasks sending engine output
+
+    async def start(self) -> int:
+        """Start listening and return the port (useful with port 0)."""
+        self.server = await asyncio.start_server(self.serve, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        logger.info("serving engines of %s on port %d", self.engine_home, self.port)
+        return self.port
+
+    async def close(self):
+        for session in list(self.sessions.values()):
+            if session.is_running():
+                session.process.kill()
+            await session.process.wait()
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+
+    def engine_path(self, engine: str) -> Optional[str]:
+        """Return the path of an engine in engine_home, None if there is no such engine."""
+        if os.sep in engine or "/" in engine or engine.startswith("."):
+            return None
+        path = os.path.join(self.engine_home, engine)
+        return path if os.path.isfile(path) and os.access(path, os.X_OK) else None
+
+    async def serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        session: Optional[EngineSession] = None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.startswith(CONTROL.encode("utf-8")):
+                    session = await self.control(line.decode("utf-8").split()[1:], session, writer)
+                elif session and session.is_running():
+                    session.received_no += 1
+                    session.stdin.write(line)
+        except (OSError, ValueError):
+            pass
+        finally:
+            if session and session.writer is writer:
+                self.detach(session)
+            writer.close()
+
+    def authorized(self, secret: str) -> bool:
+        return hmac.compare_digest(secret.encode("utf-8"), self.secret.encode("utf-8"))
+
+    async def control(self, words: List[str], session: Optional[EngineSession], writer) -> Optional[EngineSession]:
+        command = words[0] if words else ""
+        if command in ("open", "resume") and (len(words) != 4 or not self.authorized(words[3])):
+            writer.write(control_line("error", "not authorized"))
+            logger.warning("%s without the secret from %s", command, writer.get_extra_info("peername"))
+            raise ValueError("not authorized")  # closes the connection
+        if command == "open":
+            path = self.engine_path(words[2])
+            if path is None:
+                writer.write(control_line("error", "unknown engine"))
+                return None
+            if len(self.sessions) >= self.max_sessions:
+                writer.write(control_line("error", "too many engines"))
+                return None
+            process = await asyncio.create_subprocess_exec(
+                path,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+                cwd=self.engine_home,
+            )
+            session = EngineSession(words[1], process)
+            self.sessions[session.session_id] = session
+            session.writer = writer
+            writer.write(control_line("ok", "started"))
+            pump = asyncio.create_task(self.pump(session))
+            self.pumps.add(pump)
+            pump.add_done_callback(self.pumps.discard)
+            logger.info("engine %s started for session %s", words[2], session.session_id)
+            return session
+        if command == "resume":
+            session = self.sessions.get(words[1])
+            received_no = int(words[2])
+            if session is None or (session.sent and session.sent[0][0] > received_no + 1):
+                writer.write(control_line("error", "session lost"))
+                return None
+            if session.expire:
+                session.expire.cancel()
+                session.expire = None
+            if session.writer is not None:
+                session.writer.close()
+            session.writer = writer
+            writer.write(control_line("ok", "resumed", session.received_no))
+            for number, line in session.sent:
+                if number > received_no:
+                    writer.write(line)
+            logger.info("session %s resumed", session.session_id)
+            return session
+        if command == "kill" and session and session.is_running():
+            session.process.kill()
+        return session
+
+    def detach(self, session: EngineSession):
+        """The connection broke, keep the engine for a while."""
+        session.writer = None
+        if session.is_running():
+            session.expire = asyncio.get_running_loop().call_later(self.resume_timeout, session.process.kill)
+
+    async def pump(self, session: EngineSession):
+        """Send the engine output to the client until the engine ends."""
+        while True:
+            line = await session.stdout.readline()
+            if not line:
+                break
+            session.sent_no += 1
+            session.sent.append((session.sent_no, line))
+            if session.writer:
+                session.writer.write(line)
+        returncode = await session.process.wait()
+        self.sessions.pop(session.session_id, None)
+        if session.expire:
+            session.expire.cancel()
+        if session.writer:
+            session.writer.write(control_line("exit", returncode))
+        logger.info("engine of session %s ended with %d", session.session_id, returncode)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--engine-home",
+        default=os.path.join("engines", platform.machine()),
+        help="folder of the engines to serve",
+    )
+    parser.add_argument("--host", default=REMOTE_ENGINE_HOST, help="address to listen on, 0.0.0.0 for all interfaces")
+    parser.add_argument("--port", type=int, default=REMOTE_ENGINE_PORT, help="TCP port to listen on")
+    parser.add_argument(
+        "--secret",
+        default=os.environ.get(SECRET_VARIABLE, ""),
+        help="the engine-remote-secret of the clients, default the {} variable".format(SECRET_VARIABLE),
+    )
+    parser.add_argument("--max-sessions", type=int, default=MAX_SESSIONS, help="engines running at a time")
+    args = parser.parse_args()
+    if not args.secret:
+        parser.error("a secret is needed, give --secret or set " + SECRET_VARIABLE)
+    logging.basicConfig(level=logging.INFO)
+
+    async def serve():
+        server = UciServer(args.engine_home, args.secret, args.host, args.port, max_sessions=args.max_sessions)
+        await server.start()
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,18 @@
 # upload_handler.py
 
+import asyncio
+import base64
 import os
+import re
 import sys
-import base64
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import chess.pgn  # type: ignore
 import pam
 import tornado.web
-from tornado import escape
+from tornado import escape, httputil
 
-from utilities import Observable
+from utilities import Observable, write_offset_index
 from dgt.api import Event
 
 UPLOAD_BASE_DIR = "/opt/picochess/games"
@@ -15,8 +20,161 @@ UPLOAD_DIR = "uploads"
 if "unittest" not in sys.modules:  # do not create directories while running tests
     os.makedirs(os.path.join(UPLOAD_BASE_DIR, UPLOAD_DIR), exist_ok=True)
 
+MAX_UPLOAD_SIZE = 512 * 1024 * 1024  # uploads go to disk, not into memory like other request bodies
+MAX_LINE = 64 * 1024  # a longer line is no pgn text
+MAX_PART_HEADERS = 16 * 1024
+COMMENT = re.compile(r"\{[^}]*\}|;.*")
+MOVETEXT = re.compile(
+    r"1-0|0-1|1/2-1/2|\*|[O0]-[O0](?:-[O0])?|--|Z0|e\.p\.|[NBKRQ]?[a-h]?[1-8]?[-x:]?[a-h][1-8](?:=?[NBRQnbrq])?"
+    r"|[PNBRQK]?@[a-h][1-8]|[+#]|[?!]{1,2}|\$\d+|\d+\.*|\.+|[()]|\s+"
+)
+
+
+class MultipartStream:
+    """Split a multipart/form-data body that arrives in chunks into its parts."""
+
+    def __init__(self, boundary: bytes):
+        self.delimiter = b"\r\n--" + boundary
+        self.buffer = b"\r\n"  # the first delimiter starts the body, without a line break in front
+        self.state = "preamble"
+
+    @property
+    def done(self) -> bool:
+        return self.state == "end"
+
+    def feed(self, chunk: bytes) -> Iterator[Tuple[Optional[Dict[str, str]], bytes]]:
+        """Yield (content disposition, b"") when a part starts and (None, data) for its content."""
+        self.buffer += chunk
+        while True:
+            if self.state in ("preamble", "body"):
+                found = self.buffer.find(self.delimiter)
+                if found < 0:
+                    keep = min(len(self.buffer), len(self.delimiter) - 1)  # the start of a delimiter
+                    if self.state == "body" and len(self.buffer) > keep:
+                        yield None, self.buffer[: len(self.buffer) - keep]
+                    self.buffer = self.buffer[len(self.buffer) - keep :]
+                    return
+                if self.state == "body" and found:
+                    yield None, self.buffer[:found]
+                self.buffer = self.buffer[found + len(self.delimiter) :]
+                self.state = "delimiter"
+            elif self.state == "delimiter":
+                if len(self.buffer) < 2:
+                    return
+                if self.buffer.startswith(b"--"):
+                    self.state, self.buffer = "end", b""
+                    return
+                if not self.buffer.startswith(b"\r\n"):
+                    raise ValueError("Broken multipart body")
+                self.buffer = self.buffer[2:]
+                self.state = "headers"
+            elif self.state == "headers":
+                found = self.buffer.find(b"\r\n\r\n")
+                if found < 0:
+                    if len(self.buffer) > MAX_PART_HEADERS:
+                        raise ValueError("Broken multipart body")
+                    return
+                headers = httputil.HTTPHeaders.parse(self.buffer[:found].decode("utf-8", errors="replace"))
+                self.buffer = self.buffer[found + 4 :]
+                self.state = "body"
+                yield httputil._parse_header(headers.get("Content-Disposition", ""))[1], b""
+            else:
+                self.buffer = b""  # the epilogue
+                return
+
+
+class PgnScanner:
+    """Find the games of pgn text that arrives in chunks, raise ValueError as soon as it is no pgn.
+
+    Only the structure is checked: tag lines, comments and the tokens of the movetext.
+    Whether the moves are legal is found out when a game is loaded.
+    """
 
+    def __init__(self):
+        self.offsets: List[int] = []  # where the games start, like chess.pgn.skip_game finds them
+        self.size = 0
+        self.rest = b""  # the incomplete last line
+        self.line_number = 0
+        self.comment = False  # inside a {} comment over several lines
+        self.movetext = False  # the current game has moves, a tag line starts the next game
+
+    def feed(self, data: bytes):
+        offset = self.size - len(self.rest)
+        lines = (self.rest + data).split(b"\n")
+        self.rest = lines.pop()
+        for line in lines:
+            self.line(line, offset)
+            offset += len(line) + 1
+        if len(self.rest) > MAX_LINE:
+            raise ValueError(f"Line {self.line_number + 1} is too long for a pgn file")
+        self.size += len(data)
+
+    def close(self) -> List[int]:
+        """Return the game offsets, all of the text is fed."""
+        if self.rest:
+            self.line(self.rest, self.size - len(self.rest))
+            self.rest = b""
+        if not self.offsets:
+            raise ValueError("No games found in the pgn file")
+        return self.offsets
+
+    def start(self, offset: int):
+        self.offsets.append(offset)
+        self.movetext = False
+
+    def line(self, line: bytes, offset: int):
+        self.line_number += 1
+        if b"\0" in line:
+            raise ValueError("This is no pgn text file")
+        try:
+            text = line.decode("utf-8")
+        except UnicodeDecodeError:
+            text = line.decode("latin-1")  # the encoding of the pgn standard
+        text = text.strip().lstrip("\ufeff")
+        if self.comment:
+            end = text.find("}")
+            if end < 0:
+                return
+            self.comment = False
+            text = text[end + 1 :].strip()
+        if not text or text.startswith("%"):
+            return
+        if text.startswith("["):
+            match = chess.pgn.TAG_REGEX.match(text)
+            if not match:
+                raise ValueError(f"Line {self.line_number}: broken tag {text[:40]!r}")
+            if self.movetext or not self.offsets:
+                self.start(offset)
+            return
+        if not self.offsets:
+            self.start(offset)  # a game without tags
+        self.movetext = True
+        text = COMMENT.sub(" ", text)
+        if "{" in text:
+            text = text[: text.index("{")]
+            self.comment = True
+        rest = MOVETEXT.sub("", text)
+        if rest:
+            raise ValueError(f"Line {self.line_number}: unexpected {rest[:20]!r} in the moves")
+
+
+@tornado.web.stream_request_body
 class UploadHandler(tornado.web.RequestHandler):
+    """Save an uploaded pgn file in games/uploads and load its first game.
+
+    The file is written to disk and checked while it arrives, a broken file is
+    refused without reading or writing the rest of it.
+    """
+
+    def initialize(self):
+        self.multipart: Optional[MultipartStream] = None
+        self.scanner = PgnScanner()
+        self.file_name = ""
+        self.upload = None  # the open .part file
+        self.writing = False
+        self.error: Optional[str] = None
+        self.pending: Optional[asyncio.Future] = None
+
     def prepare(self):
         auth_header = self.request.headers.get("Authorization")
         if not auth_header or not auth_header.startswith("Basic "):
@@ -30,54 +188,125 @@ class UploadHandler(tornado.web.RequestHandler):
             self.request_auth()
             return
 
-        if not pam.pam().authenticate(username, password):
+        if not self.authenticate(username, password):
             self.request_auth()
             return
 
         self.current_user = username
 
+        content_type = self.request.headers.get("Content-Type", "")
+        boundary = httputil._parse_header(content_type)[1].get("boundary")
+        if not content_type.startswith("multipart/form-data") or not boundary:
+            self.set_status(400)
+            self.finish("No file uploaded")
+            return
+        self.multipart = MultipartStream(boundary.encode("latin-1"))
+        self.request.connection.set_max_body_size(MAX_UPLOAD_SIZE)
+
+    def authenticate(self, username: str, password: str) -> bool:
+        return pam.pam().authenticate(username, password)
+
     def request_auth(self):
         self.set_status(401)
         self.set_header("WWW-Authenticate", 'Basic realm="Upload Area"')
         self.finish("Authentication required")
 
-    async def post(self):
-        if not hasattr(self, "current_user"):
-            return  # Auth failed
+    async def data_received(self, chunk: bytes):
+        if self.error is None:
+            self.pending = asyncio.get_running_loop().run_in_executor(None, self.receive, chunk)
+            await self.pending
 
-        if "file" not in self.request.files:
-            self.set_status(400)
-            self.finish("No file uploaded")
-            return
-
-        fileinfo = self.request.files["file"][0]
-        original_name = fileinfo["filename"]
+    def receive(self, chunk: bytes):
+        """Write the file part of the chunk to disk and scan it, runs in a worker thread."""
+        try:
+            if self.multipart is None:
+                raise ValueError("No file uploaded")
+            for part, data in self.multipart.feed(chunk):
+                if part is not None:
+                    self.writing = part.get("name") == "file"
+                    if self.writing:
+                        self.open_upload(part.get("filename", ""))
+                elif self.writing:
+                    self.scanner.feed(data)
+                    self.upload.write(data)
+        except (ValueError, OSError) as e:
+            self.error = str(e)
+            self.discard()
 
+    def open_upload(self, original_name: str):
+        if self.upload is not None:
+            raise ValueError("Only one file can be uploaded at a time.")
         # Check if uploaded file is a PGN file (by name)
-        if not original_name.lower().endswith(".pgn"):
+        self.file_name = os.path.basename(original_name.replace("\\", "/"))
+        if not self.file_name.lower().endswith(".pgn"):
+            raise ValueError("Only .pgn files are allowed.")
+        self.upload = open(self.upload_file() + ".part", "wb")
+
+    def upload_file(self) -> str:
+        return os.path.join(UPLOAD_BASE_DIR, UPLOAD_DIR, self.file_name)
+
+    def complete(self) -> int:
+        """Move the complete upload in place and write its game offset index, return the number of games."""
+        if self.multipart is None or not self.multipart.done:
+            raise ValueError("The upload is incomplete")
+        offsets = self.scanner.close()
+        self.upload.close()
+        self.upload = None
+        os.replace(self.upload_file() + ".part", self.upload_file())
+        write_offset_index(self.upload_file(), offsets)  # pgn_engine selects games without a pass over the file
+        return len(offsets)
+
+    def discard(self):
+        """Remove the .part file of an upload that is not completed."""
+        if self.upload is not None:
+            self.upload.close()
+            self.upload = None
+            try:
+                os.remove(self.upload_file() + ".part")
+            except OSError:
+                pass
+
+    def on_connection_close(self):
+        if self.pending is not None and not self.pending.done():
+            self.pending.add_done_callback(lambda _: self.discard())
+        else:
+            self.discard()
+
+    def on_finish(self):
+        self.discard()
+
+    async def post(self):
+        if self.error is None and self.upload is None:
+            self.error = "No file uploaded"
+        games = 0
+        if self.error is None:
+            try:
+                games = await asyncio.to_thread(self.complete)
+            except ValueError as e:
+                self.error = str(e)
+            except Exception as e:
+                self.set_status(500)
+                self.finish(f"Failed to save file: {str(e)}")
+                return
+        if self.error is not None:
             self.set_status(400)
-            self.finish("Only .pgn files are allowed.")
+            self.finish(self.error)
             return
 
-        upload_file = os.path.join(UPLOAD_BASE_DIR, UPLOAD_DIR, original_name)
-        file_rel_path = os.path.join(UPLOAD_DIR, original_name)
-
         try:
-            with open(upload_file, "wb") as f:
-                f.write(fileinfo["body"])
-                event = Event.READ_GAME(pgn_filename=file_rel_path)
-                await Observable.fire(event)
+            event = Event.READ_GAME(pgn_filename=os.path.join(UPLOAD_DIR, self.file_name))
+            await Observable.fire(event)
         except Exception as e:
             self.set_status(500)
             self.finish(f"Failed to save file: {str(e)}")
             return
 
         user = escape.xhtml_escape(self.current_user)
-        name = escape.xhtml_escape(original_name)
+        name = escape.xhtml_escape(self.file_name)
 
         self.write(
             f"<div style='font-family:sans-serif; padding:2em; font-size:1.2em;'>"
-            f"<h2>User '{user}' uploaded '{name}' to games/uploads/.</h2>"
+            f"<h2>User '{user}' uploaded '{name}' ({games} games) to games/uploads/.</h2>"
             "<br><br>"
             "<form action='/' method='get'>"
             "<button type='submit' style='"
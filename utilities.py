@@ -24,18 +24,22 @@ import json
 import copy
 import configparser
 import subprocess
+import sys
 import asyncio
 import time
+from collections import deque
 from ctypes import cdll, c_int
 
 from subprocess import Popen, PIPE
 
+import chess  # type: ignore
+
 from dgt.translate import DgtTranslate
-from dgt.api import Dgt
+from dgt.api import Dgt, Message
 
 from configobj import ConfigObj, ConfigObjError, DuplicateError  # type: ignore
 
-from typing import Optional
+from typing import List, Optional
 
 from pathlib import Path
 
@@ -44,11 +48,224 @@ version = "4.1.7"
 
 logger = logging.getLogger(__name__)
 
-evt_queue: asyncio.Queue = asyncio.Queue()
-dispatch_queue: asyncio.Queue = asyncio.Queue()
-
 msgdisplay_devices = []
 dgtdisplay_devices = []
+message_queues: List["MessageQueue"] = []
+
+QUEUE_SIZE = 200  # messages waiting for one consumer
+LOW_PRIORITY_WAIT = 0.1  # longest time a low priority consumer waits for the others
+STATS_INTERVAL = 500  # log the queue stats after this many messages
+LOCATION_TIMEOUT = 5  # seconds for the geo ip lookup
+EVENT_SAMPLES = 1000  # latest events per type used for the percentiles
+SLOW_EVENT_TIME = 1.0  # seconds, slower event handlers are logged as warning
+OFFSET_INDEX_SUFFIX = ".idx"  # game offsets next to a pgn file, read by pgn_engine
+# analysis and clock messages only count with their latest value
+# (not DGT_CLOCK_TIME: it comes from several clocks and can register one with connect=True)
+COALESCED_MESSAGES = (
+    Message.NEW_DEPTH,
+    Message.NEW_SCORE,
+    Message.NEW_PV,
+    Message.CLOCK_TIME,
+)
+
+
+class MessageQueue(object):
+    """Bounded message queue of one consumer, used like an asyncio.Queue.
+
+    A message of a coalesced type replaces the same type message still waiting in the queue.
+    If the queue is full the oldest coalesced message is dropped, else the oldest message.
+    put() never waits for room: a consumer puts onto its own queue (DgtDisplay shows WRONG_FEN).
+    get() lets the other tasks run before each message, a low priority queue also
+    waits (at most LOW_PRIORITY_WAIT) until the normal queues are empty."""
+
+    def __init__(self, name: str, maxsize=QUEUE_SIZE, coalesce=(), low_priority=False):
+        self.name = name  # maxsize 0 is an unbounded queue
+        self.maxsize = maxsize
+        self.coalesce = tuple(coalesce)
+        self.low_priority = low_priority
+        self.queue: deque = deque()  # (message, put time)
+        self.not_empty = asyncio.Event()
+        self.got_at = 0.0
+        self.latency = 0.0  # queue time of the last message
+        self.messages = self.coalesced = self.dropped = self.max_depth = 0
+        self.latency_sum = self.latency_max = self.busy_sum = 0.0
+        message_queues.append(self)
+
+    def qsize(self) -> int:
+        return len(self.queue)
+
+    def empty(self) -> bool:
+        return not self.queue
+
+    def _remove_first(self, message_types) -> bool:
+        for index, (queued, _) in enumerate(self.queue):
+            if isinstance(queued, message_types):
+                del self.queue[index]
+                return True
+        return False
+
+    async def put(self, message):
+        """Put a message on the queue, drops the oldest message if the queue is full."""
+        if isinstance(message, self.coalesce) and self._remove_first(type(message)):
+            self.coalesced += 1
+        if self.maxsize and len(self.queue) >= self.maxsize:
+            if isinstance(message, self.coalesce) and not self._remove_first(self.coalesce):
+                self.dropped += 1
+                return
+            if not self._remove_first(self.coalesce):
+                dropped, _ = self.queue.popleft()
+                logger.warning("queue %s full => dropping %s", self.name, type(dropped).__name__)
+            self.dropped += 1
+        self.queue.append((message, time.monotonic()))
+        self.max_depth = max(self.max_depth, len(self.queue))
+        self.not_empty.set()
+
+    async def get(self):
+        """Remove and return the oldest message."""
+        await asyncio.sleep(0)  # let the other consumers run between two messages
+        while not self.queue:
+            self.not_empty.clear()
+            await self.not_empty.wait()
+        if self.low_priority:
+            waited = 0.0
+            while waited < LOW_PRIORITY_WAIT and any(q.queue for q in message_queues if not q.low_priority):
+                await asyncio.sleep(0.01)
+                waited += 0.01
+        message, put_at = self.queue.popleft()
+        self.got_at = time.monotonic()
+        self.latency = self.got_at - put_at
+        self.messages += 1
+        self.latency_sum += self.latency
+        self.latency_max = max(self.latency_max, self.latency)
+        if self.messages % STATS_INTERVAL == 0:
+            logger.debug("queue stats %s", self.stats())
+        return message
+
+    def task_done(self):
+        """Mark the last message as processed."""
+        self.busy_sum += time.monotonic() - self.got_at
+
+    def stats(self) -> dict:
+        """Return the queue depth, counters and latencies (ms) of the queue."""
+        messages = max(self.messages, 1)
+        return {
+            "name": self.name,
+            "depth": len(self.queue),
+            "max_depth": self.max_depth,
+            "messages": self.messages,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "latency_avg_ms": round(self.latency_sum * 1000 / messages, 2),
+            "latency_max_ms": round(self.latency_max * 1000, 2),
+            "busy_avg_ms": round(self.busy_sum * 1000 / messages, 2),
+        }
+
+
+def queue_stats() -> list:
+    """Return the stats of all message queues."""
+    return [queue.stats() for queue in message_queues]
+
+
+class EventStats(object):
+    """Rolling queue wait and handler times of the main loop events per event type."""
+
+    def __init__(self, samples=EVENT_SAMPLES):
+        self.samples = samples
+        self.waits: dict = {}  # event type: deque of seconds
+        self.durations: dict = {}
+        self.counts: dict = {}
+
+    def add(self, name: str, wait: float, duration: float):
+        """Record one handled event."""
+        if name not in self.counts:
+            self.waits[name] = deque(maxlen=self.samples)
+            self.durations[name] = deque(maxlen=self.samples)
+            self.counts[name] = 0
+        self.waits[name].append(wait)
+        self.durations[name].append(duration)
+        self.counts[name] += 1
+        if duration > SLOW_EVENT_TIME:
+            logger.warning("slow event handler %s took %.2fs (queued %.3fs)", name, duration, wait)
+
+    @staticmethod
+    def percentile(values, fraction: float) -> float:
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+    def report(self) -> dict:
+        """Return count and p50/p99 (ms) of the queue wait and handler time per event type."""
+        report = {}
+        for name in sorted(self.counts):
+            waits, durations = self.waits[name], self.durations[name]
+            report[name] = {
+                "count": self.counts[name],
+                "wait_p50_ms": round(self.percentile(waits, 0.5) * 1000, 2),
+                "wait_p99_ms": round(self.percentile(waits, 0.99) * 1000, 2),
+                "handler_p50_ms": round(self.percentile(durations, 0.5) * 1000, 2),
+                "handler_p99_ms": round(self.percentile(durations, 0.99) * 1000, 2),
+                "handler_max_ms": round(max(durations) * 1000, 2),
+            }
+        return report
+
+
+evt_queue = MessageQueue("events", maxsize=0)
+dispatch_queue = MessageQueue("dispatch")
+event_stats = EventStats()
+
+
+class GameSnapshot(chess.Board):
+    """A read only chess.Board for messages - one snapshot is shared by all displays.
+
+    Deep copies return the snapshot itself. Use copy() to get a normal chess.Board
+    you can push moves on. push() and pop() raise ValueError, only the look-ahead of
+    python-chess itself (san, is_repetition) may use them: it restores the board."""
+
+    @classmethod
+    def of(cls, board: chess.Board) -> "GameSnapshot":
+        """Take a snapshot of the board (a snapshot is returned unchanged)."""
+        if isinstance(board, GameSnapshot):
+            return board
+        snapshot = cls.__new__(cls)
+        snapshot.__dict__.update(board.copy(stack=False).__dict__)
+        # moves and board states are never changed once pushed, the lists can share them
+        snapshot.move_stack = board.move_stack[:]
+        snapshot._stack = board._stack[:]
+        return snapshot
+
+    # a normal board, not Board.copy's type(self): whoever copies a snapshot wants to push moves
+    def copy(self, *, stack: bool | int = True) -> chess.Board:  # type: ignore[override]
+        """Return a normal (changeable) chess.Board of the snapshot."""
+        board = chess.Board.__new__(chess.Board)
+        board.__dict__.update(super().copy(stack=stack).__dict__)
+        return board
+
+    @staticmethod
+    def _check_caller():
+        caller = sys._getframe(2).f_globals.get("__name__", "")
+        if caller != "chess" and not caller.startswith("chess."):
+            raise ValueError("a GameSnapshot is shared by all displays, copy() it to change it")
+
+    def push(self, move: chess.Move) -> None:
+        self._check_caller()
+        super().push(move)
+
+    def pop(self) -> chess.Move:
+        self._check_caller()
+        return super().pop()
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+def share_games(message):
+    """Replace the chess boards of a message by snapshots which all displays can share."""
+    for key, value in list(getattr(message, "__dict__", {}).items()):
+        if isinstance(value, chess.Board) and not isinstance(value, GameSnapshot):
+            setattr(message, key, GameSnapshot.of(value))
+    return message
 
 
 class Observable(object):
@@ -91,9 +308,9 @@ class DispatchDgt(object):
 class DisplayMsg(object):
     """Display devices (DGT XL clock, Piface LCD, pgn file...)."""
 
-    def __init__(self, loop: asyncio.AbstractEventLoop):
+    def __init__(self, loop: asyncio.AbstractEventLoop, low_priority=False):
         super(DisplayMsg, self).__init__()
-        self.msg_queue = asyncio.Queue()
+        self.msg_queue = MessageQueue(type(self).__name__, coalesce=COALESCED_MESSAGES, low_priority=low_priority)
         self.loop = loop  # everyone to use main loop
         msgdisplay_devices.append(self)
 
@@ -108,6 +325,7 @@ class DisplayMsg(object):
     @staticmethod
     async def show(message):
         """Send a message on each display device."""
+        share_games(message)  # boards are shared, only the small message itself is copied
         for display in msgdisplay_devices:
             await display.add_to_queue(copy.deepcopy(message))
         # logger.debug("added message to %d queues %s", len(msgdisplay_devices), message)
@@ -115,6 +333,7 @@ class DisplayMsg(object):
     @staticmethod
     def show_sync(message):
         """Send a message on each display device."""
+        share_games(message)
         for display in msgdisplay_devices:
             display.add_to_queue_sync(copy.deepcopy(message))
 
@@ -124,7 +343,7 @@ class DisplayDgt(object):
 
     def __init__(self, loop: asyncio.AbstractEventLoop):
         super(DisplayDgt, self).__init__()
-        self.dgt_queue = asyncio.Queue()
+        self.dgt_queue = MessageQueue(type(self).__name__)
         self.loop = loop  # everyone to use main loop
         dgtdisplay_devices.append(self)
 
@@ -140,6 +359,53 @@ class DisplayDgt(object):
             await display.add_to_queue(copy.deepcopy(message))
 
 
+class StartupProfile(object):
+    """Time the startup phases, phases not waiting for each other can run at the same time."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.phases = {}  # name: (start, end, names of the phases it waited for)
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def add(self, name: str, start: float, after=()):
+        """Add a phase which started at start (seconds since the startup) and ends now."""
+        self.phases[name] = (start, self.elapsed(), tuple(after))
+
+    async def run(self, name: str, coro, after=()):
+        """Await coro as the phase name."""
+        start = self.elapsed()
+        try:
+            return await coro
+        finally:
+            self.add(name, start, after)
+
+    def task(self, name: str, coro, after=()) -> asyncio.Task:
+        """Run coro as the phase name in its own task."""
+        return asyncio.create_task(self.run(name, coro, after))
+
+    def critical_path(self) -> list:
+        """Return the phases the last phase waited for, each time following the latest one."""
+        if not self.phases:
+            return []
+        name = max(self.phases, key=lambda phase: self.phases[phase][1])
+        path = [name]
+        while after := [phase for phase in self.phases[name][2] if phase in self.phases]:
+            name = max(after, key=lambda phase: self.phases[phase][1])
+            path.append(name)
+        return path[::-1]
+
+    def report(self) -> str:
+        """Return a table of the phases in start order and the critical path."""
+        lines = [f"{'phase':<16} {'start':>7} {'end':>7} {'time':>7}"]
+        for name, (start, end, _) in sorted(self.phases.items(), key=lambda item: item[1][0]):
+            lines.append(f"{name:<16} {start:7.2f} {end:7.2f} {end - start:7.2f}")
+        path = self.critical_path()
+        lines.append(f"critical path {self.phases[path[-1]][1]:.2f}s: " + " -> ".join(path) if path else "no phases")
+        return "\n".join(lines)
+
+
 class AsyncRepeatingTimer:
     """Call function on a given interval - Async version to replace RepeatedTimer"""
 
@@ -387,7 +653,7 @@ def reboot(dgtpi: bool, dev: str):
 
 def _get_internal_ip() -> Optional[str]:
     try:
-        iproute = subprocess.run(["ip", "-j", "route", "get", "8.8.8.8"], capture_output=True)
+        iproute = subprocess.run(["ip", "-j", "route", "get", "8.8.8.8"], capture_output=True, timeout=LOCATION_TIMEOUT)
         routes = json.loads(iproute.stdout)
         if routes:
             gateway = routes[0]["gateway"]
@@ -401,11 +667,11 @@ def _get_internal_ip() -> Optional[str]:
     return None
 
 
-def get_location():
+def get_location(timeout=LOCATION_TIMEOUT):
     """Return the location of the user and the external and internal ip adr."""
     if int_ip := _get_internal_ip():
         try:
-            response = urllib.request.urlopen("https://get.geojs.io/v1/ip/geo.json")
+            response = urllib.request.urlopen("https://get.geojs.io/v1/ip/geo.json", timeout=timeout)
             j = json.loads(response.read().decode())
 
             country_name = j.get("country", "")
@@ -453,3 +719,15 @@ def ensure_important_headers(headers: dict) -> None:
     for key in important_header_keys:
         if key not in headers:
             headers[key] = "?"
+
+
+def write_offset_index(pgn_path: str, offsets: List[int]):
+    """Write the game offsets of a pgn file to <pgn>.idx, in the format pgn_engine's load_offset_index reads.
+
+    The stamp (mtime_ns and size of the pgn file) tells the reader if the file changed since.
+    """
+    stat = os.stat(pgn_path)
+    index_path = pgn_path + OFFSET_INDEX_SUFFIX
+    with open(index_path + ".part", "w") as index_file:
+        json.dump({"stamp": [stat.st_mtime_ns, stat.st_size], "offsets": offsets}, index_file)
+    os.replace(index_path + ".part", index_path)
@@ -138,9 +138,8 @@ var boardStatusEl = $('#BoardStatus'),
 moveListEl = $('#moveList')
 
 var gameHistory, fenHash, currentPosition;
-const SERVER_NAME = location.hostname
-const OBOCK_SERVER_PREFIX = 'http://' + SERVER_NAME + ':7777';
-const GAMES_SERVER_PREFIX = 'http://' + SERVER_NAME + ':7778';
+const OBOCK_SERVER_PREFIX = '';  // the opening explorer of the picochess web server
+const GAMES_SERVER_PREFIX = '';  // the games index of the picochess web server
 
 fenHash = {};
 
@@ -156,6 +155,9 @@ var setupBoardFen = START_FEN;
 var dataTableFen = START_FEN;
 var chessGameType = 0; // 0=Standard ; 1=Chess960
 var computerside = ""; // color played by the computer
+var gameSeq = 0; // sequence number of the last game delta received from picochess
+var stateVersion = -1; // version of the web state (headers, clock, system and ip info) we have
+var stateSocket = null; // the /event websocket, the state is long-polled from /state without it
 
 function removeHighlights() {
     if (highlight_move == HIGHLIGHT_ON) {
@@ -1087,15 +1089,56 @@ function getWebGameHeader(h) {
     return gameHeaderText;
 }
 
-function download() {
-    var content = getFullGame();
+function downloadPgn(content, fileName) {
     var dl = document.createElement('a');
     dl.setAttribute('href', 'data:text/plain;charset=utf-8,' + encodeURIComponent(content));
-    dl.setAttribute('download', 'game.pgn');
+    dl.setAttribute('download', fileName);
     document.body.appendChild(dl);
     dl.click();
 }
 
+function download() {
+    downloadPgn(getFullGame(), 'game.pgn');
+}
+
+var batchPlies = 0; // plies of the batch analysis this page started, 0 if there is none
+
+function analyseGame() {
+    $.post('/channel', { action: 'analyse_game', pgn: getFullGame() }, function (data) {
+        if (data.success) {
+            batchPlies = data.plies;
+            showBatchProgress({ ply: 0 });
+        } else {
+            boardStatusEl.html(data.error);
+        }
+    }, 'json');
+}
+
+function showBatchProgress(data) {
+    if (!batchPlies) {
+        return;
+    }
+    $('#batchAnalysisBtn').prop('disabled', true);
+    $('#batchAnalysisBtn .btn-text').text(' ' + data.ply + '/' + batchPlies);
+    if (data.symbol) {
+        boardStatusEl.html(data.user_move + data.symbol + (data.best_move ? ' (' + data.best_move + ')' : ''));
+    }
+}
+
+function batchAnalysisDone(data) {
+    if (!batchPlies) {
+        return;
+    }
+    batchPlies = 0;
+    $('#batchAnalysisBtn').prop('disabled', false);
+    $('#batchAnalysisBtn .btn-text').text(' Analyse game');
+    if (data.error) {
+        boardStatusEl.html(data.error);
+    } else {
+        downloadPgn(data.pgn, 'analysis.pgn');
+    }
+}
+
 function newBoard(fen) {
     stopAnalysis();
 
@@ -1654,24 +1697,135 @@ function updateDGTPosition(data) {
     }
 }
 
+// add a move (in san) to the end of the game - if we dont have it already
+function appendGameMove(san) {
+    var last = fenHash['last'] || gameHistory;
+    var tmpGame = new Chess(last.fen, chessGameType);
+    var move = tmpGame.move(san, { sloppy: true });
+    if (move === null) {
+        return false;
+    }
+    var node = fenHash[tmpGame.fen()];
+    if (!node) {
+        node = addNewMove({ 'move': move }, last, tmpGame.fen()).node;
+        if (computerside == "" || move.color != computerside) {
+            saymove(move, new Chess(last.fen, chessGameType)); // announce user move
+        }
+    }
+    fenHash['last'] = node;
+    return true;
+}
+
+// remove the last count moves from the end of the game
+function popGameMoves(count) {
+    var last = fenHash['last'];
+    for (var i = 0; i < count && last && last.previous; i++) {
+        var previous = last.previous;
+        previous.variations = previous.variations.filter(function (node) { return node !== last; });
+        delete fenHash[last.fen];
+        last = previous;
+    }
+    fenHash['last'] = last;
+}
+
+// apply a game delta from picochess, returns false if we need a resync
+function applyGameDelta(data) {
+    if (data.op === undefined || data.op === 'reset') {
+        gameSeq = data.seq || 0;
+        loadGame(data['pgn'].split("\n"));
+        return goToPosition(data.fen);
+    }
+    if (data.seq <= gameSeq) {
+        return true; // already in the pgn we got
+    }
+    if (data.seq !== gameSeq + 1) {
+        return false; // we missed a delta
+    }
+    gameSeq = data.seq;
+    if (data.op === 'append' && !appendGameMove(data.san)) {
+        return false;
+    }
+    if (data.op === 'pop') {
+        popGameMoves(data.count);
+    }
+    return goToPosition(data.fen);
+}
+
 function goToDGTFen() {
-    $.get('/dgt', { action: 'get_last_move' }, function (data) {
-        if (data) {
-            updateDGTPosition(data);
-            highlightBoard(data.move, data.play);
-            addArrow(data.move, data.play);
+    // resync the full game
+    if (stateSocket && stateSocket.readyState === WebSocket.OPEN) {
+        stateSocket.send(JSON.stringify({ action: 'resync' }));
+        return;
+    }
+    $.get('/state', { pgn: 1 }, function (data) {
+        applyState(data);
+        if (data.game) {
+            applyGameDelta(data.game);
+            highlightBoard(data.game.move, data.game.play);
+            addArrow(data.game.move, data.game.play);
         }
         else {
-            data.fen = START_FEN
-            updateDGTPosition(data);
-            highlightBoard(data.move, data.play);
-            addArrow(data.move, data.play);
+            updateDGTPosition({ fen: START_FEN });
         }
     }).fail(function (jqXHR, textStatus) {
         dgtClockStatusEl.html(textStatus);
     });
 }
 
+function showState(parts) {
+    if (parts.system) {
+        window.system_info = parts.system;
+    }
+    if (parts.ip) {
+        setTitle(parts.ip);
+    }
+    if (parts.headers) {
+        setHeaders(parts.headers);
+    }
+    if (typeof parts.clock === 'string') {
+        dgtClockTextEl.html(parts.clock);
+    }
+}
+
+function applyState(data) {
+    // returns false if a version was missed and the whole state is needed
+    if (data.state !== undefined) {
+        stateVersion = data.version;
+        showState(data.state);
+        return true;
+    }
+    if (data.version <= stateVersion) {
+        return true;
+    }
+    if (data.version !== stateVersion + 1) {
+        return false;
+    }
+    stateVersion = data.version;
+    showState(data.diff);
+    return true;
+}
+
+function pollState() {
+    // long-poll: /state answers when there is a newer version than ours (or 304 after a while)
+    $.ajax({
+        url: '/state',
+        headers: stateVersion < 0 ? {} : { 'If-None-Match': '"' + stateVersion + '"' },
+        success: function (data, textStatus, jqXHR) {
+            if (jqXHR.status === 200 && data) {
+                applyState(data);
+                if (data.state.game && data.state.game.seq !== gameSeq) {
+                    goToDGTFen();
+                }
+            }
+            pollState();
+        },
+        error: function (jqXHR, textStatus) {
+            dgtClockStatusEl.html(textStatus);
+            setTimeout(pollState, 5000);
+        }
+    });
+}
+
 function setTitle(data) {
     window.ip_info = data;
     var ip = '';
@@ -1681,7 +1835,7 @@ function setTitle(data) {
     var version = '';
     if (window.ip_info.version) {
         version = window.ip_info.version;
-    } else if (window.system_info.version) {
+    } else if (window.system_info && window.system_info.version) {
         version = window.system_info.version;
     }
     document.title = 'Webserver Picochess ' + version + ip;
@@ -1710,30 +1864,6 @@ function setHeaders(data) {
     writeVariationTree(pgnEl, exporter.toString(), gameHistory);
 }
 
-function getAllInfo() {
-    $.get('/info', { action: 'get_system_info' }, function (data) {
-        window.system_info = data;
-    }).fail(function (jqXHR, textStatus) {
-        dgtClockStatusEl.html(textStatus);
-    });
-    $.get('/info', { action: 'get_ip_info' }, function (data) {
-        setTitle(data);
-    }).fail(function (jqXHR, textStatus) {
-        dgtClockStatusEl.html(textStatus);
-    });
-    $.get('/info', { action: 'get_headers' }, function (data) {
-        setHeaders(data);
-    }).fail(function (jqXHR, textStatus) {
-        dgtClockStatusEl.html(textStatus);
-    });
-    $.get('/info', { action: 'get_clock_text' }, function (data) {
-        dgtClockTextEl.html(data);
-    }).fail(function (jqXHR, textStatus) {
-        console.warn(textStatus);
-        dgtClockStatusEl.html(textStatus);
-    });
-}
-
 var boardThemes = ['blue', 'green', 'metal', 'newspaper', 'soft', 'wood', 'natural-wood'];
 var currentThemeIndex = parseInt(localStorage.getItem('boardThemeIndex')) || 6;
 
@@ -1775,10 +1905,12 @@ $(window).on('load', function () {
     const hostname = location.hostname;
     if (hostname === '127.0.0.1' || hostname === 'localhost') {
         $('#downloadBtn').hide();
+        $('#batchAnalysisBtn').hide();
         $('#uploadBtn').hide();
         $('#btn-mute').hide();
     } else {
         $('#downloadBtn').on('click', download);
+        $('#batchAnalysisBtn').on('click', analyseGame);
         $('#uploadBtn').on('click', function () {
             window.location.href = 'upload';
         });
@@ -1830,7 +1962,6 @@ $("#ClockLeverBtn").mouseup(function () {
 
 $(function () {
     loadSavedTheme();
-    getAllInfo();
 
     $('a[data-toggle="tab"]').on('shown.bs.tab', function (e) {
         updateStatus();
@@ -1863,17 +1994,21 @@ $(function () {
 
     window.WebSocket = window.WebSocket || window.MozWebSocket || false;
     if (!window.WebSocket) {
-        alert('No WebSocket Support');
+        pollState();
     }
     else {
         var ws = new WebSocket('ws://' + location.host + '/event');
+        stateSocket = ws;
         // Process messages from picochess
         ws.onmessage = function (e) {
             var data = JSON.parse(e.data);
             switch (data.event) {
                 case 'Fen':
                     pickPromotion(null) // reset promotion dialog if still showing
-                    updateDGTPosition(data);
+                    if (!applyGameDelta(data)) {
+                        goToDGTFen(); // resync with the full game
+                        break;
+                    }
                     if (data.play === 'reload') {
                         removeHighlights();
                     }
@@ -1886,12 +2021,16 @@ $(function () {
                     break;
                 case 'Game':
                     newBoard(data.fen);
+                    fenHash = {};
+                    gameSeq = data.seq;
                     break;
                 case 'Message':
                     boardStatusEl.html(data.msg);
                     break;
-                case 'Clock':
-                    dgtClockTextEl.html(data.msg);
+                case 'State':
+                    if (!applyState(data)) {
+                        ws.send(JSON.stringify({ action: 'state' })); // missed a version
+                    }
                     break;
                 case 'Status':
                     // dgtClockStatusEl.html(data.msg);
@@ -1908,15 +2047,15 @@ $(function () {
                     break;
                 case 'Clear':
                     break;
-                case 'Header':
-                    setHeaders(data['headers']);
-                    break;
-                case 'Title':
-                    setTitle(data['ip_info']);
-                    break;
                 case 'Broadcast':
                     boardStatusEl.html(data.msg);
                     break;
+                case 'BatchAnalysis':
+                    showBatchProgress(data);
+                    break;
+                case 'BatchAnalysisDone':
+                    batchAnalysisDone(data);
+                    break;
                 case 'PromotionDlg':
                     // for e-boards that do not feature piece recognition
                     promotionDialog(data.move);
@@ -1926,6 +2065,7 @@ $(function () {
         };
         ws.onclose = function () {
             dgtClockStatusEl.html('closed');
+            pollState();
         };
     }
 